@@ -10,7 +10,7 @@ import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
 from app.core.database import Base
-from app.core.config import settings
+from app.core.config import get_settings
 from app.models import *  # Import all models
 
 # this is the Alembic Config object
@@ -21,11 +21,30 @@ if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
 # Set the sqlalchemy.url from settings
+settings = get_settings()
+if not settings.DATABASE_URL:
+    raise RuntimeError("DATABASE_URL must be set to run migrations")
 config.set_main_option("sqlalchemy.url", settings.DATABASE_URL.replace("+asyncpg", ""))
 
 # add your model's MetaData object here
 target_metadata = Base.metadata
 
+# Expense search is created by DDL per dialect rather than mapped (see
+# app.models.expense.SEARCH_DDL); autogenerate must not drop it
+UNMAPPED_SEARCH_OBJECTS = {
+    "table": ("expenses_fts",),
+    "column": ("search_vector",),
+    "index": ("ix_expenses_search_vector",),
+}
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    """Leave the unmapped search objects out of autogenerate."""
+    if reflected and compare_to is None:
+        return not (name or "").startswith(UNMAPPED_SEARCH_OBJECTS.get(type_, ()))
+    return True
+
+
 # other values from the config, defined by the needs of env.py
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode."""
@@ -33,6 +52,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_object=include_object,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -42,7 +62,7 @@ def run_migrations_offline() -> None:
 
 
 def do_run_migrations(connection: Connection) -> None:
-    context.configure(connection=connection, target_metadata=target_metadata)
+    context.configure(connection=connection, target_metadata=target_metadata, include_object=include_object)
 
     with context.begin_transaction():
         context.run_migrations()
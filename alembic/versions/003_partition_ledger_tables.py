@@ -0,0 +1,197 @@
+"""Hash-partition ledger tables by group_id
+
+Denormalizes group_id onto expense_splits and, on PostgreSQL, rebuilds
+expenses, expense_splits and settlements as tables partitioned by
+HASH (group_id). Primary keys include group_id (required for partitioned
+tables) and splits reference expenses by (id, group_id), so a group's
+balance query touches a single partition of each table.
+
+Other dialects (SQLite in tests) keep plain tables, rebuilt with the same
+keys so the schema matches the models everywhere.
+
+Revision ID: 003_partition_ledger
+Revises: 002_idempotency_keys
+Create Date: 2024-03-01 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '003_partition_ledger'
+down_revision = '002_idempotency_keys'
+branch_labels = None
+depends_on = None
+
+# Fixed at creation; changing it later means another rebuild
+PARTITIONS = 16
+
+
+# Names for the constraints SQLite reflects without one
+SQLITE_NAMING = {"fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s"}
+
+
+def _is_postgres() -> bool:
+    return op.get_bind().dialect.name == "postgresql"
+
+
+def _create_partitions(table: str) -> None:
+    for remainder in range(PARTITIONS):
+        op.execute(
+            f"CREATE TABLE {table}_p{remainder} PARTITION OF {table} "
+            f"FOR VALUES WITH (MODULUS {PARTITIONS}, REMAINDER {remainder})"
+        )
+
+
+def upgrade() -> None:
+    # Denormalize group_id onto splits (plain tables first, all dialects)
+    op.add_column('expense_splits', sa.Column('group_id', postgresql.UUID(as_uuid=True), nullable=True))
+    op.execute(
+        "UPDATE expense_splits SET group_id = "
+        "(SELECT expenses.group_id FROM expenses WHERE expenses.id = expense_splits.expense_id)"
+    )
+
+    if not _is_postgres():
+        for table in ('expenses', 'settlements'):
+            with op.batch_alter_table(table, recreate='always') as batch:
+                batch.create_primary_key(f'{table}_pkey', ['id', 'group_id'])
+        with op.batch_alter_table('expense_splits', naming_convention=SQLITE_NAMING) as batch:
+            batch.alter_column('group_id', nullable=False)
+            batch.create_foreign_key(
+                'expense_splits_group_id_fkey', 'groups', ['group_id'], ['id'], ondelete='CASCADE'
+            )
+            batch.drop_constraint('fk_expense_splits_expense_id_expenses', type_='foreignkey')
+            batch.create_foreign_key(
+                'expense_splits_expense_id_group_id_fkey', 'expenses',
+                ['expense_id', 'group_id'], ['id', 'group_id'], ondelete='CASCADE'
+            )
+            batch.create_primary_key('expense_splits_pkey', ['group_id', 'expense_id', 'user_id'])
+        op.create_index('ix_expense_splits_group_id', 'expense_splits', ['group_id'])
+        return
+
+    # Move the old tables (and their indexes) out of the way
+    for table in ('expense_splits', 'settlements', 'expenses'):
+        op.execute(f"ALTER TABLE {table} RENAME TO {table}_unpartitioned")
+        op.execute(f"ALTER INDEX {table}_pkey RENAME TO {table}_unpartitioned_pkey")
+        op.execute(f"ALTER INDEX IF EXISTS ix_{table}_group_id RENAME TO ix_{table}_unpartitioned_group_id")
+
+    # expenses
+    op.execute("""
+        CREATE TABLE expenses (
+            id UUID NOT NULL,
+            group_id UUID NOT NULL REFERENCES groups(id) ON DELETE CASCADE,
+            paid_by_user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+            amount NUMERIC(12, 2) NOT NULL,
+            description VARCHAR(500) NOT NULL,
+            split_type splittype NOT NULL,
+            created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            PRIMARY KEY (id, group_id)
+        ) PARTITION BY HASH (group_id)
+    """)
+    _create_partitions('expenses')
+    op.execute("INSERT INTO expenses SELECT id, group_id, paid_by_user_id, amount, description, split_type, created_at FROM expenses_unpartitioned")
+
+    # expense_splits: group_id leads the key so a group's splits are one index range
+    op.execute("""
+        CREATE TABLE expense_splits (
+            group_id UUID NOT NULL REFERENCES groups(id) ON DELETE CASCADE,
+            expense_id UUID NOT NULL,
+            user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+            amount NUMERIC(12, 2) NOT NULL,
+            percent NUMERIC(5, 2),
+            PRIMARY KEY (group_id, expense_id, user_id),
+            FOREIGN KEY (expense_id, group_id) REFERENCES expenses (id, group_id) ON DELETE CASCADE
+        ) PARTITION BY HASH (group_id)
+    """)
+    _create_partitions('expense_splits')
+    op.execute("INSERT INTO expense_splits SELECT group_id, expense_id, user_id, amount, percent FROM expense_splits_unpartitioned")
+
+    # settlements
+    op.execute("""
+        CREATE TABLE settlements (
+            id UUID NOT NULL,
+            group_id UUID NOT NULL REFERENCES groups(id) ON DELETE CASCADE,
+            payer_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+            payee_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+            amount NUMERIC(12, 2) NOT NULL,
+            created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            PRIMARY KEY (id, group_id)
+        ) PARTITION BY HASH (group_id)
+    """)
+    _create_partitions('settlements')
+    op.execute("INSERT INTO settlements SELECT id, group_id, payer_id, payee_id, amount, created_at FROM settlements_unpartitioned")
+
+    for table in ('expense_splits', 'settlements', 'expenses'):
+        op.execute(f"DROP TABLE {table}_unpartitioned")
+
+    # Partitioned indexes (created on every partition). The splits' primary
+    # key already leads with group_id; the index matches the model's
+    # index=True, so autogenerate sees the same schema on every dialect.
+    op.create_index('ix_expenses_group_id', 'expenses', ['group_id'])
+    op.create_index('ix_expense_splits_group_id', 'expense_splits', ['group_id'])
+    op.create_index('ix_settlements_group_id', 'settlements', ['group_id'])
+
+
+def downgrade() -> None:
+    if not _is_postgres():
+        op.drop_index('ix_expense_splits_group_id', table_name='expense_splits')
+        with op.batch_alter_table('expense_splits') as batch:
+            batch.drop_constraint('expense_splits_expense_id_group_id_fkey', type_='foreignkey')
+            batch.drop_constraint('expense_splits_group_id_fkey', type_='foreignkey')
+            batch.drop_constraint('expense_splits_pkey', type_='primary')
+            batch.create_primary_key('expense_splits_pkey', ['expense_id', 'user_id'])
+            batch.create_foreign_key(
+                'fk_expense_splits_expense_id_expenses', 'expenses', ['expense_id'], ['id'], ondelete='CASCADE'
+            )
+            batch.drop_column('group_id')
+        for table in ('settlements', 'expenses'):
+            with op.batch_alter_table(table) as batch:
+                batch.drop_constraint(f'{table}_pkey', type_='primary')
+                batch.create_primary_key(f'{table}_pkey', ['id'])
+        return
+
+    for table in ('expense_splits', 'settlements', 'expenses'):
+        op.execute(f"ALTER TABLE {table} RENAME TO {table}_partitioned")
+        op.execute(f"ALTER INDEX {table}_pkey RENAME TO {table}_partitioned_pkey")
+        op.execute(f"ALTER INDEX IF EXISTS ix_{table}_group_id RENAME TO ix_{table}_partitioned_group_id")
+
+    op.execute("""
+        CREATE TABLE expenses (
+            id UUID PRIMARY KEY,
+            group_id UUID NOT NULL REFERENCES groups(id) ON DELETE CASCADE,
+            paid_by_user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+            amount NUMERIC(12, 2) NOT NULL,
+            description VARCHAR(500) NOT NULL,
+            split_type splittype NOT NULL,
+            created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL
+        )
+    """)
+    op.execute("INSERT INTO expenses SELECT id, group_id, paid_by_user_id, amount, description, split_type, created_at FROM expenses_partitioned")
+    op.execute("""
+        CREATE TABLE expense_splits (
+            expense_id UUID NOT NULL REFERENCES expenses(id) ON DELETE CASCADE,
+            user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+            amount NUMERIC(12, 2) NOT NULL,
+            percent NUMERIC(5, 2),
+            PRIMARY KEY (expense_id, user_id)
+        )
+    """)
+    op.execute("INSERT INTO expense_splits SELECT expense_id, user_id, amount, percent FROM expense_splits_partitioned")
+    op.execute("""
+        CREATE TABLE settlements (
+            id UUID PRIMARY KEY,
+            group_id UUID NOT NULL REFERENCES groups(id) ON DELETE CASCADE,
+            payer_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+            payee_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+            amount NUMERIC(12, 2) NOT NULL,
+            created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL
+        )
+    """)
+    op.execute("INSERT INTO settlements SELECT id, group_id, payer_id, payee_id, amount, created_at FROM settlements_partitioned")
+
+    for table in ('expense_splits', 'settlements', 'expenses'):
+        op.execute(f"DROP TABLE {table}_partitioned")
+
+    op.create_index('ix_expenses_group_id', 'expenses', ['group_id'])
+    op.create_index('ix_settlements_group_id', 'settlements', ['group_id'])
@@ -0,0 +1,88 @@
+"""Ledger compaction: carry-forward balances and archive tables
+
+Revision ID: 004_ledger_compaction
+Revises: 003_partition_ledger
+Create Date: 2024-03-15 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '004_ledger_compaction'
+down_revision = '003_partition_ledger'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('groups', sa.Column('compacted_before', sa.DateTime(), nullable=True))
+    
+    op.create_table(
+        'balance_carry_forwards',
+        sa.Column('group_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('debtor_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('creditor_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('debt_amount', sa.Numeric(14, 2), nullable=False),
+        sa.Column('settled_amount', sa.Numeric(14, 2), nullable=False),
+        sa.Column('cutoff_at', sa.DateTime(), nullable=False),
+        # Named so migration 010 can replace it on every dialect (SQLite leaves PKs unnamed)
+        sa.PrimaryKeyConstraint('group_id', 'debtor_id', 'creditor_id', name='balance_carry_forwards_pkey'),
+        sa.ForeignKeyConstraint(['group_id'], ['groups.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['debtor_id'], ['users.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['creditor_id'], ['users.id'], ondelete='CASCADE'),
+    )
+    
+    op.create_table(
+        'expenses_archive',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('group_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('paid_by_user_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('amount', sa.Numeric(12, 2), nullable=False),
+        sa.Column('description', sa.String(500), nullable=False),
+        sa.Column(
+            'split_type',
+            postgresql.ENUM('EQUAL', 'EXACT', 'PERCENT', name='splittype', create_type=False),
+            nullable=False
+        ),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('archived_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['group_id'], ['groups.id'], ondelete='CASCADE'),
+    )
+    op.create_index('ix_expenses_archive_group_id', 'expenses_archive', ['group_id'])
+    
+    op.create_table(
+        'expense_splits_archive',
+        sa.Column('expense_id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('group_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('amount', sa.Numeric(12, 2), nullable=False),
+        sa.Column('percent', sa.Numeric(5, 2), nullable=True),
+        sa.ForeignKeyConstraint(['expense_id'], ['expenses_archive.id'], ondelete='CASCADE'),
+    )
+    op.create_index('ix_expense_splits_archive_group_id', 'expense_splits_archive', ['group_id'])
+    
+    op.create_table(
+        'settlements_archive',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('group_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('payer_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('payee_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('amount', sa.Numeric(12, 2), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('archived_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['group_id'], ['groups.id'], ondelete='CASCADE'),
+    )
+    op.create_index('ix_settlements_archive_group_id', 'settlements_archive', ['group_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_settlements_archive_group_id', table_name='settlements_archive')
+    op.drop_table('settlements_archive')
+    op.drop_index('ix_expense_splits_archive_group_id', table_name='expense_splits_archive')
+    op.drop_table('expense_splits_archive')
+    op.drop_index('ix_expenses_archive_group_id', table_name='expenses_archive')
+    op.drop_table('expenses_archive')
+    op.drop_table('balance_carry_forwards')
+    op.drop_column('groups', 'compacted_before')
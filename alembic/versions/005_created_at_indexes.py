@@ -0,0 +1,31 @@
+"""Composite (group_id, created_at) indexes for as-of balance queries
+
+Replaces the single-column group_id indexes on the ledger and archive
+tables; the composite index still serves plain group lookups.
+
+Revision ID: 005_created_at_indexes
+Revises: 004_ledger_compaction
+Create Date: 2024-04-01 00:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '005_created_at_indexes'
+down_revision = '004_ledger_compaction'
+branch_labels = None
+depends_on = None
+
+TABLES = ('expenses', 'settlements', 'expenses_archive', 'settlements_archive')
+
+
+def upgrade() -> None:
+    for table in TABLES:
+        op.create_index(f'ix_{table}_group_id_created_at', table, ['group_id', 'created_at'])
+        op.drop_index(f'ix_{table}_group_id', table_name=table)
+
+
+def downgrade() -> None:
+    for table in TABLES:
+        op.create_index(f'ix_{table}_group_id', table, ['group_id'])
+        op.drop_index(f'ix_{table}_group_id_created_at', table_name=table)
@@ -0,0 +1,58 @@
+"""Full-text search over expense descriptions
+
+PostgreSQL: generated tsvector column with a (group_id, search_vector) GIN
+index (btree_gin), so a search is answered from one index within the
+group's partition. SQLite: external-content FTS5 table kept in sync by
+triggers.
+
+Revision ID: 006_expense_search
+Revises: 005_created_at_indexes
+Create Date: 2024-04-15 00:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '006_expense_search'
+down_revision = '005_created_at_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("CREATE EXTENSION IF NOT EXISTS btree_gin")
+        op.execute(
+            "ALTER TABLE expenses ADD COLUMN search_vector tsvector "
+            "GENERATED ALWAYS AS (to_tsvector('simple', description)) STORED"
+        )
+        op.execute("CREATE INDEX ix_expenses_search_vector ON expenses USING gin (group_id, search_vector)")
+        return
+    
+    op.execute("CREATE VIRTUAL TABLE expenses_fts USING fts5(description, content='expenses', content_rowid='rowid')")
+    op.execute(
+        "CREATE TRIGGER expenses_fts_ai AFTER INSERT ON expenses BEGIN "
+        "INSERT INTO expenses_fts(rowid, description) VALUES (new.rowid, new.description); END"
+    )
+    op.execute(
+        "CREATE TRIGGER expenses_fts_ad AFTER DELETE ON expenses BEGIN "
+        "INSERT INTO expenses_fts(expenses_fts, rowid, description) VALUES ('delete', old.rowid, old.description); END"
+    )
+    op.execute(
+        "CREATE TRIGGER expenses_fts_au AFTER UPDATE OF description ON expenses BEGIN "
+        "INSERT INTO expenses_fts(expenses_fts, rowid, description) VALUES ('delete', old.rowid, old.description); "
+        "INSERT INTO expenses_fts(rowid, description) VALUES (new.rowid, new.description); END"
+    )
+    # Index existing rows
+    op.execute("INSERT INTO expenses_fts(expenses_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("DROP INDEX IF EXISTS ix_expenses_search_vector")
+        op.execute("ALTER TABLE expenses DROP COLUMN search_vector")
+        return
+    
+    for trigger in ('expenses_fts_ai', 'expenses_fts_ad', 'expenses_fts_au'):
+        op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    op.execute("DROP TABLE IF EXISTS expenses_fts")
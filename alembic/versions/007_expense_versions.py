@@ -0,0 +1,29 @@
+"""Expense versions and group ledger versions
+
+expenses.version guards concurrent edits (optimistic locking);
+groups.ledger_version is bumped with every ledger write so cached pair
+states can be checked against the database.
+
+Revision ID: 007_expense_versions
+Revises: 006_expense_search
+Create Date: 2024-05-01 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '007_expense_versions'
+down_revision = '006_expense_search'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('expenses', sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+    op.add_column('groups', sa.Column('ledger_version', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade() -> None:
+    op.drop_column('groups', 'ledger_version')
+    op.drop_column('expenses', 'version')
@@ -0,0 +1,38 @@
+"""Per-group change sequence and change log for delta sync
+
+Revision ID: 008_group_changes
+Revises: 007_expense_versions
+Create Date: 2024-05-15 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '008_group_changes'
+down_revision = '007_expense_versions'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('groups', sa.Column('change_seq', sa.Integer(), nullable=False, server_default='0'))
+    
+    op.create_table(
+        'group_changes',
+        sa.Column('group_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('groups.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('seq', sa.Integer(), primary_key=True, autoincrement=False),
+        sa.Column('kind', sa.String(50), nullable=False),
+        sa.Column('entity_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('data', sa.JSON(), nullable=True),
+        sa.Column('user_ids', sa.JSON(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+    )
+    op.create_index('ix_group_changes_created_at', 'group_changes', ['created_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_group_changes_created_at', table_name='group_changes')
+    op.drop_table('group_changes')
+    op.drop_column('groups', 'change_seq')
@@ -0,0 +1,49 @@
+"""Recurring expense templates
+
+Revision ID: 009_recurring_expenses
+Revises: 008_group_changes
+Create Date: 2024-06-01 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '009_recurring_expenses'
+down_revision = '008_group_changes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    recurrence_interval = sa.Enum('DAILY', 'WEEKLY', 'MONTHLY', name='recurrenceinterval')
+    
+    op.create_table(
+        'recurring_expenses',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('group_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('groups.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('paid_by_user_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('users.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('amount', sa.Numeric(12, 2), nullable=False),
+        sa.Column('description', sa.String(500), nullable=False),
+        sa.Column('split_type', postgresql.ENUM(name='splittype', create_type=False), nullable=False),
+        sa.Column('splits', sa.JSON(), nullable=False),
+        sa.Column('interval', recurrence_interval, nullable=False),
+        sa.Column('interval_count', sa.Integer(), nullable=False, server_default='1'),
+        sa.Column('starts_at', sa.DateTime(), nullable=False),
+        sa.Column('ends_at', sa.DateTime(), nullable=True),
+        sa.Column('occurrences', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('next_run_at', sa.DateTime(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+    )
+    op.create_index('ix_recurring_expenses_group_id', 'recurring_expenses', ['group_id'])
+    op.create_index('ix_recurring_expenses_next_run_at', 'recurring_expenses', ['next_run_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_recurring_expenses_next_run_at', table_name='recurring_expenses')
+    op.drop_index('ix_recurring_expenses_group_id', table_name='recurring_expenses')
+    op.drop_table('recurring_expenses')
+    # Only PostgreSQL keeps enums as separate types
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute('DROP TYPE IF EXISTS recurrenceinterval')
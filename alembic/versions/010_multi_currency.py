@@ -0,0 +1,61 @@
+"""Currencies on expenses and settlements, group base currency, FX rates
+
+Every ledger row gets a currency (existing rows are USD, as are existing
+groups), and carry-forwards are kept per currency, which adds currency to
+their primary key.
+
+Revision ID: 010_multi_currency
+Revises: 009_recurring_expenses
+Create Date: 2024-06-15 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '010_multi_currency'
+down_revision = '009_recurring_expenses'
+branch_labels = None
+depends_on = None
+
+CURRENCY_TABLES = (
+    'expenses', 'settlements', 'expenses_archive', 'settlements_archive', 'recurring_expenses'
+)
+
+
+def upgrade() -> None:
+    op.add_column('groups', sa.Column('base_currency', sa.String(3), nullable=False, server_default='USD'))
+    for table in CURRENCY_TABLES:
+        op.add_column(table, sa.Column('currency', sa.String(3), nullable=False, server_default='USD'))
+    
+    with op.batch_alter_table('balance_carry_forwards') as batch:
+        batch.add_column(sa.Column('currency', sa.String(3), nullable=False, server_default='USD'))
+        batch.drop_constraint('balance_carry_forwards_pkey', type_='primary')
+        batch.create_primary_key(
+            'balance_carry_forwards_pkey', ['group_id', 'debtor_id', 'creditor_id', 'currency']
+        )
+    
+    op.create_table(
+        'fx_rates',
+        sa.Column('currency', sa.String(3), primary_key=True),
+        sa.Column('rate', sa.Numeric(20, 10), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    # Amounts in other currencies would silently become USD
+    bind = op.get_bind()
+    for table in (*CURRENCY_TABLES, 'balance_carry_forwards'):
+        if bind.execute(sa.text(f"SELECT 1 FROM {table} WHERE currency <> 'USD' LIMIT 1")).first():
+            raise RuntimeError(f"{table} has non-USD rows; convert them before downgrading")
+    
+    op.drop_table('fx_rates')
+    with op.batch_alter_table('balance_carry_forwards') as batch:
+        batch.drop_constraint('balance_carry_forwards_pkey', type_='primary')
+        batch.create_primary_key('balance_carry_forwards_pkey', ['group_id', 'debtor_id', 'creditor_id'])
+        batch.drop_column('currency')
+    
+    for table in reversed(CURRENCY_TABLES):
+        op.drop_column(table, 'currency')
+    op.drop_column('groups', 'base_currency')
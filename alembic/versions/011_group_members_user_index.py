@@ -0,0 +1,25 @@
+"""Index group memberships by user
+
+Cross-group netting and the dashboard look up every group a user belongs
+to; the primary key leads with group_id and cannot serve that.
+
+Revision ID: 011_group_members_user_index
+Revises: 010_multi_currency
+Create Date: 2024-07-01 00:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '011_group_members_user_index'
+down_revision = '010_multi_currency'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_group_members_user_id', 'group_members', ['user_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_group_members_user_id', table_name='group_members')
@@ -0,0 +1,96 @@
+"""Per-group summaries for group listings
+
+Member and expense counts, spend per currency and last activity, kept up
+to date by every write so listing a user's groups reads no ledger tables.
+The user index on group_members gains joined_at and group_id so the listing
+is an index range scan in join order.
+
+Revision ID: 012_group_summaries
+Revises: 011_group_members_user_index
+Create Date: 2024-07-15 00:00:00.000000
+
+"""
+from datetime import datetime
+from decimal import Decimal
+from uuid import UUID
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '012_group_summaries'
+down_revision = '011_group_members_user_index'
+branch_labels = None
+depends_on = None
+
+
+def _uuid(value) -> UUID:
+    # Raw SQL on SQLite returns the stored hex string
+    return value if isinstance(value, UUID) else UUID(value)
+
+
+def _backfill() -> list[dict]:
+    bind = op.get_bind()
+    summaries = {
+        _uuid(group_id): {
+            'group_id': _uuid(group_id),
+            'member_count': 0,
+            'expense_count': 0,
+            'spend': {},
+            'last_activity_at': None,
+            'version': change_seq,
+        }
+        for group_id, change_seq in bind.execute(sa.text("SELECT id, change_seq FROM groups"))
+    }
+    for group_id, count in bind.execute(sa.text(
+        "SELECT group_id, COUNT(*) FROM group_members GROUP BY group_id"
+    )):
+        summaries[_uuid(group_id)]['member_count'] = count
+
+    for table in ('expenses', 'expenses_archive'):
+        for group_id, currency, count, total in bind.execute(sa.text(
+            f"SELECT group_id, currency, COUNT(*), SUM(amount) FROM {table} GROUP BY group_id, currency"
+        )):
+            summary = summaries[_uuid(group_id)]
+            summary['expense_count'] += count
+            spend = Decimal(summary['spend'].get(currency, '0')) + Decimal(str(total))
+            summary['spend'][currency] = str(spend.quantize(Decimal('0.01')))
+
+    for table in ('expenses', 'expenses_archive', 'settlements', 'settlements_archive'):
+        for group_id, latest in bind.execute(sa.text(
+            f"SELECT group_id, MAX(created_at) FROM {table} GROUP BY group_id"
+        )):
+            summary = summaries[_uuid(group_id)]
+            if isinstance(latest, str):
+                latest = datetime.fromisoformat(latest)
+            if summary['last_activity_at'] is None or latest > summary['last_activity_at']:
+                summary['last_activity_at'] = latest
+
+    for summary in summaries.values():
+        summary['spend'] = {currency: amount for currency, amount in summary['spend'].items() if Decimal(amount)}
+    return list(summaries.values())
+
+
+def upgrade() -> None:
+    group_summaries = op.create_table(
+        'group_summaries',
+        sa.Column('group_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('groups.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('member_count', sa.Integer(), nullable=False),
+        sa.Column('expense_count', sa.Integer(), nullable=False),
+        sa.Column('spend', sa.JSON(), nullable=False),
+        sa.Column('last_activity_at', sa.DateTime(), nullable=True),
+        sa.Column('version', sa.Integer(), nullable=False),
+    )
+    rows = _backfill()
+    if rows:
+        op.bulk_insert(group_summaries, rows)
+
+    op.create_index('ix_group_members_user_joined', 'group_members', ['user_id', 'joined_at', 'group_id'])
+    op.drop_index('ix_group_members_user_id', table_name='group_members')
+
+
+def downgrade() -> None:
+    op.create_index('ix_group_members_user_id', 'group_members', ['user_id'])
+    op.drop_index('ix_group_members_user_joined', table_name='group_members')
+    op.drop_table('group_summaries')
@@ -0,0 +1,25 @@
+"""Index group memberships by group in join order
+
+Member lists are read a keyset page at a time on (joined_at, user_id); the
+primary key orders by user_id and cannot serve that.
+
+Revision ID: 013_group_members_join_order
+Revises: 012_group_summaries
+Create Date: 2024-07-22 00:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '013_group_members_join_order'
+down_revision = '012_group_summaries'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_group_members_group_joined', 'group_members', ['group_id', 'joined_at', 'user_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_group_members_group_joined', table_name='group_members')
@@ -0,0 +1,23 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+import redis.asyncio as redis
+
+from app.core.database import get_db
+from app.core.redis_client import get_redis
+from app.services.leaderboard_service import LeaderboardService
+from app.schemas.balance import LeaderboardResponse
+from app.utils.money import CURRENCY_PATTERN
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+
+@router.get("/leaderboards/top", response_model=LeaderboardResponse)
+async def get_global_top_balances(
+    k: int = Query(10, ge=1, le=100),
+    currency: str = Query("USD", pattern=CURRENCY_PATTERN, description="Base currency of the groups to rank across"),
+    db: AsyncSession = Depends(get_db),
+    redis_client: redis.Redis = Depends(get_redis)
+):
+    """Get the users who owe, and are owed, the most across all groups with the given base currency."""
+    leaderboard_service = LeaderboardService(db, redis_client)
+    return await leaderboard_service.get_global_top(k, currency)
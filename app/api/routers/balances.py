@@ -1,99 +1,167 @@
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Optional
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 import redis.asyncio as redis
-import json
 
+from app.core.config import get_settings
 from app.core.database import get_db
 from app.core.redis_client import get_redis
+from app.repositories.group_repository import GroupRepository
 from app.services.balance_service import BalanceService
-from app.schemas.balance import RawBalanceResponse, SimplifiedBalanceResponse
-from decimal import Decimal
+from app.services.leaderboard_service import LeaderboardService
+from app.services.ledger_cache import BALANCE_VIEW_TTL_SECONDS, balance_view_key, history_epoch_key, store_balance_view
+from app.schemas.balance import CurrencyBalancesResponse, LeaderboardResponse, RawBalanceResponse, SimplifiedBalanceResponse, UserBalanceResponse
+from app.utils.balance_simplification import SimplifyMode
+from app.utils.serialization import FastJSONResponse, dumps
 
 router = APIRouter(prefix="/groups/{group_id}/balances", tags=["balances"])
 
+CACHE_TTL_SECONDS = BALANCE_VIEW_TTL_SECONDS
 
-@router.get("/raw", response_model=list[RawBalanceResponse])
+AS_OF_DESCRIPTION = "Only count expenses and settlements created at or before this time"
+
+
+def _normalize_as_of(as_of: Optional[datetime]) -> Optional[datetime]:
+    """Ledger timestamps are naive UTC."""
+    if as_of is not None and as_of.tzinfo is not None:
+        as_of = as_of.astimezone(timezone.utc).replace(tzinfo=None)
+    return as_of
+
+
+async def _cache_target(
+    redis_client: redis.Redis, group_id: UUID, view: str, as_of: Optional[datetime]
+) -> tuple[Optional[str], int]:
+    """
+    Cache key and TTL for a balance view. Current balances are invalidated on
+    writes; settled history only changes when an edit rewrites the past, which
+    bumps the group's history epoch. Recent as-of timestamps are not cached.
+    """
+    if as_of is None:
+        return balance_view_key(group_id, view), CACHE_TTL_SECONDS
+    settings = get_settings()
+    if as_of <= datetime.utcnow() - timedelta(seconds=settings.BALANCE_HISTORY_SETTLE_SECONDS):
+        epoch = await redis_client.get(history_epoch_key(group_id)) or 0
+        key = f"balances:{group_id}:{view}:asof:{as_of.isoformat()}:e{int(epoch)}"
+        return key, settings.BALANCE_HISTORY_CACHE_TTL_SECONDS
+    return None, 0
+
+
+async def _cached_response(
+    redis_client: redis.Redis,
+    db: AsyncSession,
+    group_id: UUID,
+    as_of: Optional[datetime],
+    cache_key: Optional[str],
+    ttl: int,
+    compute: Callable[[], Awaitable[list[dict] | bytes]]
+) -> FastJSONResponse:
+    """
+    Serve a balance view from cache or compute it. Current views are stored
+    with a compare-and-set against the ledger version read before computing,
+    so a write that drops the views meanwhile is not undone by a stale body;
+    as-of keys carry the history epoch and are stored as they are.
+    """
+    # Try to get from cache
+    if cache_key:
+        cached = await redis_client.get(cache_key)
+        if cached:
+            return FastJSONResponse(cached)
+    
+    version = None
+    if cache_key and as_of is None:
+        version = await GroupRepository(db).get_ledger_version(group_id)
+    
+    # Encode once for both the cache and the response (or not at all)
+    body = await compute()
+    if not isinstance(body, bytes):
+        body = dumps(body)
+    if version is not None:
+        pipe = redis_client.pipeline(transaction=False)
+        store_balance_view(pipe, group_id, version, cache_key, body, ttl)
+        await pipe.execute()
+    elif cache_key and as_of is not None:
+        await redis_client.setex(cache_key, ttl, body)
+    
+    return FastJSONResponse(body)
+
+
+# Responses are returned as pre-encoded JSON: the cache stores the exact bytes
+# sent to clients, so a hit is a passthrough and a miss is encoded once.
+# response_model is kept for the OpenAPI schema only. Amounts are in the
+# group's base currency, converted at the rates current when cached.
+@router.get("/raw", response_model=list[RawBalanceResponse], response_class=FastJSONResponse)
 async def get_raw_balances(
     group_id: UUID,
+    as_of: Optional[datetime] = Query(None, description=AS_OF_DESCRIPTION),
     db: AsyncSession = Depends(get_db),
     redis_client: redis.Redis = Depends(get_redis)
 ):
     """Get raw balances (ledger-style) for a group."""
-    cache_key = f"balances:{group_id}:raw"
-    
-    # Try to get from cache
-    cached = await redis_client.get(cache_key)
-    if cached:
-        data = json.loads(cached)
-        return [
-            RawBalanceResponse(
-                debtor_id=item["debtor_id"],
-                creditor_id=item["creditor_id"],
-                amount=Decimal(str(item["amount"]))
-            )
-            for item in data
-        ]
-    
-    # Calculate balances
-    balance_service = BalanceService(db)
-    balances = await balance_service.get_raw_balances(group_id)
-    
-    # Convert to response format
-    result = [
-        RawBalanceResponse(
-            debtor_id=b["debtor_id"],
-            creditor_id=b["creditor_id"],
-            amount=Decimal(str(b["amount"]))
-        )
-        for b in balances
-    ]
-    
-    # Cache for 1 hour (serialize for cache)
-    cache_data = [
-        {
-            "debtor_id": r.debtor_id,
-            "creditor_id": r.creditor_id,
-            "amount": float(r.amount)
-        }
-        for r in result
-    ]
-    await redis_client.setex(cache_key, 3600, json.dumps(cache_data))
-    
-    return result
+    as_of = _normalize_as_of(as_of)
+    cache_key, ttl = await _cache_target(redis_client, group_id, "raw", as_of)
+    balance_service = BalanceService(db, redis_client)
+    return await _cached_response(
+        redis_client, db, group_id, as_of, cache_key, ttl,
+        lambda: balance_service.get_raw_balances(group_id, as_of)
+    )
 
 
-@router.get("/simplified", response_model=list[SimplifiedBalanceResponse])
+@router.get("/simplified", response_model=list[SimplifiedBalanceResponse], response_class=FastJSONResponse)
 async def get_simplified_balances(
     group_id: UUID,
+    as_of: Optional[datetime] = Query(None, description=AS_OF_DESCRIPTION),
+    mode: SimplifyMode = Query(
+        SimplifyMode.GREEDY,
+        description="`relationships` only routes transfers between members who already owe each other"
+    ),
     db: AsyncSession = Depends(get_db),
     redis_client: redis.Redis = Depends(get_redis)
 ):
     """Get simplified balances for a group."""
-    cache_key = f"balances:{group_id}:simplified"
-    
-    # Try to get from cache
-    cached = await redis_client.get(cache_key)
-    if cached:
-        data = json.loads(cached)
-        return [SimplifiedBalanceResponse(**item) for item in data]
-    
-    # Calculate balances
-    balance_service = BalanceService(db)
-    balances = await balance_service.get_simplified_balances(group_id)
-    
-    # Convert to response format
-    result = [
-        {
-            "payer_id": str(b["payer_id"]),
-            "payee_id": str(b["payee_id"]),
-            "amount": float(b["amount"])
-        }
-        for b in balances
-    ]
-    
-    # Cache for 1 hour
-    await redis_client.setex(cache_key, 3600, json.dumps(result))
-    
-    return [SimplifiedBalanceResponse(**item) for item in result]
+    as_of = _normalize_as_of(as_of)
+    view = "simplified" if mode == SimplifyMode.GREEDY else f"simplified:{mode.value}"
+    cache_key, ttl = await _cache_target(redis_client, group_id, view, as_of)
+    balance_service = BalanceService(db, redis_client)
+    if as_of is None and mode == SimplifyMode.GREEDY:
+        # Cached plan bytes are served as they are
+        compute = lambda: balance_service.get_current_plan_json(group_id)
+    else:
+        compute = lambda: balance_service.get_simplified_balances(group_id, as_of, mode)
+    return await _cached_response(redis_client, db, group_id, as_of, cache_key, ttl, compute)
+
+
+@router.get("/users/{user_id}", response_model=UserBalanceResponse)
+async def get_user_balance(
+    group_id: UUID,
+    user_id: UUID,
+    db: AsyncSession = Depends(get_db),
+    redis_client: redis.Redis = Depends(get_redis)
+):
+    """Get whom a member pays (or is paid by) and their net position, without the full plan."""
+    balance_service = BalanceService(db, redis_client)
+    return await balance_service.get_user_balance(group_id, user_id)
+
 
+@router.get("/currencies", response_model=CurrencyBalancesResponse)
+async def get_currency_balances(
+    group_id: UUID,
+    db: AsyncSession = Depends(get_db),
+    redis_client: redis.Redis = Depends(get_redis)
+):
+    """Get a group's balances in each currency, before conversion into its base currency."""
+    balance_service = BalanceService(db, redis_client)
+    return await balance_service.get_currency_balances(group_id)
+
+
+@router.get("/top", response_model=LeaderboardResponse)
+async def get_top_balances(
+    group_id: UUID,
+    k: int = Query(10, ge=1, le=100),
+    db: AsyncSession = Depends(get_db),
+    redis_client: redis.Redis = Depends(get_redis)
+):
+    """Get the group members who owe, and are owed, the most."""
+    leaderboard_service = LeaderboardService(db, redis_client)
+    return await leaderboard_service.get_group_top(group_id, k)
@@ -0,0 +1,24 @@
+from uuid import UUID
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+import redis.asyncio as redis
+
+from app.core.database import get_db
+from app.core.redis_client import get_redis
+from app.services.change_service import ChangeService
+from app.schemas.change import GroupChangesResponse
+
+router = APIRouter(prefix="/groups/{group_id}/changes", tags=["changes"])
+
+
+@router.get("", response_model=GroupChangesResponse)
+async def get_group_changes(
+    group_id: UUID,
+    since: int = Query(0, ge=0, description="Last change sequence number the client has applied"),
+    limit: int = Query(500, ge=1, le=1000),
+    db: AsyncSession = Depends(get_db),
+    redis_client: redis.Redis = Depends(get_redis)
+):
+    """Get the writes to a group after `since` and the resulting net balances."""
+    change_service = ChangeService(db, redis_client)
+    return await change_service.get_changes(group_id, since, limit)
@@ -0,0 +1,84 @@
+import asyncio
+import json
+from uuid import UUID
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+
+from app.core.database import create_session
+from app.repositories.group_repository import GroupRepository
+from app.services.group_events import GroupEventBroker, get_event_broker
+
+router = APIRouter(prefix="/groups/{group_id}/events", tags=["events"])
+
+HEARTBEAT_SECONDS = 15
+RETRY_MILLISECONDS = 5000
+
+
+def format_event(event: dict) -> str:
+    """Format a group event as an SSE message."""
+    return f"id: {event['version']}\nevent: {event['kind']}\ndata: {json.dumps(event)}\n\n"
+
+
+async def subscriber_event(broker: GroupEventBroker, group_id: UUID, event: dict, balances: bool) -> dict:
+    """
+    One subscriber's copy of an event. Events are shared by every subscriber
+    of the worker, so balances are added to a new dict, never in place.
+    """
+    if balances:
+        return {**event, "net_balances": await broker.net_balances(group_id, event["version"])}
+    return event
+
+
+@router.get("")
+async def stream_group_events(
+    group_id: UUID,
+    request: Request,
+    balances: bool = False,
+    last_event_id: Optional[str] = Header(None, alias="Last-Event-ID"),
+    broker: GroupEventBroker = Depends(get_event_broker)
+):
+    """
+    Stream balance change events for a group (Server-Sent Events).
+    Each event carries the group's new version (its change_seq, so a
+    Last-Event-ID can be passed to /changes?since=) and, with
+    ?balances=true, the resulting net balances.
+    """
+    # Short-lived session: a stream must not hold a pooled connection while idle
+    async with create_session() as session:
+        group = await GroupRepository(session).get_by_id(group_id)
+    if not group:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Group {group_id} not found"
+        )
+    
+    queue = await broker.subscribe(group_id)
+    
+    async def event_stream():
+        try:
+            yield f"retry: {RETRY_MILLISECONDS}\n\n"
+            
+            # Catch up a reconnecting client that missed events
+            version = group.change_seq
+            seen = int(last_event_id) if last_event_id and last_event_id.isdigit() else None
+            if seen is None or version > seen:
+                yield format_event(await subscriber_event(broker, group_id, {
+                    "group_id": str(group_id), "version": version, "kind": "snapshot"
+                }, balances))
+            
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield format_event(await subscriber_event(broker, group_id, event, balances))
+        finally:
+            await broker.unsubscribe(group_id, queue)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -1,35 +1,149 @@
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 import redis.asyncio as redis
 
 from app.core.database import get_db
 from app.core.redis_client import get_redis
 from app.services.expense_service import ExpenseService
-from app.schemas.expense import ExpenseCreate, ExpenseResponse
+from app.services.idempotency_service import IdempotencyService
+from app.services.dashboard_service import summary_key
+from app.services.group_events import publish_group_event
+from app.services.leaderboard_service import LeaderboardService
+from app.services.ledger_cache import LedgerChange, drop_balance_views, history_epoch_key
+from app.schemas.expense import SPLIT_DETAIL_LIMIT, ExpenseCreate, ExpensePreviewRequest, ExpensePreviewResponse, ExpenseResponse, ExpenseSearchResponse, ExpenseUpdate
 
 router = APIRouter(prefix="/groups/{group_id}/expenses", tags=["expenses"])
 
 
-async def invalidate_balance_cache(redis_client: redis.Redis, group_id: UUID):
-    """Invalidate balance cache keys for a group."""
-    await redis_client.delete(f"balances:{group_id}:raw")
-    await redis_client.delete(f"balances:{group_id}:simplified")
+async def invalidate_balance_cache(
+    db: AsyncSession, redis_client: redis.Redis, group_id: UUID, change: LedgerChange
+):
+    """Drop derived balance views and apply the write to cached pair states and leaderboards."""
+    await drop_balance_views(redis_client, group_id, change.version, summary_key(group_id))
+    await LeaderboardService(db, redis_client).apply_change(group_id, change)
 
 
 @router.post("", response_model=ExpenseResponse, status_code=status.HTTP_201_CREATED)
 async def create_expense(
     group_id: UUID,
     expense_data: ExpenseCreate,
+    include_splits: Optional[bool] = Query(
+        None, description=f"Include per-split detail; by default only for expenses with at most {SPLIT_DETAIL_LIMIT} splits"
+    ),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255),
+    db: AsyncSession = Depends(get_db),
+    redis_client: redis.Redis = Depends(get_redis)
+):
+    """Create a new expense in a group. `split_count` is always set, even when `splits` is left out."""
+    idempotency = IdempotencyService(db, redis_client)
+    scope = f"expenses:{group_id}"
+    # The response shape depends on include_splits, so a replay must match it too
+    request_hash = IdempotencyService.request_hash(expense_data, include_splits=include_splits)
+    
+    # Replay a completed request without touching the write path
+    if idempotency_key:
+        replay = await idempotency.begin(scope, idempotency_key, request_hash)
+        if replay:
+            return replay
+    
+    try:
+        expense_service = ExpenseService(db)
+        response, change = await expense_service.create_expense(group_id, expense_data, include_splits)
+        if idempotency_key:
+            # A concurrent duplicate won the race: its write stands, ours was rolled back
+            replay = await idempotency.complete(
+                scope, idempotency_key, request_hash, status.HTTP_201_CREATED, response
+            )
+            if replay:
+                return replay
+    finally:
+        if idempotency_key:
+            await idempotency.release(scope, idempotency_key)
+    
+    # Commit before invalidating so readers cannot re-cache the old ledger
+    await db.commit()
+    
+    # Invalidate balance cache and notify live subscribers
+    await invalidate_balance_cache(db, redis_client, group_id, change)
+    await publish_group_event(redis_client, group_id, "expense_created", change.seq)
+    
+    return response
+
+
+@router.post(":preview", response_model=ExpensePreviewResponse)
+async def preview_expenses(
+    group_id: UUID,
+    preview_request: ExpensePreviewRequest,
+    db: AsyncSession = Depends(get_db),
+    redis_client: redis.Redis = Depends(get_redis)
+):
+    """Show how balances would change if the given expenses were added. Nothing is saved."""
+    expense_service = ExpenseService(db)
+    return await expense_service.preview_expenses(group_id, preview_request.expenses, redis_client)
+
+
+@router.get("/search", response_model=ExpenseSearchResponse)
+async def search_expenses(
+    group_id: UUID,
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, max_length=500),
+    db: AsyncSession = Depends(get_db)
+):
+    """Search a group's expenses by description, best match first."""
+    expense_service = ExpenseService(db)
+    return await expense_service.search_expenses(group_id, q, limit, cursor)
+
+
+@router.get("/{expense_id}", response_model=ExpenseResponse)
+async def get_expense(
+    group_id: UUID,
+    expense_id: UUID,
+    db: AsyncSession = Depends(get_db)
+):
+    """Get an expense with all its splits."""
+    expense_service = ExpenseService(db)
+    return await expense_service.get_expense(group_id, expense_id)
+
+
+@router.patch("/{expense_id}", response_model=ExpenseResponse)
+async def update_expense(
+    group_id: UUID,
+    expense_id: UUID,
+    expense_data: ExpenseUpdate,
     db: AsyncSession = Depends(get_db),
     redis_client: redis.Redis = Depends(get_redis)
 ):
-    """Create a new expense in a group."""
+    """Update an expense. Fails with 409 if `version` is not the current one."""
     expense_service = ExpenseService(db)
-    expense = await expense_service.create_expense(group_id, expense_data)
+    expense, change, seq = await expense_service.update_expense(group_id, expense_id, expense_data)
+    response = ExpenseResponse.model_validate(expense)
+    await db.commit()
     
-    # Invalidate balance cache
-    await invalidate_balance_cache(redis_client, group_id)
+    if change is not None:
+        await invalidate_balance_cache(db, redis_client, group_id, change)
+        # The expense may predate cached as-of results
+        await redis_client.incr(history_epoch_key(group_id))
+    await publish_group_event(redis_client, group_id, "expense_updated", seq)
     
-    return expense
+    return response
+
 
+@router.delete("/{expense_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_expense(
+    group_id: UUID,
+    expense_id: UUID,
+    version: int = Query(..., ge=1, description="Version the client last read"),
+    db: AsyncSession = Depends(get_db),
+    redis_client: redis.Redis = Depends(get_redis)
+):
+    """Delete an expense. Fails with 409 if `version` is not the current one."""
+    expense_service = ExpenseService(db)
+    change = await expense_service.delete_expense(group_id, expense_id, version)
+    await db.commit()
+    
+    await invalidate_balance_cache(db, redis_client, group_id, change)
+    await redis_client.incr(history_epoch_key(group_id))
+    await publish_group_event(redis_client, group_id, "expense_deleted", change.seq)
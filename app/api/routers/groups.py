@@ -1,10 +1,14 @@
+from typing import Optional
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db
+from app.repositories.change_repository import ChangeRepository
 from app.repositories.group_repository import GroupRepository
-from app.schemas.group import GroupCreate, GroupResponse, GroupMemberCreate
+from app.repositories.group_summary_repository import GroupSummaryRepository
+from app.services.group_service import GroupService
+from app.schemas.group import GroupCreate, GroupResponse, GroupMemberCreate, GroupMembersResponse
 
 router = APIRouter(prefix="/groups", tags=["groups"])
 
@@ -17,14 +21,7 @@ async def create_group(
     """Create a new group."""
     group_repo = GroupRepository(db)
     group = await group_repo.create(group_data)
-    # Reload group with members loaded to avoid lazy-loading issues in async context
-    group = await group_repo.get_by_id(group.id, load_members=True)
-    if not group:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to retrieve created group"
-        )
-    return group
+    return await GroupService(db).get_group(group.id)
 
 
 @router.get("/{group_id}", response_model=GroupResponse)
@@ -32,17 +29,19 @@ async def get_group(
     group_id: UUID,
     db: AsyncSession = Depends(get_db)
 ):
-    """Get group by ID with members."""
-    group_repo = GroupRepository(db)
-    group = await group_repo.get_by_id(group_id, load_members=True)
-    
-    if not group:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Group {group_id} not found"
-        )
-    
-    return group
+    """Get group by ID with its member count and first page of members."""
+    return await GroupService(db).get_group(group_id)
+
+
+@router.get("/{group_id}/members", response_model=GroupMembersResponse)
+async def list_group_members(
+    group_id: UUID,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, max_length=500),
+    db: AsyncSession = Depends(get_db)
+):
+    """List a group's members in the order they joined, one page at a time."""
+    return await GroupService(db).list_members(group_id, limit, cursor)
 
 
 @router.post("/{group_id}/members", response_model=GroupResponse, status_code=status.HTTP_201_CREATED)
@@ -63,14 +62,23 @@ async def add_group_member(
         )
     
     try:
-        await group_repo.add_member(group_id, member_data)
+        member = await group_repo.add_member(group_id, member_data)
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
+    seq, _ = await ChangeRepository(db).record(
+        group_id,
+        "member_added",
+        member.user_id,
+        {"user_id": str(member.user_id), "joined_at": member.joined_at.isoformat()},
+        []
+    )
+    await GroupSummaryRepository(db).apply(group_id, seq, members=1)
+    
+    await db.commit()
     
-    # Return updated group with members
-    group = await group_repo.get_by_id(group_id, load_members=True)
-    return group
+    # Return the updated count and first page, not the whole roster
+    return await GroupService(db).get_group(group_id)
 
@@ -1,10 +1,49 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, status
+from fastapi.responses import JSONResponse
+from sqlalchemy import text
+import redis.asyncio as redis
+
+from app.core.database import create_session
+from app.core.redis_client import get_redis
+from app.services.compute_offload import compute_offloader, loop_lag_monitor
 
 router = APIRouter(tags=["health"])
 
 
 @router.get("/health")
 async def health_check():
-    """Health check endpoint."""
+    """Liveness check: the process is up. Does not touch dependencies."""
     return {"status": "healthy"}
 
+
+@router.get("/health/loop")
+async def loop_health():
+    """Event-loop lag of this worker and the state of its compute offload pool."""
+    return {"loop_lag": loop_lag_monitor.stats(), "offload": compute_offloader.stats()}
+
+
+@router.get("/health/ready")
+async def readiness_check(redis_client: redis.Redis = Depends(get_redis)):
+    """Readiness check: the database and Redis are reachable."""
+    checks = {}
+    
+    # Connect here rather than through get_db, so a missing or unreachable
+    # database is reported as not ready instead of failing the request
+    try:
+        async with create_session() as session:
+            await session.execute(text("SELECT 1"))
+        checks["database"] = "ok"
+    except Exception as e:
+        checks["database"] = f"error: {type(e).__name__}"
+    
+    try:
+        await redis_client.ping()
+        checks["redis"] = "ok"
+    except Exception as e:
+        checks["redis"] = f"error: {type(e).__name__}"
+    
+    ready = all(value == "ok" for value in checks.values())
+    return JSONResponse(
+        status_code=status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"status": "ready" if ready else "not ready", "checks": checks}
+    )
@@ -0,0 +1,46 @@
+from uuid import UUID
+from typing import List
+from fastapi import APIRouter, Depends, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import get_db
+from app.services.recurring_expense_service import RecurringExpenseService
+from app.schemas.recurring import RecurringExpenseCreate, RecurringExpenseResponse
+
+router = APIRouter(prefix="/groups/{group_id}/recurring-expenses", tags=["recurring expenses"])
+
+
+@router.post("", response_model=RecurringExpenseResponse, status_code=status.HTTP_201_CREATED)
+async def create_recurring_expense(
+    group_id: UUID,
+    recurring_data: RecurringExpenseCreate,
+    db: AsyncSession = Depends(get_db)
+):
+    """Create a recurring expense. The scheduler adds an expense at every occurrence."""
+    service = RecurringExpenseService(db)
+    template = await service.create_template(group_id, recurring_data)
+    response = RecurringExpenseResponse.model_validate(template)
+    await db.commit()
+    return response
+
+
+@router.get("", response_model=List[RecurringExpenseResponse])
+async def list_recurring_expenses(
+    group_id: UUID,
+    db: AsyncSession = Depends(get_db)
+):
+    """List a group's recurring expenses."""
+    service = RecurringExpenseService(db)
+    return await service.list_templates(group_id)
+
+
+@router.delete("/{recurring_expense_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_recurring_expense(
+    group_id: UUID,
+    recurring_expense_id: UUID,
+    db: AsyncSession = Depends(get_db)
+):
+    """Stop a recurring expense. Expenses it already created are kept."""
+    service = RecurringExpenseService(db)
+    await service.delete_template(group_id, recurring_expense_id)
+    await db.commit()
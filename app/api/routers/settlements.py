@@ -1,35 +1,69 @@
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 import redis.asyncio as redis
 
 from app.core.database import get_db
 from app.core.redis_client import get_redis
 from app.services.settlement_service import SettlementService
+from app.services.idempotency_service import IdempotencyService
+from app.services.dashboard_service import summary_key
+from app.services.group_events import publish_group_event
+from app.services.leaderboard_service import LeaderboardService
+from app.services.ledger_cache import LedgerChange, drop_balance_views
 from app.schemas.settlement import SettlementCreate, SettlementResponse
 
 router = APIRouter(prefix="/groups/{group_id}/settlements", tags=["settlements"])
 
 
-async def invalidate_balance_cache(redis_client: redis.Redis, group_id: UUID):
-    """Invalidate balance cache keys for a group."""
-    await redis_client.delete(f"balances:{group_id}:raw")
-    await redis_client.delete(f"balances:{group_id}:simplified")
+async def invalidate_balance_cache(
+    db: AsyncSession, redis_client: redis.Redis, group_id: UUID, change: LedgerChange
+):
+    """Drop derived balance views and apply the write to cached pair states and leaderboards."""
+    await drop_balance_views(redis_client, group_id, change.version, summary_key(group_id))
+    await LeaderboardService(db, redis_client).apply_change(group_id, change)
 
 
 @router.post("", response_model=SettlementResponse, status_code=status.HTTP_201_CREATED)
 async def create_settlement(
     group_id: UUID,
     settlement_data: SettlementCreate,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255),
     db: AsyncSession = Depends(get_db),
     redis_client: redis.Redis = Depends(get_redis)
 ):
     """Create a new settlement in a group."""
-    settlement_service = SettlementService(db)
-    settlement = await settlement_service.create_settlement(group_id, settlement_data)
+    idempotency = IdempotencyService(db, redis_client)
+    scope = f"settlements:{group_id}"
+    request_hash = IdempotencyService.request_hash(settlement_data)
     
-    # Invalidate balance cache
-    await invalidate_balance_cache(redis_client, group_id)
+    # Replay a completed request without touching the write path
+    if idempotency_key:
+        replay = await idempotency.begin(scope, idempotency_key, request_hash)
+        if replay:
+            return replay
     
-    return settlement
-
+    try:
+        settlement_service = SettlementService(db)
+        settlement, change = await settlement_service.create_settlement(group_id, settlement_data)
+        response = SettlementResponse.model_validate(settlement)
+        if idempotency_key:
+            # A concurrent duplicate won the race: its write stands, ours was rolled back
+            replay = await idempotency.complete(
+                scope, idempotency_key, request_hash, status.HTTP_201_CREATED, response
+            )
+            if replay:
+                return replay
+    finally:
+        if idempotency_key:
+            await idempotency.release(scope, idempotency_key)
+    
+    # Commit before invalidating so readers cannot re-cache the old ledger
+    await db.commit()
+    
+    # Invalidate balance cache and notify live subscribers
+    await invalidate_balance_cache(db, redis_client, group_id, change)
+    await publish_group_event(redis_client, group_id, "settlement_created", change.seq)
+    
+    return response
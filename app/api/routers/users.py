@@ -1,9 +1,21 @@
+from typing import Optional
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
+import redis.asyncio as redis
 
 from app.core.database import get_db
+from app.core.redis_client import get_redis
 from app.repositories.user_repository import UserRepository
+from app.services.dashboard_service import DashboardService, summary_key
+from app.services.group_events import publish_group_event
+from app.services.group_summary_service import GroupSummaryService
+from app.services.leaderboard_service import LeaderboardService
+from app.services.ledger_cache import drop_balance_views
+from app.services.netting_service import NettingService
+from app.schemas.dashboard import UserDashboardResponse
+from app.schemas.group import UserGroupsResponse
+from app.schemas.netting import NettingSettleResponse, PairwiseNettingResponse
 from app.schemas.user import UserCreate, UserResponse
 
 router = APIRouter(prefix="/users", tags=["users"])
@@ -46,3 +58,61 @@ async def get_user(
     
     return user
 
+
+@router.get("/{user_id}/dashboard", response_model=UserDashboardResponse)
+async def get_user_dashboard(
+    user_id: UUID,
+    db: AsyncSession = Depends(get_db),
+    redis_client: redis.Redis = Depends(get_redis)
+):
+    """Get a user's profile, groups and net position in each group in one call."""
+    dashboard_service = DashboardService(db, redis_client)
+    return await dashboard_service.get_dashboard(user_id)
+
+
+@router.get("/{user_id}/groups", response_model=UserGroupsResponse)
+async def list_user_groups(
+    user_id: UUID,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, max_length=500),
+    db: AsyncSession = Depends(get_db)
+):
+    """List the groups a user belongs to with member, expense and spend totals, in the order they joined."""
+    return await GroupSummaryService(db).list_user_groups(user_id, limit, cursor)
+
+
+@router.get("/{user_id}/netting", response_model=list[PairwiseNettingResponse])
+async def get_netting_plan(
+    user_id: UUID,
+    counterparty_id: Optional[UUID] = Query(None, description="Only net with this user"),
+    db: AsyncSession = Depends(get_db)
+):
+    """Net a user's balances with each person they share groups with, across those groups."""
+    return await NettingService(db).get_plan(user_id, counterparty_id)
+
+
+@router.post("/{user_id}/netting/{counterparty_id}/settle", response_model=NettingSettleResponse)
+async def settle_netting(
+    user_id: UUID,
+    counterparty_id: UUID,
+    db: AsyncSession = Depends(get_db),
+    redis_client: redis.Redis = Depends(get_redis)
+):
+    """Record the offsetting settlements of a cross-group netting plan in one transaction."""
+    plan, settlements, changes = await NettingService(db).settle(user_id, counterparty_id)
+    response = NettingSettleResponse(plan=plan, settlements=settlements)
+    
+    # Commit before invalidating so readers cannot re-cache the old ledger
+    await db.commit()
+    
+    # Changes are applied in version order, so cached pair states stay warm
+    leaderboards = LeaderboardService(db, redis_client)
+    for group_id, change in changes:
+        await drop_balance_views(redis_client, group_id, change.version, summary_key(group_id))
+        await leaderboards.apply_change(group_id, change)
+    # One event per group, carrying its last change
+    latest = {group_id: change.seq for group_id, change in changes}
+    for group_id, seq in latest.items():
+        await publish_group_event(redis_client, group_id, "settlement_created", seq)
+    
+    return response
@@ -1,3 +1,4 @@
+from functools import lru_cache
 from pydantic_settings import BaseSettings
 from typing import Optional
 
@@ -5,7 +6,9 @@ from typing import Optional
 class Settings(BaseSettings):
     """Application settings."""
     
-    DATABASE_URL: str
+    # Checked when the engine is first created, so the app can be imported
+    # (and serve liveness probes) without a database configured
+    DATABASE_URL: Optional[str] = None
     REDIS_URL: str = "redis://localhost:6379/0"
     ENVIRONMENT: str = "development"
     
@@ -16,10 +19,47 @@ class Settings(BaseSettings):
     # Database settings
     DB_ECHO: bool = False
     
+    # Idempotency settings
+    IDEMPOTENCY_TTL_SECONDS: int = 86400  # Redis fast-path retention
+    IDEMPOTENCY_LOCK_SECONDS: int = 30  # In-flight lock for concurrent duplicates
+    IDEMPOTENCY_RETENTION_SECONDS: int = 7 * 86400  # Stored responses, until app.jobs.prune_idempotency_keys
+    
+    # As-of balances: a timestamp this far in the past is treated as final
+    # (covers transactions still committing rows stamped just before it)
+    BALANCE_HISTORY_SETTLE_SECONDS: int = 300
+    BALANCE_HISTORY_CACHE_TTL_SECONDS: int = 30 * 86400  # Bounds memory; edits retire keys by epoch
+    
+    # FX rates table, cached in each process
+    FX_RATE_CACHE_TTL_SECONDS: int = 300
+    
+    # Recurring expenses: the in-app scheduler is off by default so a
+    # dedicated worker (app.jobs.materialize_recurring --loop) can own it
+    RECURRING_SCHEDULER_ENABLED: bool = False
+    RECURRING_SCHEDULER_INTERVAL_SECONDS: int = 60
+    RECURRING_BATCH_SIZE: int = 200  # Templates per transaction, across groups
+    RECURRING_MAX_CATCH_UP: int = 100  # Occurrences per template per batch
+    
+    # Simplifying a large group is CPU-bound: at or above this many ledger
+    # pairs it runs in a worker pool instead of on the event loop
+    SIMPLIFY_OFFLOAD_MIN_PAIRS: int = 2000
+    SIMPLIFY_OFFLOAD_EXECUTOR: str = "process"  # "process" or "thread"
+    SIMPLIFY_OFFLOAD_WORKERS: int = 2
+    SIMPLIFY_OFFLOAD_MAX_QUEUE: int = 8  # Running plus waiting; beyond it requests get 503
+    LOOP_LAG_SAMPLE_SECONDS: float = 0.5
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
 
 
-settings = Settings()
+@lru_cache
+def get_settings() -> Settings:
+    """Get settings, loading them from the environment on first use."""
+    return Settings()
+
 
+def __getattr__(name: str):
+    # Backwards-compatible lazy `from app.core.config import settings`
+    if name == "settings":
+        return get_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,30 +1,70 @@
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import declarative_base
-from app.core.config import settings
-
-# Create async engine
-engine = create_async_engine(
-    settings.DATABASE_URL,
-    echo=settings.DB_ECHO,
-    future=True,
-)
-
-# Create async session factory
-AsyncSessionLocal = async_sessionmaker(
-    engine,
-    class_=AsyncSession,
-    expire_on_commit=False,
-    autocommit=False,
-    autoflush=False,
-)
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.ext.compiler import compiles
+from app.core.config import get_settings
+
+# Engine and session factory are created on first use, not at import time
+_engine: Optional[AsyncEngine] = None
+_sessionmaker: Optional[async_sessionmaker] = None
 
 # Base class for models
 Base = declarative_base()
 
 
+@compiles(UUID, "sqlite")
+def compile_uuid_sqlite(type_, compiler, **kw):
+    """Render PostgreSQL UUID columns as CHAR(32) on SQLite (tests, in-process load runs)."""
+    return "CHAR(32)"
+
+
+def get_engine() -> AsyncEngine:
+    """Get or create the async engine."""
+    global _engine
+    if _engine is None:
+        settings = get_settings()
+        if not settings.DATABASE_URL:
+            raise RuntimeError("DATABASE_URL is not configured")
+        _engine = create_async_engine(
+            settings.DATABASE_URL,
+            echo=settings.DB_ECHO,
+            future=True,
+        )
+    return _engine
+
+
+def get_sessionmaker() -> async_sessionmaker:
+    """Get or create the async session factory."""
+    global _sessionmaker
+    if _sessionmaker is None:
+        _sessionmaker = async_sessionmaker(
+            get_engine(),
+            class_=AsyncSession,
+            expire_on_commit=False,
+            autocommit=False,
+            autoflush=False,
+        )
+    return _sessionmaker
+
+
+def create_session() -> AsyncSession:
+    """Open a session outside request scope (streams, background jobs)."""
+    return get_sessionmaker()()
+
+
+async def dispose_engine():
+    """Dispose the engine if it was created."""
+    global _engine, _sessionmaker
+    if _engine is not None:
+        await _engine.dispose()
+        _engine = None
+        _sessionmaker = None
+
+
 async def get_db() -> AsyncSession:
     """Dependency to get database session."""
-    async with AsyncSessionLocal() as session:
+    async with create_session() as session:
         try:
             yield session
             await session.commit()
@@ -33,4 +73,3 @@ async def get_db() -> AsyncSession:
             raise
         finally:
             await session.close()
-
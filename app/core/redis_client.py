@@ -1,5 +1,5 @@
 import redis.asyncio as redis
-from app.core.config import settings
+from app.core.config import get_settings
 from typing import Optional
 
 
@@ -13,7 +13,7 @@ class RedisClient:
         """Get or create Redis client instance."""
         if cls._instance is None:
             cls._instance = await redis.from_url(
-                settings.REDIS_URL,
+                get_settings().REDIS_URL,
                 encoding="utf-8",
                 decode_responses=True
             )
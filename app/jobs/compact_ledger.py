@@ -0,0 +1,80 @@
+"""
+Ledger compaction job.
+
+Folds each group's expenses and settlements older than the cutoff into
+carry-forward balance rows and moves the originals to the archive tables.
+Balances (and therefore cached balances) are unchanged. The delta-sync
+change log is pruned to the same cutoff.
+
+    python -m app.jobs.compact_ledger --older-than-days 365
+    python -m app.jobs.compact_ledger --before 2024-01-01 --group <group_id>
+"""
+import argparse
+import asyncio
+import sys
+from datetime import datetime, timedelta
+from typing import List, Optional
+from uuid import UUID
+from sqlalchemy import select, or_
+
+from app.core.database import create_session, dispose_engine
+from app.models.group import Group
+from app.services.ledger_compaction_service import LedgerCompactionService
+
+
+async def compact_groups(cutoff: datetime, group_ids: Optional[List[UUID]] = None) -> dict:
+    """Compact every eligible group, one transaction per group."""
+    totals = {"groups": 0, "expenses": 0, "settlements": 0, "pairs": 0, "changes": 0}
+    
+    async with create_session() as reader:
+        query = select(Group.id).where(
+            or_(Group.compacted_before.is_(None), Group.compacted_before < cutoff)
+        )
+        if group_ids:
+            query = query.where(Group.id.in_(group_ids))
+        # Stream ids so memory stays flat regardless of group count
+        group_id_stream = await reader.stream_scalars(query.execution_options(yield_per=500))
+        
+        async for group_id in group_id_stream:
+            async with create_session() as session:
+                result = await LedgerCompactionService(session).compact_group(group_id, cutoff)
+                await session.commit()
+            totals["groups"] += 1
+            totals["expenses"] += result["expenses"]
+            totals["settlements"] += result["settlements"]
+            totals["pairs"] += result["pairs"]
+            totals["changes"] += result["changes"]
+            if totals["groups"] % 100 == 0:
+                print(f"compacted {totals['groups']} groups", flush=True)
+    
+    return totals
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    cutoff_group = parser.add_mutually_exclusive_group(required=True)
+    cutoff_group.add_argument("--before", type=datetime.fromisoformat, help="Compact history before this UTC timestamp")
+    cutoff_group.add_argument("--older-than-days", type=int, help="Compact history older than N days")
+    parser.add_argument("--group", type=UUID, action="append", dest="groups", help="Limit to these groups")
+    args = parser.parse_args(argv)
+    
+    cutoff = args.before or datetime.utcnow() - timedelta(days=args.older_than_days)
+    
+    async def run():
+        try:
+            return await compact_groups(cutoff, args.groups)
+        finally:
+            await dispose_engine()
+    
+    totals = asyncio.run(run())
+    print(
+        f"Compacted {totals['groups']} groups before {cutoff.isoformat()}: "
+        f"{totals['expenses']} expenses and {totals['settlements']} settlements "
+        f"archived into {totals['pairs']} carry-forward rows, "
+        f"{totals['changes']} change log entries pruned"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
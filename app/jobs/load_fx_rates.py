@@ -0,0 +1,82 @@
+"""
+FX rate loader.
+
+Replaces the fx_rates table with the rates in a CSV file of
+`currency,rate` rows, where rate is the value of one unit of the currency
+in any common reference currency (e.g. USD,1 and EUR,1.08). Workers pick
+up the new rates within FX_RATE_CACHE_TTL_SECONDS.
+
+    python -m app.jobs.load_fx_rates rates.csv
+"""
+import argparse
+import asyncio
+import csv
+import re
+import sys
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from typing import List, Optional
+from sqlalchemy import delete, insert
+
+from app.core.database import create_session, dispose_engine
+from app.models.fx import FxRate
+from app.utils.money import CURRENCY_PATTERN
+
+
+def read_rates(path: str) -> dict:
+    """Parse a rates file; the header row is optional."""
+    rates = {}
+    with open(path, newline="") as f:
+        for line_number, row in enumerate(csv.reader(f), start=1):
+            if not row or (line_number == 1 and row[0].strip().lower() == "currency"):
+                continue
+            currency, rate = (value.strip() for value in row[:2])
+            try:
+                rate = Decimal(rate)
+            except InvalidOperation:
+                raise ValueError(f"line {line_number}: invalid rate {rate!r}")
+            if not re.match(CURRENCY_PATTERN, currency) or rate <= 0:
+                raise ValueError(f"line {line_number}: invalid row {row!r}")
+            rates[currency] = rate
+    return rates
+
+
+async def load_rates(rates: dict) -> int:
+    """Replace every stored rate in one transaction."""
+    updated_at = datetime.utcnow()
+    async with create_session() as session:
+        await session.execute(delete(FxRate))
+        await session.execute(insert(FxRate), [
+            {"currency": currency, "rate": rate, "updated_at": updated_at}
+            for currency, rate in rates.items()
+        ])
+        await session.commit()
+    return len(rates)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="CSV file of currency,rate rows")
+    args = parser.parse_args(argv)
+    
+    try:
+        rates = read_rates(args.path)
+    except (OSError, ValueError) as e:
+        print(f"Cannot load {args.path}: {e}", file=sys.stderr)
+        return 1
+    if not rates:
+        print(f"No rates in {args.path}", file=sys.stderr)
+        return 1
+    
+    async def run():
+        try:
+            return await load_rates(rates)
+        finally:
+            await dispose_engine()
+    
+    print(f"Loaded {asyncio.run(run())} FX rates")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,51 @@
+"""
+Recurring expense job.
+
+Creates the expenses of every recurring expense that is due, catching up
+on occurrences missed while nothing was running. Run it from cron, or with
+--loop as a dedicated worker instead of enabling the in-app scheduler
+(RECURRING_SCHEDULER_ENABLED).
+
+    python -m app.jobs.materialize_recurring
+    python -m app.jobs.materialize_recurring --loop
+"""
+import argparse
+import asyncio
+import sys
+from typing import List, Optional
+
+from app.core.config import get_settings
+from app.core.database import dispose_engine
+from app.core.redis_client import RedisClient
+from app.services.recurring_scheduler import materialize_recurring
+
+
+def report(totals: dict) -> None:
+    print(
+        f"Materialized {totals['expenses']} expenses from {totals['templates']} "
+        f"recurring expenses in {totals['batches']} batches",
+        flush=True
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--loop", action="store_true", help="Keep running every RECURRING_SCHEDULER_INTERVAL_SECONDS")
+    args = parser.parse_args(argv)
+    
+    async def run():
+        try:
+            report(await materialize_recurring())
+            while args.loop:
+                await asyncio.sleep(get_settings().RECURRING_SCHEDULER_INTERVAL_SECONDS)
+                report(await materialize_recurring())
+        finally:
+            await RedisClient.close()
+            await dispose_engine()
+    
+    asyncio.run(run())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,54 @@
+"""
+Idempotency key pruning job.
+
+Deletes stored idempotency responses past their expires_at
+(IDEMPOTENCY_RETENTION_SECONDS after the request), in batches of short
+transactions. A retry with a pruned key is handled as a new request.
+
+    python -m app.jobs.prune_idempotency_keys
+    python -m app.jobs.prune_idempotency_keys --batch-size 1000
+"""
+import argparse
+import asyncio
+import sys
+from datetime import datetime
+from typing import List, Optional
+
+from app.core.database import create_session, dispose_engine
+from app.repositories.idempotency_repository import IdempotencyRepository
+
+DEFAULT_BATCH_SIZE = 5000
+
+
+async def prune_expired(now: datetime, batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    """Delete every record expired by `now`, one transaction per batch."""
+    total = 0
+    while True:
+        async with create_session() as session:
+            deleted = await IdempotencyRepository(session).delete_expired(now, batch_size)
+            await session.commit()
+        total += deleted
+        if deleted < batch_size:
+            return total
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Records deleted per transaction")
+    args = parser.parse_args(argv)
+    
+    now = datetime.utcnow()
+    
+    async def run():
+        try:
+            return await prune_expired(now, args.batch_size)
+        finally:
+            await dispose_engine()
+    
+    deleted = asyncio.run(run())
+    print(f"Pruned {deleted} idempotency keys expired before {now.isoformat()}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,60 @@
+"""
+Leaderboard rebuild job.
+
+Drops every leaderboard and recomputes each group's board (and with it the
+global board) from the database. Safe to run while writes continue: a write
+to a group not yet rebuilt rebuilds that group itself, and a board is never
+replaced by an older version.
+
+    python -m app.jobs.rebuild_leaderboards
+"""
+import argparse
+import asyncio
+import sys
+from typing import List, Optional
+from sqlalchemy import select
+
+from app.core.database import create_session, dispose_engine
+from app.core.redis_client import RedisClient
+from app.models.group import Group
+from app.services.leaderboard_service import LeaderboardService
+from app.services.ledger_cache import reset_leaderboards
+
+
+async def rebuild_leaderboards() -> dict:
+    """Rebuild every group's leaderboard, one short session per group."""
+    redis_client = await RedisClient.get_client()
+    totals = {"groups": 0, "deleted_keys": await reset_leaderboards(redis_client)}
+    
+    async with create_session() as reader:
+        # Stream ids so memory stays flat regardless of group count
+        group_id_stream = await reader.stream_scalars(select(Group.id).execution_options(yield_per=500))
+        
+        async for group_id in group_id_stream:
+            async with create_session() as session:
+                await LeaderboardService(session, redis_client).rebuild_group(group_id)
+            totals["groups"] += 1
+            if totals["groups"] % 100 == 0:
+                print(f"rebuilt {totals['groups']} groups", flush=True)
+    
+    return totals
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.parse_args(argv)
+    
+    async def run():
+        try:
+            return await rebuild_leaderboards()
+        finally:
+            await RedisClient.close()
+            await dispose_engine()
+    
+    totals = asyncio.run(run())
+    print(f"Rebuilt leaderboards for {totals['groups']} groups ({totals['deleted_keys']} old keys dropped)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
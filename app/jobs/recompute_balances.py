@@ -0,0 +1,192 @@
+"""
+Batch balance recompute job.
+
+Streams every group id, replays the ledgers of each chunk of groups with one
+query per table, and fans the CPU-bound part (net balances and the simplified
+plan) out to a process pool, one sub-batch per worker. The main process only
+does I/O: while the workers compute one chunk it reads the next, and results
+go back to Redis in one pipeline per sub-batch as the same JSON bytes the
+balances endpoints cache, so cached views are warm after a deploy or flush.
+The greedy plan that writes repair is stored with the simplified view, so
+the two agree, along with its ranks for per-user settle-up reads.
+
+Each group is written with a compare-and-set against the ledger version of
+the last write that dropped its views: a group written to while its chunk
+was in flight is skipped rather than cached at an old version, and its next
+read recomputes it. benchmarks/bench_recompute.py measures how throughput
+scales with --workers.
+
+    python -m app.jobs.recompute_balances [--workers N] [--chunk-size N]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+import redis.asyncio as redis
+
+from app.core.database import create_session, dispose_engine
+from app.core.redis_client import RedisClient
+from app.models.group import Group
+from app.services.balance_service import BalanceService
+from app.services.ledger_cache import store_balance_views
+from app.utils.balance_simplification import PlanRanks, plan_ranks, simplify_balances
+from app.utils.ledger import PairKey, PairState, net_balances_from_states, raw_balances_from_states
+from app.utils.serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+# (group id, pair states, conversion rates): everything a worker needs
+GroupLedger = Tuple[str, Dict[PairKey, PairState], Dict[str, Decimal]]
+# (group id, raw JSON, simplified JSON, plan ranks): what a worker sends back
+GroupResult = Tuple[str, bytes, bytes, PlanRanks]
+
+
+def compute_balances(ledgers: List[GroupLedger]) -> List[GroupResult]:
+    """
+    Worker entry point: raw and simplified balances of each group, encoded
+    exactly as the balances endpoints cache them, and the plan's ranks.
+    Returning bytes keeps the encoding off the main process and the result
+    cheap to pickle.
+    """
+    results = []
+    for group_id, states, rates in ledgers:
+        raw = raw_balances_from_states(states, rates)
+        net_balances = net_balances_from_states(states, rates)
+        simplified = simplify_balances(net_balances)
+        results.append((group_id, dumps(raw), dumps(simplified), plan_ranks(net_balances)))
+    return results
+
+
+async def load_ledgers(
+    session: AsyncSession, group_ids: List[UUID]
+) -> Tuple[List[GroupLedger], Dict[str, int], int]:
+    """
+    Pair states and rates of a chunk of groups, the ledger versions read
+    before them, and how many groups could not be converted (missing rate).
+    """
+    result = await session.execute(
+        select(Group.id, Group.base_currency, Group.ledger_version).where(Group.id.in_(group_ids))
+    )
+    groups = result.all()
+    versions = {str(group_id): version for group_id, _, version in groups}
+    balance_service = BalanceService(session)
+    states = await balance_service.get_pair_states_bulk([group_id for group_id, _, _ in groups])
+
+    ledgers: List[GroupLedger] = []
+    failed = 0
+    for group_id, base_currency, _ in groups:
+        try:
+            rates = await balance_service.get_conversion_rates(base_currency, states[group_id])
+        except HTTPException as exc:
+            logger.warning("Skipping group %s: %s", group_id, exc.detail)
+            failed += 1
+            continue
+        ledgers.append((str(group_id), states[group_id], rates))
+    return ledgers, versions, failed
+
+
+async def write_results(
+    redis_client: redis.Redis, results: List[GroupResult], read: Dict[str, int]
+) -> int:
+    """Cache the results of groups no write has touched since they were read; returns how many."""
+    pipe = redis_client.pipeline(transaction=False)
+    for group_id, raw, simplified, ranks in results:
+        store_balance_views(pipe, group_id, read[group_id], raw, simplified, ranks)
+    return sum(await pipe.execute())
+
+
+def _split(ledgers: List[GroupLedger], parts: int) -> List[List[GroupLedger]]:
+    size = -(-len(ledgers) // parts)
+    return [ledgers[i:i + size] for i in range(0, len(ledgers), size)]
+
+
+async def recompute_balances(
+    workers: int, chunk_size: int, executor: Optional[Executor] = None
+) -> dict:
+    """Recompute and cache balances for every group."""
+    redis_client = await RedisClient.get_client()
+    loop = asyncio.get_running_loop()
+    totals = {"groups": 0, "written": 0, "skipped": 0, "failed": 0}
+    started = time.monotonic()
+    pool = executor or ProcessPoolExecutor(max_workers=workers)
+
+    async def finish(batch: List[GroupLedger], read: Dict[str, int]) -> None:
+        results = await loop.run_in_executor(pool, compute_balances, batch)
+        written = await write_results(redis_client, results, read)
+        totals["written"] += written
+        totals["skipped"] += len(results) - written
+
+    pending: set = set()
+    try:
+        async with create_session() as reader:
+            # Stream ids so memory stays flat regardless of group count
+            group_id_stream = await reader.stream_scalars(
+                select(Group.id).execution_options(yield_per=chunk_size)
+            )
+            async for chunk in group_id_stream.partitions(chunk_size):
+                async with create_session() as session:
+                    ledgers, versions, failed = await load_ledgers(session, list(chunk))
+                totals["failed"] += failed
+                if ledgers:
+                    for batch in _split(ledgers, workers):
+                        pending.add(asyncio.ensure_future(finish(batch, versions)))
+
+                # Read ahead at most one chunk while the workers are busy
+                while len(pending) > workers:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        task.result()
+
+                totals["groups"] += len(chunk)
+                elapsed = time.monotonic() - started
+                print(f"read {totals['groups']} groups, cached {totals['written']} "
+                      f"({totals['groups'] / elapsed:.0f} groups/s)", flush=True)
+
+        if pending:
+            await asyncio.gather(*pending)
+            pending = set()
+    finally:
+        for task in pending:
+            task.cancel()
+        if executor is None:
+            pool.shutdown(cancel_futures=True)
+
+    return totals
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=500, help="Groups read per bulk query")
+    args = parser.parse_args(argv)
+    if args.workers < 1 or args.chunk_size < 1:
+        parser.error("--workers and --chunk-size must be positive")
+
+    async def run():
+        try:
+            return await recompute_balances(args.workers, args.chunk_size)
+        finally:
+            await RedisClient.close()
+            await dispose_engine()
+
+    started = time.monotonic()
+    totals = asyncio.run(run())
+    print(
+        f"Recomputed {totals['groups']} groups in {time.monotonic() - started:.1f}s: "
+        f"{totals['written']} cached, {totals['skipped']} changed during the run, "
+        f"{totals['failed']} missing FX rates"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,42 +1,39 @@
+from typing import Optional
 from fastapi import FastAPI, Request, status
 from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
-from app.core.config import settings
-from app.core.redis_client import RedisClient
-from app.api.routers import users, groups, expenses, balances, settlements, health
+from app.core.config import get_settings
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Lifespan context manager for startup and shutdown."""
-    # Startup
-    await RedisClient.get_client()
+    # Startup: nothing to open eagerly; the engine, Redis and the event
+    # broker connect on first use so workers start serving immediately
+    from app.services.compute_offload import compute_offloader, loop_lag_monitor
+    from app.services.recurring_scheduler import recurring_scheduler
+    
+    loop_lag_monitor.start()
+    if get_settings().RECURRING_SCHEDULER_ENABLED:
+        recurring_scheduler.start()
     yield
     # Shutdown
+    from app.core.database import dispose_engine
+    from app.core.redis_client import RedisClient
+    from app.services.group_events import event_broker
+    
+    await recurring_scheduler.stop()
+    await loop_lag_monitor.stop()
+    compute_offloader.shutdown()
+    await event_broker.close()
     await RedisClient.close()
-
-
-app = FastAPI(
-    title=settings.PROJECT_NAME,
-    version="1.0.0",
-    lifespan=lifespan
-)
-
-# Add CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # Allows all origins
-    allow_credentials=True,
-    allow_methods=["*"],  # Allows all methods
-    allow_headers=["*"],  # Allows all headers
-)
+    await dispose_engine()
 
 
 # Global exception handler
-@app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
     """Handle all unhandled exceptions."""
     return JSONResponse(
@@ -50,7 +47,6 @@ async def global_exception_handler(request: Request, exc: Exception):
 
 
 # Validation error handler
-@app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
     """Handle validation errors."""
     errors = []
@@ -70,16 +66,57 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
     )
 
 
-# Include routers
-app.include_router(health.router)
-app.include_router(users.router, prefix=settings.API_V1_PREFIX)
-app.include_router(groups.router, prefix=settings.API_V1_PREFIX)
-app.include_router(expenses.router, prefix=settings.API_V1_PREFIX)
-app.include_router(balances.router, prefix=settings.API_V1_PREFIX)
-app.include_router(settlements.router, prefix=settings.API_V1_PREFIX)
+def create_app() -> FastAPI:
+    """Build the application. Routers (and the models they use) are imported here."""
+    settings = get_settings()
+    app = FastAPI(
+        title=settings.PROJECT_NAME,
+        version="1.0.0",
+        lifespan=lifespan
+    )
+    
+    # Add CORS middleware
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],  # Allows all origins
+        allow_credentials=True,
+        allow_methods=["*"],  # Allows all methods
+        allow_headers=["*"],  # Allows all headers
+    )
+    
+    app.add_exception_handler(Exception, global_exception_handler)
+    app.add_exception_handler(RequestValidationError, validation_exception_handler)
+    
+    # Include routers
+    from app.api.routers import users, groups, expenses, balances, settlements, events, changes, recurring_expenses, admin, health
+    
+    app.include_router(health.router)
+    app.include_router(users.router, prefix=settings.API_V1_PREFIX)
+    app.include_router(groups.router, prefix=settings.API_V1_PREFIX)
+    app.include_router(expenses.router, prefix=settings.API_V1_PREFIX)
+    app.include_router(balances.router, prefix=settings.API_V1_PREFIX)
+    app.include_router(settlements.router, prefix=settings.API_V1_PREFIX)
+    app.include_router(events.router, prefix=settings.API_V1_PREFIX)
+    app.include_router(changes.router, prefix=settings.API_V1_PREFIX)
+    app.include_router(recurring_expenses.router, prefix=settings.API_V1_PREFIX)
+    app.include_router(admin.router, prefix=settings.API_V1_PREFIX)
+    
+    return app
+
+
+_app: Optional[FastAPI] = None
+
+
+def __getattr__(name: str):
+    # `uvicorn app.main:app` and `from app.main import app` build the app on first access
+    global _app
+    if name == "app":
+        if _app is None:
+            _app = create_app()
+        return _app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
-
+    uvicorn.run("app.main:create_app", factory=True, host="0.0.0.0", port=8000)
@@ -1,15 +1,34 @@
 from app.models.user import User
-from app.models.group import Group, GroupMember
+from app.models.group import Group, GroupMember, GroupSummary
 from app.models.expense import Expense, ExpenseSplit, SplitType
 from app.models.settlement import Settlement
+from app.models.idempotency import IdempotencyRecord
+from app.models.change import GroupChange
+from app.models.recurring import RecurringExpense
+from app.models.fx import FxRate
+from app.models.ledger import (
+    BalanceCarryForward,
+    ExpenseArchive,
+    ExpenseSplitArchive,
+    SettlementArchive,
+)
 
 __all__ = [
     "User",
     "Group",
     "GroupMember",
+    "GroupSummary",
     "Expense",
     "ExpenseSplit",
     "SplitType",
     "Settlement",
+    "IdempotencyRecord",
+    "GroupChange",
+    "RecurringExpense",
+    "FxRate",
+    "BalanceCarryForward",
+    "ExpenseArchive",
+    "ExpenseSplitArchive",
+    "SettlementArchive",
 ]
 
@@ -0,0 +1,18 @@
+from datetime import datetime
+from sqlalchemy import Column, String, DateTime, ForeignKey, Integer, JSON
+from sqlalchemy.dialects.postgresql import UUID
+from app.core.database import Base
+
+
+class GroupChange(Base):
+    """One write to a group, numbered by the group's change sequence (delta sync log)."""
+    __tablename__ = "group_changes"
+    
+    group_id = Column(UUID(as_uuid=True), ForeignKey("groups.id", ondelete="CASCADE"), primary_key=True)
+    seq = Column(Integer, primary_key=True, autoincrement=False)
+    kind = Column(String(50), nullable=False)  # e.g. "expense_created", "member_added"
+    entity_id = Column(UUID(as_uuid=True), nullable=True)
+    data = Column(JSON, nullable=True)  # The entity after the write; null on delete
+    # Users whose net balance it changed; JSON null when too many to list (see USER_IDS_LIMIT)
+    user_ids = Column(JSON, nullable=False, default=list)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
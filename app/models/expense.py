@@ -1,7 +1,10 @@
 import uuid
 from datetime import datetime
 from decimal import Decimal
-from sqlalchemy import Column, String, DateTime, ForeignKey, Numeric, Enum as SQLEnum
+from sqlalchemy import (
+    Column, DDL, String, DateTime, ForeignKey, ForeignKeyConstraint, Index, Integer, Numeric,
+    PrimaryKeyConstraint, Enum as SQLEnum, event
+)
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from app.core.database import Base
@@ -14,28 +17,53 @@ class SplitType(str, enum.Enum):
     PERCENT = "PERCENT"
 
 
+# On PostgreSQL, expenses, expense_splits and settlements are hash-partitioned
+# by group_id (migration 003); every group's ledger lives in one partition.
+# A partitioned table's keys must include the partition key, so group_id is
+# part of every primary key and of the splits' reference to their expense.
 class Expense(Base):
     __tablename__ = "expenses"
+    __table_args__ = (
+        PrimaryKeyConstraint("id", "group_id", name="expenses_pkey"),
+        # Serves both group lookups and as-of range scans
+        Index("ix_expenses_group_id_created_at", "group_id", "created_at"),
+    )
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    group_id = Column(UUID(as_uuid=True), ForeignKey("groups.id", ondelete="CASCADE"), nullable=False, index=True)
+    id = Column(UUID(as_uuid=True), default=uuid.uuid4)
+    group_id = Column(UUID(as_uuid=True), ForeignKey("groups.id", ondelete="CASCADE"), nullable=False)
     paid_by_user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     amount = Column(Numeric(12, 2), nullable=False)
+    currency = Column(String(3), nullable=False)  # ISO 4217; splits are in the same currency
     description = Column(String(500), nullable=False)
     split_type = Column(SQLEnum(SplitType), nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    # Optimistic concurrency: updates and deletes match on the loaded version.
+    # Bumped explicitly on every edit, since a split-only edit leaves the row clean.
+    version = Column(Integer, nullable=False, default=1)
     
     # Relationships
     group = relationship("Group", back_populates="expenses")
     paid_by = relationship("User")
     splits = relationship("ExpenseSplit", back_populates="expense", cascade="all, delete-orphan")
+    
+    __mapper_args__ = {"version_id_col": version, "version_id_generator": False}
 
 
 class ExpenseSplit(Base):
     __tablename__ = "expense_splits"
+    __table_args__ = (
+        # group_id leads the key so a group's splits are one index range
+        PrimaryKeyConstraint("group_id", "expense_id", "user_id", name="expense_splits_pkey"),
+        ForeignKeyConstraint(
+            ["expense_id", "group_id"], ["expenses.id", "expenses.group_id"],
+            name="expense_splits_expense_id_group_id_fkey", ondelete="CASCADE"
+        ),
+    )
     
-    expense_id = Column(UUID(as_uuid=True), ForeignKey("expenses.id", ondelete="CASCADE"), primary_key=True)
-    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    expense_id = Column(UUID(as_uuid=True), nullable=False)
+    # Denormalized from expenses so balance queries filter splits by group directly
+    group_id = Column(UUID(as_uuid=True), ForeignKey("groups.id", ondelete="CASCADE"), nullable=False, index=True)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     amount = Column(Numeric(12, 2), nullable=False)
     percent = Column(Numeric(5, 2), nullable=True)  # For PERCENT split type
     
@@ -43,3 +71,33 @@ class ExpenseSplit(Base):
     expense = relationship("Expense", back_populates="splits")
     user = relationship("User")
 
+
+# Full-text search over descriptions (migration 006). Each dialect indexes
+# differently, so the search column/table is created by DDL rather than mapped:
+# PostgreSQL gets a generated tsvector with a (group_id, tsvector) GIN index,
+# SQLite an external-content FTS5 table kept in sync by triggers.
+SEARCH_DDL = {
+    "postgresql": [
+        "CREATE EXTENSION IF NOT EXISTS btree_gin",
+        "ALTER TABLE expenses ADD COLUMN search_vector tsvector "
+        "GENERATED ALWAYS AS (to_tsvector('simple', description)) STORED",
+        "CREATE INDEX ix_expenses_search_vector ON expenses USING gin (group_id, search_vector)",
+    ],
+    "sqlite": [
+        "CREATE VIRTUAL TABLE expenses_fts USING fts5(description, content='expenses', content_rowid='rowid')",
+        "CREATE TRIGGER expenses_fts_ai AFTER INSERT ON expenses BEGIN "
+        "INSERT INTO expenses_fts(rowid, description) VALUES (new.rowid, new.description); END",
+        "CREATE TRIGGER expenses_fts_ad AFTER DELETE ON expenses BEGIN "
+        "INSERT INTO expenses_fts(expenses_fts, rowid, description) VALUES ('delete', old.rowid, old.description); END",
+        "CREATE TRIGGER expenses_fts_au AFTER UPDATE OF description ON expenses BEGIN "
+        "INSERT INTO expenses_fts(expenses_fts, rowid, description) VALUES ('delete', old.rowid, old.description); "
+        "INSERT INTO expenses_fts(rowid, description) VALUES (new.rowid, new.description); END",
+    ],
+}
+
+for _dialect, _statements in SEARCH_DDL.items():
+    for _statement in _statements:
+        event.listen(Expense.__table__, "after_create", DDL(_statement).execute_if(dialect=_dialect))
+event.listen(
+    Expense.__table__, "before_drop", DDL("DROP TABLE IF EXISTS expenses_fts").execute_if(dialect="sqlite")
+)
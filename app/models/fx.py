@@ -0,0 +1,16 @@
+from datetime import datetime
+from sqlalchemy import Column, String, DateTime, Numeric
+from app.core.database import Base
+
+
+class FxRate(Base):
+    """
+    Value of one unit of a currency in a common reference currency, loaded
+    from a rates file (app.jobs.load_fx_rates). Converting between two
+    currencies divides their rates, so the reference itself never matters.
+    """
+    __tablename__ = "fx_rates"
+    
+    currency = Column(String(3), primary_key=True)
+    rate = Column(Numeric(20, 10), nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
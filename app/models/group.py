@@ -1,6 +1,6 @@
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, DateTime, ForeignKey
+from sqlalchemy import Column, String, DateTime, ForeignKey, Index, Integer, JSON
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from app.core.database import Base
@@ -11,7 +11,16 @@ class Group(Base):
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     name = Column(String(255), nullable=False)
+    # Balances are converted into this currency when read
+    base_currency = Column(String(3), nullable=False, default="USD")
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    # History before this point is folded into balance_carry_forwards
+    compacted_before = Column(DateTime, nullable=True)
+    # Bumped in the same transaction as every ledger write; cached pair
+    # states are valid only for the version they were built at
+    ledger_version = Column(Integer, nullable=False, default=0)
+    # Sequence number of the latest write of any kind (group_changes.seq)
+    change_seq = Column(Integer, nullable=False, default=0)
     
     # Relationships
     members = relationship("GroupMember", back_populates="group", cascade="all, delete-orphan")
@@ -29,4 +38,29 @@ class GroupMember(Base):
     # Relationships
     group = relationship("Group", back_populates="members")
     user = relationship("User")
+    
+    __table_args__ = (
+        # "Groups of a user", in the order they joined (the key leads with group_id)
+        Index("ix_group_members_user_joined", "user_id", "joined_at", "group_id"),
+        # A group's roster in join order, for keyset pages
+        Index("ix_group_members_group_joined", "group_id", "joined_at", "user_id"),
+    )
+
+
+class GroupSummary(Base):
+    """
+    Per-group totals maintained by every write in the same transaction, so
+    group listings never read the ledger tables.
+    """
+    __tablename__ = "group_summaries"
+    
+    group_id = Column(UUID(as_uuid=True), ForeignKey("groups.id", ondelete="CASCADE"), primary_key=True)
+    member_count = Column(Integer, nullable=False, default=0)
+    expense_count = Column(Integer, nullable=False, default=0)  # Archived expenses included
+    # Total of expense amounts per currency, as strings: {"USD": "120.50"}
+    spend = Column(JSON, nullable=False, default=dict)
+    # Latest expense or settlement; deleting one does not move it back
+    last_activity_at = Column(DateTime, nullable=True)
+    # groups.change_seq of the latest write reflected
+    version = Column(Integer, nullable=False, default=0)
 
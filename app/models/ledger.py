@@ -0,0 +1,57 @@
+from datetime import datetime
+from sqlalchemy import Column, String, DateTime, ForeignKey, Index, Numeric, Enum as SQLEnum
+from sqlalchemy.dialects.postgresql import UUID
+from app.core.database import Base
+from app.models.expense import SplitType
+
+
+class BalanceCarryForward(Base):
+    """Folded history of one (debtor, creditor, currency) pair before the group's compaction cutoff."""
+    __tablename__ = "balance_carry_forwards"
+    
+    group_id = Column(UUID(as_uuid=True), ForeignKey("groups.id", ondelete="CASCADE"), primary_key=True)
+    debtor_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    creditor_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    currency = Column(String(3), primary_key=True)
+    debt_amount = Column(Numeric(14, 2), nullable=False)  # Sum of split debts
+    settled_amount = Column(Numeric(14, 2), nullable=False)  # Sum of settlements
+    cutoff_at = Column(DateTime, nullable=False)
+
+
+class ExpenseArchive(Base):
+    __tablename__ = "expenses_archive"
+    __table_args__ = (Index("ix_expenses_archive_group_id_created_at", "group_id", "created_at"),)
+    
+    id = Column(UUID(as_uuid=True), primary_key=True)
+    group_id = Column(UUID(as_uuid=True), ForeignKey("groups.id", ondelete="CASCADE"), nullable=False)
+    paid_by_user_id = Column(UUID(as_uuid=True), nullable=False)
+    amount = Column(Numeric(12, 2), nullable=False)
+    currency = Column(String(3), nullable=False)
+    description = Column(String(500), nullable=False)
+    split_type = Column(SQLEnum(SplitType), nullable=False)
+    created_at = Column(DateTime, nullable=False)
+    archived_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class ExpenseSplitArchive(Base):
+    __tablename__ = "expense_splits_archive"
+    
+    expense_id = Column(UUID(as_uuid=True), ForeignKey("expenses_archive.id", ondelete="CASCADE"), primary_key=True)
+    user_id = Column(UUID(as_uuid=True), primary_key=True)
+    group_id = Column(UUID(as_uuid=True), nullable=False, index=True)
+    amount = Column(Numeric(12, 2), nullable=False)
+    percent = Column(Numeric(5, 2), nullable=True)
+
+
+class SettlementArchive(Base):
+    __tablename__ = "settlements_archive"
+    __table_args__ = (Index("ix_settlements_archive_group_id_created_at", "group_id", "created_at"),)
+    
+    id = Column(UUID(as_uuid=True), primary_key=True)
+    group_id = Column(UUID(as_uuid=True), ForeignKey("groups.id", ondelete="CASCADE"), nullable=False)
+    payer_id = Column(UUID(as_uuid=True), nullable=False)
+    payee_id = Column(UUID(as_uuid=True), nullable=False)
+    amount = Column(Numeric(12, 2), nullable=False)
+    currency = Column(String(3), nullable=False)
+    created_at = Column(DateTime, nullable=False)
+    archived_at = Column(DateTime, default=datetime.utcnow, nullable=False)
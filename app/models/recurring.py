@@ -0,0 +1,32 @@
+import uuid
+from datetime import datetime
+from sqlalchemy import Column, String, DateTime, ForeignKey, Integer, JSON, Numeric, Enum as SQLEnum
+from sqlalchemy.dialects.postgresql import UUID
+from app.core.database import Base
+from app.models.expense import SplitType
+from app.utils.recurrence import RecurrenceInterval
+
+
+class RecurringExpense(Base):
+    """Template that the scheduler materializes into an expense at every occurrence."""
+    __tablename__ = "recurring_expenses"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    group_id = Column(UUID(as_uuid=True), ForeignKey("groups.id", ondelete="CASCADE"), nullable=False, index=True)
+    paid_by_user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    amount = Column(Numeric(12, 2), nullable=False)
+    currency = Column(String(3), nullable=False)
+    description = Column(String(500), nullable=False)
+    split_type = Column(SQLEnum(SplitType), nullable=False)
+    # Split spec as submitted (ExpenseSplitCreate dicts); EQUAL with no splits
+    # is re-split over the members at each occurrence
+    splits = Column(JSON, nullable=False, default=list)
+    interval = Column(SQLEnum(RecurrenceInterval), nullable=False)
+    interval_count = Column(Integer, nullable=False, default=1)
+    starts_at = Column(DateTime, nullable=False)
+    ends_at = Column(DateTime, nullable=True)
+    # Occurrences materialized so far; next_run_at is occurrence number
+    # `occurrences`, or null once the series has ended
+    occurrences = Column(Integer, nullable=False, default=0)
+    next_run_at = Column(DateTime, nullable=True, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
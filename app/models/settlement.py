@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime
 from decimal import Decimal
-from sqlalchemy import Column, DateTime, ForeignKey, Numeric
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Numeric, PrimaryKeyConstraint, String
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from app.core.database import Base
@@ -9,12 +9,19 @@ from app.core.database import Base
 
 class Settlement(Base):
     __tablename__ = "settlements"
+    __table_args__ = (
+        # group_id is the partition key on PostgreSQL (see app.models.expense)
+        PrimaryKeyConstraint("id", "group_id", name="settlements_pkey"),
+        # Serves group lookups, chronological replay and as-of range scans
+        Index("ix_settlements_group_id_created_at", "group_id", "created_at"),
+    )
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    group_id = Column(UUID(as_uuid=True), ForeignKey("groups.id", ondelete="CASCADE"), nullable=False, index=True)
+    id = Column(UUID(as_uuid=True), default=uuid.uuid4)
+    group_id = Column(UUID(as_uuid=True), ForeignKey("groups.id", ondelete="CASCADE"), nullable=False)
     payer_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     payee_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     amount = Column(Numeric(12, 2), nullable=False)
+    currency = Column(String(3), nullable=False)  # Only offsets debts in this currency
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     
     # Relationships
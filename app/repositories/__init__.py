@@ -2,11 +2,17 @@ from app.repositories.user_repository import UserRepository
 from app.repositories.group_repository import GroupRepository
 from app.repositories.expense_repository import ExpenseRepository
 from app.repositories.settlement_repository import SettlementRepository
+from app.repositories.idempotency_repository import IdempotencyRepository
+from app.repositories.change_repository import ChangeRepository
+from app.repositories.group_summary_repository import GroupSummaryRepository
 
 __all__ = [
     "UserRepository",
     "GroupRepository",
     "ExpenseRepository",
     "SettlementRepository",
+    "IdempotencyRepository",
+    "ChangeRepository",
+    "GroupSummaryRepository",
 ]
 
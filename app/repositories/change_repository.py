@@ -0,0 +1,135 @@
+from datetime import datetime
+from typing import Collection, List, Optional
+from uuid import UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func, update, delete
+from app.models.change import GroupChange
+from app.models.group import Group
+
+# Writes touching more users than this log JSON null instead of listing
+# them; delta syncs replay the whole group for those anyway
+USER_IDS_LIMIT = 500
+
+
+class ChangeRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+    
+    async def record(
+        self,
+        group_id: UUID,
+        kind: str,
+        entity_id: UUID | None,
+        data: dict | None,
+        user_ids: list[UUID],
+        ledger: bool = False
+    ) -> tuple[int, int]:
+        """
+        Log a write to a group in the current transaction and return the new
+        (change_seq, ledger_version). ledger=True marks writes that change
+        balances. The group row stays locked until commit, so sequence order
+        is commit order.
+        """
+        values = {"change_seq": Group.change_seq + 1}
+        if ledger:
+            values["ledger_version"] = Group.ledger_version + 1
+        result = await self.session.execute(
+            update(Group)
+            .where(Group.id == group_id)
+            .values(**values)
+            .returning(Group.change_seq, Group.ledger_version)
+        )
+        seq, ledger_version = result.one()
+        
+        self.session.add(GroupChange(
+            group_id=group_id,
+            seq=seq,
+            kind=kind,
+            entity_id=entity_id,
+            data=data,
+            user_ids=_logged_user_ids(user_ids),
+        ))
+        await self.session.flush()
+        return seq, ledger_version
+    
+    async def record_many(
+        self,
+        group_id: UUID,
+        changes: list[tuple[str, UUID | None, dict | None, list[UUID]]],
+        ledger: bool = False
+    ) -> tuple[int, int]:
+        """
+        Log several writes to a group with one sequence update and at most one
+        ledger version bump. `changes` holds (kind, entity_id, data, user_ids);
+        returns the (change_seq, ledger_version) after the last one.
+        """
+        values = {"change_seq": Group.change_seq + len(changes)}
+        if ledger:
+            values["ledger_version"] = Group.ledger_version + 1
+        result = await self.session.execute(
+            update(Group)
+            .where(Group.id == group_id)
+            .values(**values)
+            .returning(Group.change_seq, Group.ledger_version)
+        )
+        last_seq, ledger_version = result.one()
+        
+        first_seq = last_seq - len(changes) + 1
+        self.session.add_all([
+            GroupChange(
+                group_id=group_id,
+                seq=first_seq + offset,
+                kind=kind,
+                entity_id=entity_id,
+                data=data,
+                user_ids=_logged_user_ids(user_ids),
+            )
+            for offset, (kind, entity_id, data, user_ids) in enumerate(changes)
+        ])
+        await self.session.flush()
+        return last_seq, ledger_version
+    
+    async def get_since(self, group_id: UUID, since: int, limit: int) -> list[GroupChange]:
+        """Changes after `since`, oldest first."""
+        result = await self.session.execute(
+            select(GroupChange)
+            .where(GroupChange.group_id == group_id, GroupChange.seq > since)
+            .order_by(GroupChange.seq)
+            .limit(limit)
+        )
+        return list(result.scalars().all())
+    
+    async def get_oldest_seq(self, group_id: UUID) -> int | None:
+        """Oldest change still in the log."""
+        result = await self.session.execute(
+            select(func.min(GroupChange.seq)).where(GroupChange.group_id == group_id)
+        )
+        return result.scalar_one_or_none()
+    
+    async def get_current_seq(self, group_id: UUID) -> int | None:
+        """Latest change sequence number of a group."""
+        result = await self.session.execute(
+            select(Group.change_seq).where(Group.id == group_id)
+        )
+        return result.scalar_one_or_none()
+    
+    async def get_versions(self, group_id: UUID) -> tuple[int, int] | None:
+        """A group's (change_seq, ledger_version), read together."""
+        result = await self.session.execute(
+            select(Group.change_seq, Group.ledger_version).where(Group.id == group_id)
+        )
+        row = result.one_or_none()
+        return tuple(row) if row else None
+    
+    async def prune(self, group_id: UUID, before: datetime) -> int:
+        """Drop changes logged before a time; clients behind them get a snapshot."""
+        result = await self.session.execute(
+            delete(GroupChange).where(GroupChange.group_id == group_id, GroupChange.created_at < before)
+        )
+        return result.rowcount
+
+
+def _logged_user_ids(user_ids: Collection[UUID]) -> Optional[List[str]]:
+    if len(user_ids) > USER_IDS_LIMIT:
+        return None
+    return sorted(str(user_id) for user_id in user_ids)
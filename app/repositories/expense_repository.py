@@ -1,9 +1,17 @@
+import re
+from datetime import datetime
+from typing import Optional
 from uuid import UUID
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import insert, select, func, literal_column, table, tuple_
 from sqlalchemy.orm import selectinload
 from app.models.expense import Expense, ExpenseSplit
-from app.models.group import Group
+from app.models.ledger import ExpenseArchive, ExpenseSplitArchive
+
+
+SEARCH_TOKEN = re.compile(r"\w+", re.UNICODE)
+# Splits per INSERT: bounds statement size for expenses over very large groups
+SPLIT_INSERT_BATCH = 5000
 
 
 class ExpenseRepository:
@@ -11,25 +19,20 @@ class ExpenseRepository:
         self.session = session
     
     async def create(self, expense_data: dict, splits: list[dict]) -> Expense:
-        """Create a new expense with splits."""
+        """
+        Create a new expense with splits. Splits are bulk inserted in batches
+        without building ORM objects, and are not loaded onto the expense;
+        callers already hold them.
+        """
         expense = Expense(**expense_data)
         self.session.add(expense)
         await self.session.flush()
         
-        # Create splits
-        for split_data in splits:
-            split = ExpenseSplit(expense_id=expense.id, **split_data)
-            self.session.add(split)
-        
-        await self.session.flush()
-        
-        # Refresh expense with splits loaded
-        result = await self.session.execute(
-            select(Expense)
-            .where(Expense.id == expense.id)
-            .options(selectinload(Expense.splits))
-        )
-        expense = result.scalar_one()
+        rows = [{"expense_id": expense.id, "group_id": expense.group_id, **split_data} for split_data in splits]
+        for start in range(0, len(rows), SPLIT_INSERT_BATCH):
+            await self.session.execute(insert(ExpenseSplit.__table__), rows[start:start + SPLIT_INSERT_BATCH])
+        # Loading them would mean one ORM object per split
+        self.session.expire(expense, ["splits"])
         return expense
     
     async def get_by_id(self, expense_id: UUID) -> Expense | None:
@@ -50,4 +53,78 @@ class ExpenseRepository:
             .order_by(Expense.created_at.desc())
         )
         return result.scalars().all()
-
+    
+    async def get_archived_by_group(self, group_id: UUID):
+        """Get compacted (archived) expenses for a group, newest first."""
+        result = await self.session.execute(
+            select(ExpenseArchive)
+            .where(ExpenseArchive.group_id == group_id)
+            .order_by(ExpenseArchive.created_at.desc())
+        )
+        return result.scalars().all()
+    
+    async def get_archived_splits(self, expense_ids: list[UUID]):
+        """Get archived splits for the given archived expenses."""
+        result = await self.session.execute(
+            select(ExpenseSplitArchive).where(ExpenseSplitArchive.expense_id.in_(expense_ids))
+        )
+        return result.scalars().all()
+    
+    async def search(
+        self,
+        group_id: UUID,
+        query: str,
+        limit: int,
+        after: Optional[tuple[float, datetime, UUID]] = None
+    ) -> list[tuple[float, datetime, UUID]]:
+        """
+        Full-text search of a group's expense descriptions. Returns
+        (score, created_at, id) rows, best match first; `after` is the last
+        row of the previous page.
+        """
+        # Match every word of the query; punctuation never reaches the parser
+        terms = SEARCH_TOKEN.findall(query.lower())
+        if not terms:
+            return []
+        
+        if self.session.get_bind().dialect.name == "postgresql":
+            search_vector = literal_column("expenses.search_vector")
+            ts_query = func.plainto_tsquery("simple", " ".join(terms))
+            score = func.ts_rank(search_vector, ts_query)
+            matches = (
+                select(score.label("score"), Expense.created_at, Expense.id)
+                .where(Expense.group_id == group_id, search_vector.op("@@")(ts_query))
+            )
+        else:
+            fts = table("expenses_fts")
+            # bm25 is lower-is-better; negate so both dialects sort descending
+            score = -func.bm25(literal_column("expenses_fts"))
+            matches = (
+                select(score.label("score"), Expense.created_at, Expense.id)
+                .select_from(fts)
+                .join(Expense, literal_column("expenses.rowid") == literal_column("expenses_fts.rowid"))
+                .where(
+                    literal_column("expenses_fts").op("MATCH")(" ".join(f'"{term}"' for term in terms)),
+                    Expense.group_id == group_id
+                )
+            )
+        
+        # Keyset pagination over (score, created_at, id), all descending
+        ranked = matches.subquery()
+        page = select(ranked.c.score, ranked.c.created_at, ranked.c.id)
+        if after is not None:
+            page = page.where(tuple_(ranked.c.score, ranked.c.created_at, ranked.c.id) < tuple_(*after))
+        result = await self.session.execute(
+            page.order_by(ranked.c.score.desc(), ranked.c.created_at.desc(), ranked.c.id.desc()).limit(limit)
+        )
+        return [tuple(row) for row in result.all()]
+    
+    async def get_many(self, expense_ids: list[UUID]) -> list[Expense]:
+        """Get expenses by ID with splits, in the given order."""
+        result = await self.session.execute(
+            select(Expense)
+            .where(Expense.id.in_(expense_ids))
+            .options(selectinload(Expense.splits))
+        )
+        by_id = {expense.id: expense for expense in result.scalars().all()}
+        return [by_id[expense_id] for expense_id in expense_ids if expense_id in by_id]
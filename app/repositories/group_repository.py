@@ -1,8 +1,9 @@
+from datetime import datetime
 from uuid import UUID
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, tuple_
 from sqlalchemy.orm import selectinload
-from app.models.group import Group, GroupMember
+from app.models.group import Group, GroupMember, GroupSummary
 from app.models.user import User
 from app.schemas.group import GroupCreate, GroupMemberCreate
 
@@ -16,15 +17,21 @@ class GroupRepository:
         group = Group(**group_data.model_dump())
         self.session.add(group)
         await self.session.flush()
+        self.session.add(GroupSummary(group_id=group.id, member_count=0, expense_count=0, spend={}, version=0))
+        await self.session.flush()
         await self.session.refresh(group)
         return group
     
-    async def get_by_id(self, group_id: UUID, load_members: bool = False) -> Group | None:
+    async def get_by_id(self, group_id: UUID) -> Group | None:
         """Get group by ID."""
-        query = select(Group).where(Group.id == group_id)
-        if load_members:
-            query = query.options(selectinload(Group.members).selectinload(GroupMember.user))
-        result = await self.session.execute(query)
+        result = await self.session.execute(select(Group).where(Group.id == group_id))
+        return result.scalar_one_or_none()
+    
+    async def get_ledger_version(self, group_id: UUID) -> int | None:
+        """Current ledger version of a group."""
+        result = await self.session.execute(
+            select(Group.ledger_version).where(Group.id == group_id)
+        )
         return result.scalar_one_or_none()
     
     async def add_member(self, group_id: UUID, member_data: GroupMemberCreate) -> GroupMember:
@@ -59,6 +66,26 @@ class GroupRepository:
         )
         return result.scalars().all()
     
+    async def get_members_page(
+        self, group_id: UUID, limit: int, after: tuple[datetime, UUID] | None = None
+    ) -> list[tuple]:
+        """
+        A page of a group's members in the order they joined, projected to
+        (user_id, joined_at, name, email, created_at) rows. `after` is the
+        (joined_at, user_id) of the last row of the previous page.
+        """
+        query = (
+            select(GroupMember.user_id, GroupMember.joined_at, User.name, User.email, User.created_at)
+            .join(User, User.id == GroupMember.user_id)
+            .where(GroupMember.group_id == group_id)
+            .order_by(GroupMember.joined_at, GroupMember.user_id)
+            .limit(limit)
+        )
+        if after is not None:
+            query = query.where(tuple_(GroupMember.joined_at, GroupMember.user_id) > tuple_(*after))
+        result = await self.session.execute(query)
+        return list(result.all())
+    
     async def is_member(self, group_id: UUID, user_id: UUID) -> bool:
         """Check if user is a member of the group."""
         result = await self.session.execute(
@@ -68,4 +95,3 @@ class GroupRepository:
             )
         )
         return result.scalar_one_or_none() is not None
-
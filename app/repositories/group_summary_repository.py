@@ -0,0 +1,105 @@
+from datetime import datetime
+from decimal import Decimal
+from typing import Optional
+from uuid import UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, select, tuple_
+from app.models.expense import Expense
+from app.models.group import Group, GroupMember, GroupSummary
+from app.models.ledger import ExpenseArchive, SettlementArchive
+from app.models.settlement import Settlement
+from app.utils.money import round_decimal
+
+
+class GroupSummaryRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def get(self, group_id: UUID) -> Optional[GroupSummary]:
+        """A group's summary."""
+        return await self.session.get(GroupSummary, group_id)
+
+    async def compute(self, group_id: UUID) -> GroupSummary:
+        """
+        A group's summary rebuilt from the ledger tables (as migration 012
+        backfilled them), for groups that have no row. Not added to the session.
+        """
+        summary = GroupSummary(
+            group_id=group_id,
+            member_count=await self.session.scalar(
+                select(func.count()).select_from(GroupMember).where(GroupMember.group_id == group_id)
+            ),
+            expense_count=0,
+            version=await self.session.scalar(select(Group.change_seq).where(Group.id == group_id)),
+        )
+        totals: dict[str, Decimal] = {}
+        for model in (Expense, ExpenseArchive):
+            result = await self.session.execute(
+                select(model.currency, func.count(), func.sum(model.amount))
+                .where(model.group_id == group_id)
+                .group_by(model.currency)
+            )
+            for currency, count, total in result.all():
+                summary.expense_count += count
+                totals[currency] = totals.get(currency, Decimal("0")) + Decimal(str(total))
+        summary.spend = {currency: str(round_decimal(amount)) for currency, amount in totals.items() if amount}
+        for model in (Expense, ExpenseArchive, Settlement, SettlementArchive):
+            latest = await self.session.scalar(select(func.max(model.created_at)).where(model.group_id == group_id))
+            if latest is not None and (summary.last_activity_at is None or latest > summary.last_activity_at):
+                summary.last_activity_at = latest
+        return summary
+
+    async def apply(
+        self,
+        group_id: UUID,
+        version: int,
+        members: int = 0,
+        expenses: int = 0,
+        spend: Optional[dict[str, Decimal]] = None,
+        activity_at: Optional[datetime] = None
+    ) -> None:
+        """
+        Fold one write into a group's summary: member and expense count
+        changes, spend change per currency, and when it happened. Call after
+        ChangeRepository.record, whose lock on the group row serializes
+        summary updates per group until commit.
+        """
+        summary = await self.session.get(GroupSummary, group_id, populate_existing=True)
+        if summary is None:
+            # The rebuild already counts this write
+            self.session.add(await self.compute(group_id))
+            await self.session.flush()
+            return
+        summary.member_count += members
+        summary.expense_count += expenses
+        if spend:
+            totals = {currency: Decimal(amount) for currency, amount in summary.spend.items()}
+            for currency, amount in spend.items():
+                totals[currency] = totals.get(currency, Decimal("0")) + amount
+            summary.spend = {currency: str(amount) for currency, amount in totals.items() if amount}
+        if activity_at is not None and (summary.last_activity_at is None or activity_at > summary.last_activity_at):
+            summary.last_activity_at = activity_at
+        summary.version = max(summary.version, version)
+        await self.session.flush()
+
+    async def list_for_user(
+        self, user_id: UUID, limit: Optional[int] = None, after: Optional[tuple[datetime, UUID]] = None
+    ) -> list[tuple]:
+        """
+        A page of a user's groups with their summaries (all of them without
+        `limit`), in the order the user joined them: (group, joined_at,
+        summary) rows, summary None for a group without one. `after` is the
+        (joined_at, group_id) of the last row of the previous page.
+        """
+        query = (
+            select(Group, GroupMember.joined_at, GroupSummary)
+            .join(GroupMember, GroupMember.group_id == Group.id)
+            .outerjoin(GroupSummary, GroupSummary.group_id == Group.id)
+            .where(GroupMember.user_id == user_id)
+            .order_by(GroupMember.joined_at, GroupMember.group_id)
+            .limit(limit)
+        )
+        if after is not None:
+            query = query.where(tuple_(GroupMember.joined_at, GroupMember.group_id) > tuple_(*after))
+        result = await self.session.execute(query)
+        return list(result.all())
@@ -0,0 +1,34 @@
+from datetime import datetime
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import delete, select
+from app.models.idempotency import IdempotencyRecord
+
+
+class IdempotencyRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+    
+    async def get(self, scope: str, key: str) -> IdempotencyRecord | None:
+        """Get a stored idempotency record by scope and key."""
+        result = await self.session.execute(
+            select(IdempotencyRecord).where(
+                IdempotencyRecord.scope == scope,
+                IdempotencyRecord.key == key
+            )
+        )
+        return result.scalar_one_or_none()
+    
+    async def create(self, record_data: dict) -> IdempotencyRecord:
+        """Create an idempotency record in the current transaction."""
+        record = IdempotencyRecord(**record_data)
+        self.session.add(record)
+        await self.session.flush()
+        return record
+    
+    async def delete_expired(self, now: datetime, limit: int) -> int:
+        """Delete up to `limit` records that expired by `now`; returns how many."""
+        expired = select(IdempotencyRecord.id).where(IdempotencyRecord.expires_at <= now).limit(limit)
+        result = await self.session.execute(
+            delete(IdempotencyRecord).where(IdempotencyRecord.id.in_(expired))
+        )
+        return result.rowcount
@@ -2,6 +2,7 @@ from uuid import UUID
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from app.models.settlement import Settlement
+from app.models.ledger import SettlementArchive
 
 
 class SettlementRepository:
@@ -18,7 +19,8 @@ class SettlementRepository:
     
     async def get_by_id(self, settlement_id: UUID) -> Settlement | None:
         """Get settlement by ID."""
-        return await self.session.get(Settlement, settlement_id)
+        result = await self.session.execute(select(Settlement).where(Settlement.id == settlement_id))
+        return result.scalar_one_or_none()
     
     async def get_by_group(self, group_id: UUID):
         """Get all settlements for a group."""
@@ -28,4 +30,12 @@ class SettlementRepository:
             .order_by(Settlement.created_at.desc())
         )
         return result.scalars().all()
-
+    
+    async def get_archived_by_group(self, group_id: UUID):
+        """Get compacted (archived) settlements for a group, newest first."""
+        result = await self.session.execute(
+            select(SettlementArchive)
+            .where(SettlementArchive.group_id == group_id)
+            .order_by(SettlementArchive.created_at.desc())
+        )
+        return result.scalars().all()
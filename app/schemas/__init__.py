@@ -1,8 +1,12 @@
 from app.schemas.user import UserCreate, UserResponse
-from app.schemas.group import GroupCreate, GroupResponse, GroupMemberCreate
-from app.schemas.expense import ExpenseCreate, ExpenseResponse, ExpenseSplitCreate
+from app.schemas.group import GroupCreate, GroupResponse, GroupMemberCreate, GroupMembersResponse, UserGroupsResponse, UserGroupSummary
+from app.schemas.expense import ExpenseCreate, ExpensePreview, ExpensePreviewRequest, ExpensePreviewResponse, ExpenseResponse, ExpenseSearchResponse, ExpenseSplitCreate, ExpenseUpdate
 from app.schemas.settlement import SettlementCreate, SettlementResponse
-from app.schemas.balance import RawBalanceResponse, SimplifiedBalanceResponse
+from app.schemas.balance import CurrencyBalanceResponse, CurrencyBalancesResponse, LeaderboardEntry, LeaderboardResponse, RawBalanceResponse, SimplifiedBalanceResponse, UserBalanceResponse
+from app.schemas.dashboard import DashboardGroup, UserDashboardResponse
+from app.schemas.recurring import RecurringExpenseCreate, RecurringExpenseResponse
+from app.schemas.netting import NettingGroupBalance, NettingOffset, NettingSettleResponse, PairwiseNettingResponse
+from app.schemas.change import GroupChangeResponse, GroupChangesResponse, GroupSnapshot
 
 __all__ = [
     "UserCreate",
@@ -10,12 +14,36 @@ __all__ = [
     "GroupCreate",
     "GroupResponse",
     "GroupMemberCreate",
+    "GroupMembersResponse",
+    "UserGroupSummary",
+    "UserGroupsResponse",
     "ExpenseCreate",
+    "ExpensePreview",
+    "ExpensePreviewRequest",
+    "ExpensePreviewResponse",
     "ExpenseResponse",
+    "ExpenseSearchResponse",
     "ExpenseSplitCreate",
+    "ExpenseUpdate",
     "SettlementCreate",
     "SettlementResponse",
     "RawBalanceResponse",
     "SimplifiedBalanceResponse",
+    "UserBalanceResponse",
+    "CurrencyBalanceResponse",
+    "CurrencyBalancesResponse",
+    "LeaderboardEntry",
+    "LeaderboardResponse",
+    "DashboardGroup",
+    "UserDashboardResponse",
+    "GroupChangeResponse",
+    "GroupChangesResponse",
+    "GroupSnapshot",
+    "RecurringExpenseCreate",
+    "RecurringExpenseResponse",
+    "NettingGroupBalance",
+    "NettingOffset",
+    "PairwiseNettingResponse",
+    "NettingSettleResponse",
 ]
 
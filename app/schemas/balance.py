@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 from decimal import Decimal
+from typing import Dict, List
 
 
 class RawBalanceResponse(BaseModel):
@@ -13,3 +14,34 @@ class SimplifiedBalanceResponse(BaseModel):
     payee_id: str
     amount: Decimal
 
+
+class UserBalanceResponse(BaseModel):
+    user_id: str
+    # Positive = the user is owed money, negative = the user owes money
+    net_balance: Decimal
+    # The user's part of the simplified plan
+    transfers: List[SimplifiedBalanceResponse] = []
+
+
+class LeaderboardEntry(BaseModel):
+    user_id: str
+    amount: Decimal  # Owed (debtors) or owed to (creditors), always positive
+
+
+class LeaderboardResponse(BaseModel):
+    debtors: List[LeaderboardEntry] = []
+    creditors: List[LeaderboardEntry] = []
+
+
+class CurrencyBalanceResponse(BaseModel):
+    debtor_id: str
+    creditor_id: str
+    currency: str
+    amount: Decimal  # In `currency`, unconverted
+
+
+class CurrencyBalancesResponse(BaseModel):
+    base_currency: str
+    # Multiplier from each currency in the ledger into the base currency
+    rates: Dict[str, Decimal]
+    balances: List[CurrencyBalanceResponse] = []
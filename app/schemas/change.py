@@ -0,0 +1,41 @@
+from pydantic import BaseModel
+from uuid import UUID
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+from app.schemas.group import GroupMemberResponse
+
+
+class GroupChangeResponse(BaseModel):
+    seq: int
+    kind: str
+    entity_id: Optional[UUID] = None
+    data: Optional[Dict[str, Any]] = None
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+
+class GroupSnapshot(BaseModel):
+    member_count: int = 0
+    # First page of members in join order; GET /groups/{id}/members has the rest
+    members: List[GroupMemberResponse] = []
+    members_next_cursor: Optional[str] = None
+    net_balances: Dict[str, Decimal] = {}
+
+
+class GroupChangesResponse(BaseModel):
+    group_id: UUID
+    since: int
+    # Pass back as `since` on the next sync
+    seq: int
+    has_more: bool = False
+    changes: List[GroupChangeResponse] = []
+    # Net balance of every user this page's changes touched, as of
+    # `balances_seq`: equal to `seq` unless later writes are still to come
+    # (has_more), in which case the balances already include them
+    balances_seq: Optional[int] = None
+    net_balances: Dict[str, Decimal] = {}
+    # Set instead of `changes` when `since` is older than the retained log
+    snapshot: Optional[GroupSnapshot] = None
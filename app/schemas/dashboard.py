@@ -0,0 +1,20 @@
+from pydantic import BaseModel
+from uuid import UUID
+from datetime import datetime
+from decimal import Decimal
+from typing import List, Optional
+from app.schemas.user import UserResponse
+
+
+class DashboardGroup(BaseModel):
+    id: UUID
+    name: str
+    member_count: int
+    last_activity_at: Optional[datetime] = None
+    # Positive = the user is owed money, negative = the user owes money
+    net_balance: Decimal
+
+
+class UserDashboardResponse(BaseModel):
+    user: UserResponse
+    groups: List[DashboardGroup] = []
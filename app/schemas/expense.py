@@ -1,9 +1,14 @@
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, condecimal, field_validator, model_validator
 from uuid import UUID
 from datetime import datetime
 from decimal import Decimal
-from typing import List, Optional
+from typing import Dict, List, Optional
 from app.models.expense import SplitType
+from app.schemas.balance import SimplifiedBalanceResponse
+from app.utils.money import CURRENCY_PATTERN
+
+# Larger expenses leave per-split detail out of create responses unless asked
+SPLIT_DETAIL_LIMIT = 100
 
 
 class ExpenseSplitCreate(BaseModel):
@@ -15,6 +20,8 @@ class ExpenseSplitCreate(BaseModel):
 class ExpenseCreate(BaseModel):
     paid_by_user_id: UUID
     amount: Decimal = Field(..., gt=0, decimal_places=2, max_digits=12)
+    # Defaults to the group's base currency
+    currency: Optional[str] = Field(None, pattern=CURRENCY_PATTERN)
     description: str = Field(..., min_length=1, max_length=500)
     split_type: SplitType
     splits: List[ExpenseSplitCreate] = Field(default_factory=list)
@@ -27,6 +34,17 @@ class ExpenseCreate(BaseModel):
         return v
 
 
+class ExpenseUpdate(BaseModel):
+    """Partial update; `version` is the version the client last read."""
+    version: int = Field(..., ge=1)
+    paid_by_user_id: Optional[UUID] = None
+    amount: Optional[condecimal(gt=0, decimal_places=2, max_digits=12)] = None
+    currency: Optional[str] = Field(None, pattern=CURRENCY_PATTERN)
+    description: Optional[str] = Field(None, min_length=1, max_length=500)
+    split_type: Optional[SplitType] = None
+    splits: Optional[List[ExpenseSplitCreate]] = None
+
+
 class ExpenseSplitResponse(BaseModel):
     user_id: UUID
     amount: Decimal
@@ -41,11 +59,53 @@ class ExpenseResponse(BaseModel):
     group_id: UUID
     paid_by_user_id: UUID
     amount: Decimal
+    currency: str
     description: str
     split_type: SplitType
     created_at: datetime
-    splits: List[ExpenseSplitResponse] = []
+    version: int
+    splits: List[ExpenseSplitResponse] = Field(
+        [],
+        description=(
+            "Per-split detail. Create responses leave it empty for expenses with more than "
+            f"{SPLIT_DETAIL_LIMIT} splits unless `include_splits=true`; read the expense for them"
+        )
+    )
+    split_count: Optional[int] = Field(None, description="Number of splits, set even when `splits` is left empty")
     
     class Config:
         from_attributes = True
+    
+    @model_validator(mode="after")
+    def count_splits(self):
+        if self.split_count is None:
+            self.split_count = len(self.splits)
+        return self
+
+
+
+class ExpenseSearchResponse(BaseModel):
+    items: List[ExpenseResponse] = []
+    # Pass back as `cursor` to get the next page; null on the last page
+    next_cursor: Optional[str] = None
+
+
+class ExpensePreviewRequest(BaseModel):
+    expenses: List[ExpenseCreate] = Field(..., min_length=1, max_length=50)
+
+
+class ExpensePreview(BaseModel):
+    currency: str
+    splits: List[ExpenseSplitResponse] = []
+    # After this expense and every one before it in the request
+    net_balances: Dict[str, Decimal]
+    # Against the current balances; users whose balance does not move are omitted
+    net_changes: Dict[str, Decimal]
+    simplified: List[SimplifiedBalanceResponse] = []
+
 
+class ExpensePreviewResponse(BaseModel):
+    base_currency: str
+    # Before any of the previewed expenses
+    net_balances: Dict[str, Decimal]
+    previews: List[ExpensePreview] = []
@@ -1,12 +1,16 @@
 from pydantic import BaseModel, Field
 from uuid import UUID
 from datetime import datetime
+from decimal import Decimal
 from typing import List, Optional
 from app.schemas.user import UserResponse
+from app.utils.money import CURRENCY_PATTERN
 
 
 class GroupBase(BaseModel):
     name: str = Field(..., min_length=1, max_length=255)
+    # Balances are reported in this currency
+    base_currency: str = Field("USD", pattern=CURRENCY_PATTERN)
 
 
 class GroupCreate(GroupBase):
@@ -25,12 +29,42 @@ class GroupMemberResponse(BaseModel):
 class GroupResponse(GroupBase):
     id: UUID
     created_at: datetime
+    member_count: int = 0
+    # First page of members in join order; GET /groups/{id}/members has the rest
     members: List[GroupMemberResponse] = []
+    members_next_cursor: Optional[str] = None
     
     class Config:
         from_attributes = True
 
 
+class GroupMembersResponse(BaseModel):
+    items: List[GroupMemberResponse] = []
+    # Pass back as `cursor` to get the next page; null on the last page
+    next_cursor: Optional[str] = None
+
+
 class GroupMemberCreate(BaseModel):
     user_id: UUID
 
+
+
+class UserGroupSummary(BaseModel):
+    """One of a user's groups with its running totals."""
+    id: UUID
+    name: str
+    base_currency: str
+    joined_at: datetime
+    member_count: int
+    expense_count: int
+    # Spend across all currencies, converted into base_currency; null while
+    # the FX rate of one of its currencies is missing
+    total_spend: Optional[Decimal] = None
+    last_activity_at: Optional[datetime] = None
+    version: int
+
+
+class UserGroupsResponse(BaseModel):
+    items: List[UserGroupSummary] = []
+    # Pass back as `cursor` to get the next page; null on the last page
+    next_cursor: Optional[str] = None
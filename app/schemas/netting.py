@@ -0,0 +1,38 @@
+from pydantic import BaseModel
+from uuid import UUID
+from decimal import Decimal
+from typing import List, Optional
+from app.schemas.settlement import SettlementResponse
+
+
+class NettingGroupBalance(BaseModel):
+    group_id: UUID
+    owes: Decimal  # The user owes the counterparty in this group
+    owed: Decimal  # The counterparty owes the user in this group
+
+
+class NettingOffset(BaseModel):
+    group_id: UUID
+    payer_id: UUID
+    payee_id: UUID
+    amount: Decimal
+
+
+class PairwiseNettingResponse(BaseModel):
+    """Balances between a user and one counterparty in one currency, across groups."""
+    counterparty_id: UUID
+    currency: str
+    owes: Decimal
+    owed: Decimal
+    groups: List[NettingGroupBalance]
+    # Settlements that cancel out the overlap; no money changes hands
+    offsets: List[NettingOffset]
+    # What is left to pay after the offsets (None when it nets to zero)
+    net_amount: Decimal
+    net_payer_id: Optional[UUID] = None
+    net_payee_id: Optional[UUID] = None
+
+
+class NettingSettleResponse(BaseModel):
+    plan: List[PairwiseNettingResponse]
+    settlements: List[SettlementResponse]
@@ -0,0 +1,52 @@
+from pydantic import BaseModel, Field, field_validator, model_validator
+from uuid import UUID
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import List, Optional
+from app.models.expense import SplitType
+from app.schemas.expense import ExpenseCreate, ExpenseSplitCreate
+from app.utils.recurrence import RecurrenceInterval
+
+
+class RecurringExpenseCreate(ExpenseCreate):
+    """An expense plus its schedule; the first occurrence is at `starts_at`."""
+    interval: RecurrenceInterval
+    interval_count: int = Field(1, ge=1, le=365)
+    starts_at: datetime
+    ends_at: Optional[datetime] = None
+    
+    @field_validator('starts_at', 'ends_at')
+    @classmethod
+    def to_naive_utc(cls, v):
+        # Ledger timestamps are naive UTC
+        if v is not None and v.tzinfo is not None:
+            v = v.astimezone(timezone.utc).replace(tzinfo=None)
+        return v
+    
+    @model_validator(mode='after')
+    def validate_range(self):
+        if self.ends_at is not None and self.ends_at < self.starts_at:
+            raise ValueError('ends_at must not be before starts_at')
+        return self
+
+
+class RecurringExpenseResponse(BaseModel):
+    id: UUID
+    group_id: UUID
+    paid_by_user_id: UUID
+    amount: Decimal
+    currency: str
+    description: str
+    split_type: SplitType
+    splits: List[ExpenseSplitCreate] = []
+    interval: RecurrenceInterval
+    interval_count: int
+    starts_at: datetime
+    ends_at: Optional[datetime] = None
+    occurrences: int
+    # Null once the series has ended
+    next_run_at: Optional[datetime] = None
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
@@ -2,12 +2,16 @@ from pydantic import BaseModel, Field
 from uuid import UUID
 from datetime import datetime
 from decimal import Decimal
+from typing import Optional
+from app.utils.money import CURRENCY_PATTERN
 
 
 class SettlementCreate(BaseModel):
     payer_id: UUID
     payee_id: UUID
     amount: Decimal = Field(..., gt=0, decimal_places=2, max_digits=12)
+    # Defaults to the group's base currency
+    currency: Optional[str] = Field(None, pattern=CURRENCY_PATTERN)
 
 
 class SettlementResponse(BaseModel):
@@ -16,6 +20,7 @@ class SettlementResponse(BaseModel):
     payer_id: UUID
     payee_id: UUID
     amount: Decimal
+    currency: str
     created_at: datetime
     
     class Config:
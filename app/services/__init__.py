@@ -1,10 +1,22 @@
 from app.services.expense_service import ExpenseService
 from app.services.balance_service import BalanceService
 from app.services.settlement_service import SettlementService
+from app.services.idempotency_service import IdempotencyService
+from app.services.dashboard_service import DashboardService
+from app.services.change_service import ChangeService
+from app.services.leaderboard_service import LeaderboardService
+from app.services.recurring_expense_service import RecurringExpenseService
+from app.services.netting_service import NettingService
 
 __all__ = [
     "ExpenseService",
     "BalanceService",
     "SettlementService",
+    "IdempotencyService",
+    "DashboardService",
+    "ChangeService",
+    "LeaderboardService",
+    "RecurringExpenseService",
+    "NettingService",
 ]
 
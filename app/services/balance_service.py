@@ -1,24 +1,126 @@
+from datetime import datetime
+from typing import Optional
 from uuid import UUID
 from decimal import Decimal
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select, func, and_, or_, case, literal_column, union_all
 from fastapi import HTTPException, status
+import redis.asyncio as redis
 
 from app.models.expense import Expense, ExpenseSplit
+from app.models.group import Group, GroupMember
 from app.models.settlement import Settlement
+from app.models.ledger import BalanceCarryForward, ExpenseArchive, ExpenseSplitArchive, SettlementArchive
 from app.repositories.group_repository import GroupRepository
-from app.utils.balance_simplification import calculate_net_balances, simplify_balances
-from app.utils.money import round_decimal
-import json
+from app.services.compute_offload import compute_offloader
+from app.services.fx_rates import conversion_rates, fx_rate_cache, missing_rates_error
+from app.services.ledger_cache import (
+    load_pair_fields,
+    load_pair_states,
+    load_plan,
+    load_plan_json,
+    load_user_position,
+    store_pair_fields,
+    store_pair_states,
+    store_plan,
+)
+from app.utils.balance_simplification import (
+    SimplifyMode,
+    plan_json_from_fields,
+    plan_json_from_rows,
+    simplify_states,
+    user_position,
+)
+from app.utils.flow_simplification import simplify_along_edges
+from app.utils.ledger import (
+    PairKey,
+    PairState,
+    build_pair_states,
+    currency_balances_from_states,
+    net_balances_from_states,
+    raw_balances_from_states,
+    user_net_balance,
+)
+from app.utils.serialization import loads
 
 
 class BalanceService:
-    def __init__(self, session: AsyncSession):
+    def __init__(self, session: AsyncSession, redis_client: Optional[redis.Redis] = None):
         self.session = session
+        # With Redis, current pair states come from the delta-maintained cache
+        self.redis = redis_client
         self.group_repo = GroupRepository(session)
     
-    async def get_raw_balances(self, group_id: UUID) -> list[dict]:
-        """Get raw balances (ledger-style) for a group."""
+    async def get_raw_balances(self, group_id: UUID, as_of: Optional[datetime] = None) -> list[dict]:
+        """Get raw balances (ledger-style) for a group in its base currency, optionally as of a past time."""
+        group, states = await self._get_group_states(group_id, as_of)
+        rates = await self.get_conversion_rates(group.base_currency, states)
+        return raw_balances_from_states(states, rates)
+    
+    async def get_net_balances(self, group_id: UUID) -> dict[UUID, Decimal]:
+        """Current net balance of every user with a balance, in the group's base currency."""
+        group, states = await self._get_group_states(group_id)
+        rates = await self.get_conversion_rates(group.base_currency, states)
+        return net_balances_from_states(states, rates)
+    
+    async def get_user_balance(self, group_id: UUID, user_id: UUID) -> dict:
+        """
+        One member's net balance and their transfers in the simplified plan,
+        bisected out of the ranks cached with the current plan (see
+        plan_ranks). On a miss, or once writes have repaired the plan past
+        its ranks, the plan is rebuilt with fresh ranks.
+        """
+        group = await self.group_repo.get_by_id(group_id)
+        if not group:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Group {group_id} not found"
+            )
+        if not await self.group_repo.is_member(group_id, user_id):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"User {user_id} is not a member of group {group_id}"
+            )
+        position = None
+        if self.redis is not None:
+            version = await self.group_repo.get_ledger_version(group_id)
+            position = await load_user_position(self.redis, group_id, version, user_id)
+            if position is None:
+                await self.get_current_plan_json(group_id, ranked=True)
+                position = await load_user_position(self.redis, group_id, version, user_id)
+        if position is not None:
+            net_balance, transfers = position
+            return {"user_id": str(user_id), "net_balance": net_balance, "transfers": transfers}
+        
+        group, states = await self._get_group_states(group_id)
+        rates = await self.get_conversion_rates(group.base_currency, states)
+        plan = await self._load_current_plan(group_id)
+        if plan is None:
+            net_balance, transfers = await compute_offloader.run(len(states), user_position, states, rates, user_id)
+        else:
+            # A write repaired the plan while its ranks were rebuilt, and a
+            # repaired plan can differ from a fresh one; stay consistent
+            # with the full view
+            net_balance = user_net_balance(states, rates, user_id)
+            transfers = [t for t in plan if str(user_id) in (t["payer_id"], t["payee_id"])]
+        return {"user_id": str(user_id), "net_balance": net_balance, "transfers": transfers}
+    
+    async def get_currency_balances(self, group_id: UUID) -> dict:
+        """Current balances per currency, unconverted, with the rates into the base currency."""
+        group, states = await self._get_group_states(group_id)
+        return {
+            "base_currency": group.base_currency,
+            "rates": await self.get_conversion_rates(group.base_currency, states),
+            "balances": currency_balances_from_states(states),
+        }
+    
+    async def get_conversion_rates(self, base_currency: str, states: dict[PairKey, PairState]) -> dict[str, Decimal]:
+        """Multipliers into the base currency for every currency in the states."""
+        return await conversion_rates(self.session, {currency for _, _, currency in states}, base_currency)
+    
+    async def _get_group_states(
+        self, group_id: UUID, as_of: Optional[datetime] = None
+    ) -> tuple[Group, dict[PairKey, PairState]]:
         # Validate group exists
         group = await self.group_repo.get_by_id(group_id)
         if not group:
@@ -27,65 +129,355 @@ class BalanceService:
                 detail=f"Group {group_id} not found"
             )
         
-        # Get all expenses with splits
-        expenses_result = await self.session.execute(
-            select(Expense, ExpenseSplit)
-            .join(ExpenseSplit, Expense.id == ExpenseSplit.expense_id)
-            .where(Expense.group_id == group_id)
+        if as_of is not None and group.compacted_before and as_of < group.compacted_before:
+            # Carry-forwards fold history past as_of; replay the archive instead
+            states = await self.get_archived_pair_states(group_id, as_of)
+        elif as_of is None and self.redis is not None:
+            states = await self.get_cached_pair_states(group_id)
+        else:
+            states = await self.get_pair_states(group_id, as_of)
+        return group, states
+    
+    async def get_pair_states(
+        self, group_id: UUID, as_of: Optional[datetime] = None
+    ) -> dict[PairKey, PairState]:
+        """
+        Replay a group's ledger (carry-forwards + live rows) into pair states.
+        With as_of, only rows created at or before it are replayed; as_of must
+        not be earlier than the group's compaction cutoff.
+        """
+        split_rows, settlement_rows, carry_forwards = await self._ledger_rows(group_id, as_of)
+        return build_pair_states(split_rows, settlement_rows, carry_forwards)
+    
+    async def _ledger_rows(
+        self, group_id: UUID, as_of: Optional[datetime] = None
+    ) -> tuple[list, list, dict[PairKey, PairState]]:
+        # Compacted history: one row per pair
+        carry_result = await self.session.execute(
+            select(
+                BalanceCarryForward.debtor_id,
+                BalanceCarryForward.creditor_id,
+                BalanceCarryForward.currency,
+                BalanceCarryForward.debt_amount,
+                BalanceCarryForward.settled_amount,
+            ).where(BalanceCarryForward.group_id == group_id)
+        )
+        carry_forwards = {
+            (debtor_id, creditor_id, currency): (Decimal(debt), Decimal(settled))
+            for debtor_id, creditor_id, currency, debt, settled in carry_result.all()
+        }
+        
+        # Get all splits with their payer. Filtering both tables on group_id
+        # (and joining on it) keeps the scan inside one partition of each.
+        splits_query = (
+            select(ExpenseSplit.user_id, Expense.paid_by_user_id, ExpenseSplit.amount, Expense.currency)
+            .join(Expense, and_(
+                Expense.id == ExpenseSplit.expense_id,
+                Expense.group_id == ExpenseSplit.group_id
+            ))
+            .where(ExpenseSplit.group_id == group_id, Expense.group_id == group_id)
+        )
+        
+        # Settlements are applied in the order they happened
+        settlements_query = (
+            select(Settlement.payer_id, Settlement.payee_id, Settlement.amount, Settlement.currency)
+            .where(Settlement.group_id == group_id)
+            .order_by(Settlement.created_at, Settlement.id)
         )
         
-        # Build raw balances from expenses
-        raw_balances: dict[tuple[UUID, UUID], Decimal] = {}
+        # Range on the (group_id, created_at) indexes
+        if as_of is not None:
+            splits_query = splits_query.where(Expense.created_at <= as_of)
+            settlements_query = settlements_query.where(Settlement.created_at <= as_of)
         
-        for expense, split in expenses_result.all():
-            # Who paid (creditor) vs who owes (debtor)
-            # If user is in split but didn't pay, they owe the payer
-            if split.user_id != expense.paid_by_user_id:
-                key = (split.user_id, expense.paid_by_user_id)
-                raw_balances[key] = raw_balances.get(key, Decimal("0")) + Decimal(str(split.amount))
-            # If user paid more than their share, they are owed by others
-            # This is already handled by the splits above
+        splits_result = await self.session.execute(splits_query)
+        settlements_result = await self.session.execute(settlements_query)
         
-        # Apply settlements (reduce balances)
+        return splits_result.all(), settlements_result.all(), carry_forwards
+    
+    async def get_users_pair_states(self, group_id: UUID, user_ids: set[UUID]) -> dict[PairKey, PairState]:
+        """
+        The pair states of get_pair_states that involve any of `user_ids`,
+        replaying only those users' rows.
+        """
+        carry_result = await self.session.execute(
+            select(
+                BalanceCarryForward.debtor_id,
+                BalanceCarryForward.creditor_id,
+                BalanceCarryForward.currency,
+                BalanceCarryForward.debt_amount,
+                BalanceCarryForward.settled_amount,
+            ).where(
+                BalanceCarryForward.group_id == group_id,
+                or_(BalanceCarryForward.debtor_id.in_(user_ids), BalanceCarryForward.creditor_id.in_(user_ids))
+            )
+        )
+        carry_forwards = {
+            (debtor_id, creditor_id, currency): (Decimal(debt), Decimal(settled))
+            for debtor_id, creditor_id, currency, debt, settled in carry_result.all()
+        }
+        splits_result = await self.session.execute(
+            select(ExpenseSplit.user_id, Expense.paid_by_user_id, ExpenseSplit.amount, Expense.currency)
+            .join(Expense, and_(
+                Expense.id == ExpenseSplit.expense_id,
+                Expense.group_id == ExpenseSplit.group_id
+            ))
+            .where(
+                ExpenseSplit.group_id == group_id,
+                Expense.group_id == group_id,
+                or_(ExpenseSplit.user_id.in_(user_ids), Expense.paid_by_user_id.in_(user_ids))
+            )
+        )
         settlements_result = await self.session.execute(
-            select(Settlement).where(Settlement.group_id == group_id)
+            select(Settlement.payer_id, Settlement.payee_id, Settlement.amount, Settlement.currency)
+            .where(
+                Settlement.group_id == group_id,
+                or_(Settlement.payer_id.in_(user_ids), Settlement.payee_id.in_(user_ids))
+            )
+            .order_by(Settlement.created_at, Settlement.id)
         )
-        settlements = settlements_result.scalars().all()
-        
-        for settlement in settlements:
-            # Settlement: payer pays payee, so payer owes less, payee is owed less
-            key = (settlement.payer_id, settlement.payee_id)
-            raw_balances[key] = raw_balances.get(key, Decimal("0")) - Decimal(str(settlement.amount))
-            
-            # Remove zero or negative balances (settlement can reverse debt)
-            if raw_balances[key] <= 0:
-                raw_balances.pop(key, None)
-        
-        # Convert to list format
-        result = []
-        for (debtor_id, creditor_id), amount in raw_balances.items():
-            if amount > 0:
-                result.append({
-                    "debtor_id": str(debtor_id),
-                    "creditor_id": str(creditor_id),
-                    "amount": float(round_decimal(amount, 2))
-                })
-        
-        return result
-    
-    async def get_simplified_balances(self, group_id: UUID) -> list[dict]:
-        """Get simplified balances for a group."""
-        raw_balances = await self.get_raw_balances(group_id)
-        simplified = simplify_balances(calculate_net_balances(raw_balances))
-        
-        # Convert amounts back to Decimal format for response
-        result = []
-        for transfer in simplified:
-            result.append({
-                "payer_id": transfer["payer_id"],
-                "payee_id": transfer["payee_id"],
-                "amount": Decimal(str(transfer["amount"]))
-            })
-        
-        return result
-
+        return build_pair_states(splits_result.all(), settlements_result.all(), carry_forwards)
+    
+    async def get_cached_pair_states(self, group_id: UUID) -> dict[PairKey, PairState]:
+        """Current pair states from Redis, replaying (and caching) the ledger on a miss."""
+        version = await self.group_repo.get_ledger_version(group_id)
+        states = await load_pair_states(self.redis, group_id, version)
+        if states is not None:
+            return states
+        
+        states = await self.get_pair_states(group_id)
+        # Only cache a replay that no write committed into while it ran
+        if await self.group_repo.get_ledger_version(group_id) == version:
+            await store_pair_states(self.redis, group_id, version, states)
+        return states
+    
+    async def get_pair_states_bulk(self, group_ids: list[UUID]) -> dict[UUID, dict[PairKey, PairState]]:
+        """Replay many groups' ledgers with one query per table instead of one set per group."""
+        carry_forwards: dict[UUID, dict[PairKey, PairState]] = {group_id: {} for group_id in group_ids}
+        split_rows: dict[UUID, list] = {group_id: [] for group_id in group_ids}
+        settlement_rows: dict[UUID, list] = {group_id: [] for group_id in group_ids}
+        
+        carry_result = await self.session.execute(
+            select(
+                BalanceCarryForward.group_id,
+                BalanceCarryForward.debtor_id,
+                BalanceCarryForward.creditor_id,
+                BalanceCarryForward.currency,
+                BalanceCarryForward.debt_amount,
+                BalanceCarryForward.settled_amount,
+            ).where(BalanceCarryForward.group_id.in_(group_ids))
+        )
+        for group_id, debtor_id, creditor_id, currency, debt, settled in carry_result.all():
+            carry_forwards[group_id][(debtor_id, creditor_id, currency)] = (Decimal(debt), Decimal(settled))
+        
+        splits_result = await self.session.execute(
+            select(
+                ExpenseSplit.group_id, ExpenseSplit.user_id, Expense.paid_by_user_id, ExpenseSplit.amount,
+                Expense.currency
+            )
+            .join(Expense, and_(
+                Expense.id == ExpenseSplit.expense_id,
+                Expense.group_id == ExpenseSplit.group_id
+            ))
+            .where(ExpenseSplit.group_id.in_(group_ids))
+        )
+        for group_id, *row in splits_result.all():
+            split_rows[group_id].append(row)
+        
+        settlements_result = await self.session.execute(
+            select(
+                Settlement.group_id, Settlement.payer_id, Settlement.payee_id, Settlement.amount,
+                Settlement.currency
+            )
+            .where(Settlement.group_id.in_(group_ids))
+            .order_by(Settlement.group_id, Settlement.created_at, Settlement.id)
+        )
+        for group_id, *row in settlements_result.all():
+            settlement_rows[group_id].append(row)
+        
+        return {
+            group_id: build_pair_states(split_rows[group_id], settlement_rows[group_id], carry_forwards[group_id])
+            for group_id in group_ids
+        }
+    
+    async def get_user_pair_states(
+        self, user_id: UUID, counterparty_id: Optional[UUID] = None
+    ) -> dict[UUID, dict[PairKey, PairState]]:
+        """
+        Pair states between a user and the other members of each group they
+        belong to (only `counterparty_id`, if given), keyed by group. One
+        query: carry-forwards, splits and settlements are read as a single
+        UNION ALL, each branch confined to the user's groups by group_id.
+        """
+        user_groups = select(GroupMember.group_id).where(GroupMember.user_id == user_id)
+        
+        def involving_user(group_col, debtor_col, creditor_col):
+            # The other side of the pair must still be a member to settle with
+            other = case((debtor_col == user_id, creditor_col), else_=debtor_col)
+            conditions = [
+                group_col.in_(user_groups),
+                or_(debtor_col == user_id, creditor_col == user_id),
+                debtor_col != creditor_col,
+                select(GroupMember.user_id).where(
+                    GroupMember.group_id == group_col, GroupMember.user_id == other
+                ).exists(),
+            ]
+            if counterparty_id is not None:
+                conditions.append(other == counterparty_id)
+            return and_(*conditions)
+        
+        carry_forwards = select(
+            literal_column("0").label("kind"),
+            BalanceCarryForward.group_id,
+            BalanceCarryForward.debtor_id,
+            BalanceCarryForward.creditor_id,
+            BalanceCarryForward.currency,
+            BalanceCarryForward.debt_amount.label("a"),
+            BalanceCarryForward.settled_amount.label("b"),
+            BalanceCarryForward.cutoff_at.label("created_at"),
+            BalanceCarryForward.debtor_id.label("row_id"),
+        ).where(involving_user(
+            BalanceCarryForward.group_id, BalanceCarryForward.debtor_id, BalanceCarryForward.creditor_id
+        ))
+        splits = (
+            select(
+                literal_column("1"), ExpenseSplit.group_id, ExpenseSplit.user_id, Expense.paid_by_user_id, Expense.currency,
+                ExpenseSplit.amount, literal_column("0"), Expense.created_at, ExpenseSplit.expense_id,
+            )
+            .join(Expense, and_(
+                Expense.id == ExpenseSplit.expense_id,
+                Expense.group_id == ExpenseSplit.group_id
+            ))
+            .where(involving_user(ExpenseSplit.group_id, ExpenseSplit.user_id, Expense.paid_by_user_id))
+        )
+        settlements = select(
+            literal_column("2"), Settlement.group_id, Settlement.payer_id, Settlement.payee_id, Settlement.currency,
+            Settlement.amount, literal_column("0"), Settlement.created_at, Settlement.id,
+        ).where(involving_user(Settlement.group_id, Settlement.payer_id, Settlement.payee_id))
+        
+        # Settlements must replay in the order they happened
+        rows = union_all(carry_forwards, splits, settlements).subquery()
+        result = await self.session.execute(
+            select(rows).order_by(rows.c.kind, rows.c.created_at, rows.c.row_id)
+        )
+        
+        carry_rows: dict[UUID, dict[PairKey, PairState]] = {}
+        split_rows: dict[UUID, list] = {}
+        settlement_rows: dict[UUID, list] = {}
+        for kind, group_id, debtor_id, creditor_id, currency, a, b, _, _ in result.all():
+            if kind == 0:
+                carry_rows.setdefault(group_id, {})[(debtor_id, creditor_id, currency)] = (
+                    Decimal(str(a)), Decimal(str(b))
+                )
+            elif kind == 1:
+                split_rows.setdefault(group_id, []).append((debtor_id, creditor_id, a, currency))
+            else:
+                settlement_rows.setdefault(group_id, []).append((debtor_id, creditor_id, a, currency))
+        
+        return {
+            group_id: build_pair_states(
+                split_rows.get(group_id, []), settlement_rows.get(group_id, []), carry_rows.get(group_id)
+            )
+            for group_id in carry_rows.keys() | split_rows.keys() | settlement_rows.keys()
+        }
+    
+    async def get_archived_pair_states(self, group_id: UUID, as_of: datetime) -> dict[PairKey, PairState]:
+        """Replay archived and live rows created at or before as_of, ignoring carry-forwards."""
+        archived_splits = await self.session.execute(
+            select(
+                ExpenseSplitArchive.user_id, ExpenseArchive.paid_by_user_id, ExpenseSplitArchive.amount,
+                ExpenseArchive.currency
+            )
+            .join(ExpenseArchive, ExpenseArchive.id == ExpenseSplitArchive.expense_id)
+            .where(ExpenseArchive.group_id == group_id, ExpenseArchive.created_at <= as_of)
+        )
+        live_splits = await self.session.execute(
+            select(ExpenseSplit.user_id, Expense.paid_by_user_id, ExpenseSplit.amount, Expense.currency)
+            .join(Expense, and_(
+                Expense.id == ExpenseSplit.expense_id,
+                Expense.group_id == ExpenseSplit.group_id
+            ))
+            .where(ExpenseSplit.group_id == group_id, Expense.group_id == group_id, Expense.created_at <= as_of)
+        )
+        
+        # Merge both settlement sources back into chronological order
+        settlement_rows = []
+        for model in (SettlementArchive, Settlement):
+            result = await self.session.execute(
+                select(model.created_at, model.id, model.payer_id, model.payee_id, model.amount, model.currency)
+                .where(model.group_id == group_id, model.created_at <= as_of)
+            )
+            settlement_rows.extend(result.all())
+        settlement_rows.sort(key=lambda row: (row[0], str(row[1])))
+        
+        return build_pair_states(
+            [*archived_splits.all(), *live_splits.all()],
+            [row[2:] for row in settlement_rows]
+        )
+    
+    async def get_simplified_balances(
+        self, group_id: UUID, as_of: Optional[datetime] = None, mode: SimplifyMode = SimplifyMode.GREEDY
+    ) -> list[dict]:
+        """
+        Get simplified balances for a group in its base currency, optionally as
+        of a past time. Large groups are simplified off the event loop.
+        """
+        if as_of is None and mode == SimplifyMode.GREEDY and self.redis is not None:
+            return await self.get_current_plan(group_id)
+        group, states = await self._get_group_states(group_id, as_of)
+        rates = await self.get_conversion_rates(group.base_currency, states)
+        simplify = simplify_along_edges if mode == SimplifyMode.RELATIONSHIPS else simplify_states
+        return await compute_offloader.run(len(states), simplify, states, rates)
+    
+    async def get_current_plan(self, group_id: UUID) -> list[dict]:
+        """Current greedy plan (see get_current_plan_json)."""
+        return loads(await self.get_current_plan_json(group_id))
+    
+    async def get_current_plan_json(self, group_id: UUID, ranked: bool = False) -> bytes:
+        """
+        Current greedy plan as JSON from Redis, where writes keep it up to
+        date by local repair (see repair_plan). On a miss, everything from the
+        cached pair fields (or a ledger replay) to the encoded plan runs as
+        one offloaded call, and the plan is cached. With `ranked`, a repaired
+        plan counts as a miss, so it is replaced by one with current ranks.
+        """
+        group = await self.group_repo.get_by_id(group_id)
+        if not group:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Group {group_id} not found"
+            )
+        version = await self.group_repo.get_ledger_version(group_id)
+        plan = await load_plan_json(self.redis, group_id, version, ranked)
+        if plan is not None:
+            return plan
+        
+        fx_table = await fx_rate_cache.get_rates(self.session)
+        fields = await load_pair_fields(self.redis, group_id, version)
+        plan, ranks, missing = None, None, set()
+        if fields is not None:
+            # Two fields per pair
+            plan, ranks, missing = await compute_offloader.run(
+                len(fields) // 2, plan_json_from_fields, fields, fx_table, group.base_currency
+            )
+        if plan is None and not missing:
+            rows = await self._ledger_rows(group_id)
+            plan, ranks, missing, state_fields = await compute_offloader.run(
+                sum(map(len, rows)), plan_json_from_rows, *rows, fx_table, group.base_currency
+            )
+            if await self.group_repo.get_ledger_version(group_id) == version:
+                await store_pair_fields(self.redis, group_id, version, state_fields)
+        if missing:
+            raise missing_rates_error(missing)
+        # Only cache a plan that no write committed into while it ran
+        if await self.group_repo.get_ledger_version(group_id) == version:
+            await store_plan(self.redis, group_id, version, plan, ranks)
+        return plan
+    
+    async def _load_current_plan(self, group_id: UUID) -> Optional[list[dict]]:
+        if self.redis is None:
+            return None
+        version = await self.group_repo.get_ledger_version(group_id)
+        if version is None:
+            return None
+        return await load_plan(self.redis, group_id, version)
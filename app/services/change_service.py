@@ -0,0 +1,117 @@
+from decimal import Decimal
+from typing import Optional
+from uuid import UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import HTTPException, status
+import redis.asyncio as redis
+
+from app.models.group import Group
+from app.repositories.change_repository import ChangeRepository
+from app.repositories.group_repository import GroupRepository
+from app.services.balance_service import BalanceService
+from app.services.group_service import GroupService
+from app.services.ledger_cache import load_pair_states
+from app.utils.ledger import net_balances_from_states
+
+# Above this many touched users, one replay of the whole group (which is
+# then cached) is cheaper than filtering the ledger by user
+USER_REPLAY_LIMIT = 500
+
+# Reads of the balances a write may race before the sync gives up
+BALANCE_READ_ATTEMPTS = 3
+
+
+class ChangeService:
+    """
+    Delta sync for offline clients: the writes to a group after a sequence
+    number plus the net balances of the users they touched. Work is
+    proportional to the changes; clients behind the retained log (pruned
+    by ledger compaction) get a snapshot instead.
+    """
+
+    def __init__(self, session: AsyncSession, redis_client: redis.Redis):
+        self.session = session
+        self.redis = redis_client
+        self.change_repo = ChangeRepository(session)
+        self.group_repo = GroupRepository(session)
+        self.balance_service = BalanceService(session, redis_client)
+
+    async def get_changes(self, group_id: UUID, since: int, limit: int) -> dict:
+        """Changes after `since`, oldest first, at most `limit` per call."""
+        group = await self.group_repo.get_by_id(group_id)
+        if group is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Group {group_id} not found"
+            )
+        current_seq = group.change_seq
+        if since > current_seq:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"since ({since}) is ahead of the group's latest change ({current_seq})"
+            )
+        
+        response = {"group_id": group_id, "since": since, "seq": current_seq}
+        if since == current_seq:
+            return response
+        
+        oldest_seq = await self.change_repo.get_oldest_seq(group_id)
+        if oldest_seq is None or since < oldest_seq - 1:
+            balances_seq, net_balances = await self._net_balances(group)
+            # The roster as GET /groups/{id} has it: a count and the first page
+            roster = await GroupService(self.session).get_group(group_id)
+            response["seq"] = balances_seq
+            response["snapshot"] = {
+                "member_count": roster["member_count"],
+                "members": roster["members"],
+                "members_next_cursor": roster["members_next_cursor"],
+                "net_balances": net_balances,
+            }
+            return response
+        
+        # One extra row tells whether another page follows
+        changes = await self.change_repo.get_since(group_id, since, limit + 1)
+        page = changes[:limit]
+        if any(change.user_ids is None for change in page):
+            # A write touched too many users to list: everyone's balance
+            user_ids = None
+        else:
+            user_ids = {UUID(user_id) for change in page for user_id in change.user_ids}
+        
+        response["seq"] = page[-1].seq
+        response["has_more"] = len(changes) > limit
+        response["changes"] = page
+        if user_ids is None or user_ids:
+            response["balances_seq"], response["net_balances"] = await self._net_balances(group, user_ids)
+        return response
+
+    async def _net_balances(
+        self, group: Group, user_ids: Optional[set[UUID]] = None
+    ) -> tuple[int, dict[str, Decimal]]:
+        """
+        Net balances (of `user_ids` only, if given) and the change_seq they
+        are as of. The ledger version is read before and after the states:
+        if it moved, a write changed balances meanwhile and the read repeats.
+        """
+        for _ in range(BALANCE_READ_ATTEMPTS):
+            _, version = await self.change_repo.get_versions(group.id)
+            if user_ids is not None and len(user_ids) <= USER_REPLAY_LIMIT:
+                states = await load_pair_states(self.redis, group.id, version)
+                if states is None:
+                    states = await self.balance_service.get_users_pair_states(group.id, user_ids)
+            else:
+                states = await self.balance_service.get_cached_pair_states(group.id)
+            seq, version_after = await self.change_repo.get_versions(group.id)
+            if version_after == version:
+                break
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Group balances changed during the sync; retry"
+            )
+        
+        rates = await self.balance_service.get_conversion_rates(group.base_currency, states)
+        net_balances = net_balances_from_states(states, rates)
+        if user_ids is None:
+            return seq, {str(user_id): amount for user_id, amount in net_balances.items()}
+        return seq, {str(user_id): net_balances.get(user_id, Decimal("0.00")) for user_id in user_ids}
@@ -0,0 +1,132 @@
+import asyncio
+import math
+import multiprocessing
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+from fastapi import HTTPException, status
+
+from app.core.config import get_settings
+
+
+class ComputeOffloader:
+    """
+    Size-aware execution policy for CPU-bound request work.
+
+    Work below SIMPLIFY_OFFLOAD_MIN_PAIRS runs inline: handing it to a pool
+    costs more than it saves. Larger work runs in a small pool (process by
+    default; the Decimal math holds the GIL, so threads only help with
+    fairness), created on first use. At most SIMPLIFY_OFFLOAD_MAX_QUEUE jobs
+    may be running or waiting; further requests get a 503 with Retry-After
+    rather than piling up behind them.
+    """
+
+    def __init__(self):
+        self._executor: Optional[Executor] = None
+        self.in_flight = 0
+        self.offloaded = 0
+        self.rejected = 0
+
+    async def run(self, size: int, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run `fn(*args)`, in the pool when `size` reaches the offload threshold."""
+        settings = get_settings()
+        if size < settings.SIMPLIFY_OFFLOAD_MIN_PAIRS:
+            return fn(*args)
+        if self.in_flight >= settings.SIMPLIFY_OFFLOAD_MAX_QUEUE:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many large balance computations in progress; retry shortly",
+                headers={"Retry-After": "1"}
+            )
+
+        self.in_flight += 1
+        self.offloaded += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            self.in_flight -= 1
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "max_queue": get_settings().SIMPLIFY_OFFLOAD_MAX_QUEUE,
+            "offloaded": self.offloaded,
+            "rejected": self.rejected,
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            settings = get_settings()
+            if settings.SIMPLIFY_OFFLOAD_EXECUTOR == "thread":
+                self._executor = ThreadPoolExecutor(
+                    max_workers=settings.SIMPLIFY_OFFLOAD_WORKERS, thread_name_prefix="simplify"
+                )
+            else:
+                # Spawned, not forked: the worker holds open sockets and a running loop
+                self._executor = ProcessPoolExecutor(
+                    max_workers=settings.SIMPLIFY_OFFLOAD_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+        return self._executor
+
+
+class LoopLagMonitor:
+    """
+    Measures event-loop lag: how late a timer set for LOOP_LAG_SAMPLE_SECONDS
+    fires. Anything that blocks the loop shows up here as latency every
+    other request on the worker paid. Keeps the last 120 samples.
+    """
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self._samples: deque = deque(maxlen=120)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._task = None
+
+    def reset(self) -> None:
+        self._samples.clear()
+
+    def record(self, lag: float) -> None:
+        self._samples.append(max(lag, 0.0))
+
+    def stats(self) -> dict:
+        """Lag in milliseconds over the sample window."""
+        if not self._samples:
+            return {"samples": 0, "last_ms": None, "p99_ms": None, "max_ms": None}
+        ordered = sorted(self._samples)
+        p99 = ordered[min(len(ordered) - 1, math.ceil(len(ordered) * 0.99) - 1)]
+        return {
+            "samples": len(ordered),
+            "last_ms": round(self._samples[-1] * 1000, 2),
+            "p99_ms": round(p99 * 1000, 2),
+            "max_ms": round(ordered[-1] * 1000, 2),
+        }
+
+    async def _run(self) -> None:
+        interval = get_settings().LOOP_LAG_SAMPLE_SECONDS
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(interval)
+            self.record(loop.time() - started - interval)
+
+
+compute_offloader = ComputeOffloader()
+loop_lag_monitor = LoopLagMonitor()
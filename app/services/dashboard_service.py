@@ -0,0 +1,103 @@
+from decimal import Decimal
+from uuid import UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import HTTPException, status
+import redis.asyncio as redis
+
+from app.models.group import Group
+from app.repositories.group_summary_repository import GroupSummaryRepository
+from app.repositories.user_repository import UserRepository
+from app.services.balance_service import BalanceService
+from app.services.ledger_cache import store_balance_view
+from app.utils.ledger import net_balances_from_states
+from app.utils.serialization import dumps, loads
+
+SUMMARY_TTL_SECONDS = 3600
+
+
+def summary_key(group_id: UUID) -> str:
+    """Cache key of a group's net balances for dashboards; dropped with its balance views on every write."""
+    return f"groups:{group_id}:summary"
+
+
+class DashboardService:
+    """
+    Builds a user's dashboard with a fixed number of queries: the user, then
+    their groups joined to the group_summaries projection (member counts and
+    last activity), then one MGET of cached net balances. Missing balances
+    are built together (the ledgers in one query) and written back in a
+    single pipeline, each compared against the ledger version its group was
+    loaded at.
+    """
+
+    def __init__(self, session: AsyncSession, redis_client: redis.Redis):
+        self.session = session
+        self.redis = redis_client
+        self.user_repo = UserRepository(session)
+        self.summary_repo = GroupSummaryRepository(session)
+        self.balance_service = BalanceService(session)
+
+    async def get_dashboard(self, user_id: UUID) -> dict:
+        """Get a user's profile, groups and net position in each group."""
+        user = await self.user_repo.get_by_id(user_id)
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"User {user_id} not found"
+            )
+        
+        rows = await self.summary_repo.list_for_user(user_id)
+        net_balances = await self.get_net_balances([group for group, _, _ in rows])
+        
+        groups = []
+        for group, _, summary in rows:
+            if summary is None:
+                # Groups without a summary row get one on their next write
+                summary = await self.summary_repo.compute(group.id)
+            groups.append({
+                "id": group.id,
+                "name": group.name,
+                "member_count": summary.member_count,
+                "last_activity_at": summary.last_activity_at,
+                "net_balance": Decimal(net_balances[group.id].get(str(user_id), "0")),
+            })
+        return {"user": user, "groups": groups}
+
+    async def get_net_balances(self, groups: list[Group]) -> dict[UUID, dict[str, str]]:
+        """Net balances (user id to amount) of many groups, from cache where possible."""
+        if not groups:
+            return {}
+        
+        cached = await self.redis.mget([summary_key(group.id) for group in groups])
+        net_balances = {}
+        missing = []
+        for group, body in zip(groups, cached):
+            if body:
+                net_balances[group.id] = loads(body)
+            else:
+                missing.append(group)
+        
+        if missing:
+            built = await self._build_net_balances(missing)
+            pipe = self.redis.pipeline(transaction=False)
+            for group in missing:
+                body = dumps(built[group.id])
+                store_balance_view(
+                    pipe, group.id, group.ledger_version, summary_key(group.id), body, SUMMARY_TTL_SECONDS
+                )
+                # Decode the encoded form so hits and misses look the same
+                net_balances[group.id] = loads(body)
+            await pipe.execute()
+        
+        return net_balances
+
+    async def _build_net_balances(self, groups: list[Group]) -> dict[UUID, dict]:
+        states = await self.balance_service.get_pair_states_bulk([group.id for group in groups])
+        built = {}
+        for group in groups:
+            rates = await self.balance_service.get_conversion_rates(group.base_currency, states[group.id])
+            built[group.id] = {
+                str(user_id): amount
+                for user_id, amount in net_balances_from_states(states[group.id], rates).items()
+            }
+        return built
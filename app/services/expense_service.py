@@ -1,15 +1,28 @@
+from datetime import datetime
+from typing import Optional
 from uuid import UUID
 from decimal import Decimal
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
+from sqlalchemy.orm.exc import StaleDataError
 from fastapi import HTTPException, status
+import redis.asyncio as redis
 
 from app.models.expense import Expense, ExpenseSplit, SplitType
 from app.models.group import GroupMember
+from app.repositories.change_repository import ChangeRepository
 from app.repositories.expense_repository import ExpenseRepository
 from app.repositories.group_repository import GroupRepository
-from app.schemas.expense import ExpenseCreate
+from app.repositories.group_summary_repository import GroupSummaryRepository
+from app.schemas.expense import SPLIT_DETAIL_LIMIT, ExpenseCreate, ExpenseResponse, ExpenseSplitCreate, ExpenseUpdate
+from app.services.balance_service import BalanceService
+from app.services.compute_offload import compute_offloader
+from app.services.fx_rates import conversion_rates, validate_currency
+from app.services.ledger_cache import LedgerChange
+from app.utils.balance_simplification import preview_debts
+from app.utils.ledger import debt_delta, expense_debts
 from app.utils.money import split_equal, round_decimal, distribute_remainder
+from app.utils.pagination import encode_cursor, parse_cursor
 
 
 class ExpenseService:
@@ -17,9 +30,18 @@ class ExpenseService:
         self.session = session
         self.expense_repo = ExpenseRepository(session)
         self.group_repo = GroupRepository(session)
+        self.change_repo = ChangeRepository(session)
+        self.summary_repo = GroupSummaryRepository(session)
     
-    async def create_expense(self, group_id: UUID, expense_data: ExpenseCreate) -> Expense:
-        """Create an expense with appropriate split logic."""
+    async def create_expense(
+        self, group_id: UUID, expense_data: ExpenseCreate, include_splits: Optional[bool] = None
+    ) -> tuple[ExpenseResponse, LedgerChange]:
+        """
+        Create an expense with appropriate split logic. Returns the response
+        built from the computed splits, so none are read back; it carries
+        per-split detail if `include_splits`, by default only for expenses
+        with at most SPLIT_DETAIL_LIMIT splits.
+        """
         # Validate group exists
         group = await self.group_repo.get_by_id(group_id)
         if not group:
@@ -35,6 +57,9 @@ class ExpenseService:
                 detail="Payer must be a member of the group"
             )
         
+        currency = expense_data.currency or group.base_currency
+        await validate_currency(self.session, currency, group.base_currency)
+        
         # Process splits based on split type
         splits_data = await self._calculate_splits(
             group_id, expense_data.amount, expense_data.split_type, expense_data.splits
@@ -45,26 +70,280 @@ class ExpenseService:
             "group_id": group_id,
             "paid_by_user_id": expense_data.paid_by_user_id,
             "amount": expense_data.amount,
+            "currency": currency,
             "description": expense_data.description,
             "split_type": expense_data.split_type,
         }
         
+        # Insert exactly the splits computed above, from the one roster read,
+        # so the stored rows always sum to the amount the debts were built from
         expense = await self.expense_repo.create(expense_dict, splits_data)
+        snapshot = self._snapshot(expense, len(splits_data))
+        debts = expense_debts(
+            expense.paid_by_user_id, currency, ((split["user_id"], split["amount"]) for split in splits_data)
+        )
+        seq, version = await self.change_repo.record(
+            group_id, "expense_created", expense.id, snapshot, self._users(debts), ledger=True
+        )
+        await self.summary_repo.apply(
+            group_id, seq, expenses=1, spend={currency: expense.amount}, activity_at=expense.created_at
+        )
+        
+        if include_splits is None:
+            include_splits = len(splits_data) <= SPLIT_DETAIL_LIMIT
+        response = ExpenseResponse.model_validate({**snapshot, "splits": splits_data if include_splits else []})
+        return response, LedgerChange(version, debts, [], seq)
+    
+    async def get_expense(self, group_id: UUID, expense_id: UUID) -> Expense:
+        """An expense with all its splits (change log entries only carry the split count)."""
+        expense = await self.expense_repo.get_by_id(expense_id)
+        if not expense or expense.group_id != group_id:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Expense {expense_id} not found"
+            )
         return expense
     
+    async def update_expense(
+        self, group_id: UUID, expense_id: UUID, update_data: ExpenseUpdate
+    ) -> tuple[Expense, Optional[LedgerChange], int]:
+        """
+        Apply a partial update. Returns the change to the group's ledger (None
+        if only non-ledger fields, the description, changed) and the group's
+        change_seq after the write.
+        """
+        expense = await self._get_for_write(group_id, expense_id, update_data.version)
+        before = self._debts(expense)
+        spend = {expense.currency: -expense.amount}
+        fields = update_data.model_fields_set
+        
+        if "description" in fields and update_data.description is not None:
+            expense.description = update_data.description
+        
+        ledger_fields = {"paid_by_user_id", "amount", "currency", "split_type", "splits"} & fields
+        if ledger_fields:
+            paid_by_user_id = update_data.paid_by_user_id or expense.paid_by_user_id
+            amount = update_data.amount or expense.amount
+            currency = update_data.currency or expense.currency
+            split_type = update_data.split_type or expense.split_type
+            
+            if currency != expense.currency:
+                group = await self.group_repo.get_by_id(group_id)
+                await validate_currency(self.session, currency, group.base_currency)
+            
+            if paid_by_user_id != expense.paid_by_user_id and not await self.group_repo.is_member(group_id, paid_by_user_id):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Payer must be a member of the group"
+                )
+            
+            # Without new splits, re-split over the current participants
+            if update_data.splits is not None:
+                provided_splits = update_data.splits
+            elif split_type == expense.split_type:
+                provided_splits = [
+                    ExpenseSplitCreate(user_id=split.user_id, amount=split.amount, percent=split.percent)
+                    for split in expense.splits
+                ]
+            else:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Changing split_type requires splits"
+                )
+            
+            splits_data = await self._calculate_splits(group_id, amount, split_type, provided_splits)
+            expense.paid_by_user_id = paid_by_user_id
+            expense.amount = amount
+            expense.currency = currency
+            expense.split_type = split_type
+            expense.splits = [ExpenseSplit(group_id=group_id, **split_data) for split_data in splits_data]
+        
+        expense.version = update_data.version + 1
+        await self._flush_versioned()
+        
+        delta = debt_delta(before, self._debts(expense))
+        seq, version = await self.change_repo.record(
+            group_id, "expense_updated", expense.id, self._snapshot(expense), self._users(delta),
+            ledger=bool(ledger_fields)
+        )
+        spend[expense.currency] = spend.get(expense.currency, Decimal("0")) + expense.amount
+        await self.summary_repo.apply(group_id, seq, spend=spend)
+        if not ledger_fields:
+            return expense, None, seq
+        return expense, LedgerChange(version, delta, [], seq), seq
+    
+    async def delete_expense(self, group_id: UUID, expense_id: UUID, expected_version: int) -> LedgerChange:
+        """Delete an expense and its splits."""
+        expense = await self._get_for_write(group_id, expense_id, expected_version)
+        before = self._debts(expense)
+        spend = {expense.currency: -expense.amount}
+        
+        await self.session.delete(expense)
+        await self._flush_versioned()
+        
+        seq, version = await self.change_repo.record(
+            group_id, "expense_deleted", expense_id, None, self._users(before), ledger=True
+        )
+        await self.summary_repo.apply(group_id, seq, expenses=-1, spend=spend)
+        return LedgerChange(version, {key: -amount for key, amount in before.items()}, [], seq)
+    
+    async def _get_for_write(self, group_id: UUID, expense_id: UUID, expected_version: int) -> Expense:
+        expense = await self.expense_repo.get_by_id(expense_id)
+        if not expense or expense.group_id != group_id:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Expense {expense_id} not found"
+            )
+        if expense.version != expected_version:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Expense {expense_id} was modified (current version {expense.version})"
+            )
+        return expense
+    
+    async def _flush_versioned(self) -> None:
+        # The UPDATE/DELETE matches on the loaded version; a concurrent edit makes it miss
+        try:
+            await self.session.flush()
+        except StaleDataError:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Expense was modified concurrently"
+            )
+    
+    @staticmethod
+    def _snapshot(expense: Expense, split_count: Optional[int] = None) -> dict:
+        """
+        Change log entry for an expense: the expense without its splits,
+        which can run to tens of thousands, plus their count (by default,
+        of the loaded splits). Clients read the expense for the splits.
+        """
+        return ExpenseResponse(
+            id=expense.id,
+            group_id=expense.group_id,
+            paid_by_user_id=expense.paid_by_user_id,
+            amount=expense.amount,
+            currency=expense.currency,
+            description=expense.description,
+            split_type=expense.split_type,
+            created_at=expense.created_at,
+            version=expense.version,
+            split_count=len(expense.splits) if split_count is None else split_count,
+        ).model_dump(mode="json", exclude={"splits"})
+    
+    @staticmethod
+    def _users(debts: dict) -> set:
+        return {user_id for pair in debts for user_id in pair[:2]}
+    
+    @staticmethod
+    def _debts(expense: Expense) -> dict:
+        return expense_debts(
+            expense.paid_by_user_id, expense.currency, [(split.user_id, split.amount) for split in expense.splits]
+        )
+    
+    async def preview_expenses(
+        self, group_id: UUID, candidates: list[ExpenseCreate], redis_client: redis.Redis
+    ) -> dict:
+        """
+        What a batch of new expenses would do to the group's balances, without
+        writing anything. Candidates are applied in order on top of the cached
+        pair states; each preview includes every candidate before it. One
+        membership read serves the whole batch.
+        """
+        group = await self.group_repo.get_by_id(group_id)
+        if not group:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Group {group_id} not found"
+            )
+        
+        member_ids = await self._member_ids(group_id)
+        members = set(member_ids)
+        batches = []
+        previews = []
+        for candidate in candidates:
+            if candidate.paid_by_user_id not in members:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Payer must be a member of the group"
+                )
+            currency = candidate.currency or group.base_currency
+            await validate_currency(self.session, currency, group.base_currency)
+            splits_data = await self._calculate_splits(
+                group_id, candidate.amount, candidate.split_type, candidate.splits, member_ids
+            )
+            batches.append(expense_debts(
+                candidate.paid_by_user_id, currency, [(split["user_id"], split["amount"]) for split in splits_data]
+            ))
+            previews.append({"currency": currency, "splits": splits_data})
+        
+        balance_service = BalanceService(self.session, redis_client)
+        states = await balance_service.get_cached_pair_states(group_id)
+        currencies = {currency for _, _, currency in states} | {preview["currency"] for preview in previews}
+        rates = await conversion_rates(self.session, currencies, group.base_currency)
+        current, results = await compute_offloader.run(
+            len(states) * len(batches), preview_debts, states, rates, batches
+        )
+        
+        for preview, (net_balances, simplified) in zip(previews, results):
+            preview["net_balances"] = {str(user_id): amount for user_id, amount in net_balances.items()}
+            preview["net_changes"] = {
+                str(user_id): amount - current.get(user_id, Decimal("0"))
+                for user_id, amount in net_balances.items()
+                if amount != current.get(user_id, Decimal("0"))
+            }
+            preview["simplified"] = simplified
+        return {
+            "base_currency": group.base_currency,
+            "net_balances": {str(user_id): amount for user_id, amount in current.items()},
+            "previews": previews,
+        }
+    
+    async def search_expenses(
+        self, group_id: UUID, query: str, limit: int, cursor: Optional[str] = None
+    ) -> dict:
+        """Ranked full-text search of a group's expenses, one page at a time."""
+        group = await self.group_repo.get_by_id(group_id)
+        if not group:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Group {group_id} not found"
+            )
+        
+        after = parse_cursor(cursor, float, datetime.fromisoformat, UUID)
+        
+        # Fetch one extra row to know whether another page exists
+        rows = await self.expense_repo.search(group_id, query, limit + 1, after)
+        page = rows[:limit]
+        expenses = await self.expense_repo.get_many([expense_id for _, _, expense_id in page])
+        
+        next_cursor = None
+        if len(rows) > limit:
+            score, created_at, expense_id = page[-1]
+            next_cursor = encode_cursor([score, created_at, expense_id])
+        return {"items": expenses, "next_cursor": next_cursor}
+    
+    async def _member_ids(self, group_id: UUID) -> list[UUID]:
+        # Join order: EQUAL splits give the extra cents to the first members
+        members_result = await self.session.execute(
+            select(GroupMember.user_id)
+            .where(GroupMember.group_id == group_id)
+            .order_by(GroupMember.joined_at, GroupMember.user_id)
+        )
+        return [row[0] for row in members_result.all()]
+    
     async def _calculate_splits(
         self,
         group_id: UUID,
         total_amount: Decimal,
         split_type: SplitType,
-        provided_splits: list
+        provided_splits: list,
+        member_ids: Optional[list[UUID]] = None
     ) -> list[dict]:
         """Calculate expense splits based on split type."""
-        # Get all group members
-        members_result = await self.session.execute(
-            select(GroupMember.user_id).where(GroupMember.group_id == group_id)
-        )
-        member_ids = [row[0] for row in members_result.all()]
+        # Get all group members, unless the caller already has them
+        if member_ids is None:
+            member_ids = await self._member_ids(group_id)
         
         if not member_ids:
             raise HTTPException(
@@ -72,6 +351,8 @@ class ExpenseService:
                 detail="Group has no members"
             )
         
+        # Set lookups keep validation linear in the number of splits
+        members = set(member_ids)
         splits_data = []
         
         if split_type == SplitType.EQUAL:
@@ -79,22 +360,19 @@ class ExpenseService:
             participant_ids = [s.user_id for s in provided_splits] if provided_splits else member_ids
             
             # Validate all participants are group members
-            for user_id in participant_ids:
-                if user_id not in member_ids:
-                    raise HTTPException(
-                        status_code=status.HTTP_400_BAD_REQUEST,
-                        detail=f"User {user_id} is not a member of this group"
-                    )
+            if provided_splits:
+                for user_id in participant_ids:
+                    if user_id not in members:
+                        raise HTTPException(
+                            status_code=status.HTTP_400_BAD_REQUEST,
+                            detail=f"User {user_id} is not a member of this group"
+                        )
             
             # Split equally
-            split_amounts = split_equal(total_amount, len(participant_ids))
-            
-            for i, user_id in enumerate(participant_ids):
-                splits_data.append({
-                    "user_id": user_id,
-                    "amount": split_amounts[i],
-                    "percent": None
-                })
+            splits_data = [
+                {"user_id": user_id, "amount": amount, "percent": None}
+                for user_id, amount in zip(participant_ids, split_equal(total_amount, len(participant_ids)))
+            ]
         
         elif split_type == SplitType.EXACT:
             if not provided_splits:
@@ -116,7 +394,7 @@ class ExpenseService:
             
             # Validate all participants are group members
             for split in provided_splits:
-                if split.user_id not in member_ids:
+                if split.user_id not in members:
                     raise HTTPException(
                         status_code=status.HTTP_400_BAD_REQUEST,
                         detail=f"User {split.user_id} is not a member of this group"
@@ -153,7 +431,7 @@ class ExpenseService:
             
             # Validate all participants are group members
             for split in provided_splits:
-                if split.user_id not in member_ids:
+                if split.user_id not in members:
                     raise HTTPException(
                         status_code=status.HTTP_400_BAD_REQUEST,
                         detail=f"User {split.user_id} is not a member of this group"
@@ -0,0 +1,74 @@
+import time
+from decimal import Decimal
+from typing import Dict, Iterable, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from fastapi import HTTPException, status
+
+from app.core.config import get_settings
+from app.models.fx import FxRate
+from app.utils.ledger import rates_into_base
+
+ONE = Decimal("1")
+
+
+class FxRateCache:
+    """
+    The whole fx_rates table (a few hundred rows at most) held in process
+    for FX_RATE_CACHE_TTL_SECONDS, so conversions cost no query. A reload
+    by the rates job is picked up within the TTL.
+    """
+
+    def __init__(self):
+        self._rates: Optional[Dict[str, Decimal]] = None
+        self._expires_at = 0.0
+
+    async def get_rates(self, session: AsyncSession) -> Dict[str, Decimal]:
+        if self._rates is None or time.monotonic() >= self._expires_at:
+            result = await session.execute(select(FxRate.currency, FxRate.rate))
+            self._rates = {currency: Decimal(rate) for currency, rate in result.all()}
+            self._expires_at = time.monotonic() + get_settings().FX_RATE_CACHE_TTL_SECONDS
+        return self._rates
+
+    def clear(self) -> None:
+        self._rates = None
+
+
+fx_rate_cache = FxRateCache()
+
+
+def missing_rates_error(missing: Iterable[str]) -> HTTPException:
+    """
+    Writes are validated against the rates, so a missing one means the rates
+    table lost it: 503 until the rates job loads it again.
+    """
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=f"No FX rate loaded for {', '.join(sorted(missing))}"
+    )
+
+
+async def conversion_rates(session: AsyncSession, currencies: Iterable[str], base_currency: str) -> Dict[str, Decimal]:
+    """
+    Multiplier from each currency into the base currency. Single-currency
+    ledgers (everything in the base currency) need no rates at all.
+    """
+    currencies = set(currencies)
+    if currencies <= {base_currency}:
+        return {base_currency: ONE}
+    rates, missing = rates_into_base(await fx_rate_cache.get_rates(session), currencies, base_currency)
+    if missing:
+        raise missing_rates_error(missing)
+    return rates
+
+
+async def validate_currency(session: AsyncSession, currency: str, base_currency: str) -> None:
+    """Reject writes in a currency that could not be converted into the group's base currency."""
+    if currency == base_currency:
+        return
+    rates = await fx_rate_cache.get_rates(session)
+    if currency not in rates or base_currency not in rates:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"No FX rate to convert {currency} into the group's base currency {base_currency}"
+        )
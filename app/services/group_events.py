@@ -0,0 +1,147 @@
+import asyncio
+import json
+import logging
+from typing import Dict, Optional, Set, Tuple
+from uuid import UUID
+import redis.asyncio as redis
+
+from app.core.database import create_session
+from app.core.redis_client import RedisClient
+from app.services.balance_service import BalanceService
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = "group_events:"
+SUBSCRIBER_QUEUE_SIZE = 8
+
+
+async def publish_group_event(redis_client: redis.Redis, group_id: UUID, kind: str, version: int) -> None:
+    """
+    Announce a committed write to every worker. `version` is the group's
+    change_seq after the write, the sequence GET /groups/{id}/changes pages by.
+    """
+    await redis_client.publish(
+        f"{CHANNEL_PREFIX}{group_id}",
+        json.dumps({"group_id": str(group_id), "version": version, "kind": kind})
+    )
+
+
+class GroupEventBroker:
+    """
+    Per-worker fan-out of group events from Redis pub/sub.
+
+    A single pub/sub connection is shared by all subscribers of the worker and
+    is subscribed only to channels of groups that have local listeners. Each
+    subscriber gets a small bounded queue; when a slow client falls behind the
+    oldest events are dropped, which is safe because every event carries the
+    latest version.
+    """
+
+    def __init__(self):
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._pubsub = None
+        self._reader: Optional[asyncio.Task] = None
+        self._net_balances: Dict[str, Tuple[int, asyncio.Future]] = {}
+
+    async def subscribe(self, group_id: UUID) -> asyncio.Queue:
+        """Register a subscriber queue for a group."""
+        key = str(group_id)
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        if key not in self._subscribers:
+            self._subscribers[key] = set()
+            pubsub = await self._get_pubsub()
+            await pubsub.subscribe(f"{CHANNEL_PREFIX}{key}")
+        self._subscribers[key].add(queue)
+        if self._reader is None or self._reader.done():
+            self._reader = asyncio.create_task(self._read_loop())
+        return queue
+
+    async def unsubscribe(self, group_id: UUID, queue: asyncio.Queue) -> None:
+        """Remove a subscriber queue; drop the channel when it was the last one."""
+        key = str(group_id)
+        queues = self._subscribers.get(key)
+        if not queues:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self._subscribers[key]
+            self._net_balances.pop(key, None)
+            if self._pubsub is not None:
+                await self._pubsub.unsubscribe(f"{CHANNEL_PREFIX}{key}")
+
+    def subscriber_count(self) -> int:
+        return sum(len(queues) for queues in self._subscribers.values())
+
+    def dispatch(self, group_id: str, event: dict) -> None:
+        """Deliver an event to every local subscriber of the group."""
+        for queue in self._subscribers.get(group_id, ()):
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+    async def net_balances(self, group_id: UUID, version: int) -> Dict[str, str]:
+        """
+        Net balances for a group at a version, computed once per worker and
+        shared by every subscriber that asked for them.
+        """
+        key = str(group_id)
+        cached = self._net_balances.get(key)
+        if cached is None or cached[0] != version or (cached[1].done() and cached[1].exception()):
+            future = asyncio.ensure_future(self._compute_net_balances(group_id))
+            self._net_balances[key] = (version, future)
+            cached = (version, future)
+        return await asyncio.shield(cached[1])
+
+    async def close(self) -> None:
+        """Stop the reader task and release the pub/sub connection."""
+        if self._reader is not None:
+            self._reader.cancel()
+            try:
+                await self._reader
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._reader = None
+        if self._pubsub is not None:
+            await self._pubsub.close()
+            self._pubsub = None
+        self._subscribers.clear()
+        self._net_balances.clear()
+
+    async def _get_pubsub(self):
+        if self._pubsub is None:
+            client = await RedisClient.get_client()
+            self._pubsub = client.pubsub(ignore_subscribe_messages=True)
+        return self._pubsub
+
+    async def _read_loop(self) -> None:
+        while self._subscribers:
+            try:
+                message = await self._pubsub.get_message(timeout=1.0)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Group event subscription failed; retrying")
+                await asyncio.sleep(1.0)
+                continue
+            if not message or message.get("type") != "message":
+                continue
+            channel = message["channel"]
+            group_id = channel[len(CHANNEL_PREFIX):]
+            try:
+                self.dispatch(group_id, json.loads(message["data"]))
+            except (ValueError, KeyError):
+                logger.warning("Ignoring malformed group event on %s", channel)
+
+    @staticmethod
+    async def _compute_net_balances(group_id: UUID) -> Dict[str, str]:
+        async with create_session() as session:
+            net_balances = await BalanceService(session).get_net_balances(group_id)
+        return {str(user_id): str(amount) for user_id, amount in net_balances.items()}
+
+
+event_broker = GroupEventBroker()
+
+
+def get_event_broker() -> GroupEventBroker:
+    """Dependency to get the per-worker group event broker."""
+    return event_broker
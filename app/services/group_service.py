@@ -0,0 +1,79 @@
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import HTTPException, status
+
+from app.models.group import Group
+from app.repositories.group_repository import GroupRepository
+from app.repositories.group_summary_repository import GroupSummaryRepository
+from app.utils.pagination import encode_cursor, parse_cursor
+
+# Members embedded in a group response
+MEMBER_PAGE_SIZE = 50
+
+
+class GroupService:
+    """
+    Group reads sized for large groups: the member count comes from the
+    group's summary and members are read a keyset page at a time, so no
+    request loads the whole roster.
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+        self.group_repo = GroupRepository(session)
+        self.summary_repo = GroupSummaryRepository(session)
+
+    async def get_group(self, group_id: UUID) -> dict:
+        """A group with its member count and first page of members."""
+        group = await self._get_group(group_id)
+        # Groups without a summary row get one on their next write
+        summary = await self.summary_repo.get(group_id) or await self.summary_repo.compute(group_id)
+        page = await self._members_page(group_id, MEMBER_PAGE_SIZE)
+        return {
+            "id": group.id,
+            "name": group.name,
+            "base_currency": group.base_currency,
+            "created_at": group.created_at,
+            "member_count": summary.member_count,
+            "members": page["items"],
+            "members_next_cursor": page["next_cursor"],
+        }
+
+    async def list_members(self, group_id: UUID, limit: int, cursor: Optional[str] = None) -> dict:
+        """A page of a group's members, in the order they joined."""
+        await self._get_group(group_id)
+        after = parse_cursor(cursor, datetime.fromisoformat, UUID)
+        return await self._members_page(group_id, limit, after)
+
+    async def _get_group(self, group_id: UUID) -> Group:
+        group = await self.group_repo.get_by_id(group_id)
+        if not group:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Group {group_id} not found"
+            )
+        return group
+
+    async def _members_page(
+        self, group_id: UUID, limit: int, after: Optional[tuple[datetime, UUID]] = None
+    ) -> dict:
+        # Fetch one extra row to know whether another page exists
+        rows = await self.group_repo.get_members_page(group_id, limit + 1, after)
+        page = rows[:limit]
+        next_cursor = None
+        if len(rows) > limit:
+            user_id, joined_at, *_ = page[-1]
+            next_cursor = encode_cursor([joined_at, user_id])
+        return {
+            "items": [
+                {
+                    "user_id": user_id,
+                    "joined_at": joined_at,
+                    "user": {"id": user_id, "name": name, "email": email, "created_at": created_at},
+                }
+                for user_id, joined_at, name, email, created_at in page
+            ],
+            "next_cursor": next_cursor,
+        }
@@ -0,0 +1,69 @@
+from datetime import datetime
+from decimal import Decimal
+from typing import Optional
+from uuid import UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import HTTPException, status
+
+from app.repositories.group_summary_repository import GroupSummaryRepository
+from app.repositories.user_repository import UserRepository
+from app.services.fx_rates import fx_rate_cache
+from app.utils.ledger import rates_into_base
+from app.utils.money import round_decimal
+from app.utils.pagination import encode_cursor, parse_cursor
+
+
+class GroupSummaryService:
+    """
+    A user's groups with their totals, read from group_summaries only: one
+    query per page however many expenses the groups hold.
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+        self.user_repo = UserRepository(session)
+        self.summary_repo = GroupSummaryRepository(session)
+
+    async def list_user_groups(self, user_id: UUID, limit: int, cursor: Optional[str] = None) -> dict:
+        """A page of the groups a user belongs to, in the order they joined."""
+        if not await self.user_repo.get_by_id(user_id):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"User {user_id} not found"
+            )
+
+        after = parse_cursor(cursor, datetime.fromisoformat, UUID)
+
+        # Fetch one extra row to know whether another page exists
+        rows = await self.summary_repo.list_for_user(user_id, limit + 1, after)
+        page = rows[:limit]
+        items = []
+        for group, joined_at, summary in page:
+            if summary is None:
+                # Groups without a summary row get one on their next write
+                summary = await self.summary_repo.compute(group.id)
+            items.append({
+                "id": group.id,
+                "name": group.name,
+                "base_currency": group.base_currency,
+                "joined_at": joined_at,
+                "member_count": summary.member_count,
+                "expense_count": summary.expense_count,
+                "total_spend": await self._total_spend(summary.spend, group.base_currency),
+                "last_activity_at": summary.last_activity_at,
+                "version": summary.version,
+            })
+
+        next_cursor = None
+        if len(rows) > limit:
+            group, joined_at, _ = page[-1]
+            next_cursor = encode_cursor([joined_at, group.id])
+        return {"items": items, "next_cursor": next_cursor}
+
+    async def _total_spend(self, spend: dict[str, str], base_currency: str) -> Optional[Decimal]:
+        """Spend converted into the base currency; None while a rate is missing, rather than failing the page."""
+        # Rates come from the in-process FX cache, not a query per group
+        rates, missing = rates_into_base(await fx_rate_cache.get_rates(self.session), spend, base_currency)
+        if missing:
+            return None
+        return round_decimal(sum((Decimal(amount) * rates[currency] for currency, amount in spend.items()), Decimal("0")))
@@ -0,0 +1,150 @@
+import hashlib
+import json
+import secrets
+from datetime import datetime, timedelta
+from fastapi import HTTPException, Response, status
+from pydantic import BaseModel
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+import redis.asyncio as redis
+
+from app.core.config import get_settings
+from app.repositories.idempotency_repository import IdempotencyRepository
+
+REPLAY_HEADER = "Idempotent-Replayed"
+
+# Delete the in-flight lock (KEYS[1]) only while it still holds this
+# request's token (ARGV[1]): once it expired, another request may own it
+_RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class IdempotencyService:
+    """
+    Idempotency-Key handling for create endpoints.
+
+    The stored response is written in the same transaction as the resource it
+    describes (DB unique key on scope + key) and kept for
+    IDEMPOTENCY_RETENTION_SECONDS; Redis holds a fast-path copy for replays
+    and a short-lived lock that serializes concurrent duplicates.
+    """
+
+    def __init__(self, session: AsyncSession, redis_client: redis.Redis):
+        self.session = session
+        self.redis = redis_client
+        self.repo = IdempotencyRepository(session)
+        # Token of each lock this request holds, by (scope, key)
+        self._lock_tokens: dict[tuple[str, str], str] = {}
+
+    @staticmethod
+    def request_hash(payload: BaseModel, **params) -> str:
+        """
+        Fingerprint of a request, used to reject key reuse with another one:
+        its body plus any query `params` that shape the response.
+        """
+        fingerprint = payload.model_dump_json()
+        if params:
+            fingerprint += json.dumps(params, sort_keys=True)
+        return hashlib.sha256(fingerprint.encode()).hexdigest()
+
+    @staticmethod
+    def _cache_key(scope: str, key: str) -> str:
+        return f"idempotency:{scope}:{key}"
+
+    @staticmethod
+    def _replay(request_hash: str, stored_hash: str, status_code: int, body: str) -> Response:
+        if stored_hash != request_hash:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Idempotency-Key was already used with a different request"
+            )
+        return Response(
+            content=body,
+            status_code=status_code,
+            media_type="application/json",
+            headers={REPLAY_HEADER: "true"}
+        )
+
+    async def begin(self, scope: str, key: str, request_hash: str) -> Response | None:
+        """
+        Return the stored response for a replayed key, or take the in-flight lock.
+        Raises 409 if another request with the same key is still running.
+        """
+        cache_key = self._cache_key(scope, key)
+
+        # Fast path: completed request cached in Redis
+        cached = await self.redis.get(cache_key)
+        if cached:
+            data = json.loads(cached)
+            return self._replay(request_hash, data["hash"], data["status"], data["body"])
+
+        # Serialize concurrent duplicates before touching the write path
+        token = secrets.token_hex(16)
+        acquired = await self.redis.set(
+            f"{cache_key}:lock", token, nx=True, ex=get_settings().IDEMPOTENCY_LOCK_SECONDS
+        )
+        if acquired:
+            self._lock_tokens[(scope, key)] = token
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="A request with this Idempotency-Key is already in progress"
+            )
+
+        # Durable path: Redis entry expired or was never written
+        record = await self.repo.get(scope, key)
+        if record:
+            await self.release(scope, key)
+            await self._cache(scope, key, record.request_hash, record.status_code, record.response_body)
+            return self._replay(request_hash, record.request_hash, record.status_code, record.response_body)
+
+        return None
+
+    async def complete(
+        self, scope: str, key: str, request_hash: str, status_code: int, response: BaseModel
+    ) -> Response | None:
+        """
+        Store the response alongside the write, commit both, then cache the
+        replay. If a concurrent duplicate committed first, this write is
+        rolled back and the stored response is returned instead.
+        """
+        body = response.model_dump_json()
+        try:
+            await self.repo.create({
+                "scope": scope,
+                "key": key,
+                "request_hash": request_hash,
+                "status_code": status_code,
+                "response_body": body,
+                "expires_at": datetime.utcnow() + timedelta(seconds=get_settings().IDEMPOTENCY_RETENTION_SECONDS),
+            })
+            await self.session.commit()
+        except IntegrityError:
+            await self.session.rollback()
+            record = await self.repo.get(scope, key)
+            if record is None:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="A request with this Idempotency-Key is already in progress"
+                )
+            await self._cache(scope, key, record.request_hash, record.status_code, record.response_body)
+            return self._replay(request_hash, record.request_hash, record.status_code, record.response_body)
+        await self._cache(scope, key, request_hash, status_code, body)
+        return None
+
+    async def release(self, scope: str, key: str) -> None:
+        """Release the in-flight lock, unless it expired and was taken by another request."""
+        token = self._lock_tokens.pop((scope, key), None)
+        if token is not None:
+            await self.redis.eval(_RELEASE_SCRIPT, 1, f"{self._cache_key(scope, key)}:lock", token)
+
+    async def _cache(self, scope: str, key: str, request_hash: str, status_code: int, body: str) -> None:
+        await self.redis.setex(
+            self._cache_key(scope, key),
+            get_settings().IDEMPOTENCY_TTL_SECONDS,
+            json.dumps({"hash": request_hash, "status": status_code, "body": body})
+        )
@@ -0,0 +1,91 @@
+from uuid import UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import HTTPException, status
+import redis.asyncio as redis
+
+from app.repositories.group_repository import GroupRepository
+from app.services.balance_service import BalanceService
+from app.services.ledger_cache import (
+    LedgerChange,
+    apply_ledger_change,
+    get_leaderboard_version,
+    global_leaderboard_key,
+    group_leaderboard_key,
+    repair_cached_plan,
+    replace_group_leaderboard,
+    top_entries,
+)
+from app.utils.ledger import net_balances_from_states
+
+
+class LeaderboardService:
+    """
+    Top debtors and creditors from Redis sorted sets of net balance in cents.
+
+    Writes move the boards by exact per-pair balance changes (see
+    apply_ledger_change); when that is not possible the group's board is
+    rebuilt from its pair states and the global board of its base currency
+    moved by the difference.
+    Group reads check the board against the group's ledger version first.
+    """
+
+    def __init__(self, session: AsyncSession, redis_client: redis.Redis):
+        self.session = session
+        self.redis = redis_client
+        self.group_repo = GroupRepository(session)
+        self.balance_service = BalanceService(session, redis_client)
+
+    async def apply_change(self, group_id: UUID, change: LedgerChange) -> None:
+        """Apply a committed write to cached pair states, leaderboards and the simplified plan."""
+        group = await self.group_repo.get_by_id(group_id)
+        if group is None:
+            return
+        ranked, net_changes = await apply_ledger_change(self.redis, group_id, change, group.base_currency)
+        await repair_cached_plan(self.redis, group_id, change.version, net_changes)
+        if not ranked:
+            await self.rebuild_group(group_id)
+
+    async def rebuild_group(self, group_id: UUID) -> bool:
+        """
+        Recompute a group's board from its current pair states, converted at
+        current rates. Boards of multi-currency groups keep the rates of their
+        last rebuild until the next write or rebuild job.
+        """
+        group = await self.group_repo.get_by_id(group_id)
+        if group is None:
+            return False
+        # Read the version itself; the loaded row may predate this session's writes
+        version = await self.group_repo.get_ledger_version(group_id)
+        states = await self.balance_service.get_cached_pair_states(group_id)
+        # A write committed meanwhile will rebuild (or update) the board itself
+        if await self.group_repo.get_ledger_version(group_id) != version:
+            return False
+        rates = await self.balance_service.get_conversion_rates(group.base_currency, states)
+        net_balances = net_balances_from_states(states, rates)
+        return await replace_group_leaderboard(self.redis, group_id, group.base_currency, version, net_balances)
+
+    async def get_group_top(self, group_id: UUID, k: int) -> dict:
+        """Top k debtors and creditors of a group."""
+        version = await self.group_repo.get_ledger_version(group_id)
+        if version is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Group {group_id} not found"
+            )
+        if await get_leaderboard_version(self.redis, group_id) != version:
+            await self.rebuild_group(group_id)
+        return self._format(await top_entries(self.redis, group_leaderboard_key(group_id), k))
+
+    async def get_global_top(self, k: int, currency: str) -> dict:
+        """
+        Top k debtors and creditors across all groups with base currency
+        `currency`; balances in different currencies are never added up.
+        """
+        return self._format(await top_entries(self.redis, global_leaderboard_key(currency), k))
+
+    @staticmethod
+    def _format(entries: dict) -> dict:
+        return {
+            side: [{"user_id": user_id, "amount": amount} for user_id, amount in rows]
+            for side, rows in entries.items()
+        }
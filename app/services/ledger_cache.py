@@ -0,0 +1,596 @@
+from decimal import Decimal
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from uuid import UUID
+import redis.asyncio as redis
+
+from app.utils.balance_simplification import PlanRanks, interval_transfers, repair_plan
+from app.utils.ledger import (
+    PairKey,
+    PairState,
+    pair_field,
+    pair_state_fields,
+    pair_states_from_fields,
+    to_cents,
+)
+from app.utils.serialization import dumps, loads
+
+LEDGER_CACHE_TTL_SECONDS = 3600
+BALANCE_VIEW_TTL_SECONDS = 3600
+
+# Hash layout: `version` is the groups.ledger_version the hash reflects; each
+# pair has d:/s:{debtor}:{creditor}:{currency} fields holding debt and
+# settled in cents of the pair's currency.
+#
+# Leaderboards: per group and global sorted sets of net balance in cents
+# (positive = owed money). A group's board carries the ledger version it
+# reflects in a separate key. Cents are in the group's base currency, so
+# there is one global board per base currency, the sum of those groups'
+# boards; adding cents of different currencies would mean nothing.
+#
+# Applying a write updates the touched pairs and, from their balance before
+# and after, the boards. Boards are in the group's base currency, so ARGV[3]
+# is 0 when the write is in another currency (needs conversion: rebuild).
+# Returns {status, pair, change, ...}: status 1 when both were current, 2
+# when the pairs were but the board needs a rebuild, 0 when the pairs were
+# dropped; then each pair's balance change in cents for writes in the base
+# currency.
+_APPLY_SCRIPT = """
+local version = tonumber(ARGV[1])
+local current = redis.call('HGET', KEYS[1], 'version')
+if not current or tonumber(current) ~= version - 1 then
+    redis.call('DEL', KEYS[1])
+    return {0}
+end
+local in_base = ARGV[3] == '1'
+local board = redis.call('GET', KEYS[4])
+local ranked = in_base and board and tonumber(board) == version - 1
+local result = {1}
+for i = 4, #ARGV, 3 do
+    local kind, pair, cents = ARGV[i], ARGV[i + 1], tonumber(ARGV[i + 2])
+    local debt = tonumber(redis.call('HGET', KEYS[1], 'd:' .. pair) or '0')
+    local settled = tonumber(redis.call('HGET', KEYS[1], 's:' .. pair) or '0')
+    local before = math.max(debt - settled, 0)
+    if kind == 'debt' then
+        debt = debt + cents
+    else
+        settled = settled + cents
+    end
+    redis.call('HSET', KEYS[1], 'd:' .. pair, debt, 's:' .. pair, settled)
+    local change = math.max(debt - settled, 0) - before
+    if in_base and change ~= 0 then
+        table.insert(result, pair)
+        table.insert(result, change)
+    end
+    if ranked and change ~= 0 then
+        local debtor, creditor = string.match(pair, '([^:]+):([^:]+)')
+        for _, key in ipairs({KEYS[2], KEYS[3]}) do
+            redis.call('ZINCRBY', key, -change, debtor)
+            redis.call('ZINCRBY', key, change, creditor)
+        end
+    end
+end
+redis.call('HSET', KEYS[1], 'version', ARGV[1])
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+if not ranked then
+    result[1] = 2
+    return result
+end
+redis.call('SET', KEYS[4], ARGV[1])
+redis.call('ZREMRANGEBYSCORE', KEYS[2], 0, 0)
+redis.call('ZREMRANGEBYSCORE', KEYS[3], 0, 0)
+return result
+"""
+
+# Replace a group's board with freshly computed nets at a version (unless
+# the board is already at or past it), moving the global board by the diff.
+_REPLACE_BOARD_SCRIPT = """
+local current = redis.call('GET', KEYS[3])
+if current and tonumber(current) >= tonumber(ARGV[1]) then
+    return 0
+end
+local old = redis.call('ZRANGE', KEYS[1], 0, -1, 'WITHSCORES')
+for i = 1, #old, 2 do
+    redis.call('ZINCRBY', KEYS[2], -tonumber(old[i + 1]), old[i])
+end
+redis.call('DEL', KEYS[1])
+for i = 2, #ARGV, 2 do
+    local cents = tonumber(ARGV[i + 1])
+    if cents ~= 0 then
+        redis.call('ZADD', KEYS[1], cents, ARGV[i])
+        redis.call('ZINCRBY', KEYS[2], cents, ARGV[i])
+    end
+end
+redis.call('SET', KEYS[3], ARGV[1])
+redis.call('ZREMRANGEBYSCORE', KEYS[2], 0, 0)
+return 1
+"""
+
+_STORE_SCRIPT = """
+local current = redis.call('HGET', KEYS[1], 'version')
+if current and tonumber(current) >= tonumber(ARGV[1]) then
+    return 0
+end
+redis.call('DEL', KEYS[1])
+redis.call('HSET', KEYS[1], 'version', ARGV[1])
+for i = 3, #ARGV, 2 do
+    redis.call('HSET', KEYS[1], ARGV[i], ARGV[i + 1])
+end
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+return 1
+"""
+
+
+# Greedy simplified plan, kept across writes: a hash of the ledger `version`
+# it settles and its `transfers` as JSON. Writes in the base currency repair
+# it in place (see repair_plan); any other write drops it. Repairs keep the
+# TTL, so every plan is rebuilt from scratch (at current rates) regularly.
+# A repaired plan has no ranks, so a fresh one at the same version replaces
+# it, and the simplified view (KEYS[4]) built from it is dropped.
+_STORE_PLAN_SCRIPT = """
+local plan = redis.call('HMGET', KEYS[1], 'version', 'ranked')
+local current = tonumber(plan[1])
+local version = tonumber(ARGV[1])
+if current and (current > version or (current == version and plan[2] == ARGV[1])) then
+    return 0
+end
+if current == version then
+    redis.call('DEL', KEYS[4])
+end
+redis.call('HSET', KEYS[1], 'version', ARGV[1], 'transfers', ARGV[3], 'ranked', ARGV[1])
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+local first = 6
+for side = 2, 3 do
+    redis.call('DEL', KEYS[side])
+    local last = first + 2 * tonumber(ARGV[side + 2]) - 1
+    for i = first, last, 1000 do
+        redis.call('ZADD', KEYS[side], unpack(ARGV, i, math.min(i + 999, last)))
+    end
+    redis.call('EXPIRE', KEYS[side], ARGV[2])
+    first = last + 1
+end
+return 1
+"""
+
+# One user's interval in the ranks of the plan at version ARGV[1] (see
+# plan_ranks) and the other side's intervals that overlap it. Ranks are
+# only current while the plan has not been repaired since they were built
+# ('ranked' is the version they were built at); nil otherwise. Returns
+# {side, start, end, id, end, ...}: side 1 for a debtor, 2 for a creditor,
+# or {0} for a user without a balance.
+_USER_POSITION_SCRIPT = """
+local plan = redis.call('HMGET', KEYS[1], 'version', 'ranked')
+if plan[1] ~= ARGV[1] or plan[2] ~= ARGV[1] then
+    return false
+end
+for side = 2, 3 do
+    local finish = redis.call('ZSCORE', KEYS[side], ARGV[2])
+    if finish then
+        local other = 5 - side
+        local before = redis.call('ZREVRANGEBYSCORE', KEYS[side], '(' .. finish, '-inf', 'WITHSCORES', 'LIMIT', 0, 1)
+        local start = before[2] or '0'
+        local result = {side - 1, start, finish}
+        local overlapping = redis.call('ZRANGEBYSCORE', KEYS[other], '(' .. start, finish, 'WITHSCORES')
+        local after = redis.call('ZRANGEBYSCORE', KEYS[other], '(' .. finish, '+inf', 'WITHSCORES', 'LIMIT', 0, 1)
+        for _, reply in ipairs({overlapping, after}) do
+            for i = 1, #reply do
+                result[#result + 1] = reply[i]
+            end
+        end
+        return result
+    end
+end
+return {0}
+"""
+
+# Replace the plan at version ARGV[1] - 1 with its repair; a plan at any
+# other version means a concurrent write got there first, so drop it
+_REPAIR_PLAN_SCRIPT = """
+local current = redis.call('HGET', KEYS[1], 'version')
+if not current or tonumber(current) ~= tonumber(ARGV[1]) - 1 then
+    redis.call('DEL', KEYS[1])
+    return 0
+end
+redis.call('HSET', KEYS[1], 'version', ARGV[1], 'transfers', ARGV[2])
+return 1
+"""
+
+# Drop a group's balance views (plus any extra keys) and record the ledger
+# version that dropped them, so a view computed at an older version cannot
+# be written back afterwards (see _STORE_VIEWS_SCRIPT)
+_DROP_VIEWS_SCRIPT = """
+local current = redis.call('GET', KEYS[1])
+if not current or tonumber(current) < tonumber(ARGV[1]) then
+    redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+end
+redis.call('DEL', unpack(KEYS, 2))
+return 1
+"""
+
+# Store the raw and greedy simplified views computed at version ARGV[1],
+# unless a write has dropped the views since. The plan hash and its ranks
+# are stored along with them (as _STORE_PLAN_SCRIPT does); if writes
+# already keep a plan at this version, that plan is the simplified view, so
+# the two never disagree.
+_STORE_VIEWS_SCRIPT = """
+local version = tonumber(ARGV[1])
+local dropped = redis.call('GET', KEYS[1])
+if dropped and tonumber(dropped) > version then
+    return 0
+end
+local simplified = ARGV[4]
+local planned = redis.call('HGET', KEYS[4], 'version')
+if planned and tonumber(planned) > version then
+    return 0
+elseif planned and tonumber(planned) == version then
+    simplified = redis.call('HGET', KEYS[4], 'transfers')
+else
+    redis.call('HSET', KEYS[4], 'version', ARGV[1], 'transfers', simplified, 'ranked', ARGV[1])
+    redis.call('EXPIRE', KEYS[4], ARGV[2])
+    local first = 7
+    for side = 5, 6 do
+        redis.call('DEL', KEYS[side])
+        local last = first + 2 * tonumber(ARGV[side]) - 1
+        for i = first, last, 1000 do
+            redis.call('ZADD', KEYS[side], unpack(ARGV, i, math.min(i + 999, last)))
+        end
+        redis.call('EXPIRE', KEYS[side], ARGV[2])
+        first = last + 1
+    end
+end
+redis.call('SET', KEYS[2], ARGV[3], 'EX', ARGV[2])
+redis.call('SET', KEYS[3], simplified, 'EX', ARGV[2])
+return 1
+"""
+
+# Store one view of a group's current balances (KEYS[2]) computed at ledger
+# version ARGV[1], unless a write has dropped the views since
+_STORE_VIEW_SCRIPT = """
+local dropped = redis.call('GET', KEYS[1])
+if dropped and tonumber(dropped) > tonumber(ARGV[1]) then
+    return 0
+end
+redis.call('SET', KEYS[2], ARGV[3], 'EX', ARGV[2])
+return 1
+"""
+
+class LedgerChange(NamedTuple):
+    """What a committed write did to a group's ledger."""
+    version: int  # groups.ledger_version after the write
+    debts: Dict[PairKey, Decimal]  # Per-pair debt change
+    settlements: List[Tuple[PairKey, Decimal]]  # Settlements, in order
+    seq: int  # groups.change_seq after the write (the group event version)
+
+
+# Cached views of current balances; every ledger write drops them all
+BALANCE_VIEWS = ("raw", "simplified", "simplified:relationships")
+
+
+def balance_view_key(group_id: UUID, view: str) -> str:
+    """Cached JSON body of one of a group's current BALANCE_VIEWS."""
+    return f"balances:{group_id}:{view}"
+
+
+def balance_view_keys(group_id: UUID) -> List[str]:
+    return [balance_view_key(group_id, view) for view in BALANCE_VIEWS]
+
+
+def views_version_key(group_id: UUID) -> str:
+    """Ledger version of the last write that dropped the group's balance views."""
+    return f"balances:{group_id}:views_version"
+
+
+def ledger_key(group_id: UUID) -> str:
+    return f"balances:{group_id}:pairs"
+
+
+def plan_key(group_id: UUID) -> str:
+    return f"balances:{group_id}:plan"
+
+
+def plan_ranks_key(group_id: UUID, side: str) -> str:
+    """Sorted set of the plan's debtors' or creditors' interval ends (see plan_ranks)."""
+    return f"balances:{group_id}:plan:{side}"
+
+
+def group_leaderboard_key(group_id: UUID) -> str:
+    return f"leaderboard:groups:{group_id}"
+
+
+def group_leaderboard_version_key(group_id: UUID) -> str:
+    return f"leaderboard:groups:{group_id}:version"
+
+
+def global_leaderboard_key(currency: str) -> str:
+    """Sum of the boards of every group with base currency `currency`."""
+    return f"leaderboard:global:{currency}"
+
+
+def history_epoch_key(group_id: UUID) -> str:
+    """
+    Part of every as-of balance cache key. Bumped when an edit rewrites past
+    history, which orphans all cached historical results at once.
+    """
+    return f"balances:{group_id}:history_epoch"
+
+
+async def load_pair_fields(
+    redis_client: redis.Redis, group_id: UUID, version: int
+) -> Optional[Dict[str, int]]:
+    """Cached pair fields (see pair_states_from_fields), or None unless they reflect exactly `version`."""
+    fields = await redis_client.hgetall(ledger_key(group_id))
+    if not fields:
+        return None
+    fields = {
+        (k.decode() if isinstance(k, bytes) else k): int(v)
+        for k, v in fields.items()
+    }
+    if fields.pop("version", None) != version:
+        return None
+    return fields
+
+
+async def load_pair_states(
+    redis_client: redis.Redis, group_id: UUID, version: int
+) -> Optional[Dict[PairKey, PairState]]:
+    """Cached pair states, or None unless the cache reflects exactly `version`."""
+    fields = await load_pair_fields(redis_client, group_id, version)
+    if fields is None:
+        return None
+    return pair_states_from_fields(fields)
+
+
+async def store_pair_fields(
+    redis_client: redis.Redis, group_id: UUID, version: int, fields: List[Tuple[str, int]]
+) -> None:
+    """Cache pair fields replayed at `version`, unless a newer copy is already there."""
+    args: list = [version, LEDGER_CACHE_TTL_SECONDS]
+    for field in fields:
+        args.extend(field)
+    await redis_client.eval(_STORE_SCRIPT, 1, ledger_key(group_id), *args)
+
+
+async def store_pair_states(
+    redis_client: redis.Redis, group_id: UUID, version: int, states: Dict[PairKey, PairState]
+) -> None:
+    """Cache pair states replayed at `version`, unless a newer copy is already there."""
+    await store_pair_fields(redis_client, group_id, version, pair_state_fields(states))
+
+
+async def drop_balance_views(
+    redis_client: redis.Redis, group_id: UUID, version: int, *extra_keys: str
+) -> None:
+    """After a committed write at `version`: drop the group's balance views and any `extra_keys`."""
+    await redis_client.eval(
+        _DROP_VIEWS_SCRIPT,
+        1 + len(BALANCE_VIEWS) + len(extra_keys),
+        views_version_key(group_id),
+        *balance_view_keys(group_id),
+        *extra_keys,
+        version,
+        BALANCE_VIEW_TTL_SECONDS,
+    )
+
+
+def store_balance_view(
+    pipe: redis.client.Pipeline, group_id: UUID, version: int, key: str, body: bytes,
+    ttl: int = BALANCE_VIEW_TTL_SECONDS
+) -> None:
+    """
+    Queue a compare-and-set of one body derived from the group's balances at
+    `version` (a view, or anything else drop_balance_views drops with them);
+    the script replies 0 if a write dropped the views since.
+    """
+    pipe.eval(_STORE_VIEW_SCRIPT, 2, views_version_key(group_id), key, version, ttl, body)
+
+
+def store_balance_views(
+    pipe: redis.client.Pipeline, group_id: UUID, version: int, raw: bytes, simplified: bytes, ranks: PlanRanks
+) -> None:
+    """
+    Queue a compare-and-set of the raw and greedy simplified views (and the
+    plan with its ranks) computed at `version`; the script replies 0 if a
+    write dropped the views since.
+    """
+    debtors, creditors = ranks
+    args: list = [version, BALANCE_VIEW_TTL_SECONDS, raw, simplified, len(debtors), len(creditors)]
+    for side in ranks:
+        for rank in side:
+            args.extend(rank)
+    pipe.eval(
+        _STORE_VIEWS_SCRIPT,
+        6,
+        views_version_key(group_id),
+        balance_view_key(group_id, "raw"),
+        balance_view_key(group_id, "simplified"),
+        plan_key(group_id),
+        plan_ranks_key(group_id, "debtors"),
+        plan_ranks_key(group_id, "creditors"),
+        *args
+    )
+
+
+async def apply_ledger_change(
+    redis_client: redis.Redis, group_id: UUID, change: LedgerChange, base_currency: str
+) -> Tuple[bool, Optional[Dict[UUID, Decimal]]]:
+    """
+    Apply a committed write to the cached pair states and leaderboards in one
+    atomic step. Only the pairs it touched are updated; if the cache is
+    missing or not at the preceding version (a concurrent write got there
+    first), it is dropped instead. Returns whether the group's leaderboard is
+    current (never after a write outside the base currency) and, when the
+    pairs were current and the write in the base currency, the change in
+    each affected member's net balance.
+    """
+    in_base = all(key[2] == base_currency for key in [*change.debts, *(key for key, _ in change.settlements)])
+    args: list = [change.version, LEDGER_CACHE_TTL_SECONDS, int(in_base)]
+    for key, amount in change.debts.items():
+        args.extend(("debt", pair_field(key), to_cents(amount)))
+    for key, amount in change.settlements:
+        args.extend(("settlement", pair_field(key), to_cents(amount)))
+    status, *changes = await redis_client.eval(
+        _APPLY_SCRIPT,
+        4,
+        ledger_key(group_id),
+        group_leaderboard_key(group_id),
+        global_leaderboard_key(base_currency),
+        group_leaderboard_version_key(group_id),
+        *args
+    )
+    if not status or not in_base:
+        return status == 1, None
+    net_changes: Dict[UUID, Decimal] = {}
+    for pair, cents in zip(changes[::2], changes[1::2]):
+        debtor_id, creditor_id, _ = _member(pair).split(":")
+        amount = Decimal(int(cents)) / 100
+        for user_id, sign in ((UUID(debtor_id), -1), (UUID(creditor_id), 1)):
+            net_changes[user_id] = net_changes.get(user_id, Decimal("0")) + sign * amount
+    return status == 1, net_changes
+
+
+async def load_plan_json(
+    redis_client: redis.Redis, group_id: UUID, version: int, ranked: bool = False
+) -> Optional[bytes]:
+    """
+    Cached simplified plan as JSON, or None unless it settles exactly
+    `version` (and, if `ranked`, has not been repaired since its ranks were built).
+    """
+    fields = await redis_client.hgetall(plan_key(group_id))
+    fields = {_member(k): v for k, v in fields.items()}
+    if not fields or int(fields["version"]) != version:
+        return None
+    if ranked and int(fields.get("ranked", -1)) != version:
+        return None
+    return fields["transfers"]
+
+
+async def load_plan(redis_client: redis.Redis, group_id: UUID, version: int) -> Optional[List[dict]]:
+    """Cached simplified plan, or None unless it settles exactly `version`."""
+    plan = await load_plan_json(redis_client, group_id, version)
+    return None if plan is None else loads(plan)
+
+
+async def store_plan(
+    redis_client: redis.Redis, group_id: UUID, version: int, plan: bytes, ranks: PlanRanks
+) -> None:
+    """
+    Cache a plan (JSON) computed at `version` with its ranks, unless a newer
+    one (or a ranked one at `version`) is already there.
+    """
+    debtors, creditors = ranks
+    args: list = [version, BALANCE_VIEW_TTL_SECONDS, plan, len(debtors), len(creditors)]
+    for side in ranks:
+        for rank in side:
+            args.extend(rank)
+    await redis_client.eval(
+        _STORE_PLAN_SCRIPT,
+        4,
+        plan_key(group_id),
+        plan_ranks_key(group_id, "debtors"),
+        plan_ranks_key(group_id, "creditors"),
+        balance_view_key(group_id, "simplified"),
+        *args
+    )
+
+
+async def load_user_position(
+    redis_client: redis.Redis, group_id: UUID, version: int, user_id: UUID
+) -> Optional[Tuple[Decimal, List[dict]]]:
+    """
+    A user's net balance and transfers in the cached plan at `version`,
+    bisected out of its ranks; None unless the plan and its ranks are current.
+    """
+    reply = await redis_client.eval(
+        _USER_POSITION_SCRIPT,
+        3,
+        plan_key(group_id),
+        plan_ranks_key(group_id, "debtors"),
+        plan_ranks_key(group_id, "creditors"),
+        version,
+        str(user_id),
+    )
+    if not reply:
+        return None
+    if reply[0] == 0:
+        return Decimal("0.00"), []
+    side, start, end, *others = reply
+    start, end = (Decimal(_member(cents)).scaleb(-2) for cents in (start, end))
+    others = [
+        (UUID(_member(other_id)), Decimal(_member(cents)).scaleb(-2))
+        for other_id, cents in zip(others[::2], others[1::2])
+    ]
+    pays = side == 1
+    net_balance = start - end if pays else end - start
+    return net_balance, interval_transfers(user_id, pays, start, end, others)
+
+
+async def repair_cached_plan(
+    redis_client: redis.Redis, group_id: UUID, version: int, net_changes: Optional[Dict[UUID, Decimal]]
+) -> bool:
+    """
+    Bring the cached plan from `version` - 1 to `version` by repairing it
+    for the write's net balance changes; without them (or without a plan at
+    the preceding version) the plan is dropped.
+    """
+    fields = await redis_client.hgetall(plan_key(group_id)) if net_changes is not None else {}
+    fields = {_member(k): v for k, v in fields.items()}
+    if not fields or int(fields["version"]) != version - 1:
+        await redis_client.delete(plan_key(group_id))
+        return False
+    plan = repair_plan(loads(fields["transfers"]), net_changes)
+    result = await redis_client.eval(_REPAIR_PLAN_SCRIPT, 1, plan_key(group_id), version, dumps(plan))
+    return result == 1
+
+
+async def replace_group_leaderboard(
+    redis_client: redis.Redis, group_id: UUID, base_currency: str, version: int, net_balances: Dict[UUID, Decimal]
+) -> bool:
+    """
+    Set a group's leaderboard to net balances (in its base currency)
+    computed at `version`; False if it was already newer.
+    """
+    args: list = [version]
+    for user_id, amount in net_balances.items():
+        args.extend((str(user_id), to_cents(amount)))
+    result = await redis_client.eval(
+        _REPLACE_BOARD_SCRIPT,
+        3,
+        group_leaderboard_key(group_id),
+        global_leaderboard_key(base_currency),
+        group_leaderboard_version_key(group_id),
+        *args
+    )
+    return result == 1
+
+
+async def get_leaderboard_version(redis_client: redis.Redis, group_id: UUID) -> Optional[int]:
+    """Ledger version a group's leaderboard reflects, if it has been built."""
+    version = await redis_client.get(group_leaderboard_version_key(group_id))
+    return int(version) if version is not None else None
+
+
+async def top_entries(redis_client: redis.Redis, key: str, k: int) -> Dict[str, List[Tuple[str, Decimal]]]:
+    """Top k debtors (most negative) and creditors (most positive) of a leaderboard."""
+    debtors = await redis_client.zrangebyscore(key, "-inf", "(0", start=0, num=k, withscores=True)
+    creditors = await redis_client.zrevrangebyscore(key, "+inf", "(0", start=0, num=k, withscores=True)
+    return {
+        "debtors": [(_member(user_id), -Decimal(int(cents)).scaleb(-2)) for user_id, cents in debtors],
+        "creditors": [(_member(user_id), Decimal(int(cents)).scaleb(-2)) for user_id, cents in creditors],
+    }
+
+
+async def reset_leaderboards(redis_client: redis.Redis) -> int:
+    """Drop every leaderboard key; returns how many were deleted."""
+    deleted = 0
+    batch = []
+    async for key in redis_client.scan_iter(match="leaderboard:*", count=1000):
+        batch.append(key)
+        if len(batch) == 1000:
+            deleted += await redis_client.delete(*batch)
+            batch = []
+    if batch:
+        deleted += await redis_client.delete(*batch)
+    return deleted
+
+
+def _member(value) -> str:
+    return value.decode() if isinstance(value, bytes) else value
@@ -0,0 +1,145 @@
+from datetime import datetime
+from decimal import Decimal
+from uuid import UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, insert, delete, and_, literal, DateTime
+from fastapi import HTTPException, status
+
+from app.models.expense import Expense, ExpenseSplit
+from app.models.group import Group
+from app.models.ledger import BalanceCarryForward, ExpenseArchive, ExpenseSplitArchive, SettlementArchive
+from app.models.settlement import Settlement
+from app.repositories.change_repository import ChangeRepository
+from app.utils.ledger import EMPTY_STATE, build_pair_states
+
+
+class LedgerCompactionService:
+    """
+    Folds a group's expenses and settlements before a cutoff into one
+    carry-forward row per (debtor, creditor) pair and moves the originals to
+    the archive tables. Balances are unchanged; later recomputes only replay
+    post-cutoff activity.
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def compact_group(self, group_id: UUID, cutoff: datetime) -> dict:
+        """Compact one group's history before `cutoff`. Caller commits."""
+        # Lock the group row so concurrent compactions of a group serialize
+        group_result = await self.session.execute(
+            select(Group).where(Group.id == group_id).with_for_update()
+        )
+        group = group_result.scalar_one_or_none()
+        if not group:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Group {group_id} not found"
+            )
+        if group.compacted_before and cutoff <= group.compacted_before:
+            return {"group_id": str(group_id), "expenses": 0, "settlements": 0, "pairs": 0, "changes": 0}
+
+        expense_filter = and_(Expense.group_id == group_id, Expense.created_at < cutoff)
+        settlement_filter = and_(Settlement.group_id == group_id, Settlement.created_at < cutoff)
+        archived_expense_ids = select(Expense.id).where(expense_filter)
+
+        # Fold existing carry-forwards plus the pre-cutoff rows into new states
+        carry_result = await self.session.execute(
+            select(BalanceCarryForward).where(BalanceCarryForward.group_id == group_id)
+        )
+        carry_forwards = {
+            (row.debtor_id, row.creditor_id, row.currency): (
+                Decimal(row.debt_amount), Decimal(row.settled_amount)
+            )
+            for row in carry_result.scalars().all()
+        }
+        splits_result = await self.session.execute(
+            select(ExpenseSplit.user_id, Expense.paid_by_user_id, ExpenseSplit.amount, Expense.currency)
+            .join(Expense, and_(
+                Expense.id == ExpenseSplit.expense_id,
+                Expense.group_id == ExpenseSplit.group_id
+            ))
+            .where(ExpenseSplit.group_id == group_id, expense_filter)
+        )
+        settlements_result = await self.session.execute(
+            select(Settlement.payer_id, Settlement.payee_id, Settlement.amount, Settlement.currency)
+            .where(settlement_filter)
+            .order_by(Settlement.created_at, Settlement.id)
+        )
+        states = build_pair_states(splits_result.all(), settlements_result.all(), carry_forwards)
+
+        # Replace the group's carry-forward rows
+        await self.session.execute(
+            delete(BalanceCarryForward).where(BalanceCarryForward.group_id == group_id)
+        )
+        carry_rows = [
+            {
+                "group_id": group_id,
+                "debtor_id": debtor_id,
+                "creditor_id": creditor_id,
+                "currency": currency,
+                "debt_amount": state[0],
+                "settled_amount": state[1],
+                "cutoff_at": cutoff,
+            }
+            for (debtor_id, creditor_id, currency), state in states.items()
+            if state != EMPTY_STATE
+        ]
+        if carry_rows:
+            await self.session.execute(insert(BalanceCarryForward), carry_rows)
+
+        # Move the originals to the archive
+        archived_at = literal(datetime.utcnow(), DateTime)
+        expenses_moved = await self.session.execute(
+            insert(ExpenseArchive).from_select(
+                ["id", "group_id", "paid_by_user_id", "amount", "currency", "description", "split_type",
+                 "created_at", "archived_at"],
+                select(
+                    Expense.id, Expense.group_id, Expense.paid_by_user_id, Expense.amount, Expense.currency,
+                    Expense.description, Expense.split_type, Expense.created_at, archived_at
+                ).where(expense_filter)
+            )
+        )
+        await self.session.execute(
+            insert(ExpenseSplitArchive).from_select(
+                ["expense_id", "user_id", "group_id", "amount", "percent"],
+                select(
+                    ExpenseSplit.expense_id, ExpenseSplit.user_id, ExpenseSplit.group_id,
+                    ExpenseSplit.amount, ExpenseSplit.percent
+                ).where(
+                    ExpenseSplit.group_id == group_id,
+                    ExpenseSplit.expense_id.in_(archived_expense_ids)
+                )
+            )
+        )
+        settlements_moved = await self.session.execute(
+            insert(SettlementArchive).from_select(
+                ["id", "group_id", "payer_id", "payee_id", "amount", "currency", "created_at", "archived_at"],
+                select(
+                    Settlement.id, Settlement.group_id, Settlement.payer_id, Settlement.payee_id,
+                    Settlement.amount, Settlement.currency, Settlement.created_at, archived_at
+                ).where(settlement_filter)
+            )
+        )
+        await self.session.execute(
+            delete(ExpenseSplit).where(
+                ExpenseSplit.group_id == group_id,
+                ExpenseSplit.expense_id.in_(archived_expense_ids)
+            )
+        )
+        await self.session.execute(delete(Expense).where(expense_filter))
+        await self.session.execute(delete(Settlement).where(settlement_filter))
+
+        # Delta-sync clients further behind than the cutoff fall back to a snapshot
+        changes_pruned = await ChangeRepository(self.session).prune(group_id, cutoff)
+        
+        group.compacted_before = cutoff
+        await self.session.flush()
+
+        return {
+            "group_id": str(group_id),
+            "expenses": expenses_moved.rowcount,
+            "settlements": settlements_moved.rowcount,
+            "pairs": len(carry_rows),
+            "changes": changes_pruned,
+        }
@@ -0,0 +1,89 @@
+from typing import Optional
+from uuid import UUID
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import HTTPException, status
+
+from app.models.group import Group, GroupMember
+from app.models.settlement import Settlement
+from app.repositories.user_repository import UserRepository
+from app.schemas.settlement import SettlementCreate
+from app.services.balance_service import BalanceService
+from app.services.ledger_cache import LedgerChange
+from app.services.settlement_service import SettlementService
+from app.utils.netting import pairwise_netting
+
+
+class NettingService:
+    """
+    Cross-group netting between a user and the people they share groups
+    with. Balances are netted per counterparty and currency (never across
+    currencies, so no conversion is involved); settling records the
+    offsetting settlements in every group in one transaction.
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+        self.user_repo = UserRepository(session)
+        self.balance_service = BalanceService(session)
+
+    async def get_plan(self, user_id: UUID, counterparty_id: Optional[UUID] = None) -> list[dict]:
+        """Netting plan with every counterparty (or one)."""
+        await self._require_user(user_id)
+        if counterparty_id is not None:
+            await self._require_user(counterparty_id)
+        states = await self.balance_service.get_user_pair_states(user_id, counterparty_id)
+        return pairwise_netting(user_id, states)
+
+    async def settle(
+        self, user_id: UUID, counterparty_id: UUID
+    ) -> tuple[list[dict], list[Settlement], list[tuple[UUID, LedgerChange]]]:
+        """
+        Record the offsetting settlements of a pair's plan. Returns the plan,
+        the settlements and each group's ledger changes in order. Caller commits.
+        """
+        if user_id == counterparty_id:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Cannot net balances with yourself"
+            )
+        await self._require_user(user_id)
+        await self._require_user(counterparty_id)
+
+        # Lock the shared groups (in id order, so concurrent nettings cannot
+        # deadlock) before reading: other ledger writes to them wait for this
+        # transaction, so no offset can exceed the balance it cancels
+        counterparty_groups = select(GroupMember.group_id).where(GroupMember.user_id == counterparty_id)
+        await self.session.execute(
+            select(Group.id)
+            .join(GroupMember, GroupMember.group_id == Group.id)
+            .where(GroupMember.user_id == user_id, Group.id.in_(counterparty_groups))
+            .order_by(Group.id)
+            .with_for_update(of=Group)
+        )
+
+        plan = pairwise_netting(user_id, await self.balance_service.get_user_pair_states(user_id, counterparty_id))
+        settlement_service = SettlementService(self.session)
+        settlements = []
+        changes = []
+        for entry in plan:
+            for offset in entry["offsets"]:
+                settlement, change = await settlement_service.create_settlement(
+                    offset["group_id"],
+                    SettlementCreate(
+                        payer_id=offset["payer_id"],
+                        payee_id=offset["payee_id"],
+                        amount=offset["amount"],
+                        currency=entry["currency"],
+                    )
+                )
+                settlements.append(settlement)
+                changes.append((offset["group_id"], change))
+        return plan, settlements, changes
+
+    async def _require_user(self, user_id: UUID) -> None:
+        if not await self.user_repo.get_by_id(user_id):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"User {user_id} not found"
+            )
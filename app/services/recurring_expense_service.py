@@ -0,0 +1,237 @@
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Dict, List, NamedTuple, Optional
+from uuid import UUID, uuid4
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from fastapi import HTTPException, status
+import redis.asyncio as redis
+
+from app.core.config import get_settings
+from app.models.expense import Expense, ExpenseSplit
+from app.models.group import Group
+from app.models.recurring import RecurringExpense
+from app.repositories.change_repository import ChangeRepository
+from app.repositories.group_repository import GroupRepository
+from app.repositories.group_summary_repository import GroupSummaryRepository
+from app.schemas.expense import ExpenseSplitCreate
+from app.schemas.recurring import RecurringExpenseCreate
+from app.services.dashboard_service import summary_key
+from app.services.expense_service import ExpenseService
+from app.services.fx_rates import validate_currency
+from app.services.group_events import publish_group_event
+from app.services.leaderboard_service import LeaderboardService
+from app.services.ledger_cache import LedgerChange, drop_balance_views, history_epoch_key
+from app.utils.ledger import ZERO
+from app.utils.recurrence import occurrence_at
+
+logger = logging.getLogger(__name__)
+
+
+class MaterializedGroup(NamedTuple):
+    """What one batch added to a group: a single combined ledger change."""
+    change: LedgerChange
+    expenses: int
+    # Some occurrence is older than the as-of settle window (catch-up)
+    backdated: bool
+
+
+class MaterializeResult(NamedTuple):
+    templates: int
+    groups: Dict[UUID, MaterializedGroup]
+
+
+class RecurringExpenseService:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+        self.group_repo = GroupRepository(session)
+        self.change_repo = ChangeRepository(session)
+        self.summary_repo = GroupSummaryRepository(session)
+        self.expense_service = ExpenseService(session)
+    
+    async def create_template(self, group_id: UUID, data: RecurringExpenseCreate) -> RecurringExpense:
+        """Create a recurring expense; its splits are validated like a one-off expense's."""
+        group = await self._get_group(group_id)
+        if not await self.group_repo.is_member(group_id, data.paid_by_user_id):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Payer must be a member of the group"
+            )
+        currency = data.currency or group.base_currency
+        await validate_currency(self.session, currency, group.base_currency)
+        await self.expense_service._calculate_splits(group_id, data.amount, data.split_type, data.splits)
+        
+        template = RecurringExpense(
+            group_id=group_id,
+            paid_by_user_id=data.paid_by_user_id,
+            amount=data.amount,
+            currency=currency,
+            description=data.description,
+            split_type=data.split_type,
+            splits=[split.model_dump(mode="json") for split in data.splits],
+            interval=data.interval,
+            interval_count=data.interval_count,
+            starts_at=data.starts_at,
+            ends_at=data.ends_at,
+            occurrences=0,
+            next_run_at=data.starts_at,
+        )
+        self.session.add(template)
+        await self.session.flush()
+        return template
+    
+    async def list_templates(self, group_id: UUID) -> List[RecurringExpense]:
+        """A group's recurring expenses, oldest first."""
+        await self._get_group(group_id)
+        result = await self.session.execute(
+            select(RecurringExpense)
+            .where(RecurringExpense.group_id == group_id)
+            .order_by(RecurringExpense.created_at)
+        )
+        return list(result.scalars().all())
+    
+    async def delete_template(self, group_id: UUID, template_id: UUID) -> None:
+        """Stop a recurring expense. Expenses it already created are kept."""
+        template = await self.session.get(RecurringExpense, template_id)
+        if not template or template.group_id != group_id:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Recurring expense {template_id} not found"
+            )
+        await self.session.delete(template)
+        await self.session.flush()
+    
+    async def materialize_due(self, now: datetime, limit: int, max_catch_up: int) -> MaterializeResult:
+        """
+        Create the expenses of up to `limit` due templates, across groups, in
+        the current transaction. A template behind by several occurrences
+        (downtime) gets up to `max_catch_up` of them, each dated at its
+        occurrence. Each group gets one change log update and one ledger
+        version bump for the whole batch. Caller commits, then calls
+        publish_materialized.
+        """
+        # SKIP LOCKED lets several schedulers share the queue without double-booking
+        result = await self.session.execute(
+            select(RecurringExpense)
+            .where(RecurringExpense.next_run_at <= now)
+            .order_by(RecurringExpense.next_run_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        templates = result.scalars().all()
+        if not templates:
+            return MaterializeResult(0, {})
+        
+        compacted_result = await self.session.execute(
+            select(Group.id, Group.compacted_before)
+            .where(Group.id.in_({template.group_id for template in templates}))
+        )
+        compacted_before = dict(compacted_result.all())
+        
+        expenses_by_group: Dict[UUID, List[Expense]] = defaultdict(list)
+        for template in templates:
+            expenses_by_group[template.group_id].extend(
+                await self._occurrences(template, now, max_catch_up, compacted_before.get(template.group_id))
+            )
+        self.session.add_all([expense for expenses in expenses_by_group.values() for expense in expenses])
+        await self.session.flush()
+        
+        settled_before = now - timedelta(seconds=get_settings().BALANCE_HISTORY_SETTLE_SECONDS)
+        groups = {}
+        # Group rows are locked by the version bump; a fixed order avoids deadlocks between batches
+        for group_id in sorted(expenses_by_group, key=str):
+            expenses = expenses_by_group[group_id]
+            if not expenses:
+                continue
+            debts = {}
+            changes = []
+            for expense in expenses:
+                expense_debts = ExpenseService._debts(expense)
+                for key, amount in expense_debts.items():
+                    debts[key] = debts.get(key, ZERO) + amount
+                changes.append((
+                    "expense_created", expense.id, ExpenseService._snapshot(expense),
+                    ExpenseService._users(expense_debts)
+                ))
+            seq, version = await self.change_repo.record_many(group_id, changes, ledger=True)
+            spend = {}
+            for expense in expenses:
+                spend[expense.currency] = spend.get(expense.currency, ZERO) + Decimal(expense.amount)
+            await self.summary_repo.apply(
+                group_id, seq, expenses=len(expenses), spend=spend,
+                activity_at=max(expense.created_at for expense in expenses)
+            )
+            groups[group_id] = MaterializedGroup(
+                LedgerChange(version, debts, [], seq),
+                len(expenses),
+                min(expense.created_at for expense in expenses) <= settled_before
+            )
+        return MaterializeResult(len(templates), groups)
+    
+    async def _occurrences(
+        self, template: RecurringExpense, now: datetime, max_catch_up: int, compacted_before: Optional[datetime]
+    ) -> List[Expense]:
+        """Build the template's due expenses and advance its schedule."""
+        try:
+            splits_data = await self.expense_service._calculate_splits(
+                template.group_id,
+                Decimal(template.amount),
+                template.split_type,
+                [ExpenseSplitCreate(**split) for split in template.splits]
+            )
+        except HTTPException as e:
+            # The spec no longer fits the group; stop rather than retry forever
+            logger.warning("Stopping recurring expense %s: %s", template.id, e.detail)
+            template.next_run_at = None
+            return []
+        
+        expenses = []
+        while template.next_run_at is not None and template.next_run_at <= now and len(expenses) < max_catch_up:
+            created_at = template.next_run_at
+            # Compacted history is immutable; land late occurrences just after the cutoff
+            if compacted_before and created_at < compacted_before:
+                created_at = compacted_before
+            expenses.append(Expense(
+                id=uuid4(),
+                group_id=template.group_id,
+                paid_by_user_id=template.paid_by_user_id,
+                amount=template.amount,
+                currency=template.currency,
+                description=template.description,
+                split_type=template.split_type,
+                created_at=created_at,
+                version=1,
+                splits=[ExpenseSplit(group_id=template.group_id, **split_data) for split_data in splits_data],
+            ))
+            template.occurrences += 1
+            next_run_at = occurrence_at(
+                template.starts_at, template.interval, template.interval_count, template.occurrences
+            )
+            template.next_run_at = None if template.ends_at and next_run_at > template.ends_at else next_run_at
+        return expenses
+    
+    async def _get_group(self, group_id: UUID) -> Group:
+        group = await self.group_repo.get_by_id(group_id)
+        if not group:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Group {group_id} not found"
+            )
+        return group
+
+
+async def publish_materialized(
+    session: AsyncSession, redis_client: redis.Redis, groups: Dict[UUID, MaterializedGroup]
+) -> None:
+    """
+    After commit: invalidate each group's caches and notify subscribers once,
+    however many occurrences the batch gave it.
+    """
+    for group_id, materialized in groups.items():
+        await drop_balance_views(redis_client, group_id, materialized.change.version, summary_key(group_id))
+        await LeaderboardService(session, redis_client).apply_change(group_id, materialized.change)
+        if materialized.backdated:
+            await redis_client.incr(history_epoch_key(group_id))
+        await publish_group_event(redis_client, group_id, "expense_created", materialized.change.seq)
@@ -0,0 +1,81 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import Optional
+
+from app.core.config import get_settings
+from app.core.database import create_session
+from app.core.redis_client import RedisClient
+from app.services.recurring_expense_service import RecurringExpenseService, publish_materialized
+
+logger = logging.getLogger(__name__)
+
+
+async def materialize_recurring(now: Optional[datetime] = None) -> dict:
+    """
+    Materialize every occurrence due at `now`, one transaction per batch of
+    templates. Loops until nothing is due, so a long outage is caught up in
+    a single run.
+    """
+    settings = get_settings()
+    now = now or datetime.utcnow()
+    redis_client = await RedisClient.get_client()
+    totals = {"batches": 0, "templates": 0, "expenses": 0}
+    
+    while True:
+        async with create_session() as session:
+            result = await RecurringExpenseService(session).materialize_due(
+                now, settings.RECURRING_BATCH_SIZE, settings.RECURRING_MAX_CATCH_UP
+            )
+            if not result.templates:
+                break
+            await session.commit()
+            await publish_materialized(session, redis_client, result.groups)
+        totals["batches"] += 1
+        totals["templates"] += result.templates
+        totals["expenses"] += sum(group.expenses for group in result.groups.values())
+    
+    return totals
+
+
+class RecurringScheduler:
+    """
+    Runs materialize_recurring every RECURRING_SCHEDULER_INTERVAL_SECONDS in
+    the background of a worker. Any number of workers may run it: due
+    templates are claimed with SKIP LOCKED.
+    """
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        interval = get_settings().RECURRING_SCHEDULER_INTERVAL_SECONDS
+        while True:
+            try:
+                totals = await materialize_recurring()
+                if totals["expenses"]:
+                    logger.info(
+                        "Materialized %d recurring expenses from %d templates in %d batches",
+                        totals["expenses"], totals["templates"], totals["batches"]
+                    )
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Recurring expense run failed; retrying next interval")
+            await asyncio.sleep(interval)
+
+
+recurring_scheduler = RecurringScheduler()
@@ -3,9 +3,14 @@ from decimal import Decimal
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException, status
 
+from app.models.settlement import Settlement
+from app.repositories.change_repository import ChangeRepository
 from app.repositories.settlement_repository import SettlementRepository
 from app.repositories.group_repository import GroupRepository
-from app.schemas.settlement import SettlementCreate
+from app.repositories.group_summary_repository import GroupSummaryRepository
+from app.schemas.settlement import SettlementCreate, SettlementResponse
+from app.services.fx_rates import validate_currency
+from app.services.ledger_cache import LedgerChange
 from app.utils.money import round_decimal
 
 
@@ -14,11 +19,13 @@ class SettlementService:
         self.session = session
         self.settlement_repo = SettlementRepository(session)
         self.group_repo = GroupRepository(session)
+        self.change_repo = ChangeRepository(session)
+        self.summary_repo = GroupSummaryRepository(session)
     
     async def create_settlement(
         self, group_id: UUID, settlement_data: SettlementCreate
-    ) -> dict:
-        """Create a settlement and invalidate balance cache."""
+    ) -> tuple[Settlement, LedgerChange]:
+        """Create a settlement; returns it with the change to the group's ledger."""
         # Validate group exists
         group = await self.group_repo.get_by_id(group_id)
         if not group:
@@ -55,6 +62,10 @@ class SettlementService:
                 detail="Settlement amount must be greater than 0"
             )
         
+        # Settles debts in its own currency only
+        currency = settlement_data.currency or group.base_currency
+        await validate_currency(self.session, currency, group.base_currency)
+        
         # Round amount to 2 decimal places
         rounded_amount = round_decimal(Decimal(str(settlement_data.amount)))
         
@@ -64,8 +75,21 @@ class SettlementService:
             "payer_id": settlement_data.payer_id,
             "payee_id": settlement_data.payee_id,
             "amount": rounded_amount,
+            "currency": currency,
         }
         
         settlement = await self.settlement_repo.create(settlement_dict)
-        return settlement
+        seq, version = await self.change_repo.record(
+            group_id,
+            "settlement_created",
+            settlement.id,
+            SettlementResponse.model_validate(settlement).model_dump(mode="json"),
+            [settlement.payer_id, settlement.payee_id],
+            ledger=True
+        )
+        await self.summary_repo.apply(group_id, seq, activity_at=settlement.created_at)
+        change = LedgerChange(
+            version, {}, [((settlement.payer_id, settlement.payee_id, currency), rounded_amount)], seq
+        )
+        return settlement, change
 
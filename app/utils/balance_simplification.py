@@ -1,7 +1,35 @@
+from bisect import bisect_right
 from decimal import Decimal
-from typing import Dict, List, Tuple
+from enum import Enum
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 from uuid import UUID
 
+from app.utils.ledger import (
+    EMPTY_STATE,
+    PairKey,
+    PairState,
+    add_debt,
+    build_pair_states,
+    convert_vector,
+    net_balances_from_states,
+    net_vectors,
+    pair_balance,
+    pair_state_fields,
+    pair_states_from_fields,
+    rates_into_base,
+    to_cents,
+)
+from app.utils.serialization import dumps
+
+
+# Debtors' and creditors' (end in cents, user_id), see plan_ranks
+PlanRanks = Tuple[List[Tuple[int, str]], List[Tuple[int, str]]]
+
+
+class SimplifyMode(str, Enum):
+    GREEDY = "greedy"  # Fewest transfers; anyone may be told to pay anyone
+    RELATIONSHIPS = "relationships"  # Only along debtor -> creditor edges of the raw ledger
+
 
 def calculate_net_balances(
     raw_balances: List[Dict[str, any]]
@@ -15,7 +43,9 @@ def calculate_net_balances(
     for balance in raw_balances:
         debtor_id = UUID(balance["debtor_id"])
         creditor_id = UUID(balance["creditor_id"])
-        amount = Decimal(str(balance["amount"]))
+        amount = balance["amount"]
+        if not isinstance(amount, Decimal):
+            amount = Decimal(str(amount))
         
         # Debtor owes (negative balance)
         net_balances[debtor_id] = net_balances.get(debtor_id, Decimal("0")) - amount
@@ -62,7 +92,7 @@ def simplify_balances(net_balances: Dict[UUID, Decimal]) -> List[Dict[str, any]]
             transfers.append({
                 "payer_id": str(debtor_id),
                 "payee_id": str(creditor_id),
-                "amount": float(transfer_amount)
+                "amount": transfer_amount
             })
             
             # Update remaining amounts
@@ -82,3 +112,250 @@ def simplify_balances(net_balances: Dict[UUID, Decimal]) -> List[Dict[str, any]]
     
     return transfers
 
+
+def simplify_states(states: Dict[PairKey, PairState], rates: Dict[str, Decimal]) -> List[Dict[str, any]]:
+    """
+    Simplified transfers straight from pair states. A module-level function
+    so it can run in a worker process.
+    """
+    return simplify_balances(net_balances_from_states(states, rates))
+
+
+def plan_json(
+    states: Dict[PairKey, PairState], fx_table: Dict[str, Decimal], base_currency: str
+) -> Tuple[Optional[bytes], Optional[PlanRanks], Set[str]]:
+    """
+    The simplified plan as JSON with its plan_ranks, converting with
+    rates_into_base, or None and the currencies the FX table lacks.
+    Conversion, netting, the greedy walk and encoding all happen here, so
+    one worker call does the lot.
+    """
+    rates, missing = rates_into_base(fx_table, {currency for _, _, currency in states}, base_currency)
+    if missing:
+        return None, None, missing
+    net_balances = net_balances_from_states(states, rates)
+    return dumps(simplify_balances(net_balances)), plan_ranks(net_balances), missing
+
+
+def plan_json_from_fields(
+    fields: Dict[str, int], fx_table: Dict[str, Decimal], base_currency: str
+) -> Tuple[Optional[bytes], Optional[PlanRanks], Set[str]]:
+    """
+    plan_json from cached ledger fields (see load_pair_fields). None with no
+    missing currencies means the fields could not be read: replay instead.
+    """
+    states = pair_states_from_fields(fields)
+    if states is None:
+        return None, None, set()
+    return plan_json(states, fx_table, base_currency)
+
+
+def plan_json_from_rows(
+    split_rows: list, settlement_rows: list, carry_forwards: Dict[PairKey, PairState],
+    fx_table: Dict[str, Decimal], base_currency: str
+) -> Tuple[Optional[bytes], Optional[PlanRanks], Set[str], List[Tuple[str, int]]]:
+    """plan_json from a ledger replay (see build_pair_states), plus the replayed states as cache fields."""
+    states = build_pair_states(split_rows, settlement_rows, carry_forwards)
+    return (*plan_json(states, fx_table, base_currency), pair_state_fields(states))
+
+
+def _ranked(net_balances: Dict[UUID, Decimal], sign: int) -> List[Tuple[UUID, Decimal]]:
+    # Same order as simplify_balances: largest first, ties in input order
+    ranked = [(user_id, abs(amount)) for user_id, amount in net_balances.items() if amount * sign > 0]
+    ranked.sort(key=lambda x: x[1], reverse=True)
+    return ranked
+
+
+def plan_ranks(net_balances: Dict[UUID, Decimal]) -> PlanRanks:
+    """
+    Debtors' and creditors' intervals in the simplify_balances walk (see
+    user_transfers) as (end in cents, user_id), in rank order. Cached with
+    the plan, they answer one user's transfers with a bisect.
+    """
+    debtors, creditors = [], []
+    for side, sign in ((debtors, -1), (creditors, 1)):
+        end = 0
+        for user_id, amount in _ranked(net_balances, sign):
+            end += to_cents(amount)
+            side.append((end, str(user_id)))
+    return debtors, creditors
+
+
+def user_transfers(net_balances: Dict[UUID, Decimal], user_id: UUID) -> List[Dict[str, any]]:
+    """
+    One user's transfers from the simplify_balances plan, without building
+    the rest of it. The greedy walk pays debtors' amounts, laid end to end in
+    order, into creditors' amounts laid end to end, so debtor i pays
+    creditor j exactly the overlap of their two intervals.
+    """
+    amount = net_balances.get(user_id, Decimal("0"))
+    if amount == 0:
+        return []
+    own, other = (_ranked(net_balances, -1), _ranked(net_balances, 1)) if amount < 0 else \
+        (_ranked(net_balances, 1), _ranked(net_balances, -1))
+
+    start = Decimal("0")
+    for ranked_id, ranked_amount in own:
+        if ranked_id == user_id:
+            break
+        start += ranked_amount
+
+    # Cumulative ends of the other side's intervals
+    ends = []
+    total = Decimal("0")
+    for _, other_amount in other:
+        total += other_amount
+        ends.append(total)
+
+    j = bisect_right(ends, start)
+    others = zip((other_id for other_id, _ in other[j:]), ends[j:])
+    return interval_transfers(user_id, amount < 0, start, start + abs(amount), others)
+
+
+def interval_transfers(
+    user_id: UUID, pays: bool, start: Decimal, end: Decimal, others: Iterable[Tuple[UUID, Decimal]]
+) -> List[Dict[str, any]]:
+    """
+    Transfers of the user whose interval is [start, end) (see
+    user_transfers). `others` are the other side's ids and interval ends in
+    rank order, from the first interval that ends after start.
+    """
+    transfers = []
+    begin = start
+    for other_id, other_end in others:
+        if begin >= end:
+            break
+        overlap = min(end, other_end) - begin
+        if overlap > 0:
+            payer_id, payee_id = (user_id, other_id) if pays else (other_id, user_id)
+            transfers.append({"payer_id": str(payer_id), "payee_id": str(payee_id), "amount": overlap})
+        begin = other_end
+    return transfers
+
+
+def user_position(
+    states: Dict[PairKey, PairState], rates: Dict[str, Decimal], user_id: UUID
+) -> Tuple[Decimal, List[Dict[str, any]]]:
+    """A user's net balance and plan transfers straight from pair states (runs in a worker)."""
+    net_balances = net_balances_from_states(states, rates)
+    return net_balances.get(user_id, Decimal("0.00")), user_transfers(net_balances, user_id)
+
+
+def preview_debts(
+    states: Dict[PairKey, PairState], rates: Dict[str, Decimal], batches: List[Dict[PairKey, Decimal]]
+) -> Tuple[Dict[UUID, Decimal], List[Tuple[Dict[UUID, Decimal], List[Dict[str, any]]]]]:
+    """
+    Current net balances, then the net balances and simplified plan after
+    each batch of new split debts, applied in order on top of `states`
+    (which are left untouched). A batch only changes its own pairs, so only
+    the users in them are re-converted. Runs in a worker.
+    """
+    currencies = sorted({currency for _, _, currency in states} | {
+        currency for debts in batches for _, _, currency in debts
+    })
+    index = {currency: i for i, currency in enumerate(currencies)}
+    weights = [rates[currency] for currency in currencies]
+    vectors = net_vectors(states, currencies)
+    current = {user_id: convert_vector(vector, weights) for user_id, vector in vectors.items()}
+
+    net_balances = dict(current)
+    applied: Dict[PairKey, PairState] = {}
+    previews = []
+    for debts in batches:
+        touched = set()
+        for key, amount in debts.items():
+            state = applied[key] if key in applied else states.get(key, EMPTY_STATE)
+            applied[key] = add_debt(state, amount)
+            # Not always `amount`: earlier overpayments on the pair absorb new debt
+            change = pair_balance(applied[key]) - pair_balance(state)
+            if change:
+                debtor_id, creditor_id, currency = key
+                vectors.setdefault(debtor_id, [Decimal("0")] * len(currencies))[index[currency]] -= change
+                vectors.setdefault(creditor_id, [Decimal("0")] * len(currencies))[index[currency]] += change
+                touched.update((debtor_id, creditor_id))
+        for user_id in touched:
+            net_balances[user_id] = convert_vector(vectors[user_id], weights)
+        previews.append((dict(net_balances), simplify_balances(net_balances)))
+    return current, previews
+
+
+# Extra transfers a repaired plan may carry, as a fraction of its members,
+# before it is recomputed from scratch
+REPAIR_SLACK = 0.01
+
+
+def repair_plan(plan: List[Dict[str, any]], net_changes: Dict[UUID, Decimal]) -> List[Dict[str, any]]:
+    """
+    Update a simplify_balances plan for a change in net balances without
+    re-running it over every member. Transfers of members whose balance
+    shrank or changed sign are cut back, smallest first so whole transfers
+    go; then only the members left short (the changed ones and the other
+    side of each cut) are matched greedily and merged in. Every other
+    transfer is passed through untouched, so the work beyond a few linear
+    scans of the plan is proportional to the change, not the group.
+
+    Quality bound: each member only pays or only receives, and transfers
+    exceed simplify_balances' own worst case (one less than the members in
+    the plan) by at most REPAIR_SLACK of the members. A repair that would
+    break it falls back to a full recompute.
+    """
+    changes = {str(user_id): change for user_id, change in net_changes.items() if change}
+    touching: Dict[str, List[int]] = {}
+    for i in [i for i, t in enumerate(plan) if t["payer_id"] in changes or t["payee_id"] in changes]:
+        for user_id in (plan[i]["payer_id"], plan[i]["payee_id"]):
+            if user_id in changes:
+                touching.setdefault(user_id, []).append(i)
+
+    # New amounts by position in the plan (zero: removed); members' shortfall
+    # against their new balance, negative for those who must pay more
+    amounts: Dict[int, Decimal] = {}
+    shortfall: Dict[str, Decimal] = dict(changes)
+
+    def amount(i: int) -> Decimal:
+        return amounts[i] if i in amounts else Decimal(str(plan[i]["amount"]))
+
+    for user_id, change in changes.items():
+        indices = touching.get(user_id, [])
+        target = change + sum(
+            (Decimal(str(plan[i]["amount"])) * (-1 if plan[i]["payer_id"] == user_id else 1) for i in indices),
+            Decimal("0")
+        )
+        # A debtor pays at most what they owe and receives nothing; creditors mirror that
+        for pays, limit in ((True, max(-target, Decimal("0"))), (False, max(target, Decimal("0")))):
+            side = [i for i in indices if (plan[i]["payer_id"] == user_id) == pays and amount(i) > 0]
+            excess = sum((amount(i) for i in side), Decimal("0")) - limit
+            for i in sorted(side, key=lambda i: (amount(i), i)):
+                if excess <= 0:
+                    break
+                cut = min(amount(i), excess)
+                excess -= cut
+                amounts[i] = amount(i) - cut
+                payer_id, payee_id = plan[i]["payer_id"], plan[i]["payee_id"]
+                shortfall[payer_id] = shortfall.get(payer_id, Decimal("0")) - cut
+                shortfall[payee_id] = shortfall.get(payee_id, Decimal("0")) + cut
+
+    added = {(t["payer_id"], t["payee_id"]): t["amount"] for t in simplify_balances(shortfall)}
+    payers = {payer_id for payer_id, _ in added}
+    repaired = []
+    for i, transfer in enumerate(plan):
+        pair = (transfer["payer_id"], transfer["payee_id"])
+        if pair[0] in payers and pair in added:
+            amounts[i] = amount(i) + added.pop(pair)
+        if i not in amounts:
+            repaired.append(transfer)
+        elif amounts[i] > 0:
+            repaired.append({**transfer, "amount": amounts[i]})
+    repaired.extend(
+        {"payer_id": payer_id, "payee_id": payee_id, "amount": amount}
+        for (payer_id, payee_id), amount in added.items()
+    )
+
+    members = len({t["payer_id"] for t in repaired} | {t["payee_id"] for t in repaired})
+    if len(repaired) > members - 1 + max(1, int(members * REPAIR_SLACK)):
+        net_balances: Dict[str, Decimal] = {}
+        for transfer in repaired:
+            transfer_amount = Decimal(str(transfer["amount"]))
+            net_balances[transfer["payer_id"]] = net_balances.get(transfer["payer_id"], Decimal("0")) - transfer_amount
+            net_balances[transfer["payee_id"]] = net_balances.get(transfer["payee_id"], Decimal("0")) + transfer_amount
+        return simplify_balances(net_balances)
+    return repaired
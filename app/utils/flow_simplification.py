@@ -0,0 +1,287 @@
+import heapq
+from collections import deque
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+
+from app.utils.ledger import PairKey, PairState, net_balances_from_states, pair_balance
+
+# Relationship-constrained simplification. Every transfer follows a
+# debtor -> creditor edge that exists in the raw ledger; money may pass
+# through intermediate members (A pays B, B pays C) but nobody is told to pay
+# someone they do not already owe.
+#
+# Debtors are sources and creditors sinks of a flow network in cents; each
+# ledger edge has unlimited capacity and cost 1 per cent, so a min-cost max
+# flow settles every balance while moving the least money along edges, which
+# favours direct payments over long chains. Minimizing the number of
+# transfers exactly is NP-hard; instead the flow is reduced to a forest by
+# cancelling cycles (never raising its cost), which bounds the result:
+#
+#   - transfers <= members involved - connected components, and never more
+#     than the ledger has debtor -> creditor edges;
+#   - O(n) solver phases (each raises the shortest source-sink path cost by
+#     at least 1, and paths have at most n - 1 edges), each one Dijkstra plus
+#     blocking flows over the zero-reduced-cost arcs.
+
+
+class _MinCostFlow:
+    """Primal-dual min-cost max-flow on integer capacities and costs."""
+
+    def __init__(self, n: int):
+        self.n = n
+        self.adj: List[List[int]] = [[] for _ in range(n)]
+        self.to: List[int] = []
+        self.cap: List[int] = []
+        self.cost: List[int] = []
+
+    def add_arc(self, u: int, v: int, cap: int, cost: int) -> int:
+        """Add an arc (and its residual twin, id ^ 1); returns the arc id."""
+        self.adj[u].append(len(self.to))
+        self.to.append(v)
+        self.cap.append(cap)
+        self.cost.append(cost)
+        self.adj[v].append(len(self.to))
+        self.to.append(u)
+        self.cap.append(0)
+        self.cost.append(-cost)
+        return len(self.to) - 2
+
+    def flow(self, arc: int) -> int:
+        return self.cap[arc ^ 1]
+
+    def run(self, s: int, t: int) -> int:
+        """Push the maximum flow from s to t at minimum cost; returns the flow."""
+        # Initial costs are non-negative, so zero potentials are feasible
+        potential = [0] * self.n
+        total = 0
+        while self._update_potentials(s, t, potential):
+            # Potentials are fixed for the phase, so are the zero-cost arcs
+            tight = [
+                [e for e in arcs if self.cost[e] + potential[u] - potential[self.to[e]] == 0]
+                for u, arcs in enumerate(self.adj)
+            ]
+            while True:
+                level = self._levels(s, tight)
+                if level[t] < 0:
+                    break
+                pushed = self._blocking_flow(s, t, level, tight)
+                if not pushed:
+                    break
+                total += pushed
+        return total
+
+    def _update_potentials(self, s: int, t: int, potential: List[int]) -> bool:
+        """
+        Dijkstra on reduced costs; False when t is unreachable. Only settled
+        nodes move, by dist - dist[t], which keeps every reduced cost
+        non-negative and makes the shortest paths to t zero-cost.
+        """
+        dist: Dict[int, int] = {s: 0}
+        settled: Dict[int, int] = {}
+        heap = [(0, s)]
+        while heap:
+            d, u = heapq.heappop(heap)
+            if u in settled:
+                continue
+            settled[u] = d
+            if u == t:
+                break
+            pu = potential[u]
+            for e in self.adj[u]:
+                if self.cap[e] > 0:
+                    v = self.to[e]
+                    nd = d + self.cost[e] + pu - potential[v]
+                    if nd < dist.get(v, nd + 1) and v not in settled:
+                        dist[v] = nd
+                        heapq.heappush(heap, (nd, v))
+        if t not in settled:
+            return False
+        dt = settled[t]
+        for v, d in settled.items():
+            potential[v] += d - dt
+        return True
+
+    def _levels(self, s: int, tight: List[List[int]]) -> List[int]:
+        # Hop levels over zero-cost arcs with capacity left; those arcs may
+        # form zero-cost cycles, which the level condition breaks
+        cap, to = self.cap, self.to
+        level = [-1] * self.n
+        level[s] = 0
+        queue = deque([s])
+        while queue:
+            u = queue.popleft()
+            next_level = level[u] + 1
+            for e in tight[u]:
+                v = to[e]
+                if level[v] < 0 and cap[e] > 0:
+                    level[v] = next_level
+                    queue.append(v)
+        return level
+
+    def _blocking_flow(self, s: int, t: int, level: List[int], tight: List[List[int]]) -> int:
+        """Augment along level-increasing zero-cost paths until none remain (iterative Dinic)."""
+        cap, to = self.cap, self.to
+        pointer = [0] * self.n
+        total = 0
+        while True:
+            path: List[int] = []
+            u = s
+            while u != t:
+                arcs = tight[u]
+                while pointer[u] < len(arcs):
+                    e = arcs[pointer[u]]
+                    if cap[e] > 0 and level[to[e]] == level[u] + 1:
+                        break
+                    pointer[u] += 1
+                else:
+                    # Dead end: drop the node and retreat
+                    if u == s:
+                        return total
+                    level[u] = -1
+                    e = path.pop()
+                    u = to[e ^ 1]
+                    pointer[u] += 1
+                    continue
+                path.append(e)
+                u = to[e]
+            pushed = min(cap[e] for e in path)
+            for e in path:
+                cap[e] -= pushed
+                cap[e ^ 1] += pushed
+            total += pushed
+
+
+def _find(parent: List[int], x: int) -> int:
+    while parent[x] != x:
+        parent[x] = parent[parent[x]]
+        x = parent[x]
+    return x
+
+
+def _forest_path(
+    neighbours: Dict[int, Dict[int, Tuple[int, int]]], start: int, goal: int
+) -> Optional[List[Tuple[Tuple[int, int], bool]]]:
+    """Arcs on the forest path start -> goal, each with whether it points along the path."""
+    previous: Dict[int, Tuple[int, Tuple[int, int]]] = {start: (start, (start, start))}
+    queue = deque([start])
+    while queue:
+        u = queue.popleft()
+        if u == goal:
+            break
+        for v, arc in neighbours.get(u, {}).items():
+            if v not in previous:
+                previous[v] = (u, arc)
+                queue.append(v)
+    if goal not in previous:
+        return None
+    path = []
+    node = goal
+    while node != start:
+        parent, arc = previous[node]
+        path.append((arc, arc == (parent, node)))
+        node = parent
+    path.reverse()
+    return path
+
+
+def _cancel_cycles(flows: Dict[Tuple[int, int], int], n: int) -> Dict[Tuple[int, int], int]:
+    """
+    Reduce a flow's support to a forest. Each cycle is pushed around in the
+    direction that does not raise cost (fewer arcs gain flow than lose it)
+    until one of its arcs empties.
+    """
+    forest: Dict[Tuple[int, int], int] = {}
+    neighbours: Dict[int, Dict[int, Tuple[int, int]]] = {}
+    # Union-find over-approximates connectivity once arcs are removed; a
+    # failed path search then just means no cycle
+    parent = list(range(n))
+
+    def link(arc: Tuple[int, int], amount: int) -> None:
+        u, v = arc
+        forest[arc] = amount
+        neighbours.setdefault(u, {})[v] = arc
+        neighbours.setdefault(v, {})[u] = arc
+
+    for (u, v), amount in sorted(flows.items()):
+        ru, rv = _find(parent, u), _find(parent, v)
+        path = _forest_path(neighbours, v, u) if ru == rv else None
+        if path is None:
+            parent[ru] = rv
+            link((u, v), amount)
+            continue
+
+        # Cycle u -> v ~> u; the new arc points along it
+        cycle = [((u, v), True), *path]
+        flow = {arc: forest[arc] for arc, _ in path}
+        flow[(u, v)] = amount
+        forward = [arc for arc, along in cycle if along]
+        backward = [arc for arc, along in cycle if not along]
+        shrinking, growing = (backward, forward) if len(forward) <= len(backward) else (forward, backward)
+        delta = min(flow[arc] for arc in shrinking)
+        for arc in shrinking:
+            flow[arc] -= delta
+        for arc in growing:
+            flow[arc] += delta
+
+        for arc, _ in cycle:
+            if arc == (u, v):
+                continue
+            if flow[arc]:
+                forest[arc] = flow[arc]
+            else:
+                del forest[arc]
+                a, b = arc
+                del neighbours[a][b]
+                del neighbours[b][a]
+        if flow[(u, v)]:
+            link((u, v), flow[(u, v)])
+    return forest
+
+
+def relationship_transfers(
+    net_balances: Dict[UUID, Decimal], edges: Iterable[Tuple[UUID, UUID]]
+) -> List[Dict[str, any]]:
+    """
+    Transfers that settle `net_balances` using only the given debtor ->
+    creditor edges. Same output format as simplify_balances.
+    """
+    edges = sorted(set(edges), key=lambda edge: (str(edge[0]), str(edge[1])))
+    users = sorted({user_id for edge in edges for user_id in edge} | set(net_balances), key=str)
+    index = {user_id: i for i, user_id in enumerate(users)}
+    source, sink = len(users), len(users) + 1
+    network = _MinCostFlow(len(users) + 2)
+
+    cents = {user_id: int((amount * 100).to_integral_value()) for user_id, amount in net_balances.items()}
+    unlimited = sum(-amount for amount in cents.values() if amount < 0) or 1
+    for user_id, amount in cents.items():
+        if amount < 0:
+            network.add_arc(source, index[user_id], -amount, 0)
+        elif amount > 0:
+            network.add_arc(index[user_id], sink, amount, 0)
+    arcs = {
+        (index[debtor_id], index[creditor_id]): network.add_arc(index[debtor_id], index[creditor_id], unlimited, 1)
+        for debtor_id, creditor_id in edges
+    }
+    # Rounded nets can be a cent off zero-sum; max flow leaves the residue
+    network.run(source, sink)
+
+    flows = {pair: network.flow(arc) for pair, arc in arcs.items() if network.flow(arc) > 0}
+    forest = _cancel_cycles(flows, len(users))
+    return [
+        {
+            "payer_id": str(users[u]),
+            "payee_id": str(users[v]),
+            "amount": (Decimal(amount) / 100).quantize(Decimal("0.01")),
+        }
+        for (u, v), amount in sorted(forest.items(), key=lambda item: (-item[1], item[0]))
+    ]
+
+
+def simplify_along_edges(states: Dict[PairKey, PairState], rates: Dict[str, Decimal]) -> List[Dict[str, any]]:
+    """
+    Relationship-constrained plan straight from pair states. A module-level
+    function so it can run in a worker process.
+    """
+    edges = [(debtor_id, creditor_id) for (debtor_id, creditor_id, _), state in states.items() if pair_balance(state) > 0]
+    return relationship_transfers(net_balances_from_states(states, rates), edges)
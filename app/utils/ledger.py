@@ -0,0 +1,233 @@
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from uuid import UUID
+
+from app.utils.money import round_decimal
+
+ZERO = Decimal("0")
+
+# Raw balances replay every expense split first, then settlements, and a
+# settlement that overshoots a pair's debt clears it without creating a
+# reverse debt. Per (debtor, creditor) pair that replay reduces to two
+# numbers (debt, settled) with balance = max(debt - settled, 0). States
+# compose, so any prefix of history folds into one carry-forward entry.
+#
+# Each currency is a separate ledger: a pair is (debtor, creditor, currency)
+# and settlements only offset debts in their own currency. Amounts are
+# converted into the group's base currency when balances are read.
+PairKey = Tuple[UUID, UUID, str]
+PairState = Tuple[Decimal, Decimal]
+EMPTY_STATE: PairState = (ZERO, ZERO)
+
+
+def add_debt(state: PairState, amount: Decimal) -> PairState:
+    """Add split debt to a pair (debts apply before any settlement)."""
+    debt, settled = state
+    return (debt + amount, settled)
+
+
+def apply_settlement(state: PairState, amount: Decimal) -> PairState:
+    """Apply a settlement: subtract it, never going below zero."""
+    debt, settled = state
+    return (debt, settled + amount)
+
+
+def compose(earlier: PairState, later: PairState) -> PairState:
+    """Combine the states of two consecutive stretches of history."""
+    return (earlier[0] + later[0], earlier[1] + later[1])
+
+
+def pair_balance(state: PairState) -> Decimal:
+    """Amount the debtor still owes the creditor."""
+    debt, settled = state
+    return max(debt - settled, ZERO)
+
+
+def build_pair_states(
+    split_rows: Iterable[Tuple[UUID, UUID, Decimal]],
+    settlement_rows: Iterable[Tuple[UUID, UUID, Decimal]],
+    carry_forwards: Optional[Dict[PairKey, PairState]] = None
+) -> Dict[PairKey, PairState]:
+    """
+    Replay a ledger into pair states.
+    split_rows: (user_id, paid_by_user_id, amount, currency); settlement_rows,
+    in chronological order: (payer_id, payee_id, amount, currency).
+    """
+    states: Dict[PairKey, PairState] = dict(carry_forwards or {})
+
+    for user_id, paid_by_user_id, amount, currency in split_rows:
+        # If user is in split but didn't pay, they owe the payer
+        if user_id != paid_by_user_id:
+            key = (user_id, paid_by_user_id, currency)
+            states[key] = add_debt(states.get(key, EMPTY_STATE), Decimal(str(amount)))
+
+    for payer_id, payee_id, amount, currency in settlement_rows:
+        # Settlement: payer pays payee, so payer owes less
+        key = (payer_id, payee_id, currency)
+        states[key] = apply_settlement(states.get(key, EMPTY_STATE), Decimal(str(amount)))
+
+    return states
+
+
+def raw_balances_from_states(states: Dict[PairKey, PairState], rates: Dict[str, Decimal]) -> List[dict]:
+    """
+    Convert pair states to the raw balance list format. `rates` converts each
+    currency into the base currency; a pair's currencies are summed.
+    """
+    totals: Dict[Tuple[UUID, UUID], Decimal] = {}
+    for (debtor_id, creditor_id, currency), state in states.items():
+        amount = pair_balance(state)
+        if amount > 0:
+            totals[(debtor_id, creditor_id)] = totals.get((debtor_id, creditor_id), ZERO) + amount * rates[currency]
+
+    result = []
+    for (debtor_id, creditor_id), amount in totals.items():
+        amount = round_decimal(amount, 2)
+        if amount > 0:
+            result.append({
+                "debtor_id": str(debtor_id),
+                "creditor_id": str(creditor_id),
+                "amount": amount
+            })
+    return result
+
+
+def currency_balances_from_states(states: Dict[PairKey, PairState]) -> List[dict]:
+    """Unconverted balance of every pair, one entry per currency."""
+    return [
+        {
+            "debtor_id": str(debtor_id),
+            "creditor_id": str(creditor_id),
+            "currency": currency,
+            "amount": round_decimal(pair_balance(state), 2)
+        }
+        for (debtor_id, creditor_id, currency), state in states.items()
+        if pair_balance(state) > 0
+    ]
+
+
+def net_vectors(states: Dict[PairKey, PairState], currencies: List[str]) -> Dict[UUID, List[Decimal]]:
+    """Each user's unconverted net per currency, in the order of `currencies`."""
+    index = {currency: i for i, currency in enumerate(currencies)}
+    vectors: Dict[UUID, List[Decimal]] = {}
+    for (debtor_id, creditor_id, currency), state in states.items():
+        amount = pair_balance(state)
+        if amount > 0:
+            i = index[currency]
+            vectors.setdefault(debtor_id, [ZERO] * len(currencies))[i] -= amount
+            vectors.setdefault(creditor_id, [ZERO] * len(currencies))[i] += amount
+    return vectors
+
+
+def convert_vector(vector: List[Decimal], weights: List[Decimal]) -> Decimal:
+    """One user's per-currency nets in the base currency, rounded to cents."""
+    return round_decimal(sum((amount * weight for amount, weight in zip(vector, weights)), ZERO), 2)
+
+
+def net_balances_from_states(states: Dict[PairKey, PairState], rates: Dict[str, Decimal]) -> Dict[UUID, Decimal]:
+    """
+    Net balance per user in the base currency (positive = owed money).
+    One pass builds each user's vector of per-currency nets, and each vector
+    is converted once, so extra currencies do not mean extra recomputes.
+    """
+    currencies = sorted({currency for _, _, currency in states})
+    weights = [rates[currency] for currency in currencies]
+    return {
+        user_id: convert_vector(vector, weights)
+        for user_id, vector in net_vectors(states, currencies).items()
+    }
+
+
+def user_net_balance(states: Dict[PairKey, PairState], rates: Dict[str, Decimal], user_id: UUID) -> Decimal:
+    """One user's entry of net_balances_from_states (0.00 without balances)."""
+    user_states = {key: state for key, state in states.items() if user_id in key[:2]}
+    currencies = sorted({currency for _, _, currency in user_states})
+    vector = net_vectors(user_states, currencies).get(user_id)
+    if vector is None:
+        return Decimal("0.00")
+    return convert_vector(vector, [rates[currency] for currency in currencies])
+
+
+def expense_debts(
+    paid_by_user_id: UUID, currency: str, splits: Iterable[Tuple[UUID, Decimal]]
+) -> Dict[PairKey, Decimal]:
+    """Debt each (debtor, payer) pair takes on from one expense."""
+    debts: Dict[PairKey, Decimal] = {}
+    for user_id, amount in splits:
+        if user_id != paid_by_user_id:
+            key = (user_id, paid_by_user_id, currency)
+            # Splits are Decimals already, except from JSON snapshots
+            if not isinstance(amount, Decimal):
+                amount = Decimal(str(amount))
+            debts[key] = debts[key] + amount if key in debts else amount
+    return debts
+
+
+def debt_delta(before: Dict[PairKey, Decimal], after: Dict[PairKey, Decimal]) -> Dict[PairKey, Decimal]:
+    """Per-pair debt change between two versions of an expense; unchanged pairs are omitted."""
+    delta = {}
+    for key in before.keys() | after.keys():
+        change = after.get(key, ZERO) - before.get(key, ZERO)
+        if change:
+            delta[key] = change
+    return delta
+
+
+# Ledger cache hash fields (see app.services.ledger_cache): each pair has
+# d:/s:{debtor}:{creditor}:{currency} fields holding debt and settled in
+# cents of the pair's currency. Kept here so workers can parse them.
+
+def to_cents(amount: Decimal) -> int:
+    return int((Decimal(amount) * 100).to_integral_value())
+
+
+def pair_field(key: PairKey) -> str:
+    return f"{key[0]}:{key[1]}:{key[2]}"
+
+
+def pair_state_fields(states: Dict[PairKey, PairState]) -> List[Tuple[str, int]]:
+    """Ledger cache fields for pair states."""
+    fields = []
+    for key, state in states.items():
+        pair = pair_field(key)
+        for kind, amount in zip("ds", state):
+            fields.append((f"{kind}:{pair}", to_cents(amount)))
+    return fields
+
+
+def pair_states_from_fields(fields: Dict[str, int]) -> Optional[Dict[PairKey, PairState]]:
+    """Pair states from ledger cache fields, or None for a layout this code no longer reads."""
+    states: Dict[PairKey, list] = {}
+    for field, cents in fields.items():
+        parts = field.split(":")
+        if len(parts) != 4:
+            # Written before pairs were kept per currency
+            return None
+        kind, debtor_id, creditor_id, currency = parts
+        if kind not in ("d", "s"):
+            # Hashes cached before the floor field was dropped also hold f:
+            continue
+        state = states.setdefault((UUID(debtor_id), UUID(creditor_id), currency), [0, 0])
+        state["ds".index(kind)] = cents
+    return {
+        key: tuple(Decimal(cents) / 100 for cents in state)
+        for key, state in states.items()
+    }
+
+
+def rates_into_base(
+    table: Dict[str, Decimal], currencies: Iterable[str], base_currency: str
+) -> Tuple[Dict[str, Decimal], Set[str]]:
+    """
+    Multiplier from each currency into the base currency, from a table of
+    rates against a common currency, and the currencies the table lacks.
+    Single-currency ledgers need no table at all.
+    """
+    currencies = set(currencies) | {base_currency}
+    if currencies == {base_currency}:
+        return {base_currency: Decimal("1")}, set()
+    missing = currencies - table.keys()
+    if missing:
+        return {}, missing
+    base_rate = table[base_currency]
+    return {currency: table[currency] / base_rate for currency in currencies}, missing
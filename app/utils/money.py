@@ -1,6 +1,9 @@
 from decimal import Decimal, ROUND_HALF_UP
 from typing import List, Tuple
 
+# ISO 4217 code; every currency is stored with two decimal places
+CURRENCY_PATTERN = r"^[A-Z]{3}$"
+
 
 def round_decimal(value: Decimal, decimal_places: int = 2) -> Decimal:
     """Round decimal to specified decimal places."""
@@ -38,17 +41,35 @@ def distribute_remainder(
     return rounded_amounts
 
 
+def equal_shares(
+    total_amount: Decimal,
+    num_people: int,
+    decimal_places: int = 2
+) -> Tuple[Decimal, Decimal, int]:
+    """
+    split_equal as (low, high, remainder): the first `remainder` people get
+    `high`, one cent more than everyone else's `low`.
+    """
+    cents = int(total_amount.scaleb(decimal_places).to_integral_value(rounding=ROUND_HALF_UP))
+    per_person, remainder = divmod(cents, num_people)
+    low = Decimal(per_person).scaleb(-decimal_places)
+    high = Decimal(per_person + 1).scaleb(-decimal_places)
+    return low, high, remainder
+
+
 def split_equal(
     total_amount: Decimal,
     num_people: int,
     decimal_places: int = 2
 ) -> List[Decimal]:
-    """Split amount equally among people with fair remainder distribution."""
+    """
+    Split amount equally among people with fair remainder distribution: the
+    first few get one extra cent. Allocated in integer cents, so large splits
+    cost two Decimals rather than one division and rounding per person.
+    """
     if num_people == 0:
         return []
     
-    per_person = total_amount / Decimal(num_people)
-    amounts = [per_person] * num_people
-    
-    return distribute_remainder(total_amount, amounts, decimal_places)
+    low, high, remainder = equal_shares(total_amount, num_people, decimal_places)
+    return [high] * remainder + [low] * (num_people - remainder)
 
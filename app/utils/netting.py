@@ -0,0 +1,66 @@
+from decimal import Decimal
+from typing import Dict, List, Tuple
+from uuid import UUID
+
+from app.utils.ledger import ZERO, PairKey, PairState, pair_balance
+from app.utils.money import round_decimal
+
+
+def pairwise_netting(user_id: UUID, states_by_group: Dict[UUID, Dict[PairKey, PairState]]) -> List[dict]:
+    """
+    Net a user's balances with each counterparty across groups, per currency.
+
+    What the user owes a counterparty and what the counterparty owes the user
+    overlap by min(owes, owed). The overlap is cancelled by offsetting
+    settlements in both directions, each group taking at most its own
+    balance (groups in id order), leaving one net amount to actually pay.
+    """
+    sides: Dict[Tuple[UUID, str], Tuple[Dict[UUID, Decimal], Dict[UUID, Decimal]]] = {}
+    for group_id, states in states_by_group.items():
+        for (debtor_id, creditor_id, currency), state in states.items():
+            amount = round_decimal(pair_balance(state), 2)
+            if amount <= 0:
+                continue
+            if debtor_id == user_id:
+                owes, _ = sides.setdefault((creditor_id, currency), ({}, {}))
+                owes[group_id] = owes.get(group_id, ZERO) + amount
+            elif creditor_id == user_id:
+                _, owed = sides.setdefault((debtor_id, currency), ({}, {}))
+                owed[group_id] = owed.get(group_id, ZERO) + amount
+
+    plan = []
+    for (counterparty_id, currency), (owes, owed) in sorted(sides.items(), key=lambda item: (str(item[0][0]), item[0][1])):
+        total_owes = sum(owes.values(), ZERO)
+        total_owed = sum(owed.values(), ZERO)
+        overlap = min(total_owes, total_owed)
+        net = total_owes - total_owed
+        plan.append({
+            "counterparty_id": counterparty_id,
+            "currency": currency,
+            "owes": total_owes,
+            "owed": total_owed,
+            "groups": [
+                {"group_id": group_id, "owes": owes.get(group_id, ZERO), "owed": owed.get(group_id, ZERO)}
+                for group_id in sorted(owes.keys() | owed.keys(), key=str)
+            ],
+            "offsets": [
+                *_allocate(overlap, owes, user_id, counterparty_id),
+                *_allocate(overlap, owed, counterparty_id, user_id),
+            ],
+            "net_amount": abs(net),
+            "net_payer_id": user_id if net > 0 else counterparty_id if net < 0 else None,
+            "net_payee_id": counterparty_id if net > 0 else user_id if net < 0 else None,
+        })
+    return plan
+
+
+def _allocate(total: Decimal, balances: Dict[UUID, Decimal], payer_id: UUID, payee_id: UUID) -> List[dict]:
+    """Spread `total` over per-group balances, never beyond a group's balance."""
+    offsets = []
+    for group_id in sorted(balances, key=str):
+        if total <= 0:
+            break
+        amount = min(total, balances[group_id])
+        total -= amount
+        offsets.append({"group_id": group_id, "payer_id": payer_id, "payee_id": payee_id, "amount": amount})
+    return offsets
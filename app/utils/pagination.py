@@ -0,0 +1,41 @@
+import base64
+from typing import Any, Callable, List, Optional
+from fastapi import HTTPException, status
+
+from app.utils.serialization import dumps, loads
+
+
+def encode_cursor(values: List[Any]) -> str:
+    """Opaque keyset cursor: the sort key of the last row on a page."""
+    return base64.urlsafe_b64encode(dumps(values)).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> List[Any]:
+    """Decode a cursor made by encode_cursor. Raises ValueError if malformed."""
+    try:
+        values = loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except Exception as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(values, list):
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def parse_cursor(cursor: Optional[str], *parsers: Callable[[Any], Any]) -> Optional[tuple]:
+    """
+    The sort key a cursor from encode_cursor carries, each value passed
+    through its parser (datetime.fromisoformat, UUID, ...); None without a
+    cursor. A malformed cursor is a 400.
+    """
+    if not cursor:
+        return None
+    try:
+        values = decode_cursor(cursor)
+        if len(values) != len(parsers):
+            raise ValueError("Invalid cursor")
+        return tuple(parse(value) for parse, value in zip(parsers, values))
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
@@ -0,0 +1,28 @@
+import calendar
+import enum
+from datetime import datetime, timedelta
+
+
+class RecurrenceInterval(str, enum.Enum):
+    DAILY = "DAILY"
+    WEEKLY = "WEEKLY"
+    MONTHLY = "MONTHLY"
+
+
+def add_months(start: datetime, months: int) -> datetime:
+    """Same day-of-month `months` later, clamped to the end of shorter months."""
+    month_index = start.month - 1 + months
+    year, month = start.year + month_index // 12, month_index % 12 + 1
+    day = min(start.day, calendar.monthrange(year, month)[1])
+    return start.replace(year=year, month=month, day=day)
+
+
+def occurrence_at(starts_at: datetime, interval: RecurrenceInterval, interval_count: int, n: int) -> datetime:
+    """
+    Time of the n-th occurrence (0-based). Always measured from the start so
+    a monthly series on the 31st returns to the 31st after a short month.
+    """
+    if interval == RecurrenceInterval.MONTHLY:
+        return add_months(starts_at, n * interval_count)
+    days = 7 if interval == RecurrenceInterval.WEEKLY else 1
+    return starts_at + timedelta(days=n * interval_count * days)
@@ -0,0 +1,37 @@
+from decimal import Decimal
+from typing import Any
+import orjson
+from fastapi.responses import Response
+
+
+def _default(obj: Any) -> Any:
+    """Encode types orjson does not handle natively."""
+    if isinstance(obj, Decimal):
+        # Strings keep money exact (no float round-trip)
+        return str(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj: Any) -> bytes:
+    """Encode to compact JSON bytes; UUIDs and datetimes are handled natively."""
+    return orjson.dumps(obj, default=_default)
+
+
+def loads(data: bytes | str) -> Any:
+    """Decode JSON bytes or text."""
+    return orjson.loads(data)
+
+
+class FastJSONResponse(Response):
+    """
+    JSON response that passes pre-encoded bytes through untouched and encodes
+    everything else once with orjson.
+    """
+    media_type = "application/json"
+    
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        if isinstance(content, str):
+            return content.encode("utf-8")
+        return dumps(content)
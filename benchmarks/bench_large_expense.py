@@ -0,0 +1,114 @@
+"""
+EQUAL split over a very large group, through the expense write path.
+
+Seeds a group of --participants members, then times creating expenses split
+equally between all of them: ExpenseService.create_expense (membership read,
+split allocation, set-based split insert, change log and summary), the
+commit and serializing the default response. With --redis-url the Redis
+upkeep the router runs after the commit (invalidate_balance_cache, which
+applies the change to cached pair states and leaderboards) is timed too.
+Reports the median and exits 1 if it exceeds the budget.
+
+Runs against an in-memory SQLite database unless --database-url is given
+(e.g. postgresql+asyncpg://... with the migrations applied).
+
+    python -m benchmarks.bench_large_expense --participants 50000 --budget-ms 1000 \
+        --database-url postgresql+asyncpg://... --redis-url redis://localhost:6379/15
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from decimal import Decimal
+from typing import Optional
+from uuid import uuid4
+
+import redis.asyncio as redis
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.api.routers.expenses import invalidate_balance_cache
+from app.core.database import Base
+from app.models import Group, GroupMember, GroupSummary, User
+from app.models.expense import SplitType
+from app.schemas.expense import ExpenseCreate
+from app.services.expense_service import ExpenseService
+from app.utils.serialization import dumps
+
+
+async def seed(session, participants: int):
+    group_id = uuid4()
+    user_ids = [uuid4() for _ in range(participants)]
+    session.add(Group(id=group_id, name="Community"))
+    await session.flush()
+    session.add(GroupSummary(group_id=group_id, member_count=participants, expense_count=0, spend={}, version=0))
+    await session.execute(insert(User.__table__), [
+        {"id": user_id, "name": f"Member {i}", "email": f"member{i}@example.com"} for i, user_id in enumerate(user_ids)
+    ])
+    await session.execute(insert(GroupMember.__table__), [
+        {"group_id": group_id, "user_id": user_id} for user_id in user_ids
+    ])
+    await session.commit()
+    return group_id, user_ids
+
+
+async def run(database_url: str, redis_url: Optional[str], participants: int, runs: int) -> list:
+    engine = create_async_engine(database_url)
+    redis_client = redis.from_url(redis_url) if redis_url else None
+    if database_url.startswith("sqlite"):
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+    async with sessions() as session:
+        group_id, user_ids = await seed(session, participants)
+
+    timings = []
+    for i in range(runs):
+        expense = ExpenseCreate(
+            paid_by_user_id=user_ids[i % len(user_ids)],
+            amount=Decimal("123456.78"),
+            description="Venue hire",
+            split_type=SplitType.EQUAL,
+        )
+        async with sessions() as session:
+            started = time.perf_counter()
+            response, change = await ExpenseService(session).create_expense(group_id, expense)
+            await session.commit()
+            dumps(response.model_dump(mode="json"))
+            if redis_client is not None:
+                await invalidate_balance_cache(session, redis_client, group_id, change)
+            timings.append(time.perf_counter() - started)
+
+        # Everyone but the payer owes them their share
+        assert response.split_count == participants and not response.splits
+        assert len(change.debts) == participants - 1
+    await engine.dispose()
+    if redis_client is not None:
+        await redis_client.close()
+    return timings
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--participants", type=int, default=50_000)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--budget-ms", type=float, default=1000.0, help="Max median time per expense")
+    parser.add_argument("--database-url", default="sqlite+aiosqlite://")
+    parser.add_argument("--redis-url", default=None, help="Also time the Redis upkeep against this server")
+    args = parser.parse_args(argv)
+
+    timings = asyncio.run(run(args.database_url, args.redis_url, args.participants, args.runs))
+    median_ms = statistics.median(timings) * 1000
+    print(f"{args.participants} participants: median {median_ms:.1f} ms "
+          f"(min {min(timings) * 1000:.1f}, max {max(timings) * 1000:.1f})")
+
+    if median_ms > args.budget_ms:
+        print(f"FAIL: {median_ms:.1f} ms exceeds budget {args.budget_ms:.0f} ms")
+        return 1
+    print(f"OK: within {args.budget_ms:.0f} ms budget")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
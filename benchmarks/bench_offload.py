@@ -0,0 +1,143 @@
+"""
+Event-loop lag under concurrent requests, with simplification offloaded or not.
+
+Seeds one group of --members members and --payers EQUAL expenses over all
+of them (members x payers pair states), then for --duration seconds runs
+--heavy clients that drop the cached plan and read /balances/simplified
+(so every read recomputes it from the cached pair fields) next to --light
+clients reading the group. Runs once with the states -> plan pipeline
+inline on the event loop and once offloaded, and reports the loop lag
+LoopLagMonitor recorded (as /health/loop shows it) and the light requests'
+latency, which is what the other requests on a worker pay for a blocked loop.
+
+Drives the in-process app against the configured database and Redis:
+
+    python -m benchmarks.bench_offload --create-tables --members 2000 --payers 5
+"""
+import argparse
+import asyncio
+import sys
+import time
+from typing import List, Optional
+from uuid import UUID, uuid4
+
+import httpx
+
+from benchmarks.load_test import _create_tables, percentile
+
+
+async def seed(client: httpx.AsyncClient, args: argparse.Namespace) -> str:
+    run_id = uuid4().hex[:8]
+    resp = await client.post(f"{args.prefix}/groups", json={"name": f"offload-{run_id}"})
+    resp.raise_for_status()
+    group_id = resp.json()["id"]
+    member_ids = []
+    for u in range(args.members):
+        resp = await client.post(
+            f"{args.prefix}/users", json={"name": f"Offload User {u}", "email": f"offload-{run_id}-{u}@example.com"}
+        )
+        resp.raise_for_status()
+        member_ids.append(resp.json()["id"])
+        resp = await client.post(f"{args.prefix}/groups/{group_id}/members", json={"user_id": member_ids[-1]})
+        resp.raise_for_status()
+    for payer_id in member_ids[:args.payers]:
+        resp = await client.post(f"{args.prefix}/groups/{group_id}/expenses", json={
+            "paid_by_user_id": payer_id,
+            "amount": f"{args.members * 3}.00",
+            "description": "Offload benchmark",
+            "split_type": "EQUAL",
+            "splits": [],
+        })
+        resp.raise_for_status()
+    return group_id
+
+
+async def run_phase(client: httpx.AsyncClient, args: argparse.Namespace, group_id: str) -> dict:
+    from app.core.redis_client import get_redis
+    from app.services.compute_offload import loop_lag_monitor
+    from app.services.ledger_cache import balance_view_key, plan_key
+
+    redis_client = await get_redis()
+    deadline = time.perf_counter() + args.duration
+    heavy_reads = 0
+    light_latencies: List[float] = []
+
+    async def heavy():
+        nonlocal heavy_reads
+        while time.perf_counter() < deadline:
+            await redis_client.delete(plan_key(UUID(group_id)), balance_view_key(UUID(group_id), "simplified"))
+            resp = await client.get(f"{args.prefix}/groups/{group_id}/balances/simplified")
+            resp.raise_for_status()
+            heavy_reads += 1
+
+    async def light():
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            resp = await client.get(f"{args.prefix}/groups/{group_id}")
+            resp.raise_for_status()
+            light_latencies.append(time.perf_counter() - started)
+
+    loop_lag_monitor.reset()
+    await asyncio.gather(*[heavy() for _ in range(args.heavy)], *[light() for _ in range(args.light)])
+    resp = await client.get("/health/loop")
+    return {
+        "loop_lag": resp.json()["loop_lag"],
+        "heavy_reads": heavy_reads,
+        "light_requests": len(light_latencies),
+        "light_p50_ms": percentile(light_latencies, 50) * 1000,
+        "light_p99_ms": percentile(light_latencies, 99) * 1000,
+    }
+
+
+async def run(args: argparse.Namespace) -> int:
+    from app.core.config import get_settings
+    from app.main import create_app
+    from app.services.compute_offload import compute_offloader, loop_lag_monitor
+
+    settings = get_settings()
+    settings.LOOP_LAG_SAMPLE_SECONDS = args.sample_seconds
+    app = create_app()
+    if args.create_tables:
+        await _create_tables()
+    # AsyncClient(app=...) does not run the lifespan that starts the monitor
+    loop_lag_monitor.start()
+    try:
+        async with httpx.AsyncClient(app=app, base_url="http://bench", timeout=args.timeout) as client:
+            group_id = await seed(client, args)
+            print(f"{args.members} members x {args.payers} payers, {args.heavy} heavy + {args.light} light clients")
+            print(f"{'pipeline':<10}{'lag p99':>10}{'lag max':>10}{'light p50':>11}{'light p99':>11}{'plans/s':>9}")
+            for label, min_pairs in (("inline", sys.maxsize), ("offloaded", 1)):
+                settings.SIMPLIFY_OFFLOAD_MIN_PAIRS = min_pairs
+                result = await run_phase(client, args, group_id)
+                lag = result["loop_lag"]
+                print(
+                    f"{label:<10}{lag['p99_ms']:>8.1f}ms{lag['max_ms']:>8.1f}ms"
+                    f"{result['light_p50_ms']:>9.1f}ms{result['light_p99_ms']:>9.1f}ms"
+                    f"{result['heavy_reads'] / args.duration:>9.1f}"
+                )
+    finally:
+        await loop_lag_monitor.stop()
+        compute_offloader.shutdown()
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--prefix", default="/api/v1", help="API prefix")
+    parser.add_argument("--create-tables", action="store_true", help="Create tables before running")
+    parser.add_argument("--members", type=int, default=2000)
+    parser.add_argument("--payers", type=int, default=5, help="EQUAL expenses over all members, one per payer")
+    parser.add_argument("--heavy", type=int, default=2, help="Clients recomputing the simplified plan")
+    parser.add_argument("--light", type=int, default=8, help="Clients making cheap group reads")
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds per phase")
+    parser.add_argument("--sample-seconds", type=float, default=0.05, help="LoopLagMonitor sample interval")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    return asyncio.run(run(build_parser().parse_args(argv)))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
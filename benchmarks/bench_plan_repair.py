@@ -0,0 +1,90 @@
+"""
+Incremental repair of the greedy simplified plan against full recomputes.
+
+Starts from the plan of a random group of n members with balances, then
+applies a trickle of small expenses (a payer and a few participants each).
+After every expense the plan is repaired from the net balance change and,
+separately, recomputed from scratch. Reports the time of each and how many
+more transfers the repaired plan has, and checks every repaired plan settles
+all nets with each member only paying or only receiving, within the
+REPAIR_SLACK bound over simplify_balances' own worst case.
+
+    python -m benchmarks.bench_plan_repair
+"""
+import random
+import time
+from decimal import Decimal
+from uuid import UUID
+
+from app.utils.balance_simplification import REPAIR_SLACK, repair_plan, simplify_balances
+
+SIZES = (1_000, 10_000, 50_000)
+EXPENSES = 100
+
+
+def make_nets(n: int, rnd: random.Random) -> dict:
+    users = [UUID(int=rnd.getrandbits(128)) for _ in range(n)]
+    nets = {user_id: Decimal("0") for user_id in users}
+    for _ in range(n):
+        debtor, creditor = rnd.sample(users, 2)
+        amount = Decimal(rnd.randint(1, 100_000)) / 100
+        nets[debtor] -= amount
+        nets[creditor] += amount
+    return nets
+
+
+def make_expense(users: list, rnd: random.Random) -> dict:
+    payer, *participants = rnd.sample(users, rnd.randint(2, 6))
+    changes: dict = {}
+    for user_id in participants:
+        amount = Decimal(rnd.randint(100, 5_000)) / 100
+        changes[user_id] = changes.get(user_id, Decimal("0")) - amount
+        changes[payer] = changes.get(payer, Decimal("0")) + amount
+    return changes
+
+
+def check(nets: dict, plan: list[dict]) -> None:
+    settled: dict = {}
+    for t in plan:
+        assert t["amount"] > 0
+        settled[t["payer_id"]] = settled.get(t["payer_id"], 0) - t["amount"]
+        settled[t["payee_id"]] = settled.get(t["payee_id"], 0) + t["amount"]
+    for user_id, amount in nets.items():
+        assert settled.get(str(user_id), 0) == amount
+    payers = {t["payer_id"] for t in plan}
+    payees = {t["payee_id"] for t in plan}
+    assert not payers & payees
+    members = len(payers | payees)
+    assert len(plan) <= members - 1 + max(1, int(members * REPAIR_SLACK))
+
+
+def main():
+    print(f"{'members':>8}{'repair ms':>11}{'full ms':>9}{'speedup':>9}{'extra tx (mean/max)':>21}")
+    for n in SIZES:
+        rnd = random.Random(n)
+        nets = make_nets(n, rnd)
+        users = list(nets)
+        plan = simplify_balances(nets)
+        repair_s = full_s = 0.0
+        extra = []
+        for _ in range(EXPENSES):
+            changes = make_expense(users, rnd)
+            for user_id, change in changes.items():
+                nets[user_id] += change
+
+            start = time.perf_counter()
+            plan = repair_plan(plan, changes)
+            repair_s += time.perf_counter() - start
+            start = time.perf_counter()
+            full = simplify_balances(nets)
+            full_s += time.perf_counter() - start
+
+            check(nets, plan)
+            extra.append(len(plan) - len(full))
+        repair_ms, full_ms = repair_s * 1000 / EXPENSES, full_s * 1000 / EXPENSES
+        print(f"{n:>8}{repair_ms:>11.2f}{full_ms:>9.2f}{full_ms / repair_ms:>8.1f}x"
+              f"{sum(extra) / len(extra):>14.2f} / {max(extra)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Compute throughput of the batch balance recompute job by worker count.
+
+Builds --groups random group ledgers of --pairs pair states each and runs
+them through compute_balances in a process pool the way the job does (one
+sub-batch per worker, states pickled over and JSON bytes back), once per
+worker count from 1 up to --max-workers. Reports groups per second and the
+speedup and per-worker efficiency over a single worker. Database reads and
+Redis writes are left out: this is the part the pool is meant to scale.
+
+    python -m benchmarks.bench_recompute --groups 2000 --pairs 200 --max-workers 8
+"""
+import argparse
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal
+from uuid import UUID
+
+from app.jobs.recompute_balances import _split, compute_balances
+
+
+def make_ledgers(groups: int, pairs: int, rnd: random.Random) -> list:
+    rates = {"USD": Decimal("1")}
+    ledgers = []
+    for _ in range(groups):
+        users = [UUID(int=rnd.getrandbits(128)) for _ in range(max(2, pairs // 4))]
+        states = {}
+        for _ in range(pairs):
+            debtor, creditor = rnd.sample(users, 2)
+            states[(debtor, creditor, "USD")] = (
+                Decimal(rnd.randint(1, 100_000)) / 100, Decimal(rnd.randint(0, 50_000)) / 100
+            )
+        ledgers.append((str(UUID(int=rnd.getrandbits(128))), states, rates))
+    return ledgers
+
+
+def run(ledgers: list, workers: int) -> float:
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # Start every worker before timing
+        list(pool.map(compute_balances, [[]] * workers))
+        started = time.perf_counter()
+        for _ in pool.map(compute_balances, _split(ledgers, workers)):
+            pass
+        return time.perf_counter() - started
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--groups", type=int, default=2000)
+    parser.add_argument("--pairs", type=int, default=200, help="Pair states per group")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args(argv)
+
+    ledgers = make_ledgers(args.groups, args.pairs, random.Random(41))
+    counts = sorted({1, args.max_workers} | {2 ** i for i in range(1, args.max_workers.bit_length()) if 2 ** i < args.max_workers})
+    print(f"{args.groups} groups x {args.pairs} pairs, {os.cpu_count()} CPUs")
+    print(f"{'workers':>8}{'groups/s':>10}{'speedup':>9}{'efficiency':>12}")
+    baseline = None
+    for workers in counts:
+        rate = args.groups / run(ledgers, workers)
+        baseline = baseline or rate
+        print(f"{workers:>8}{rate:>10.0f}{rate / baseline:>8.2f}x{rate / baseline / workers:>11.0%}")
+
+
+if __name__ == "__main__":
+    main()
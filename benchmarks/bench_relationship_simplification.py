@@ -0,0 +1,59 @@
+"""
+Relationship-constrained simplification (min-cost flow) on large groups.
+
+Random ledgers with n members and m debtor -> creditor edges. Reports solver
+time, transfer counts against the greedy plan and the raw ledger, and checks
+every plan settles all nets along existing edges.
+
+    python -m benchmarks.bench_relationship_simplification
+"""
+import random
+import time
+from decimal import Decimal
+from uuid import UUID
+
+from app.utils.balance_simplification import simplify_states
+from app.utils.flow_simplification import simplify_along_edges
+from app.utils.ledger import net_balances_from_states
+
+SIZES = ((100, 300), (1_000, 3_000), (2_000, 8_000), (5_000, 15_000))
+RATES = {"USD": Decimal("1")}
+
+
+def make_states(n: int, m: int, seed: int = 1) -> dict:
+    rnd = random.Random(seed)
+    users = [UUID(int=rnd.getrandbits(128)) for _ in range(n)]
+    states = {}
+    while len(states) < m:
+        debtor, creditor = rnd.sample(users, 2)
+        states[(debtor, creditor, "USD")] = (Decimal(rnd.randint(1, 100_000)) / 100, Decimal("0"))
+    return states
+
+
+def check(states: dict, plan: list[dict]) -> None:
+    edges = {(str(debtor), str(creditor)) for debtor, creditor, _ in states}
+    assert all((t["payer_id"], t["payee_id"]) in edges for t in plan)
+    settled: dict = {}
+    for t in plan:
+        settled[t["payer_id"]] = settled.get(t["payer_id"], 0) - t["amount"]
+        settled[t["payee_id"]] = settled.get(t["payee_id"], 0) + t["amount"]
+    for user_id, amount in net_balances_from_states(states, RATES).items():
+        assert settled.get(str(user_id), 0) == amount
+
+
+def main():
+    print(f"{'members':>8}{'edges':>8}{'flow ms':>10}{'greedy ms':>11}{'flow tx':>9}{'greedy tx':>11}")
+    for n, m in SIZES:
+        states = make_states(n, m)
+        start = time.perf_counter()
+        plan = simplify_along_edges(states, RATES)
+        flow_s = time.perf_counter() - start
+        start = time.perf_counter()
+        greedy = simplify_states(states, RATES)
+        greedy_s = time.perf_counter() - start
+        check(states, plan)
+        print(f"{n:>8}{m:>8}{flow_s * 1000:>10.0f}{greedy_s * 1000:>11.0f}{len(plan):>9}{len(greedy):>11}")
+
+
+if __name__ == "__main__":
+    main()
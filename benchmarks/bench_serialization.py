@@ -0,0 +1,111 @@
+"""
+Per-request CPU cost of serializing balance responses.
+
+Compares the previous path (build RawBalanceResponse models, rebuild dicts for
+the cache, json.dumps; on a hit json.loads, rebuild models with
+Decimal(str(...)) and let FastAPI re-validate via response_model) with the
+single-encode path (orjson once on a miss, pre-encoded bytes passthrough on a
+hit).
+
+    python -m benchmarks.bench_serialization
+"""
+import json
+import time
+from decimal import Decimal
+from uuid import uuid4
+
+from pydantic import TypeAdapter
+
+from app.schemas.balance import RawBalanceResponse
+from app.utils.serialization import FastJSONResponse, dumps
+
+SIZES = (10, 1_000, 100_000)
+response_adapter = TypeAdapter(list[RawBalanceResponse])
+
+
+def make_rows(n: int) -> list[dict]:
+    users = [str(uuid4()) for _ in range(max(2, int(n ** 0.5) + 1))]
+    return [
+        {
+            "debtor_id": users[i % len(users)],
+            "creditor_id": users[(i + 1) % len(users)],
+            "amount": Decimal(i % 100000 + 1) / 100,
+        }
+        for i in range(n)
+    ]
+
+
+def legacy_miss(rows: list[dict]) -> tuple[bytes, bytes]:
+    result = [
+        RawBalanceResponse(
+            debtor_id=b["debtor_id"],
+            creditor_id=b["creditor_id"],
+            amount=Decimal(str(float(b["amount"])))
+        )
+        for b in rows
+    ]
+    cache_data = [
+        {"debtor_id": r.debtor_id, "creditor_id": r.creditor_id, "amount": float(r.amount)}
+        for r in result
+    ]
+    cached = json.dumps(cache_data)
+    # FastAPI response_model validation + serialization
+    body = response_adapter.dump_json(response_adapter.validate_python(result))
+    return cached.encode(), body
+
+
+def legacy_hit(cached: bytes) -> bytes:
+    models = [
+        RawBalanceResponse(
+            debtor_id=item["debtor_id"],
+            creditor_id=item["creditor_id"],
+            amount=Decimal(str(item["amount"]))
+        )
+        for item in json.loads(cached)
+    ]
+    return response_adapter.dump_json(response_adapter.validate_python(models))
+
+
+def fast_miss(rows: list[dict]) -> bytes:
+    body = dumps(rows)
+    return FastJSONResponse(body).body
+
+
+def fast_hit(cached: bytes) -> bytes:
+    return FastJSONResponse(cached).body
+
+
+def cpu_per_call(fn, arg, budget: float = 0.5) -> float:
+    """Average process CPU seconds per call, repeating for roughly `budget` seconds."""
+    calls, start = 0, time.process_time()
+    while True:
+        fn(arg)
+        calls += 1
+        elapsed = time.process_time() - start
+        if elapsed >= budget:
+            return elapsed / calls
+
+
+def main():
+    print(f"{'rows':>8}{'path':>8}{'legacy ms':>12}{'fast ms':>12}{'speedup':>10}")
+    for n in SIZES:
+        rows = make_rows(n)
+        legacy_cached, _ = legacy_miss(rows)
+        fast_cached = dumps(rows)
+        
+        # Exactness: the fast path never round-trips money through float
+        assert json.loads(fast_cached)[0]["amount"] == str(rows[0]["amount"])
+        
+        for path, legacy, fast in (
+            ("miss", lambda: cpu_per_call(legacy_miss, rows), lambda: cpu_per_call(fast_miss, rows)),
+            ("hit", lambda: cpu_per_call(legacy_hit, legacy_cached), lambda: cpu_per_call(fast_hit, fast_cached)),
+        ):
+            legacy_s, fast_s = legacy(), fast()
+            print(
+                f"{n:>8}{path:>8}{legacy_s * 1000:>12.3f}{fast_s * 1000:>12.3f}"
+                f"{legacy_s / max(fast_s, 1e-9):>9.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Import-to-first-request startup benchmark.
+
+Spawns fresh interpreters (without DATABASE_URL or a reachable Redis) that
+import the app, build it with create_app() and serve GET /health in-process.
+Reports the median wall time per phase and exits 1 if the median
+import-to-first-request time exceeds the budget.
+
+    python -m benchmarks.bench_startup --runs 5 --budget-ms 1500
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+PROBE = r"""
+import asyncio, json, time
+t0 = time.perf_counter()
+import app.main
+t_import = time.perf_counter()
+application = app.main.create_app()
+t_create = time.perf_counter()
+import httpx
+
+async def first_request():
+    async with httpx.AsyncClient(app=application, base_url="http://startup") as client:
+        response = await client.get("/health")
+        assert response.status_code == 200, response.text
+
+asyncio.run(first_request())
+t_first = time.perf_counter()
+print(json.dumps({
+    "import_ms": (t_import - t0) * 1000,
+    "create_app_ms": (t_create - t_import) * 1000,
+    "first_request_ms": (t_first - t_create) * 1000,
+    "total_ms": (t_first - t0) * 1000,
+}))
+"""
+
+
+def run_once() -> dict:
+    env = {k: v for k, v in os.environ.items() if k not in ("DATABASE_URL", "REDIS_URL")}
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        env=env,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=1500.0, help="Max median import-to-first-request time")
+    args = parser.parse_args(argv)
+
+    runs = [run_once() for _ in range(args.runs)]
+    medians = {key: statistics.median(run[key] for run in runs) for key in runs[0]}
+    for key, value in medians.items():
+        print(f"{key:<18}{value:>10.1f} ms")
+
+    if medians["total_ms"] > args.budget_ms:
+        print(f"FAIL: import-to-first-request {medians['total_ms']:.1f} ms exceeds budget {args.budget_ms:.0f} ms")
+        return 1
+    print(f"OK: within {args.budget_ms:.0f} ms budget")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,351 @@
+"""
+End-to-end load test for the Expense Sharing API.
+
+Drives the ASGI app in-process (default) or a running server (--base-url) with a
+configurable mix of expense creation, settlements, balance reads and group reads,
+then reports throughput and p50/p95/p99 latency per endpoint and phase:
+
+    cold   - first balance read of every group right after seeding (cache misses)
+    warm   - the same reads repeated (cache hits)
+    mixed  - the configured request mix for --duration seconds
+
+Results can be saved as a baseline and later runs compared against it:
+
+    python -m benchmarks.load_test --save-baseline benchmarks/baseline.json
+    python -m benchmarks.load_test --baseline benchmarks/baseline.json --max-regression 0.2
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from decimal import Decimal
+from typing import Dict, List, Optional
+from uuid import uuid4
+
+import httpx
+
+DEFAULT_MIX = "expense=30,settlement=10,balances_raw=25,balances_simplified=25,group=10"
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Linear-interpolated percentile of a list of samples."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = (len(ordered) - 1) * pct / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+def parse_mix(mix: str) -> Dict[str, int]:
+    """Parse 'name=weight,...' into a weight mapping."""
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in OPERATIONS:
+            raise ValueError(f"Unknown operation '{name.strip()}' in mix")
+        weights[name.strip()] = int(weight)
+    return weights
+
+
+class LatencyRecorder:
+    """Collect per-phase, per-endpoint latencies and errors."""
+
+    def __init__(self):
+        self.samples: Dict[str, Dict[str, List[float]]] = {}
+        self.errors: Dict[str, Dict[str, int]] = {}
+        self.elapsed: Dict[str, float] = {}
+
+    def record(self, phase: str, endpoint: str, seconds: float, ok: bool):
+        self.samples.setdefault(phase, {}).setdefault(endpoint, []).append(seconds)
+        if not ok:
+            phase_errors = self.errors.setdefault(phase, {})
+            phase_errors[endpoint] = phase_errors.get(endpoint, 0) + 1
+
+    def summary(self) -> Dict[str, Dict[str, dict]]:
+        """Summarize as {phase: {endpoint: stats}} with latencies in milliseconds."""
+        result = {}
+        for phase, endpoints in self.samples.items():
+            elapsed = self.elapsed.get(phase) or 1e-9
+            result[phase] = {}
+            for endpoint, samples in endpoints.items():
+                stats = {
+                    "count": len(samples),
+                    "errors": self.errors.get(phase, {}).get(endpoint, 0),
+                    "rps": round(len(samples) / elapsed, 2),
+                    "mean_ms": round(sum(samples) / len(samples) * 1000, 3),
+                }
+                for pct in PERCENTILES:
+                    stats[f"p{pct}_ms"] = round(percentile(samples, pct) * 1000, 3)
+                result[phase][endpoint] = stats
+        return result
+
+
+def compare_to_baseline(
+    current: Dict[str, Dict[str, dict]],
+    baseline: Dict[str, Dict[str, dict]],
+    max_regression: float
+) -> List[str]:
+    """
+    Compare a summary against a stored baseline.
+    Returns human-readable regressions: p95/p99 latency up or throughput down
+    by more than max_regression (a fraction, e.g. 0.2 for 20%).
+    """
+    regressions = []
+    for phase, endpoints in baseline.items():
+        for endpoint, base in endpoints.items():
+            stats = current.get(phase, {}).get(endpoint)
+            if stats is None:
+                continue
+            for key in ("p95_ms", "p99_ms"):
+                if base.get(key) and stats[key] > base[key] * (1 + max_regression):
+                    regressions.append(
+                        f"{phase}/{endpoint} {key}: {stats[key]:.3f} > baseline {base[key]:.3f}"
+                    )
+            if base.get("rps") and stats["rps"] < base["rps"] * (1 - max_regression):
+                regressions.append(
+                    f"{phase}/{endpoint} rps: {stats['rps']:.2f} < baseline {base['rps']:.2f}"
+                )
+    return regressions
+
+
+class LoadTest:
+    """Seed groups through the API and drive the request mix."""
+
+    def __init__(self, client: httpx.AsyncClient, args: argparse.Namespace):
+        self.client = client
+        self.args = args
+        self.recorder = LatencyRecorder()
+        self.groups: List[dict] = []
+        self.rng = random.Random(args.seed)
+
+    async def _request(self, phase: str, endpoint: str, method: str, url: str, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+            ok = response.status_code < 400
+        except httpx.HTTPError:
+            response, ok = None, False
+        self.recorder.record(phase, endpoint, time.perf_counter() - start, ok)
+        return response
+
+    async def seed(self):
+        """Create users and groups through the public API."""
+        run_id = uuid4().hex[:8]
+        for g in range(self.args.groups):
+            resp = await self.client.post(
+                f"{self.args.prefix}/groups", json={"name": f"load-{run_id}-{g}"}
+            )
+            resp.raise_for_status()
+            group_id = resp.json()["id"]
+            member_ids = []
+            for u in range(self.args.users_per_group):
+                resp = await self.client.post(
+                    f"{self.args.prefix}/users",
+                    json={"name": f"Load User {u}", "email": f"load-{run_id}-{g}-{u}@example.com"}
+                )
+                resp.raise_for_status()
+                user_id = resp.json()["id"]
+                resp = await self.client.post(
+                    f"{self.args.prefix}/groups/{group_id}/members", json={"user_id": user_id}
+                )
+                resp.raise_for_status()
+                member_ids.append(user_id)
+            self.groups.append({"id": group_id, "members": member_ids})
+
+        # Give every group some history so balance reads do real work
+        for group in self.groups:
+            for _ in range(self.args.seed_expenses):
+                await self.op_expense(group, "seed")
+
+    async def op_expense(self, group: dict, phase: str):
+        payer = self.rng.choice(group["members"])
+        amount = Decimal(self.rng.randint(100, 50000)) / 100
+        await self._request(
+            phase, "POST /expenses", "POST",
+            f"{self.args.prefix}/groups/{group['id']}/expenses",
+            json={
+                "paid_by_user_id": payer,
+                "amount": str(amount),
+                "description": "load test expense",
+                "split_type": "EQUAL",
+                "splits": [],
+            }
+        )
+
+    async def op_settlement(self, group: dict, phase: str):
+        payer, payee = self.rng.sample(group["members"], 2)
+        amount = Decimal(self.rng.randint(100, 5000)) / 100
+        await self._request(
+            phase, "POST /settlements", "POST",
+            f"{self.args.prefix}/groups/{group['id']}/settlements",
+            json={"payer_id": payer, "payee_id": payee, "amount": str(amount)}
+        )
+
+    async def op_balances_raw(self, group: dict, phase: str):
+        await self._request(
+            phase, "GET /balances/raw", "GET",
+            f"{self.args.prefix}/groups/{group['id']}/balances/raw"
+        )
+
+    async def op_balances_simplified(self, group: dict, phase: str):
+        await self._request(
+            phase, "GET /balances/simplified", "GET",
+            f"{self.args.prefix}/groups/{group['id']}/balances/simplified"
+        )
+
+    async def op_group(self, group: dict, phase: str):
+        await self._request(
+            phase, "GET /groups/{id}", "GET", f"{self.args.prefix}/groups/{group['id']}"
+        )
+
+    async def _run_reads(self, phase: str):
+        start = time.perf_counter()
+        semaphore = asyncio.Semaphore(self.args.concurrency)
+
+        async def read(op, group):
+            async with semaphore:
+                await op(self, group, phase)
+
+        await asyncio.gather(*(
+            read(op, group)
+            for group in self.groups
+            for op in (OPERATIONS["balances_raw"], OPERATIONS["balances_simplified"])
+        ))
+        elapsed = time.perf_counter() - start
+        self.recorder.elapsed[phase] = self.recorder.elapsed.get(phase, 0.0) + elapsed
+
+    async def run_cold(self):
+        """First reads after seeding; every group's cache was invalidated by its writes."""
+        await self._run_reads("cold")
+
+    async def run_warm(self):
+        """Repeat the same reads; these should be served from cache."""
+        for _ in range(self.args.warm_rounds):
+            await self._run_reads("warm")
+
+    async def run_mixed(self):
+        """Run the configured mix with a fixed number of concurrent workers."""
+        weights = parse_mix(self.args.mix)
+        names = list(weights)
+        deadline = time.perf_counter() + self.args.duration
+        start = time.perf_counter()
+
+        async def worker():
+            while time.perf_counter() < deadline:
+                name = self.rng.choices(names, weights=[weights[n] for n in names])[0]
+                await OPERATIONS[name](self, self.rng.choice(self.groups), "mixed")
+
+        await asyncio.gather(*(worker() for _ in range(self.args.concurrency)))
+        self.recorder.elapsed["mixed"] = time.perf_counter() - start
+
+
+OPERATIONS = {
+    "expense": LoadTest.op_expense,
+    "settlement": LoadTest.op_settlement,
+    "balances_raw": LoadTest.op_balances_raw,
+    "balances_simplified": LoadTest.op_balances_simplified,
+    "group": LoadTest.op_group,
+}
+
+
+def print_report(summary: Dict[str, Dict[str, dict]]):
+    """Print a per-phase latency table."""
+    header = f"{'endpoint':<28}{'count':>8}{'err':>6}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+    for phase in ("cold", "warm", "mixed"):
+        if phase not in summary:
+            continue
+        print(f"\n[{phase}]")
+        print(header)
+        for endpoint, stats in sorted(summary[phase].items()):
+            print(
+                f"{endpoint:<28}{stats['count']:>8}{stats['errors']:>6}{stats['rps']:>10.1f}"
+                f"{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}{stats['p99_ms']:>10.2f}"
+            )
+
+
+async def _create_tables():
+    from app.core.database import Base, get_engine
+    import app.models  # noqa: F401  (register tables)
+
+    async with get_engine().begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+
+async def run(args: argparse.Namespace) -> int:
+    if args.base_url:
+        client = httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout)
+    else:
+        from app.main import create_app
+
+        app = create_app()
+        if args.create_tables:
+            await _create_tables()
+        client = httpx.AsyncClient(app=app, base_url="http://loadtest", timeout=args.timeout)
+
+    async with client:
+        load_test = LoadTest(client, args)
+        await load_test.seed()
+        await load_test.run_cold()
+        await load_test.run_warm()
+        if args.duration > 0:
+            await load_test.run_mixed()
+
+    summary = load_test.recorder.summary()
+    summary.pop("seed", None)
+    print_report(summary)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(summary, f, indent=2)
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(summary, f, indent=2)
+        print(f"\nBaseline saved to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(summary, baseline, args.max_regression)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.max_regression:.0%}:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"\nNo regressions beyond {args.max_regression:.0%} against {args.baseline}")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", help="Target a running server instead of the in-process app")
+    parser.add_argument("--prefix", default="/api/v1", help="API prefix")
+    parser.add_argument("--create-tables", action="store_true", help="Create tables before an in-process run")
+    parser.add_argument("--groups", type=int, default=20)
+    parser.add_argument("--users-per-group", type=int, default=5)
+    parser.add_argument("--seed-expenses", type=int, default=20, help="Expenses created per group before measuring")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of mixed load (0 to skip)")
+    parser.add_argument("--warm-rounds", type=int, default=3)
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"Operation weights (default: {DEFAULT_MIX})")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for reproducible mixes")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--output", help="Write the summary JSON here")
+    parser.add_argument("--save-baseline", help="Store the summary as a baseline")
+    parser.add_argument("--baseline", help="Compare against this baseline and exit 1 on regression")
+    parser.add_argument("--max-regression", type=float, default=0.2)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    parse_mix(args.mix)
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,7 +5,7 @@ import asyncio
 from uuid import uuid4
 
 from app.core.database import Base, get_db
-from app.models import User, Group, GroupMember
+from app.models import User, Group, GroupMember, GroupSummary
 from app.main import app
 
 
@@ -50,14 +50,34 @@ def override_get_db(db_session):
 @pytest.fixture
 async def mock_redis():
     """Mock Redis client for testing."""
-    from unittest.mock import AsyncMock
+    from unittest.mock import AsyncMock, MagicMock
+    from app.services.ledger_cache import _APPLY_SCRIPT
     mock_redis = AsyncMock()
     mock_redis.get = AsyncMock(return_value=None)
     mock_redis.setex = AsyncMock(return_value=True)
     mock_redis.delete = AsyncMock(return_value=0)
+    mock_redis.incr = AsyncMock(return_value=1)
+    mock_redis.publish = AsyncMock(return_value=0)
+    mock_redis.hgetall = AsyncMock(return_value={})
+    # Scripts report a cache miss; the ledger apply script replies with a list
+    mock_redis.eval = AsyncMock(side_effect=lambda script, *args: [0] if script == _APPLY_SCRIPT else 0)
+    mock_redis.zrangebyscore = AsyncMock(return_value=[])
+    mock_redis.zrevrangebyscore = AsyncMock(return_value=[])
+    mock_redis.mget = AsyncMock(side_effect=lambda keys: [None] * len(keys))
+    # Pipelines queue commands synchronously and run them on execute()
+    mock_redis.pipeline = MagicMock(return_value=MagicMock(execute=AsyncMock(return_value=[])))
     return mock_redis
 
 
+@pytest.fixture
+async def fake_redis():
+    """In-memory Redis that runs the Lua scripts, for testing them for real."""
+    from fakeredis import aioredis
+    fake_redis = aioredis.FakeRedis()
+    yield fake_redis
+    await fake_redis.aclose()
+
+
 @pytest.fixture
 async def client(override_get_db, mock_redis):
     """Create a test client."""
@@ -107,6 +127,7 @@ async def test_group(db_session: AsyncSession, test_user):
     
     member = GroupMember(group_id=group.id, user_id=test_user.id)
     db_session.add(member)
+    db_session.add(GroupSummary(group_id=group.id, member_count=1, expense_count=0, spend={}, version=0))
     await db_session.commit()
     await db_session.refresh(group)
     return group
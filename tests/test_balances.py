@@ -1,6 +1,23 @@
 import pytest
+import random
+from datetime import datetime, timedelta
 from decimal import Decimal
+from uuid import UUID, uuid4
 from httpx import AsyncClient
+from sqlalchemy import update
+
+from app.core.redis_client import get_redis
+from app.main import app
+from app.models import Expense
+from app.services.dashboard_service import summary_key
+from app.services.ledger_cache import (
+    balance_view_key,
+    drop_balance_views,
+    load_user_position,
+    plan_key,
+    store_balance_view,
+)
+from app.utils.balance_simplification import simplify_balances, user_transfers
 
 
 @pytest.mark.asyncio
@@ -136,3 +153,188 @@ async def test_settlement_reduces_balances(client: AsyncClient, test_users, db_s
     updated_balance = resp.json()[0]["amount"]
     assert Decimal(str(updated_balance)) == Decimal("20.00")
 
+
+
+@pytest.mark.asyncio
+async def test_balances_encoded_once_and_served_from_cache(client: AsyncClient, test_users, mock_redis):
+    """Test that computed balances are cached as the exact response bytes."""
+    group_resp = await client.post("/api/v1/groups", json={"name": "Test Group"})
+    group_id = group_resp.json()["id"]
+    user_ids = []
+    for user in test_users:
+        await client.post(f"/api/v1/groups/{group_id}/members", json={"user_id": str(user.id)})
+        user_ids.append(str(user.id))
+    
+    expense = {
+        "paid_by_user_id": user_ids[0],
+        "amount": "100.00",
+        "description": "Expense",
+        "split_type": "EQUAL",
+        "splits": []
+    }
+    await client.post(f"/api/v1/groups/{group_id}/expenses", json=expense)
+    
+    resp = await client.get(f"/api/v1/groups/{group_id}/balances/raw")
+    assert resp.status_code == 200
+    # Decimal amounts are preserved exactly (no float round-trip)
+    amounts = [b["amount"] for b in resp.json()]
+    assert len(amounts) == 2
+    assert all(amount in ("33.33", "33.34") for amount in amounts)
+    
+    # Current views are stored with a compare-and-set on the ledger version
+    _, _, version_key, cache_key, version, _, cached_body = mock_redis.pipeline.return_value.eval.call_args.args
+    assert (version_key, cache_key, version) == (f"balances:{group_id}:views_version", f"balances:{group_id}:raw", 1)
+    assert cached_body == resp.content
+    
+    # A cache hit is returned verbatim
+    mock_redis.get.return_value = cached_body.decode()
+    hit = await client.get(f"/api/v1/groups/{group_id}/balances/raw")
+    assert hit.content == cached_body
+
+
+@pytest.mark.asyncio
+async def test_stale_view_not_stored_after_write(fake_redis):
+    """Test a body computed before a write cannot land after the write dropped the views."""
+    group_id = uuid4()
+    raw_key = balance_view_key(group_id, "raw")
+    # Read at version 1, then a write at version 2 commits before the store
+    await drop_balance_views(fake_redis, group_id, 2, summary_key(group_id))
+    pipe = fake_redis.pipeline(transaction=False)
+    store_balance_view(pipe, group_id, 1, raw_key, b"[]")
+    store_balance_view(pipe, group_id, 1, summary_key(group_id), b"{}")
+    assert await pipe.execute() == [0, 0]
+    assert await fake_redis.get(raw_key) is None
+    assert await fake_redis.get(summary_key(group_id)) is None
+    
+    pipe = fake_redis.pipeline(transaction=False)
+    store_balance_view(pipe, group_id, 2, raw_key, b"[]")
+    assert await pipe.execute() == [1]
+    assert await fake_redis.get(raw_key) == b"[]"
+
+
+@pytest.mark.asyncio
+async def test_balances_as_of(client: AsyncClient, test_users, db_session, mock_redis):
+    """Test that as_of only counts history up to that time and caches it without invalidation."""
+    group_resp = await client.post("/api/v1/groups", json={"name": "Test Group"})
+    group_id = group_resp.json()["id"]
+    user_ids = []
+    for user in test_users:
+        await client.post(f"/api/v1/groups/{group_id}/members", json={"user_id": str(user.id)})
+        user_ids.append(str(user.id))
+    
+    # Month-old expense: User 1 owes User 0 $50
+    await client.post(f"/api/v1/groups/{group_id}/expenses", json={
+        "paid_by_user_id": user_ids[0],
+        "amount": "50.00",
+        "description": "Old",
+        "split_type": "EXACT",
+        "splits": [{"user_id": user_ids[1], "amount": "50.00"}]
+    })
+    await db_session.execute(update(Expense).values(created_at=datetime.utcnow() - timedelta(days=30)))
+    await db_session.commit()
+    
+    # Today: User 1 settles $20
+    await client.post(f"/api/v1/groups/{group_id}/settlements", json={
+        "payer_id": user_ids[1], "payee_id": user_ids[0], "amount": "20.00"
+    })
+    
+    current = await client.get(f"/api/v1/groups/{group_id}/balances/raw")
+    assert current.json()[0]["amount"] == "30.00"
+    
+    as_of = (datetime.utcnow() - timedelta(days=7)).isoformat()
+    resp = await client.get(f"/api/v1/groups/{group_id}/balances/raw", params={"as_of": as_of})
+    assert resp.status_code == 200
+    assert resp.json()[0]["amount"] == "50.00"
+    cache_key, _, cached_body = mock_redis.setex.call_args.args
+    assert cache_key == f"balances:{group_id}:raw:asof:{as_of}:e0"
+    assert cached_body == resp.content
+    
+    before = (datetime.utcnow() - timedelta(days=60)).isoformat()
+    resp = await client.get(f"/api/v1/groups/{group_id}/balances/simplified", params={"as_of": before})
+    assert resp.json() == []
+    
+    # Timestamps that are not settled yet are computed but never cached
+    mock_redis.setex.reset_mock()
+    resp = await client.get(f"/api/v1/groups/{group_id}/balances/raw", params={"as_of": datetime.utcnow().isoformat()})
+    assert resp.json()[0]["amount"] == "30.00"
+    mock_redis.setex.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_user_balance_view(client: AsyncClient, test_users):
+    """Test a member's view is their slice of the simplified plan plus their net."""
+    group_resp = await client.post("/api/v1/groups", json={"name": "Test Group"})
+    group_id = group_resp.json()["id"]
+    user_ids = []
+    for user in test_users:
+        await client.post(f"/api/v1/groups/{group_id}/members", json={"user_id": str(user.id)})
+        user_ids.append(str(user.id))
+    for payer, amount in ((0, "90.00"), (1, "30.00")):
+        await client.post(f"/api/v1/groups/{group_id}/expenses", json={
+            "paid_by_user_id": user_ids[payer],
+            "amount": amount,
+            "description": "Shared",
+            "split_type": "EQUAL",
+            "splits": []
+        })
+    
+    plan = (await client.get(f"/api/v1/groups/{group_id}/balances/simplified")).json()
+    nets = {"0": Decimal("50.00"), "1": Decimal("-10.00"), "2": Decimal("-40.00")}
+    for i, user_id in enumerate(user_ids):
+        resp = await client.get(f"/api/v1/groups/{group_id}/balances/users/{user_id}")
+        assert resp.status_code == 200
+        data = resp.json()
+        assert Decimal(data["net_balance"]) == nets[str(i)]
+        assert data["transfers"] == [t for t in plan if user_id in (t["payer_id"], t["payee_id"])]
+    
+    resp = await client.get(f"/api/v1/groups/{group_id}/balances/users/{uuid4()}")
+    assert resp.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_user_balance_fast_path_after_write(client: AsyncClient, test_users, fake_redis):
+    """Test the first lookup after a repaired write re-ranks the plan, so later ones bisect it."""
+    app.dependency_overrides[get_redis] = lambda: fake_redis
+    group_resp = await client.post("/api/v1/groups", json={"name": "Test Group"})
+    group_id = group_resp.json()["id"]
+    user_ids = []
+    for user in test_users:
+        await client.post(f"/api/v1/groups/{group_id}/members", json={"user_id": str(user.id)})
+        user_ids.append(str(user.id))
+    for payer, amount in ((0, "90.00"), (1, "30.00")):
+        await client.post(f"/api/v1/groups/{group_id}/expenses", json={
+            "paid_by_user_id": user_ids[payer],
+            "amount": amount,
+            "description": "Shared",
+            "split_type": "EQUAL",
+            "splits": []
+        })
+        # Cache the plan with its ranks; the second write repairs it in place
+        await client.get(f"/api/v1/groups/{group_id}/balances/simplified")
+    plan = await fake_redis.hgetall(plan_key(UUID(group_id)))
+    version = int(plan[b"version"])
+    assert int(plan[b"ranked"]) == version - 1
+    assert await load_user_position(fake_redis, UUID(group_id), version, UUID(user_ids[0])) is None
+    
+    resp = await client.get(f"/api/v1/groups/{group_id}/balances/users/{user_ids[0]}")
+    assert resp.status_code == 200
+    assert int((await fake_redis.hgetall(plan_key(UUID(group_id))))[b"ranked"]) == version
+    full_plan = (await client.get(f"/api/v1/groups/{group_id}/balances/simplified")).json()
+    for user_id in user_ids:
+        assert await load_user_position(fake_redis, UUID(group_id), version, UUID(user_id)) is not None
+        data = (await client.get(f"/api/v1/groups/{group_id}/balances/users/{user_id}")).json()
+        assert data["transfers"] == [t for t in full_plan if user_id in (t["payer_id"], t["payee_id"])]
+
+
+def test_user_transfers_match_full_plan():
+    """Property test: a user's transfers equal their entries in simplify_balances, ties included."""
+    rnd = random.Random(3)
+    for _ in range(300):
+        users = [UUID(int=rnd.getrandbits(128)) for _ in range(rnd.randint(1, 12))]
+        nets = {user_id: Decimal(rnd.choice([rnd.randint(-500, 500), 100, -100, 0])) / 100 for user_id in users}
+        nets[users[0]] -= sum(nets.values())
+        plan = simplify_balances(nets)
+        for user_id in users:
+            assert user_transfers(nets, user_id) == [
+                t for t in plan if str(user_id) in (t["payer_id"], t["payee_id"])
+            ]
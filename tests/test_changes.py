@@ -0,0 +1,110 @@
+import pytest
+from datetime import datetime, timedelta
+from uuid import UUID
+from httpx import AsyncClient
+
+from app.repositories.change_repository import ChangeRepository
+from app.services import change_service
+
+
+@pytest.mark.asyncio
+async def test_changes_since_sequence(client: AsyncClient, test_users, db_session):
+    """Test delta sync returns only newer writes, their net balances, and a snapshot when too old."""
+    group_resp = await client.post("/api/v1/groups", json={"name": "Test Group"})
+    group_id = group_resp.json()["id"]
+    user_ids = []
+    for user in test_users:
+        await client.post(f"/api/v1/groups/{group_id}/members", json={"user_id": str(user.id)})
+        user_ids.append(str(user.id))
+    url = f"/api/v1/groups/{group_id}/changes"
+    
+    resp = await client.get(url)
+    data = resp.json()
+    assert [change["seq"] for change in data["changes"]] == [1, 2, 3]
+    assert {change["kind"] for change in data["changes"]} == {"member_added"}
+    assert data["seq"] == 3
+    assert data["net_balances"] == {}
+    
+    # User 1 owes User 0 $50, then pays $20 back
+    expense_resp = await client.post(f"/api/v1/groups/{group_id}/expenses", json={
+        "paid_by_user_id": user_ids[0],
+        "amount": "50.00",
+        "description": "Taxi",
+        "split_type": "EXACT",
+        "splits": [{"user_id": user_ids[1], "amount": "50.00"}]
+    })
+    await client.post(f"/api/v1/groups/{group_id}/settlements", json={
+        "payer_id": user_ids[1], "payee_id": user_ids[0], "amount": "20.00"
+    })
+    
+    resp = await client.get(url, params={"since": 3, "limit": 1})
+    data = resp.json()
+    assert data["has_more"] is True
+    assert data["seq"] == 4
+    assert data["changes"][0]["kind"] == "expense_created"
+    assert data["changes"][0]["data"]["id"] == expense_resp.json()["id"]
+    # The log keeps the expense header; splits are read from the expense
+    assert data["changes"][0]["data"]["split_count"] == 1 and "splits" not in data["changes"][0]["data"]
+    # The settlement is not on this page yet, and balances_seq says the balances include it
+    assert data["balances_seq"] == 5
+    assert data["net_balances"] == {user_ids[0]: "30.00", user_ids[1]: "-30.00"}
+    
+    resp = await client.get(url, params={"since": 4})
+    data = resp.json()
+    assert data["has_more"] is False
+    assert [change["kind"] for change in data["changes"]] == ["settlement_created"]
+    # Only users touched since `since`, with their net balance as of the page's seq
+    assert data["balances_seq"] == data["seq"] == 5
+    assert data["net_balances"] == {user_ids[0]: "30.00", user_ids[1]: "-30.00"}
+    
+    # Up to date
+    resp = await client.get(url, params={"since": 5})
+    assert resp.json()["changes"] == []
+    assert resp.json()["snapshot"] is None
+    resp = await client.get(url, params={"since": 6})
+    assert resp.status_code == 400
+    
+    # Clients behind the pruned log get a snapshot
+    await ChangeRepository(db_session).prune(UUID(group_id), datetime.utcnow() + timedelta(seconds=1))
+    await db_session.commit()
+    await client.post(f"/api/v1/groups/{group_id}/settlements", json={
+        "payer_id": user_ids[1], "payee_id": user_ids[0], "amount": "5.00"
+    })
+    resp = await client.get(url, params={"since": 4})
+    data = resp.json()
+    assert data["changes"] == []
+    assert data["seq"] == 6
+    assert data["snapshot"]["member_count"] == 3
+    assert [member["user_id"] for member in data["snapshot"]["members"]] == user_ids
+    assert data["snapshot"]["members_next_cursor"] is None
+    assert data["snapshot"]["net_balances"][user_ids[1]] == "-25.00"
+    
+    resp = await client.get(url, params={"since": 5})
+    assert [change["seq"] for change in resp.json()["changes"]] == [6]
+
+
+@pytest.mark.asyncio
+async def test_changes_balances_replay_only_touched_users(client: AsyncClient, test_users, monkeypatch):
+    """Test balances of a few touched users match a replay of the whole group."""
+    group_resp = await client.post("/api/v1/groups", json={"name": "Test Group"})
+    group_id = group_resp.json()["id"]
+    user_ids = []
+    for user in test_users:
+        await client.post(f"/api/v1/groups/{group_id}/members", json={"user_id": str(user.id)})
+        user_ids.append(str(user.id))
+    await client.post(f"/api/v1/groups/{group_id}/expenses", json={
+        "paid_by_user_id": user_ids[0], "amount": "90.00", "description": "Dinner", "split_type": "EQUAL"
+    })
+    await client.post(f"/api/v1/groups/{group_id}/settlements", json={
+        "payer_id": user_ids[1], "payee_id": user_ids[2], "amount": "10.00"
+    })
+    url = f"/api/v1/groups/{group_id}/changes"
+    
+    # Only the settlement: two users, replayed from their own rows. User 1
+    # owed User 2 nothing, so the overpayment leaves both balances as they were
+    touched = (await client.get(url, params={"since": 4})).json()
+    assert touched["net_balances"] == {user_ids[1]: "-30.00", user_ids[2]: "-30.00"}
+    
+    monkeypatch.setattr(change_service, "USER_REPLAY_LIMIT", 0)
+    full = (await client.get(url, params={"since": 4})).json()
+    assert full["net_balances"] == touched["net_balances"]
@@ -0,0 +1,111 @@
+import asyncio
+import pytest
+from decimal import Decimal
+from uuid import uuid4
+from fastapi import HTTPException
+from httpx import AsyncClient
+
+from app.core.config import get_settings
+from app.services.compute_offload import ComputeOffloader, LoopLagMonitor, compute_offloader
+from app.utils.balance_simplification import plan_json_from_fields, plan_json_from_rows, simplify_states
+from app.utils.ledger import pair_state_fields
+from app.utils.serialization import dumps
+
+
+@pytest.fixture
+def offload_in_threads(monkeypatch):
+    """Offload everything, to a thread pool so tests need no worker processes."""
+    settings = get_settings()
+    monkeypatch.setattr(settings, "SIMPLIFY_OFFLOAD_MIN_PAIRS", 1)
+    monkeypatch.setattr(settings, "SIMPLIFY_OFFLOAD_EXECUTOR", "thread")
+    yield settings
+    compute_offloader.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_large_simplification_is_offloaded(client: AsyncClient, test_users, offload_in_threads):
+    """Test simplified balances over the threshold are computed in the pool with the same result."""
+    group_resp = await client.post("/api/v1/groups", json={"name": "Large"})
+    group_id = group_resp.json()["id"]
+    user_ids = []
+    for user in test_users:
+        await client.post(f"/api/v1/groups/{group_id}/members", json={"user_id": str(user.id)})
+        user_ids.append(str(user.id))
+    await client.post(f"/api/v1/groups/{group_id}/expenses", json={
+        "paid_by_user_id": user_ids[0],
+        "amount": "90.00",
+        "description": "Dinner",
+        "split_type": "EQUAL",
+        "splits": []
+    })
+
+    offloaded = compute_offloader.offloaded
+    resp = await client.get(f"/api/v1/groups/{group_id}/balances/simplified")
+    assert resp.status_code == 200
+    assert {(t["payer_id"], t["amount"]) for t in resp.json()} == {(user_ids[1], "30.00"), (user_ids[2], "30.00")}
+    assert compute_offloader.offloaded == offloaded + 1
+
+    resp = await client.get("/health/loop")
+    assert resp.json()["offload"]["in_flight"] == 0
+
+
+def test_plan_pipeline_matches_simplify_states():
+    """Test the single-call worker pipeline gives the plan simplify_states does, encoded."""
+    a, b, c = uuid4(), uuid4(), uuid4()
+    states = {
+        (a, b, "USD"): (Decimal("40.00"), Decimal("10.00")),
+        (c, b, "EUR"): (Decimal("25.50"), Decimal("0")),
+    }
+    table = {"USD": Decimal("1"), "EUR": Decimal("1.10")}
+    expected = dumps(simplify_states(states, {"USD": Decimal("1"), "EUR": Decimal("1.10")}))
+
+    plan, ranks, missing = plan_json_from_fields(dict(pair_state_fields(states)), table, "USD")
+    assert (plan, missing) == (expected, set())
+    assert ranks == ([(3000, str(a)), (5805, str(c))], [(5805, str(b))])
+    plan, _, missing, fields = plan_json_from_rows(
+        [(a, b, Decimal("40.00"), "USD"), (c, b, Decimal("25.50"), "EUR")],
+        [(a, b, Decimal("10.00"), "USD")], {}, table, "USD"
+    )
+    assert (plan, missing) == (expected, set())
+    assert sorted(fields) == sorted(pair_state_fields(states))
+    assert plan_json_from_fields(dict(fields), {"USD": Decimal("1")}, "USD") == (None, None, {"EUR"})
+
+
+@pytest.mark.asyncio
+async def test_offload_queue_limit_sheds_load(offload_in_threads, monkeypatch):
+    """Test requests beyond the queue-depth limit get 503 instead of waiting."""
+    monkeypatch.setattr(offload_in_threads, "SIMPLIFY_OFFLOAD_MAX_QUEUE", 1)
+    offloader = ComputeOffloader()
+    debtor, creditor = uuid4(), uuid4()
+    states = {(debtor, creditor, "USD"): (Decimal("10"), Decimal("0"))}
+
+    release = asyncio.Event()
+    loop = asyncio.get_running_loop()
+
+    def blocked():
+        asyncio.run_coroutine_threadsafe(release.wait(), loop).result()
+        return "done"
+
+    running = asyncio.create_task(offloader.run(10, blocked))
+    await asyncio.sleep(0.05)
+    with pytest.raises(HTTPException) as exc_info:
+        await offloader.run(10, simplify_states, states, {"USD": Decimal("1")})
+    assert exc_info.value.status_code == 503
+    assert offloader.rejected == 1
+
+    # Small work still runs inline
+    assert await offloader.run(0, simplify_states, states, {"USD": Decimal("1")}) == [
+        {"payer_id": str(debtor), "payee_id": str(creditor), "amount": Decimal("10")}
+    ]
+    release.set()
+    assert await running == "done"
+    offloader.shutdown()
+
+
+def test_loop_lag_stats():
+    """Test lag samples are reported in milliseconds with p99 and max."""
+    monitor = LoopLagMonitor()
+    assert monitor.stats()["samples"] == 0
+    for lag in [0.001] * 99 + [0.25]:
+        monitor.record(lag)
+    assert monitor.stats() == {"samples": 100, "last_ms": 250.0, "p99_ms": 1.0, "max_ms": 250.0}
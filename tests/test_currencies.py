@@ -0,0 +1,125 @@
+import pytest
+from decimal import Decimal
+from uuid import uuid4
+from httpx import AsyncClient
+from sqlalchemy import delete
+
+from app.models import FxRate
+from app.services.fx_rates import fx_rate_cache
+from app.utils.ledger import net_balances_from_states
+
+
+@pytest.fixture
+async def fx_rates(db_session):
+    """USD and EUR rates, visible to the in-process rate cache."""
+    db_session.add_all([FxRate(currency="USD", rate=Decimal("1")), FxRate(currency="EUR", rate=Decimal("1.1"))])
+    await db_session.commit()
+    fx_rate_cache.clear()
+    yield
+    fx_rate_cache.clear()
+
+
+@pytest.mark.asyncio
+async def test_multi_currency_balances(client: AsyncClient, test_users, fx_rates):
+    """Test each currency is its own ledger and balances are converted into the base currency on read."""
+    group_resp = await client.post("/api/v1/groups", json={"name": "Trip", "base_currency": "USD"})
+    assert group_resp.json()["base_currency"] == "USD"
+    group_id = group_resp.json()["id"]
+    user_ids = []
+    for user in test_users:
+        await client.post(f"/api/v1/groups/{group_id}/members", json={"user_id": str(user.id)})
+        user_ids.append(str(user.id))
+    
+    # Users 1 and 2 owe user 0 10 EUR each; user 0 owes user 1 30 USD
+    resp = await client.post(f"/api/v1/groups/{group_id}/expenses", json={
+        "paid_by_user_id": user_ids[0],
+        "amount": "30.00",
+        "currency": "EUR",
+        "description": "Museum",
+        "split_type": "EQUAL",
+        "splits": []
+    })
+    assert resp.json()["currency"] == "EUR"
+    resp = await client.post(f"/api/v1/groups/{group_id}/expenses", json={
+        "paid_by_user_id": user_ids[1],
+        "amount": "30.00",
+        "description": "Dinner",
+        "split_type": "EXACT",
+        "splits": [{"user_id": user_ids[0], "amount": "30.00"}]
+    })
+    assert resp.json()["currency"] == "USD"
+    
+    # A EUR settlement only pays down EUR debt
+    resp = await client.post(f"/api/v1/groups/{group_id}/settlements", json={
+        "payer_id": user_ids[1], "payee_id": user_ids[0], "amount": "5.00", "currency": "EUR"
+    })
+    assert resp.status_code == 201
+    
+    resp = await client.get(f"/api/v1/groups/{group_id}/balances/currencies")
+    data = resp.json()
+    assert data["base_currency"] == "USD"
+    assert {currency: Decimal(rate) for currency, rate in data["rates"].items()} == {
+        "USD": Decimal("1"), "EUR": Decimal("1.1")
+    }
+    assert {(b["debtor_id"], b["creditor_id"], b["currency"], b["amount"]) for b in data["balances"]} == {
+        (user_ids[1], user_ids[0], "EUR", "5.00"),
+        (user_ids[2], user_ids[0], "EUR", "10.00"),
+        (user_ids[0], user_ids[1], "USD", "30.00"),
+    }
+    
+    resp = await client.get(f"/api/v1/groups/{group_id}/balances/raw")
+    assert {(b["debtor_id"], b["creditor_id"], b["amount"]) for b in resp.json()} == {
+        (user_ids[1], user_ids[0], "5.50"),
+        (user_ids[2], user_ids[0], "11.00"),
+        (user_ids[0], user_ids[1], "30.00"),
+    }
+    
+    # Nets in USD: user 0 -13.50, user 1 +24.50, user 2 -11.00
+    resp = await client.get(f"/api/v1/groups/{group_id}/balances/simplified")
+    transfers = {(t["payer_id"], t["payee_id"]): Decimal(t["amount"]) for t in resp.json()}
+    assert transfers == {
+        (user_ids[0], user_ids[1]): Decimal("13.50"),
+        (user_ids[2], user_ids[1]): Decimal("11.00"),
+    }
+    
+    # Writes in a currency without a rate are rejected
+    resp = await client.post(f"/api/v1/groups/{group_id}/settlements", json={
+        "payer_id": user_ids[1], "payee_id": user_ids[0], "amount": "5.00", "currency": "GBP"
+    })
+    assert resp.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_missing_rate_on_read_is_unavailable(client: AsyncClient, test_users, db_session, fx_rates):
+    """Test reading balances whose rate was dropped after the write is a 503 naming the currency."""
+    group_resp = await client.post("/api/v1/groups", json={"name": "Trip", "base_currency": "USD"})
+    group_id = group_resp.json()["id"]
+    for user in test_users:
+        await client.post(f"/api/v1/groups/{group_id}/members", json={"user_id": str(user.id)})
+    resp = await client.post(f"/api/v1/groups/{group_id}/expenses", json={
+        "paid_by_user_id": str(test_users[0].id),
+        "amount": "30.00",
+        "currency": "EUR",
+        "description": "Museum",
+        "split_type": "EQUAL",
+    })
+    assert resp.status_code == 201
+    
+    await db_session.execute(delete(FxRate).where(FxRate.currency == "EUR"))
+    await db_session.commit()
+    fx_rate_cache.clear()
+    resp = await client.get(f"/api/v1/groups/{group_id}/balances/raw")
+    assert resp.status_code == 503
+    assert resp.json()["detail"] == "No FX rate loaded for EUR"
+
+
+def test_net_balances_convert_once_per_user():
+    """Test per-currency nets are converted as one vector per user."""
+    a, b = uuid4(), uuid4()
+    states = {
+        (a, b, "USD"): (Decimal("10"), Decimal("0")),
+        (b, a, "EUR"): (Decimal("4"), Decimal("0")),
+        (a, b, "JPY"): (Decimal("1000"), Decimal("1000")),
+    }
+    rates = {"USD": Decimal("1"), "EUR": Decimal("1.1"), "JPY": Decimal("0.0067")}
+    assert net_balances_from_states(states, rates) == {a: Decimal("-5.60"), b: Decimal("5.60")}
@@ -0,0 +1,87 @@
+import pytest
+from contextlib import contextmanager
+from httpx import AsyncClient
+from sqlalchemy import event
+
+from tests.conftest import test_engine
+
+
+@contextmanager
+def count_queries():
+    """Count SQL statements run on the test engine."""
+    statements = []
+    
+    def before_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+    
+    event.listen(test_engine.sync_engine, "before_cursor_execute", before_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(test_engine.sync_engine, "before_cursor_execute", before_execute)
+
+
+async def create_group_with_expense(client: AsyncClient, user_ids: list[str], amount: str) -> str:
+    group_resp = await client.post("/api/v1/groups", json={"name": "Test Group"})
+    group_id = group_resp.json()["id"]
+    for user_id in user_ids:
+        await client.post(f"/api/v1/groups/{group_id}/members", json={"user_id": user_id})
+    await client.post(f"/api/v1/groups/{group_id}/expenses", json={
+        "paid_by_user_id": user_ids[0],
+        "amount": amount,
+        "description": "Dinner",
+        "split_type": "EQUAL",
+        "splits": []
+    })
+    return group_id
+
+
+@pytest.mark.asyncio
+async def test_dashboard_uses_fixed_number_of_queries(client: AsyncClient, test_users, mock_redis):
+    """Test the dashboard aggregates every group without per-group queries."""
+    user_ids = [str(user.id) for user in test_users]
+    group_id = await create_group_with_expense(client, user_ids, "90.00")
+    
+    with count_queries() as one_group:
+        resp = await client.get(f"/api/v1/users/{user_ids[1]}/dashboard")
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["user"]["id"] == user_ids[1]
+    assert data["groups"] == [{
+        "id": group_id,
+        "name": "Test Group",
+        "member_count": 3,
+        "last_activity_at": data["groups"][0]["last_activity_at"],
+        "net_balance": "-30.00",
+    }]
+    assert data["groups"][0]["last_activity_at"] is not None
+    
+    await create_group_with_expense(client, user_ids, "30.00")
+    await create_group_with_expense(client, user_ids[:2], "10.00")
+    
+    with count_queries() as three_groups:
+        resp = await client.get(f"/api/v1/users/{user_ids[0]}/dashboard")
+    assert [group["net_balance"] for group in resp.json()["groups"]] == ["60.00", "20.00", "5.00"]
+    assert len(three_groups) == len(one_group)
+    
+    # Cached net balances skip the ledger query entirely
+    pipe = mock_redis.pipeline.return_value
+    cached = {call.args[3]: call.args[6] for call in pipe.eval.call_args_list}
+    mock_redis.mget.side_effect = lambda keys: [cached.get(key) for key in keys]
+    with count_queries() as cached_run:
+        cached_resp = await client.get(f"/api/v1/users/{user_ids[0]}/dashboard")
+    assert cached_resp.json() == resp.json()
+    assert len(cached_run) == 2
+    
+    # Counts come from group_summaries, so a new member shows with the nets still cached
+    third_group_id = resp.json()["groups"][2]["id"]
+    await client.post(f"/api/v1/groups/{third_group_id}/members", json={"user_id": user_ids[2]})
+    resp = await client.get(f"/api/v1/users/{user_ids[0]}/dashboard")
+    assert [group["member_count"] for group in resp.json()["groups"]] == [3, 3, 3]
+
+
+@pytest.mark.asyncio
+async def test_dashboard_user_not_found(client: AsyncClient, db_session):
+    """Test the dashboard of an unknown user is a 404."""
+    resp = await client.get("/api/v1/users/00000000-0000-0000-0000-000000000000/dashboard")
+    assert resp.status_code == 404
@@ -0,0 +1,109 @@
+import pytest
+from decimal import Decimal
+from uuid import UUID
+from httpx import AsyncClient
+
+from app.services.ledger_cache import _APPLY_SCRIPT, ledger_key, load_pair_states
+
+
+async def setup_group(client: AsyncClient, test_users) -> tuple[str, list[str]]:
+    group_resp = await client.post("/api/v1/groups", json={"name": "Test Group"})
+    group_id = group_resp.json()["id"]
+    user_ids = []
+    for user in test_users:
+        await client.post(f"/api/v1/groups/{group_id}/members", json={"user_id": str(user.id)})
+        user_ids.append(str(user.id))
+    return group_id, user_ids
+
+
+def applied_deltas(mock_redis) -> dict:
+    """Debt deltas (in cents) sent to the pair-state cache by the last write."""
+    apply_calls = [call for call in mock_redis.eval.call_args_list if call.args[0] == _APPLY_SCRIPT]
+    _, _, *keys, version, ttl, in_base = apply_calls[-1].args[:9]
+    args = apply_calls[-1].args[9:]
+    return {args[i + 1]: args[i + 2] for i in range(0, len(args), 3) if args[i] == "debt"}
+
+
+@pytest.mark.asyncio
+async def test_update_and_delete_expense(client: AsyncClient, test_users, mock_redis):
+    """Test editing and deleting an expense adjusts balances and only the touched pairs."""
+    group_id, user_ids = await setup_group(client, test_users)
+    resp = await client.post(f"/api/v1/groups/{group_id}/expenses", json={
+        "paid_by_user_id": user_ids[0],
+        "amount": "90.00",
+        "description": "Dinner",
+        "split_type": "EQUAL",
+        "splits": []
+    })
+    expense = resp.json()
+    assert expense["version"] == 1
+    url = f"/api/v1/groups/{group_id}/expenses/{expense['id']}"
+    
+    # Re-split over the same participants
+    resp = await client.patch(url, json={"version": 1, "amount": "60.00"})
+    assert resp.status_code == 200
+    assert resp.json()["version"] == 2
+    assert sorted(split["amount"] for split in resp.json()["splits"]) == ["20.00", "20.00", "20.00"]
+    assert applied_deltas(mock_redis) == {
+        f"{user_ids[1]}:{user_ids[0]}:USD": -1000,
+        f"{user_ids[2]}:{user_ids[0]}:USD": -1000,
+    }
+    
+    balances = await client.get(f"/api/v1/groups/{group_id}/balances/raw")
+    assert sorted(b["amount"] for b in balances.json()) == ["20.00", "20.00"]
+    
+    # Only user 2 owes now: user 1's pair is cleared, user 2's unchanged
+    resp = await client.patch(url, json={
+        "version": 2,
+        "split_type": "EXACT",
+        "splits": [{"user_id": user_ids[0], "amount": "40.00"}, {"user_id": user_ids[2], "amount": "20.00"}]
+    })
+    assert resp.status_code == 200
+    assert applied_deltas(mock_redis) == {f"{user_ids[1]}:{user_ids[0]}:USD": -2000}
+    
+    # Description-only edits leave the ledger alone
+    mock_redis.eval.reset_mock()
+    resp = await client.patch(url, json={"version": 3, "description": "Team dinner"})
+    assert resp.json()["description"] == "Team dinner"
+    mock_redis.eval.assert_not_called()
+    
+    # Stale versions are rejected
+    resp = await client.patch(url, json={"version": 3, "amount": "10.00"})
+    assert resp.status_code == 409
+    resp = await client.delete(url, params={"version": 1})
+    assert resp.status_code == 409
+    
+    resp = await client.delete(url, params={"version": 4})
+    assert resp.status_code == 204
+    assert applied_deltas(mock_redis) == {f"{user_ids[2]}:{user_ids[0]}:USD": -2000}
+    balances = await client.get(f"/api/v1/groups/{group_id}/balances/raw")
+    assert balances.json() == []
+    
+    resp = await client.delete(url, params={"version": 5})
+    assert resp.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_balances_served_from_pair_state_cache(client: AsyncClient, test_users, mock_redis):
+    """Test raw balances use cached pair states that match the group's ledger version."""
+    group_id, user_ids = await setup_group(client, test_users)
+    await client.post(f"/api/v1/groups/{group_id}/settlements", json={
+        "payer_id": user_ids[1], "payee_id": user_ids[0], "amount": "5.00"
+    })
+    
+    # The write's ledger version was 1; a cached hash at that version is trusted
+    pair = f"{user_ids[1]}:{user_ids[0]}:USD"
+    cached = {"version": "1", f"d:{pair}": "4200", f"s:{pair}": "500"}
+    mock_redis.hgetall.return_value = cached
+    resp = await client.get(f"/api/v1/groups/{group_id}/balances/raw")
+    assert resp.json() == [{"debtor_id": user_ids[1], "creditor_id": user_ids[0], "amount": "37.00"}]
+    
+    # Any other version is ignored and the ledger is replayed
+    assert await load_pair_states(mock_redis, UUID(group_id), 2) is None
+    mock_redis.hgetall.return_value = {**cached, "version": "2"}
+    resp = await client.get(f"/api/v1/groups/{group_id}/balances/raw")
+    assert resp.json() == []
+    mock_redis.hgetall.assert_called_with(ledger_key(UUID(group_id)))
+    
+    states = await load_pair_states(mock_redis, UUID(group_id), 2)
+    assert states == {(UUID(user_ids[1]), UUID(user_ids[0]), "USD"): (Decimal("42"), Decimal("5"))}
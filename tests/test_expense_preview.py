@@ -0,0 +1,79 @@
+import pytest
+from decimal import Decimal
+from uuid import uuid4
+from httpx import AsyncClient
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Expense
+from app.utils.balance_simplification import preview_debts, simplify_balances
+from app.utils.ledger import add_debt, apply_settlement, net_balances_from_states
+
+
+@pytest.mark.asyncio
+async def test_preview_expenses(client: AsyncClient, test_users, db_session: AsyncSession):
+    """Test a batch preview shows cumulative balances and plans without saving anything."""
+    alice, bob, carol = (str(user.id) for user in test_users)
+    group_resp = await client.post("/api/v1/groups", json={"name": "Trip"})
+    group_id = group_resp.json()["id"]
+    for user_id in (alice, bob, carol):
+        await client.post(f"/api/v1/groups/{group_id}/members", json={"user_id": user_id})
+    await client.post(f"/api/v1/groups/{group_id}/expenses", json={
+        "paid_by_user_id": alice,
+        "amount": "30.00",
+        "description": "Taxi",
+        "split_type": "EQUAL",
+        "splits": []
+    })
+
+    resp = await client.post(f"/api/v1/groups/{group_id}/expenses:preview", json={"expenses": [
+        {"paid_by_user_id": bob, "amount": "20.00", "description": "Lunch", "split_type": "EXACT",
+         "splits": [{"user_id": alice, "amount": "20.00"}]},
+        {"paid_by_user_id": carol, "amount": "9.00", "description": "Coffee", "split_type": "EQUAL", "splits": []},
+    ]})
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["net_balances"] == {alice: "20.00", bob: "-10.00", carol: "-10.00"}
+
+    lunch, coffee = body["previews"]
+    assert lunch["splits"] == [{"user_id": alice, "amount": "20.00", "percent": None}]
+    assert lunch["net_balances"] == {alice: "0.00", bob: "10.00", carol: "-10.00"}
+    assert lunch["net_changes"] == {alice: "-20.00", bob: "20.00"}
+    assert lunch["simplified"] == [{"payer_id": carol, "payee_id": bob, "amount": "10.00"}]
+    # Includes the lunch before it
+    assert coffee["net_balances"] == {alice: "-3.00", bob: "7.00", carol: "-4.00"}
+    assert coffee["net_changes"] == {alice: "-23.00", bob: "17.00", carol: "6.00"}
+
+    count = await db_session.execute(select(func.count()).select_from(Expense))
+    assert count.scalar() == 1
+
+    resp = await client.post(f"/api/v1/groups/{group_id}/expenses:preview", json={"expenses": [
+        {"paid_by_user_id": str(uuid4()), "amount": "5.00", "description": "Stranger", "split_type": "EQUAL"},
+    ]})
+    assert resp.status_code == 400
+
+
+def test_preview_matches_replay():
+    """Test incremental previews equal a full recompute, including debt absorbed by overpayment."""
+    alice, bob, carol = uuid4(), uuid4(), uuid4()
+    rates = {"USD": Decimal("1"), "EUR": Decimal("1.1")}
+    states = {
+        (bob, alice, "USD"): apply_settlement(add_debt((Decimal("0"),) * 2, Decimal("10")), Decimal("15")),
+        (carol, alice, "EUR"): (Decimal("7.33"), Decimal("0")),
+    }
+    batches = [
+        {(bob, alice, "USD"): Decimal("3")},
+        {(carol, bob, "EUR"): Decimal("4.45"), (alice, bob, "USD"): Decimal("2.50")},
+    ]
+
+    current, previews = preview_debts(states, rates, batches)
+    assert current == net_balances_from_states(states, rates)
+    applied = dict(states)
+    for debts, (net_balances, simplified) in zip(batches, previews):
+        for key, amount in debts.items():
+            applied[key] = add_debt(applied.get(key, (Decimal("0"),) * 2), amount)
+        assert net_balances == net_balances_from_states(applied, rates)
+        assert simplified == simplify_balances(net_balances)
+    # The overpaid pair absorbs the first batch entirely
+    assert previews[0][0] == current
+    assert states[(bob, alice, "USD")] == (Decimal("10"), Decimal("15"))
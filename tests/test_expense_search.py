@@ -0,0 +1,135 @@
+import pytest
+from uuid import uuid4
+from httpx import AsyncClient
+
+from app.utils.pagination import encode_cursor
+
+
+@pytest.mark.asyncio
+async def test_search_expenses_ranked_and_paginated(client: AsyncClient, test_users):
+    """Test description search returns ranked matches page by page."""
+    group_resp = await client.post("/api/v1/groups", json={"name": "Trip"})
+    group_id = group_resp.json()["id"]
+    other_resp = await client.post("/api/v1/groups", json={"name": "Other"})
+    other_id = other_resp.json()["id"]
+    user_id = str(test_users[0].id)
+    for gid in (group_id, other_id):
+        await client.post(f"/api/v1/groups/{gid}/members", json={"user_id": user_id})
+    
+    async def expense(gid, description):
+        resp = await client.post(f"/api/v1/groups/{gid}/expenses", json={
+            "paid_by_user_id": user_id,
+            "amount": "10.00",
+            "description": description,
+            "split_type": "EQUAL",
+            "splits": []
+        })
+        return resp.json()["id"]
+    
+    best = await expense(group_id, "Dinner dinner dinner")
+    for i in range(4):
+        await expense(group_id, f"Dinner at place {i} with a long description of the evening")
+    await expense(group_id, "Airbnb deposit")
+    await expense(other_id, "Dinner elsewhere")
+    
+    seen = []
+    cursor = None
+    while True:
+        params = {"q": "dinner", "limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        resp = await client.get(f"/api/v1/groups/{group_id}/expenses/search", params=params)
+        assert resp.status_code == 200
+        data = resp.json()
+        seen.extend(item["id"] for item in data["items"])
+        cursor = data["next_cursor"]
+        if not cursor:
+            break
+    
+    assert len(seen) == 5
+    assert len(set(seen)) == 5
+    assert seen[0] == best
+    
+    # Punctuation is ignored and every word must match
+    resp = await client.get(f"/api/v1/groups/{group_id}/expenses/search", params={"q": "airbnb, deposit!"})
+    assert [item["description"] for item in resp.json()["items"]] == ["Airbnb deposit"]
+    resp = await client.get(f"/api/v1/groups/{group_id}/expenses/search", params={"q": "airbnb dinner"})
+    assert resp.json()["items"] == []
+    
+    resp = await client.get(
+        f"/api/v1/groups/{group_id}/expenses/search", params={"q": "dinner", "cursor": "not-a-cursor"}
+    )
+    assert resp.status_code == 400
+
+
+async def _group_with_expenses(client: AsyncClient, user_id: str, descriptions: list[str]) -> tuple[str, list[str]]:
+    group_resp = await client.post("/api/v1/groups", json={"name": "Trip"})
+    group_id = group_resp.json()["id"]
+    await client.post(f"/api/v1/groups/{group_id}/members", json={"user_id": user_id})
+    expense_ids = []
+    for description in descriptions:
+        resp = await client.post(f"/api/v1/groups/{group_id}/expenses", json={
+            "paid_by_user_id": user_id,
+            "amount": "10.00",
+            "description": description,
+            "split_type": "EQUAL",
+            "splits": []
+        })
+        expense_ids.append(resp.json()["id"])
+    return group_id, expense_ids
+
+
+@pytest.mark.asyncio
+async def test_search_pages_across_tied_scores(client: AsyncClient, test_user):
+    """Test equal scores page by (created_at, id) without skipping or repeating a row."""
+    group_id, expense_ids = await _group_with_expenses(client, str(test_user.id), ["Taxi"] * 5)
+    url = f"/api/v1/groups/{group_id}/expenses/search"
+    
+    everything = (await client.get(url, params={"q": "taxi", "limit": 100})).json()
+    assert everything["next_cursor"] is None
+    expected = [item["id"] for item in everything["items"]]
+    assert sorted(expected) == sorted(expense_ids)
+    
+    first = (await client.get(url, params={"q": "taxi", "limit": 2})).json()
+    assert [item["id"] for item in first["items"]] == expected[:2]
+    second = (await client.get(url, params={"q": "taxi", "limit": 2, "cursor": first["next_cursor"]})).json()
+    assert [item["id"] for item in second["items"]] == expected[2:4]
+    # A cursor always resumes right after the row it was made from
+    again = (await client.get(url, params={"q": "taxi", "limit": 2, "cursor": first["next_cursor"]})).json()
+    assert again == second
+    
+    # An exactly full last page has no next cursor
+    last = (await client.get(url, params={"q": "taxi", "limit": 3, "cursor": first["next_cursor"]})).json()
+    assert [item["id"] for item in last["items"]] == expected[2:]
+    assert last["next_cursor"] is None
+
+
+@pytest.mark.asyncio
+async def test_search_rejects_malformed_cursors(client: AsyncClient, test_user):
+    """Test cursors that do not decode to this endpoint's sort key are a 400."""
+    group_id, _ = await _group_with_expenses(client, str(test_user.id), ["Taxi"])
+    url = f"/api/v1/groups/{group_id}/expenses/search"
+    
+    for cursor in (
+        "not-a-cursor",
+        encode_cursor({"score": 1.0}),
+        encode_cursor([1.0, "2024-01-01T00:00:00"]),
+        encode_cursor([1.0, "yesterday", str(uuid4())]),
+        encode_cursor([1.0, "2024-01-01T00:00:00", "not-a-uuid"]),
+        encode_cursor(["best", "2024-01-01T00:00:00", str(uuid4())]),
+    ):
+        resp = await client.get(url, params={"q": "taxi", "cursor": cursor})
+        assert resp.status_code == 400, cursor
+        assert resp.json()["detail"] == "Invalid cursor"
+
+
+@pytest.mark.asyncio
+async def test_search_punctuation_only_query(client: AsyncClient, test_user):
+    """Test a query without any words matches nothing instead of erroring."""
+    group_id, _ = await _group_with_expenses(client, str(test_user.id), ["Taxi", "Dinner!"])
+    url = f"/api/v1/groups/{group_id}/expenses/search"
+    
+    for query in ("!", "?!...", '"*" - :', "()"):
+        resp = await client.get(url, params={"q": query})
+        assert resp.status_code == 200, query
+        assert resp.json() == {"items": [], "next_cursor": None}
@@ -1,10 +1,13 @@
 import pytest
 from decimal import Decimal
-from uuid import uuid4
+from uuid import UUID, uuid4
 from httpx import AsyncClient
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models import User, Group, GroupMember, Expense, ExpenseSplit, SplitType
+from app.repositories import change_repository
+from app.utils.money import split_equal
 
 
 @pytest.mark.asyncio
@@ -169,3 +172,90 @@ async def test_percent_split_with_rounding(client: AsyncClient, test_users, db_s
     # Check that percents are stored
     assert all(s.get("percent") is not None for s in expense["splits"])
 
+
+
+@pytest.mark.asyncio
+async def test_splits_store_group_id(client: AsyncClient, test_users, db_session: AsyncSession):
+    """Test that splits carry their expense's group_id for group-local balance queries."""
+    group_resp = await client.post("/api/v1/groups", json={"name": "Test Group"})
+    group_id = group_resp.json()["id"]
+    for user in test_users[:2]:
+        await client.post(f"/api/v1/groups/{group_id}/members", json={"user_id": str(user.id)})
+    
+    expense_data = {
+        "paid_by_user_id": str(test_users[0].id),
+        "amount": "10.00",
+        "description": "Test expense",
+        "split_type": "EQUAL",
+        "splits": []
+    }
+    resp = await client.post(f"/api/v1/groups/{group_id}/expenses", json=expense_data)
+    assert resp.status_code == 201
+    
+    from sqlalchemy import select
+    result = await db_session.execute(select(ExpenseSplit.group_id))
+    group_ids = {str(row[0]) for row in result.all()}
+    assert group_ids == {group_id}
+
+
+def test_split_equal_allocates_cents_exactly():
+    """Test equal splits sum to the total whichever way the division rounds."""
+    assert split_equal(Decimal("20.00"), 3) == [Decimal("6.67"), Decimal("6.67"), Decimal("6.66")]
+    assert split_equal(Decimal("0.01"), 3) == [Decimal("0.01"), Decimal("0.00"), Decimal("0.00")]
+    for amount in ("100.00", "20.00", "0.05", "123456.78"):
+        for people in (1, 3, 7, 1000):
+            shares = split_equal(Decimal(amount), people)
+            assert sum(shares) == Decimal(amount)
+            assert max(shares) - min(shares) <= Decimal("0.01")
+
+
+@pytest.mark.asyncio
+async def test_large_equal_split_omits_split_detail(client: AsyncClient, test_user, db_session: AsyncSession, monkeypatch):
+    """Test large equal splits are stored in full but only counted in the response unless asked for."""
+    group_resp = await client.post("/api/v1/groups", json={"name": "Community"})
+    group_id = UUID(group_resp.json()["id"])
+    monkeypatch.setattr(change_repository, "USER_IDS_LIMIT", 100)
+    users = [User(id=uuid4(), name=f"Member {i}", email=f"member{i}@example.com") for i in range(250)]
+    db_session.add_all(users)
+    db_session.add_all([GroupMember(group_id=group_id, user_id=user.id) for user in users])
+    await db_session.commit()
+    expense_data = {
+        "paid_by_user_id": str(users[0].id),
+        "amount": "1000.00",
+        "description": "Venue hire",
+        "split_type": "EQUAL",
+    }
+    
+    resp = await client.post(f"/api/v1/groups/{group_id}/expenses", json=expense_data)
+    assert resp.status_code == 201
+    expense = resp.json()
+    assert (expense["split_count"], expense["splits"]) == (250, [])
+    
+    splits = await db_session.execute(
+        select(ExpenseSplit.amount).where(ExpenseSplit.expense_id == UUID(expense["id"]))
+    )
+    amounts = splits.scalars().all()
+    assert sorted(amounts) == sorted(split_equal(Decimal("1000.00"), 250))
+    
+    # Reading the expense returns every split
+    resp = await client.get(f"/api/v1/groups/{group_id}/expenses/{expense['id']}")
+    assert resp.status_code == 200
+    assert len(resp.json()["splits"]) == 250
+    
+    # Too many users to log: delta sync returns everyone's balance
+    resp = await client.get(f"/api/v1/groups/{group_id}/changes")
+    data = resp.json()
+    assert "splits" not in data["changes"][0]["data"]
+    assert len(data["net_balances"]) == 250
+    
+    resp = await client.post(
+        f"/api/v1/groups/{group_id}/expenses", params={"include_splits": "true"}, json=expense_data
+    )
+    expense = resp.json()
+    assert expense["split_count"] == len(expense["splits"]) == 250
+    
+    # A stranger among explicit participants is still rejected
+    resp = await client.post(f"/api/v1/groups/{group_id}/expenses", json={
+        **expense_data, "splits": [{"user_id": str(users[1].id)}, {"user_id": str(test_user.id)}]
+    })
+    assert resp.status_code == 400
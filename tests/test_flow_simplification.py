@@ -0,0 +1,78 @@
+import random
+import pytest
+from decimal import Decimal
+from uuid import UUID
+from httpx import AsyncClient
+
+from app.utils.flow_simplification import simplify_along_edges
+from app.utils.ledger import net_balances_from_states
+
+
+@pytest.mark.asyncio
+async def test_relationship_mode_follows_ledger_edges(client: AsyncClient, test_users, mock_redis):
+    """Test relationship mode never has someone pay a person they do not owe."""
+    group_resp = await client.post("/api/v1/groups", json={"name": "Chain"})
+    group_id = group_resp.json()["id"]
+    alice, bob, carol = (str(user.id) for user in test_users)
+    for user_id in (alice, bob, carol):
+        await client.post(f"/api/v1/groups/{group_id}/members", json={"user_id": user_id})
+
+    # Alice owes Bob 10, Bob owes Carol 10
+    for debtor, creditor in ((alice, bob), (bob, carol)):
+        await client.post(f"/api/v1/groups/{group_id}/expenses", json={
+            "paid_by_user_id": creditor,
+            "amount": "10.00",
+            "description": "Lunch",
+            "split_type": "EXACT",
+            "splits": [{"user_id": debtor, "amount": "10.00"}]
+        })
+
+    resp = await client.get(f"/api/v1/groups/{group_id}/balances/simplified")
+    assert [(t["payer_id"], t["payee_id"]) for t in resp.json()] == [(alice, carol)]
+
+    pipe = mock_redis.pipeline.return_value
+    pipe.eval.reset_mock()
+    resp = await client.get(f"/api/v1/groups/{group_id}/balances/simplified", params={"mode": "relationships"})
+    assert resp.status_code == 200
+    assert {(t["payer_id"], t["payee_id"], t["amount"]) for t in resp.json()} == {
+        (alice, bob, "10.00"), (bob, carol, "10.00")
+    }
+    assert pipe.eval.call_args.args[3] == f"balances:{group_id}:simplified:relationships"
+
+
+def test_relationship_plans_on_random_ledgers():
+    """Property test: plans settle every net, use only ledger edges and form a forest."""
+    rnd = random.Random(7)
+    rates = {"USD": Decimal("1"), "EUR": Decimal("1.1")}
+    for _ in range(200):
+        users = [UUID(int=rnd.getrandbits(128)) for _ in range(rnd.randint(2, 12))]
+        states = {}
+        for _ in range(rnd.randint(1, 30)):
+            debtor, creditor = rnd.sample(users, 2)
+            states[(debtor, creditor, rnd.choice(list(rates)))] = (
+                Decimal(rnd.randint(1, 50000)) / 100, Decimal(rnd.randint(0, 20000)) / 100
+            )
+        plan = simplify_along_edges(states, rates)
+
+        edges = {(str(debtor), str(creditor)) for debtor, creditor, _ in states}
+        assert all((t["payer_id"], t["payee_id"]) in edges and t["amount"] > 0 for t in plan)
+
+        settled: dict = {}
+        for t in plan:
+            settled[t["payer_id"]] = settled.get(t["payer_id"], Decimal("0")) - t["amount"]
+            settled[t["payee_id"]] = settled.get(t["payee_id"], Decimal("0")) + t["amount"]
+        nets = net_balances_from_states(states, rates)
+        # Rounded converted nets need not sum to zero; all but that residue settles
+        unsettled = sum(abs(settled.get(str(user_id), Decimal("0")) - amount) for user_id, amount in nets.items())
+        assert unsettled == abs(sum(nets.values()))
+
+        # A forest: every transfer joins two previously unconnected members
+        parent = {}
+        def find(x):
+            while parent.setdefault(x, x) != x:
+                x = parent[x]
+            return x
+        for t in plan:
+            a, b = find(t["payer_id"]), find(t["payee_id"])
+            assert a != b
+            parent[a] = b
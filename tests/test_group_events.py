@@ -0,0 +1,93 @@
+import asyncio
+import json
+import pytest
+from unittest.mock import AsyncMock
+from uuid import uuid4
+
+from app.api.routers.events import format_event, subscriber_event
+from app.services.group_events import GroupEventBroker, SUBSCRIBER_QUEUE_SIZE, publish_group_event
+
+
+@pytest.fixture
+async def broker():
+    """Broker wired to a fake pub/sub connection."""
+    broker = GroupEventBroker()
+    
+    async def get_message(timeout):
+        await asyncio.sleep(timeout)
+    
+    broker._pubsub = AsyncMock()
+    broker._pubsub.get_message = get_message
+    yield broker
+    await broker.close()
+
+
+@pytest.mark.asyncio
+async def test_publish_uses_change_seq_as_version(mock_redis):
+    """Test that publishing fans the given change_seq out via Redis."""
+    group_id = uuid4()
+    
+    await publish_group_event(mock_redis, group_id, "expense_created", 7)
+    
+    mock_redis.incr.assert_not_called()
+    channel, payload = mock_redis.publish.call_args.args
+    assert channel == f"group_events:{group_id}"
+    assert json.loads(payload) == {"group_id": str(group_id), "version": 7, "kind": "expense_created"}
+
+
+@pytest.mark.asyncio
+async def test_broker_fans_out_to_group_subscribers_only(broker):
+    """Test that events reach every subscriber of the group and nobody else."""
+    group_id, other_group_id = uuid4(), uuid4()
+    first = await broker.subscribe(group_id)
+    second = await broker.subscribe(group_id)
+    other = await broker.subscribe(other_group_id)
+    
+    broker.dispatch(str(group_id), {"version": 1, "kind": "expense_created"})
+    
+    assert first.get_nowait()["version"] == 1
+    assert second.get_nowait()["version"] == 1
+    assert other.empty()
+    
+    # Channel is subscribed once per group, released with the last subscriber
+    await broker.unsubscribe(group_id, first)
+    await broker.unsubscribe(group_id, second)
+    broker._pubsub.unsubscribe.assert_awaited_once_with(f"group_events:{group_id}")
+    assert broker.subscriber_count() == 1
+
+
+@pytest.mark.asyncio
+async def test_slow_subscriber_keeps_latest_events(broker):
+    """Test that a subscriber queue stays bounded and drops the oldest events."""
+    group_id = uuid4()
+    queue = await broker.subscribe(group_id)
+    
+    for version in range(1, SUBSCRIBER_QUEUE_SIZE + 5):
+        broker.dispatch(str(group_id), {"version": version, "kind": "expense_created"})
+    
+    assert queue.qsize() == SUBSCRIBER_QUEUE_SIZE
+    versions = [queue.get_nowait()["version"] for _ in range(SUBSCRIBER_QUEUE_SIZE)]
+    assert versions[-1] == SUBSCRIBER_QUEUE_SIZE + 4
+
+
+def test_format_event():
+    """Test SSE message framing."""
+    message = format_event({"version": 3, "kind": "settlement_created"})
+    assert message.startswith("id: 3\nevent: settlement_created\ndata: ")
+    assert message.endswith("\n\n")
+
+
+@pytest.mark.asyncio
+async def test_balances_reach_only_subscribers_that_asked(broker):
+    """Test adding balances for one subscriber leaves the event other subscribers share untouched."""
+    group_id = uuid4()
+    with_balances = await broker.subscribe(group_id)
+    without = await broker.subscribe(group_id)
+    broker.net_balances = AsyncMock(return_value={"user": "5.00"})
+    
+    broker.dispatch(str(group_id), {"version": 4, "kind": "expense_created"})
+    
+    event = await subscriber_event(broker, group_id, with_balances.get_nowait(), True)
+    assert event["net_balances"] == {"user": "5.00"}
+    event = await subscriber_event(broker, group_id, without.get_nowait(), False)
+    assert "net_balances" not in event
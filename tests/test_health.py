@@ -0,0 +1,68 @@
+import os
+import subprocess
+import sys
+import pytest
+from unittest.mock import AsyncMock
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.api.routers import health
+from tests.conftest import TestSessionLocal
+
+
+@pytest.mark.asyncio
+async def test_liveness(client: AsyncClient):
+    """Test the liveness probe."""
+    resp = await client.get("/health")
+    assert resp.status_code == 200
+    assert resp.json() == {"status": "healthy"}
+
+
+@pytest.mark.asyncio
+async def test_readiness_checks_dependencies(client: AsyncClient, mock_redis, monkeypatch):
+    """Test that readiness reports database and Redis status."""
+    monkeypatch.setattr(health, "create_session", TestSessionLocal)
+    resp = await client.get("/health/ready")
+    assert resp.status_code == 200
+    assert resp.json()["checks"] == {"database": "ok", "redis": "ok"}
+    
+    mock_redis.ping = AsyncMock(side_effect=ConnectionError("refused"))
+    resp = await client.get("/health/ready")
+    assert resp.status_code == 503
+    assert resp.json()["checks"]["redis"] == "error: ConnectionError"
+
+
+@pytest.mark.asyncio
+async def test_readiness_reports_unreachable_database(client: AsyncClient, monkeypatch):
+    """Test that a database that cannot be reached makes readiness 503, not 500."""
+    engine = create_async_engine("sqlite+aiosqlite:////nonexistent/dir/ledger.db")
+    monkeypatch.setattr(health, "create_session", async_sessionmaker(engine))
+    resp = await client.get("/health/ready")
+    assert resp.status_code == 503
+    assert resp.json()["checks"]["database"] == "error: OperationalError"
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_readiness_reports_missing_database_url(client: AsyncClient, monkeypatch):
+    """Test that readiness is 503 when DATABASE_URL is not configured."""
+    def create_session():
+        raise RuntimeError("DATABASE_URL is not configured")
+    monkeypatch.setattr(health, "create_session", create_session)
+    resp = await client.get("/health/ready")
+    assert resp.status_code == 503
+    assert resp.json()["checks"]["database"] == "error: RuntimeError"
+
+
+def test_import_is_lazy_without_database_url():
+    """Test that importing the app needs no DATABASE_URL and defers routers and engine."""
+    env = {k: v for k, v in os.environ.items() if k != "DATABASE_URL"}
+    probe = (
+        "import sys, app.main\n"
+        "assert 'app.api.routers.balances' not in sys.modules\n"
+        "import app.core.database as db\n"
+        "app.main.create_app()\n"
+        "assert db._engine is None\n"
+    )
+    result = subprocess.run([sys.executable, "-c", probe], env=env, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
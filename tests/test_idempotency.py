@@ -0,0 +1,161 @@
+import pytest
+from datetime import datetime, timedelta
+from httpx import AsyncClient
+from sqlalchemy import select, func
+
+from app.jobs import prune_idempotency_keys
+from app.models import Expense, Settlement
+from app.models.idempotency import IdempotencyRecord
+from app.repositories.idempotency_repository import IdempotencyRepository
+from app.services.idempotency_service import IdempotencyService
+from tests.conftest import TestSessionLocal
+
+
+async def _group_with_members(client: AsyncClient, users) -> str:
+    group_resp = await client.post("/api/v1/groups", json={"name": "Test Group"})
+    group_id = group_resp.json()["id"]
+    for user in users:
+        await client.post(f"/api/v1/groups/{group_id}/members", json={"user_id": str(user.id)})
+    return group_id
+
+
+@pytest.mark.asyncio
+async def test_expense_replay_returns_original_response(client: AsyncClient, test_users, db_session):
+    """Test that retrying with the same Idempotency-Key does not create a duplicate."""
+    group_id = await _group_with_members(client, test_users[:2])
+    expense = {
+        "paid_by_user_id": str(test_users[0].id),
+        "amount": "100.00",
+        "description": "Dinner",
+        "split_type": "EQUAL",
+        "splits": []
+    }
+    headers = {"Idempotency-Key": "retry-1"}
+    
+    first = await client.post(f"/api/v1/groups/{group_id}/expenses", json=expense, headers=headers)
+    second = await client.post(f"/api/v1/groups/{group_id}/expenses", json=expense, headers=headers)
+    
+    assert first.status_code == 201
+    assert second.status_code == 201
+    assert second.json() == first.json()
+    assert second.headers["Idempotent-Replayed"] == "true"
+    
+    count = await db_session.scalar(select(func.count()).select_from(Expense))
+    assert count == 1
+
+
+@pytest.mark.asyncio
+async def test_key_reuse_with_different_body_rejected(client: AsyncClient, test_users, db_session):
+    """Test that an Idempotency-Key cannot be reused for a different request."""
+    group_id = await _group_with_members(client, test_users[:2])
+    settlement = {
+        "payer_id": str(test_users[1].id),
+        "payee_id": str(test_users[0].id),
+        "amount": "30.00"
+    }
+    headers = {"Idempotency-Key": "settle-1"}
+    
+    first = await client.post(f"/api/v1/groups/{group_id}/settlements", json=settlement, headers=headers)
+    assert first.status_code == 201
+    
+    settlement["amount"] = "40.00"
+    second = await client.post(f"/api/v1/groups/{group_id}/settlements", json=settlement, headers=headers)
+    assert second.status_code == 422
+    
+    count = await db_session.scalar(select(func.count()).select_from(Settlement))
+    assert count == 1
+
+
+@pytest.mark.asyncio
+async def test_key_reuse_with_different_include_splits_rejected(client: AsyncClient, test_users):
+    """Test that include_splits is part of the request a key is bound to."""
+    group_id = await _group_with_members(client, test_users[:2])
+    expense = {
+        "paid_by_user_id": str(test_users[0].id),
+        "amount": "100.00",
+        "description": "Dinner",
+        "split_type": "EQUAL",
+        "splits": []
+    }
+    headers = {"Idempotency-Key": "shape-1"}
+    url = f"/api/v1/groups/{group_id}/expenses"
+    
+    first = await client.post(url, json=expense, headers=headers, params={"include_splits": "false"})
+    assert first.status_code == 201
+    assert first.json()["splits"] == []
+    
+    replay = await client.post(url, json=expense, headers=headers, params={"include_splits": "false"})
+    assert replay.json() == first.json()
+    other_shape = await client.post(url, json=expense, headers=headers, params={"include_splits": "true"})
+    assert other_shape.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_concurrent_duplicate_gets_stored_response(client: AsyncClient, test_users, db_session, monkeypatch):
+    """Test that losing the race to store the key replays the winner's response instead of a 409."""
+    group_id = await _group_with_members(client, test_users[:2])
+    expense = {
+        "paid_by_user_id": str(test_users[0].id),
+        "amount": "100.00",
+        "description": "Dinner",
+        "split_type": "EQUAL",
+        "splits": []
+    }
+    headers = {"Idempotency-Key": "race-1"}
+    url = f"/api/v1/groups/{group_id}/expenses"
+    first = await client.post(url, json=expense, headers=headers)
+    assert first.status_code == 201
+    
+    # The duplicate checked for a stored response before the first one committed
+    get = IdempotencyRepository.get
+    lookups = []
+    
+    async def not_yet_stored(self, scope, key):
+        lookups.append(key)
+        return None if len(lookups) == 1 else await get(self, scope, key)
+    
+    monkeypatch.setattr(IdempotencyRepository, "get", not_yet_stored)
+    second = await client.post(url, json=expense, headers=headers)
+    
+    assert len(lookups) == 2
+    assert second.status_code == 201
+    assert second.json() == first.json()
+    assert second.headers["Idempotent-Replayed"] == "true"
+    # The duplicate's own expense was rolled back with its key
+    count = await db_session.scalar(select(func.count()).select_from(Expense))
+    assert count == 1
+
+
+@pytest.mark.asyncio
+async def test_release_keeps_a_lock_taken_after_expiry(db_session, fake_redis):
+    """Test a request whose lock expired cannot release the lock a duplicate took since."""
+    first = IdempotencyService(db_session, fake_redis)
+    second = IdempotencyService(db_session, fake_redis)
+    assert await first.begin("expenses:g", "slow-1", "hash") is None
+    
+    # The first request outlives its lock; a duplicate takes it over
+    await fake_redis.delete("idempotency:expenses:g:slow-1:lock")
+    assert await second.begin("expenses:g", "slow-1", "hash") is None
+    await first.release("expenses:g", "slow-1")
+    assert await fake_redis.exists("idempotency:expenses:g:slow-1:lock")
+    
+    await second.release("expenses:g", "slow-1")
+    assert not await fake_redis.exists("idempotency:expenses:g:slow-1:lock")
+
+
+@pytest.mark.asyncio
+async def test_prune_deletes_only_expired_keys(db_session, monkeypatch):
+    """Test the pruning job deletes expired records in batches and keeps the rest."""
+    now = datetime.utcnow()
+    for i, expires_in in enumerate((-3, -2, -1, 1)):
+        db_session.add(IdempotencyRecord(
+            scope="expenses:g", key=f"key-{i}", request_hash="hash", status_code=201,
+            response_body="{}", expires_at=now + timedelta(days=expires_in)
+        ))
+    await db_session.commit()
+    
+    monkeypatch.setattr(prune_idempotency_keys, "create_session", TestSessionLocal)
+    assert await prune_idempotency_keys.prune_expired(now, batch_size=2) == 3
+    keys = await db_session.scalars(select(IdempotencyRecord.key))
+    assert list(keys) == ["key-3"]
+
@@ -0,0 +1,139 @@
+import pytest
+from httpx import AsyncClient
+
+from app.core.redis_client import get_redis
+from app.main import app
+from app.services.ledger_cache import (
+    _REPLACE_BOARD_SCRIPT,
+    global_leaderboard_key,
+    group_leaderboard_key,
+    group_leaderboard_version_key,
+)
+
+
+@pytest.mark.asyncio
+async def test_group_leaderboard_rebuilt_and_read(client: AsyncClient, test_users, mock_redis):
+    """Test a stale group board is rebuilt from balances before the top-k read."""
+    group_resp = await client.post("/api/v1/groups", json={"name": "Test Group"})
+    group_id = group_resp.json()["id"]
+    user_ids = []
+    for user in test_users:
+        await client.post(f"/api/v1/groups/{group_id}/members", json={"user_id": str(user.id)})
+        user_ids.append(str(user.id))
+    await client.post(f"/api/v1/groups/{group_id}/expenses", json={
+        "paid_by_user_id": user_ids[0],
+        "amount": "90.00",
+        "description": "Dinner",
+        "split_type": "EQUAL",
+        "splits": []
+    })
+    
+    mock_redis.eval.reset_mock()
+    mock_redis.zrangebyscore.return_value = [(user_ids[1], -3000.0), (user_ids[2], -3000.0)]
+    mock_redis.zrevrangebyscore.return_value = [(user_ids[0], 6000.0)]
+    resp = await client.get(f"/api/v1/groups/{group_id}/balances/top", params={"k": 2})
+    assert resp.status_code == 200
+    assert resp.json() == {
+        "debtors": [{"user_id": user_ids[1], "amount": "30.00"}, {"user_id": user_ids[2], "amount": "30.00"}],
+        "creditors": [{"user_id": user_ids[0], "amount": "60.00"}],
+    }
+    
+    # No board version in Redis, so the board was replaced with nets in cents at ledger version 1
+    replace = next(call for call in mock_redis.eval.call_args_list if call.args[0] == _REPLACE_BOARD_SCRIPT)
+    _, _, board_key, global_key, _, version, *nets = replace.args
+    assert (board_key, global_key, version) == (group_leaderboard_key(group_id), global_leaderboard_key("USD"), 1)
+    assert dict(zip(nets[::2], nets[1::2])) == {user_ids[0]: 6000, user_ids[1]: -3000, user_ids[2]: -3000}
+    mock_redis.zrangebyscore.assert_called_with(
+        group_leaderboard_key(group_id), "-inf", "(0", start=0, num=2, withscores=True
+    )
+    
+    resp = await client.get("/api/v1/admin/leaderboards/top")
+    assert resp.status_code == 200
+    mock_redis.zrevrangebyscore.assert_called_with(
+        global_leaderboard_key("USD"), "+inf", "(0", start=0, num=10, withscores=True
+    )
+    
+    resp = await client.get("/api/v1/groups/00000000-0000-0000-0000-000000000000/balances/top")
+    assert resp.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_leaderboards_follow_writes_in_redis(client: AsyncClient, test_users, fake_redis):
+    """Test the board scripts against a scripting Redis: a rebuild, then per-pair moves."""
+    group_resp = await client.post("/api/v1/groups", json={"name": "Test Group"})
+    group_id = group_resp.json()["id"]
+    user_ids = []
+    for user in test_users:
+        await client.post(f"/api/v1/groups/{group_id}/members", json={"user_id": str(user.id)})
+        user_ids.append(str(user.id))
+    app.dependency_overrides[get_redis] = lambda: fake_redis
+    
+    # No pair states cached yet, so this write rebuilds the board
+    await client.post(f"/api/v1/groups/{group_id}/expenses", json={
+        "paid_by_user_id": user_ids[0],
+        "amount": "90.00",
+        "description": "Dinner",
+        "split_type": "EQUAL",
+        "splits": []
+    })
+    resp = await client.get(f"/api/v1/groups/{group_id}/balances/top", params={"k": 2})
+    # Ties are in member order
+    assert resp.json() == {
+        "debtors": [{"user_id": user_id, "amount": "30.00"} for user_id in sorted(user_ids[1:])],
+        "creditors": [{"user_id": user_ids[0], "amount": "60.00"}],
+    }
+    
+    # The board is current, so the next writes move it pair by pair
+    await client.post(f"/api/v1/groups/{group_id}/settlements", json={
+        "payer_id": user_ids[1], "payee_id": user_ids[0], "amount": "30.00"
+    })
+    await client.post(f"/api/v1/groups/{group_id}/expenses", json={
+        "paid_by_user_id": user_ids[2],
+        "amount": "10.50",
+        "description": "Coffee",
+        "split_type": "EQUAL",
+        "splits": []
+    })
+    assert await fake_redis.get(group_leaderboard_version_key(group_id)) == b"3"
+    expected = {
+        "debtors": [{"user_id": user_ids[2], "amount": "23.00"}],
+        "creditors": [{"user_id": user_ids[0], "amount": "26.50"}],
+    }
+    resp = await client.get(f"/api/v1/groups/{group_id}/balances/top", params={"k": 1})
+    assert resp.json() == expected
+    resp = await client.get("/api/v1/admin/leaderboards/top", params={"k": 1})
+    assert resp.json() == expected
+
+
+@pytest.mark.asyncio
+async def test_global_boards_never_mix_currencies(client: AsyncClient, test_users, fake_redis):
+    """Test groups with different base currencies feed separate global boards."""
+    app.dependency_overrides[get_redis] = lambda: fake_redis
+    payer, debtor = str(test_users[0].id), str(test_users[1].id)
+    for base_currency, amount in (("EUR", "200.00"), ("JPY", "200.00"), ("EUR", "50.00")):
+        group_resp = await client.post("/api/v1/groups", json={"name": base_currency, "base_currency": base_currency})
+        group_id = group_resp.json()["id"]
+        for user_id in (payer, debtor):
+            await client.post(f"/api/v1/groups/{group_id}/members", json={"user_id": user_id})
+        resp = await client.post(f"/api/v1/groups/{group_id}/expenses", json={
+            "paid_by_user_id": payer,
+            "amount": amount,
+            "description": "Hotel",
+            "split_type": "EQUAL",
+            "splits": []
+        })
+        assert resp.status_code == 201
+    
+    # Both EUR groups add up; the JPY group stays on its own board
+    resp = await client.get("/api/v1/admin/leaderboards/top", params={"currency": "EUR"})
+    assert resp.json() == {
+        "debtors": [{"user_id": debtor, "amount": "125.00"}],
+        "creditors": [{"user_id": payer, "amount": "125.00"}],
+    }
+    resp = await client.get("/api/v1/admin/leaderboards/top", params={"currency": "JPY"})
+    assert resp.json() == {
+        "debtors": [{"user_id": debtor, "amount": "100.00"}],
+        "creditors": [{"user_id": payer, "amount": "100.00"}],
+    }
+    resp = await client.get("/api/v1/admin/leaderboards/top", params={"currency": "USD"})
+    assert resp.json() == {"debtors": [], "creditors": []}
@@ -0,0 +1,108 @@
+import random
+import pytest
+from datetime import datetime, timedelta
+from decimal import Decimal
+from uuid import UUID, uuid4
+from httpx import AsyncClient
+from sqlalchemy import select, func, update
+
+from app.models import Expense, Settlement, ExpenseArchive, SettlementArchive, BalanceCarryForward
+from app.services.ledger_compaction_service import LedgerCompactionService
+from app.utils.ledger import build_pair_states, compose, raw_balances_from_states
+
+
+def test_compacted_prefix_matches_full_replay():
+    """Test that folding any prefix of history into states leaves balances unchanged."""
+    rng = random.Random(7)
+    users = [uuid4() for _ in range(4)]
+    rates = {"USD": Decimal("1"), "EUR": Decimal("1.1")}
+    
+    for _ in range(200):
+        splits = [
+            (rng.choice(users), rng.choice(users), Decimal(rng.randint(1, 5000)) / 100, rng.choice(list(rates)))
+            for _ in range(rng.randint(0, 12))
+        ]
+        settlements = [
+            tuple(rng.sample(users, 2)) + (Decimal(rng.randint(1, 5000)) / 100, rng.choice(list(rates)))
+            for _ in range(rng.randint(0, 12))
+        ]
+        cut_splits = rng.randint(0, len(splits))
+        cut_settlements = rng.randint(0, len(settlements))
+        
+        full = build_pair_states(splits, settlements)
+        carry = build_pair_states(splits[:cut_splits], settlements[:cut_settlements])
+        compacted = build_pair_states(splits[cut_splits:], settlements[cut_settlements:], carry)
+        
+        key = lambda b: (b["debtor_id"], b["creditor_id"])
+        assert (
+            sorted(raw_balances_from_states(compacted, rates), key=key)
+            == sorted(raw_balances_from_states(full, rates), key=key)
+        )
+        
+        # Composing two folded stretches is the same as folding both at once
+        later = build_pair_states(splits[cut_splits:], settlements[cut_settlements:])
+        for key in full:
+            assert compose(carry.get(key, (0, 0)), later.get(key, (0, 0))) == full[key]
+
+
+@pytest.mark.asyncio
+async def test_compaction_preserves_balances(client: AsyncClient, test_users, db_session):
+    """Test that compacting old history archives it without changing balances."""
+    group_resp = await client.post("/api/v1/groups", json={"name": "Test Group"})
+    group_id = group_resp.json()["id"]
+    user_ids = []
+    for user in test_users:
+        await client.post(f"/api/v1/groups/{group_id}/members", json={"user_id": str(user.id)})
+        user_ids.append(str(user.id))
+    
+    async def expense(payer, amount):
+        await client.post(f"/api/v1/groups/{group_id}/expenses", json={
+            "paid_by_user_id": user_ids[payer],
+            "amount": amount,
+            "description": "Expense",
+            "split_type": "EQUAL",
+            "splits": []
+        })
+    
+    async def settle(payer, payee, amount):
+        await client.post(f"/api/v1/groups/{group_id}/settlements", json={
+            "payer_id": user_ids[payer], "payee_id": user_ids[payee], "amount": amount
+        })
+    
+    # Old history, including a settlement that overshoots the debt
+    await expense(0, "90.00")
+    await settle(1, 0, "50.00")
+    await expense(2, "30.00")
+    old = datetime.utcnow() - timedelta(days=400)
+    await db_session.execute(update(Expense).values(created_at=old))
+    await db_session.execute(update(Settlement).values(created_at=old))
+    await db_session.commit()
+    old_balances = await client.get(f"/api/v1/groups/{group_id}/balances/raw")
+    
+    # Recent history
+    await expense(1, "60.00")
+    await settle(2, 0, "10.00")
+    
+    before = await client.get(f"/api/v1/groups/{group_id}/balances/raw")
+    assert before.status_code == 200
+    
+    result = await LedgerCompactionService(db_session).compact_group(
+        UUID(group_id), datetime.utcnow() - timedelta(days=30)
+    )
+    await db_session.commit()
+    assert result["expenses"] == 2
+    assert result["settlements"] == 1
+    
+    after = await client.get(f"/api/v1/groups/{group_id}/balances/raw")
+    key = lambda b: (b["debtor_id"], b["creditor_id"])
+    assert sorted(after.json(), key=key) == sorted(before.json(), key=key)
+    
+    assert await db_session.scalar(select(func.count()).select_from(Expense)) == 1
+    assert await db_session.scalar(select(func.count()).select_from(ExpenseArchive)) == 2
+    assert await db_session.scalar(select(func.count()).select_from(SettlementArchive)) == 1
+    assert await db_session.scalar(select(func.count()).select_from(BalanceCarryForward)) == result["pairs"]
+    
+    # As-of queries before the cutoff replay the archive instead of carry-forwards
+    as_of = (datetime.utcnow() - timedelta(days=400)).isoformat()
+    historical = await client.get(f"/api/v1/groups/{group_id}/balances/raw", params={"as_of": as_of})
+    assert sorted(historical.json(), key=key) == sorted(old_balances.json(), key=key)
@@ -0,0 +1,34 @@
+import pytest
+
+from benchmarks.load_test import LatencyRecorder, compare_to_baseline, parse_mix, percentile
+
+
+def test_percentile_interpolates():
+    """Test percentile calculation on a known distribution."""
+    samples = [float(i) for i in range(1, 101)]
+    assert percentile(samples, 50) == pytest.approx(50.5)
+    assert percentile(samples, 99) == pytest.approx(99.01)
+    assert percentile([], 95) == 0.0
+
+
+def test_parse_mix_rejects_unknown_operation():
+    """Test that the mix parser only accepts known operations."""
+    assert parse_mix("expense=3,balances_raw=1") == {"expense": 3, "balances_raw": 1}
+    with pytest.raises(ValueError):
+        parse_mix("delete_everything=1")
+
+
+def test_compare_to_baseline_flags_regressions():
+    """Test regression gating against a stored baseline."""
+    recorder = LatencyRecorder()
+    for _ in range(10):
+        recorder.record("warm", "GET /balances/raw", 0.010, True)
+    recorder.elapsed["warm"] = 1.0
+    summary = recorder.summary()
+
+    baseline = {"warm": {"GET /balances/raw": {"p95_ms": 5.0, "p99_ms": 20.0, "rps": 10.0}}}
+    regressions = compare_to_baseline(summary, baseline, max_regression=0.2)
+    assert len(regressions) == 1
+    assert "p95_ms" in regressions[0]
+
+    assert compare_to_baseline(summary, summary, max_regression=0.0) == []
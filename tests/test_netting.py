@@ -0,0 +1,70 @@
+import pytest
+from httpx import AsyncClient
+
+
+async def _group_with(client: AsyncClient, name: str, user_ids: list[str]) -> str:
+    resp = await client.post("/api/v1/groups", json={"name": name})
+    group_id = resp.json()["id"]
+    for user_id in user_ids:
+        await client.post(f"/api/v1/groups/{group_id}/members", json={"user_id": user_id})
+    return group_id
+
+
+async def _owe(client: AsyncClient, group_id: str, debtor_id: str, creditor_id: str, amount: str) -> None:
+    resp = await client.post(f"/api/v1/groups/{group_id}/expenses", json={
+        "paid_by_user_id": creditor_id,
+        "amount": amount,
+        "description": "Shared",
+        "split_type": "EXACT",
+        "splits": [{"user_id": debtor_id, "amount": amount}]
+    })
+    assert resp.status_code == 201
+
+
+@pytest.mark.asyncio
+async def test_cross_group_netting(client: AsyncClient, test_users):
+    """Test opposite debts in two groups net out, and settling records the offsets in each group."""
+    alice, bob, carol = (str(user.id) for user in test_users)
+    trip = await _group_with(client, "Trip", [alice, bob, carol])
+    flat = await _group_with(client, "Flat", [alice, bob])
+    await _owe(client, trip, bob, alice, "30.00")
+    await _owe(client, flat, alice, bob, "20.00")
+    await _owe(client, trip, carol, alice, "5.00")
+
+    resp = await client.get(f"/api/v1/users/{alice}/netting", params={"counterparty_id": bob})
+    assert resp.status_code == 200
+    [entry] = resp.json()
+    assert (entry["owes"], entry["owed"]) == ("20.00", "30.00")
+    assert {(o["group_id"], o["payer_id"], o["payee_id"], o["amount"]) for o in entry["offsets"]} == {
+        (flat, alice, bob, "20.00"),
+        (trip, bob, alice, "20.00"),
+    }
+    assert (entry["net_payer_id"], entry["net_payee_id"], entry["net_amount"]) == (bob, alice, "10.00")
+
+    # Without a counterparty, every person the user shares a group with
+    resp = await client.get(f"/api/v1/users/{alice}/netting")
+    assert {(e["counterparty_id"], e["net_amount"], len(e["offsets"])) for e in resp.json()} == {
+        (bob, "10.00", 2), (carol, "5.00", 0)
+    }
+
+    resp = await client.post(f"/api/v1/users/{alice}/netting/{bob}/settle")
+    assert resp.status_code == 200
+    assert len(resp.json()["settlements"]) == 2
+
+    resp = await client.get(f"/api/v1/groups/{flat}/balances/raw")
+    assert resp.json() == []
+    resp = await client.get(f"/api/v1/groups/{trip}/balances/raw")
+    assert {(b["debtor_id"], b["creditor_id"], b["amount"]) for b in resp.json()} == {
+        (bob, alice, "10.00"), (carol, alice, "5.00")
+    }
+
+    # Nothing left to offset
+    resp = await client.post(f"/api/v1/users/{alice}/netting/{bob}/settle")
+    assert resp.json()["settlements"] == []
+
+
+@pytest.mark.asyncio
+async def test_netting_validation(client: AsyncClient, test_user):
+    """Test netting with yourself is rejected."""
+    resp = await client.post(f"/api/v1/users/{test_user.id}/netting/{test_user.id}/settle")
+    assert resp.status_code == 400
@@ -0,0 +1,96 @@
+import random
+import pytest
+from decimal import Decimal
+from unittest.mock import AsyncMock
+from uuid import UUID, uuid4
+
+from app.services.ledger_cache import _REPAIR_PLAN_SCRIPT, plan_key, repair_cached_plan
+from app.utils.balance_simplification import REPAIR_SLACK, repair_plan, simplify_balances
+from app.utils.serialization import dumps, loads
+
+
+def test_repaired_plans_on_random_trickles():
+    """Property test: repaired plans settle every net and stay within the bound of a full recompute."""
+    rnd = random.Random(11)
+    extra = []
+    for _ in range(300):
+        users = [UUID(int=rnd.getrandbits(128)) for _ in range(rnd.randint(2, 15))]
+        nets = {user_id: Decimal("0") for user_id in users}
+        for _ in range(rnd.randint(0, 10)):
+            debtor, creditor = rnd.sample(users, 2)
+            amount = Decimal(rnd.randint(1, 10000)) / 100
+            nets[debtor] -= amount
+            nets[creditor] += amount
+        plan = simplify_balances(nets)
+
+        # A trickle of expenses: a payer and up to four participants
+        for _ in range(10):
+            payer, *participants = rnd.sample(users, min(rnd.randint(2, 5), len(users)))
+            changes: dict = {}
+            for user_id in participants:
+                amount = Decimal(rnd.randint(1, 5000)) / 100
+                changes[user_id] = changes.get(user_id, Decimal("0")) - amount
+                changes[payer] = changes.get(payer, Decimal("0")) + amount
+            for user_id, change in changes.items():
+                nets[user_id] += change
+            plan = repair_plan(plan, changes)
+
+            settled: dict = {}
+            for t in plan:
+                assert t["amount"] > 0
+                settled[t["payer_id"]] = settled.get(t["payer_id"], Decimal("0")) - t["amount"]
+                settled[t["payee_id"]] = settled.get(t["payee_id"], Decimal("0")) + t["amount"]
+            assert all(settled.get(str(user_id), Decimal("0")) == amount for user_id, amount in nets.items())
+
+            # Nobody both pays and receives, and at most REPAIR_SLACK over
+            # simplify_balances' worst case of one less than the members
+            payers = {t["payer_id"] for t in plan}
+            payees = {t["payee_id"] for t in plan}
+            assert not payers & payees
+            members = len(payers | payees)
+            assert len(plan) <= members - 1 + max(1, int(members * REPAIR_SLACK))
+            extra.append(len(plan) - len(simplify_balances(nets)))
+    # Close to a full recompute on average
+    assert sum(extra) / len(extra) < Decimal("0.5")
+
+
+def test_repair_keeps_untouched_transfers():
+    """Test a change between two members leaves everyone else's transfers as they were."""
+    alice, bob, carol, dave = (str(uuid4()) for _ in range(4))
+    plan = [
+        {"payer_id": alice, "payee_id": bob, "amount": "10.00"},
+        {"payer_id": carol, "payee_id": dave, "amount": "5.00"},
+    ]
+    # Alice now owes 4 less and Bob is owed 4 less
+    repaired = repair_plan(plan, {UUID(alice): Decimal("4.00"), UUID(bob): Decimal("-4.00")})
+    assert repaired == [
+        {"payer_id": alice, "payee_id": bob, "amount": Decimal("6.00")},
+        {"payer_id": carol, "payee_id": dave, "amount": "5.00"},
+    ]
+    # Bob and Carol swap sides: both lose their transfers, and the four are matched again
+    repaired = repair_plan(plan, {UUID(bob): Decimal("-15.00"), UUID(carol): Decimal("15.00")})
+    assert {(t["payer_id"], t["payee_id"], Decimal(t["amount"])) for t in repaired} == {
+        (alice, carol, Decimal("10.00")), (bob, dave, Decimal("5.00"))
+    }
+
+
+@pytest.mark.asyncio
+async def test_cached_plan_is_repaired_only_from_the_previous_version():
+    """Test the cached plan moves forward one version at a time, and is dropped otherwise."""
+    group_id, debtor_id, creditor_id = uuid4(), uuid4(), uuid4()
+    plan = [{"payer_id": str(debtor_id), "payee_id": str(creditor_id), "amount": "10.00"}]
+    redis_client = AsyncMock()
+    redis_client.hgetall = AsyncMock(return_value={b"version": b"4", b"transfers": dumps(plan)})
+    redis_client.eval = AsyncMock(return_value=1)
+    changes = {debtor_id: Decimal("-2.50"), creditor_id: Decimal("2.50")}
+
+    assert await repair_cached_plan(redis_client, group_id, 5, changes)
+    script, _, key, version, transfers = redis_client.eval.call_args.args
+    assert (script, key, version) == (_REPAIR_PLAN_SCRIPT, plan_key(group_id), 5)
+    assert loads(transfers) == [{"payer_id": str(debtor_id), "payee_id": str(creditor_id), "amount": "12.50"}]
+
+    redis_client.eval.reset_mock()
+    assert not await repair_cached_plan(redis_client, group_id, 7, changes)
+    assert not await repair_cached_plan(redis_client, group_id, 5, None)
+    redis_client.eval.assert_not_called()
+    assert redis_client.delete.await_count == 2
@@ -0,0 +1,97 @@
+import pytest
+from unittest.mock import AsyncMock
+from uuid import UUID
+from httpx import AsyncClient
+
+from app.jobs.recompute_balances import compute_balances, load_ledgers, write_results
+from app.services.ledger_cache import BALANCE_VIEW_TTL_SECONDS, _STORE_VIEWS_SCRIPT, load_user_position
+from app.utils.balance_simplification import user_position
+
+
+@pytest.mark.asyncio
+async def test_recompute_matches_endpoint_cache(client: AsyncClient, db_session, mock_redis, test_users):
+    """Test the batch job caches exactly the bytes the balances endpoints would."""
+    group_resp = await client.post("/api/v1/groups", json={"name": "Batch"})
+    group_id = group_resp.json()["id"]
+    user_ids = []
+    for user in test_users:
+        await client.post(f"/api/v1/groups/{group_id}/members", json={"user_id": str(user.id)})
+        user_ids.append(str(user.id))
+    await client.post(f"/api/v1/groups/{group_id}/expenses", json={
+        "paid_by_user_id": user_ids[0],
+        "amount": "90.00",
+        "description": "Dinner",
+        "split_type": "EQUAL",
+        "splits": []
+    })
+    await client.post(f"/api/v1/groups/{group_id}/settlements", json={
+        "payer_id": user_ids[1], "payee_id": user_ids[0], "amount": "10.00"
+    })
+
+    ledgers, versions, failed = await load_ledgers(db_session, [UUID(group_id)])
+    assert failed == 0
+    [(result_group_id, raw, simplified, ranks)] = compute_balances(ledgers)
+    assert result_group_id == group_id
+    assert raw == (await client.get(f"/api/v1/groups/{group_id}/balances/raw")).content
+    assert simplified == (await client.get(f"/api/v1/groups/{group_id}/balances/simplified")).content
+
+    # One compare-and-set per group against the version of the last write
+    # that dropped its views; the plan is stored with the simplified view
+    pipe = mock_redis.pipeline.return_value
+    pipe.execute = AsyncMock(return_value=[0])
+    results = [(group_id, raw, simplified, ranks)]
+    assert await write_results(mock_redis, results, versions) == 0
+    pipe.execute.return_value = [1]
+    assert await write_results(mock_redis, results, versions) == 1
+    script, key_count, *keys_and_args = pipe.eval.call_args.args
+    assert script == _STORE_VIEWS_SCRIPT
+    assert keys_and_args[:key_count] == [
+        f"balances:{group_id}:views_version",
+        f"balances:{group_id}:raw",
+        f"balances:{group_id}:simplified",
+        f"balances:{group_id}:plan",
+        f"balances:{group_id}:plan:debtors",
+        f"balances:{group_id}:plan:creditors",
+    ]
+    debtors, creditors = ranks
+    assert keys_and_args[key_count:key_count + 6] == [
+        versions[group_id], BALANCE_VIEW_TTL_SECONDS, raw, simplified, len(debtors), len(creditors)
+    ]
+    assert keys_and_args[key_count + 6:] == [value for side in ranks for rank in side for value in rank]
+
+
+@pytest.mark.asyncio
+async def test_recompute_stores_plan_ranks(client: AsyncClient, db_session, fake_redis, test_users):
+    """Test a group the job warms answers one user's transfers from the cached ranks."""
+    group_resp = await client.post("/api/v1/groups", json={"name": "Warm"})
+    group_id = group_resp.json()["id"]
+    user_ids = []
+    for user in test_users:
+        await client.post(f"/api/v1/groups/{group_id}/members", json={"user_id": str(user.id)})
+        user_ids.append(str(user.id))
+    await client.post(f"/api/v1/groups/{group_id}/expenses", json={
+        "paid_by_user_id": user_ids[0],
+        "amount": "90.00",
+        "description": "Dinner",
+        "split_type": "EQUAL",
+        "splits": []
+    })
+    await client.post(f"/api/v1/groups/{group_id}/expenses", json={
+        "paid_by_user_id": user_ids[1],
+        "amount": "30.00",
+        "description": "Taxi",
+        "split_type": "EQUAL",
+        "splits": []
+    })
+
+    ledgers, versions, _ = await load_ledgers(db_session, [UUID(group_id)])
+    version = versions[group_id]
+    assert await write_results(fake_redis, compute_balances(ledgers), versions) == 1
+
+    # The plan is marked as ranked at its own version, so the bisect path serves it
+    plan = await fake_redis.hgetall(f"balances:{group_id}:plan")
+    assert plan[b"ranked"] == plan[b"version"] == str(version).encode()
+    [(_, states, rates)] = ledgers
+    for user_id in user_ids:
+        assert await load_user_position(fake_redis, UUID(group_id), version, UUID(user_id)) == \
+            user_position(states, rates, UUID(user_id))
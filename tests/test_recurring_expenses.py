@@ -0,0 +1,186 @@
+import pytest
+from datetime import datetime, timedelta
+from uuid import UUID
+from httpx import AsyncClient
+from sqlalchemy import select
+
+from app.models.expense import Expense
+from app.services.ledger_cache import _APPLY_SCRIPT
+from app.services.recurring_expense_service import MaterializeResult, RecurringExpenseService, publish_materialized
+from app.utils.recurrence import RecurrenceInterval, add_months, occurrence_at
+
+
+@pytest.mark.asyncio
+async def test_recurring_expense_catch_up(client: AsyncClient, test_users, db_session, mock_redis):
+    """Test due occurrences are materialized in one batch, with one ledger bump and invalidation per group."""
+    group_resp = await client.post("/api/v1/groups", json={"name": "Test Group"})
+    group_id = group_resp.json()["id"]
+    user_ids = []
+    for user in test_users:
+        await client.post(f"/api/v1/groups/{group_id}/members", json={"user_id": str(user.id)})
+        user_ids.append(str(user.id))
+    url = f"/api/v1/groups/{group_id}/recurring-expenses"
+    
+    # Monthly rent since the 31st two months ago: three occurrences are due
+    now = datetime(2024, 3, 31, 12, 0)
+    resp = await client.post(url, json={
+        "paid_by_user_id": user_ids[0],
+        "amount": "90.00",
+        "description": "Rent",
+        "split_type": "EQUAL",
+        "interval": "MONTHLY",
+        "starts_at": "2024-01-31T09:00:00Z"
+    })
+    assert resp.status_code == 201
+    assert resp.json()["next_run_at"] == "2024-01-31T09:00:00"
+    
+    # Splits are validated up front
+    resp = await client.post(url, json={
+        "paid_by_user_id": user_ids[0],
+        "amount": "90.00",
+        "description": "Bad",
+        "split_type": "EXACT",
+        "splits": [{"user_id": user_ids[1], "amount": "10.00"}],
+        "interval": "WEEKLY",
+        "starts_at": "2024-01-01T00:00:00"
+    })
+    assert resp.status_code == 400
+    
+    result = await RecurringExpenseService(db_session).materialize_due(now, limit=10, max_catch_up=10)
+    await db_session.commit()
+    assert result.templates == 1
+    materialized = result.groups[next(iter(result.groups))]
+    assert materialized.expenses == 3
+    assert materialized.backdated is True
+    # One version bump for the whole batch, one change log entry per expense
+    assert materialized.change.version == 1
+    assert sum(materialized.change.debts.values()) == 180
+    
+    mock_redis.eval.reset_mock()
+    mock_redis.incr.reset_mock()
+    await publish_materialized(db_session, mock_redis, result.groups)
+    assert len([call for call in mock_redis.eval.call_args_list if call.args[0] == _APPLY_SCRIPT]) == 1
+    assert mock_redis.publish.await_count >= 1
+    
+    expenses = (await client.get(f"/api/v1/groups/{group_id}/changes", params={"since": 3})).json()["changes"]
+    assert [change["kind"] for change in expenses] == ["expense_created"] * 3
+    # Clamped to short months, then back to the 31st
+    assert [change["data"]["created_at"] for change in expenses] == [
+        "2024-01-31T09:00:00", "2024-02-29T09:00:00", "2024-03-31T09:00:00"
+    ]
+    
+    resp = await client.get(f"/api/v1/groups/{group_id}/balances/raw")
+    assert {(b["debtor_id"], b["amount"]) for b in resp.json()} == {(user_ids[1], "90.00"), (user_ids[2], "90.00")}
+    
+    resp = await client.get(url)
+    assert resp.json()[0]["occurrences"] == 3
+    assert resp.json()[0]["next_run_at"] == "2024-04-30T09:00:00"
+    
+    # Nothing more is due; deleting keeps the created expenses
+    result = await RecurringExpenseService(db_session).materialize_due(now, limit=10, max_catch_up=10)
+    assert result.templates == 0
+    resp = await client.delete(f"{url}/{resp.json()[0]['id']}")
+    assert resp.status_code == 204
+    assert (await client.get(url)).json() == []
+    assert len((await client.get(f"/api/v1/groups/{group_id}/balances/raw")).json()) == 2
+
+
+def test_occurrences_roll_over_month_ends_and_leap_days():
+    """Test month-end and leap-day series clamp to short months without drifting."""
+    month_end = datetime(2024, 1, 31, 9, 0)
+    assert [occurrence_at(month_end, RecurrenceInterval.MONTHLY, 1, n) for n in range(5)] == [
+        datetime(2024, 1, 31, 9, 0),
+        datetime(2024, 2, 29, 9, 0),
+        datetime(2024, 3, 31, 9, 0),
+        datetime(2024, 4, 30, 9, 0),
+        datetime(2024, 5, 31, 9, 0),
+    ]
+    # Every two months across the year end, 2025 not being a leap year
+    assert occurrence_at(month_end, RecurrenceInterval.MONTHLY, 2, 6) == datetime(2025, 1, 31, 9, 0)
+    assert add_months(datetime(2024, 12, 30), 2) == datetime(2025, 2, 28)
+    
+    # Yearly on a leap day falls back to the 28th, then returns to the 29th
+    leap_day = datetime(2024, 2, 29)
+    assert [occurrence_at(leap_day, RecurrenceInterval.MONTHLY, 12, n) for n in range(5)] == [
+        datetime(2024, 2, 29), datetime(2025, 2, 28), datetime(2026, 2, 28),
+        datetime(2027, 2, 28), datetime(2028, 2, 29),
+    ]
+    
+    # Day-based intervals step through the leap day like any other
+    assert occurrence_at(datetime(2024, 2, 28), RecurrenceInterval.DAILY, 1, 1) == datetime(2024, 2, 29)
+    assert occurrence_at(datetime(2024, 2, 22), RecurrenceInterval.WEEKLY, 1, 1) == datetime(2024, 2, 29)
+    assert occurrence_at(leap_day, RecurrenceInterval.WEEKLY, 2, 3) == leap_day + timedelta(weeks=6)
+
+
+async def _weekly_template(client: AsyncClient, test_users, starts_at: datetime) -> tuple[str, str]:
+    group_resp = await client.post("/api/v1/groups", json={"name": "Test Group"})
+    group_id = group_resp.json()["id"]
+    for user in test_users:
+        await client.post(f"/api/v1/groups/{group_id}/members", json={"user_id": str(user.id)})
+    resp = await client.post(f"/api/v1/groups/{group_id}/recurring-expenses", json={
+        "paid_by_user_id": str(test_users[0].id),
+        "amount": "30.00",
+        "description": "Cleaner",
+        "split_type": "EQUAL",
+        "interval": "WEEKLY",
+        "starts_at": starts_at.isoformat()
+    })
+    assert resp.status_code == 201
+    return group_id, f"/api/v1/groups/{group_id}/recurring-expenses"
+
+
+async def _expense_dates(db_session, group_id: str) -> list[datetime]:
+    result = await db_session.execute(
+        select(Expense.created_at).where(Expense.group_id == UUID(group_id)).order_by(Expense.created_at)
+    )
+    return list(result.scalars().all())
+
+
+@pytest.mark.asyncio
+async def test_catch_up_of_many_missed_periods(client: AsyncClient, test_users, db_session):
+    """Test a long outage is caught up max_catch_up occurrences per run, each at its own date."""
+    now = datetime(2024, 3, 1, 12, 0)
+    starts_at = now - timedelta(weeks=5)
+    group_id, url = await _weekly_template(client, test_users, starts_at)
+    
+    # Six weekly occurrences are due (weeks 0 to 5); each run takes at most two
+    service = RecurringExpenseService(db_session)
+    batches = []
+    while (result := await service.materialize_due(now, limit=10, max_catch_up=2)).templates:
+        await db_session.commit()
+        batches.append(result.groups[UUID(group_id)].expenses)
+    assert batches == [2, 2, 2]
+    
+    assert await _expense_dates(db_session, group_id) == [starts_at + timedelta(weeks=n) for n in range(6)]
+    template = (await client.get(url)).json()[0]
+    assert template["occurrences"] == 6
+    assert template["next_run_at"] == (starts_at + timedelta(weeks=6)).isoformat()
+    
+    changes = (await client.get(f"/api/v1/groups/{group_id}/changes", params={"since": 3})).json()["changes"]
+    assert [change["kind"] for change in changes] == ["expense_created"] * 6
+
+
+@pytest.mark.asyncio
+async def test_rerun_does_not_materialize_twice(client: AsyncClient, test_users, db_session):
+    """Test rerunning at the same time creates nothing, and a later run only the new occurrence."""
+    now = datetime(2024, 3, 1, 12, 0)
+    starts_at = now - timedelta(weeks=1)
+    group_id, url = await _weekly_template(client, test_users, starts_at)
+    
+    service = RecurringExpenseService(db_session)
+    result = await service.materialize_due(now, limit=10, max_catch_up=10)
+    await db_session.commit()
+    assert result.groups[UUID(group_id)].expenses == 2
+    
+    # Same instant, and just before the next occurrence: nothing is due
+    for rerun_at in (now, starts_at + timedelta(weeks=2) - timedelta(seconds=1)):
+        result = await service.materialize_due(rerun_at, limit=10, max_catch_up=10)
+        await db_session.commit()
+        assert result == MaterializeResult(0, {})
+    assert len(await _expense_dates(db_session, group_id)) == 2
+    
+    result = await service.materialize_due(now + timedelta(weeks=1), limit=10, max_catch_up=10)
+    await db_session.commit()
+    assert result.groups[UUID(group_id)].expenses == 1
+    assert await _expense_dates(db_session, group_id) == [starts_at + timedelta(weeks=n) for n in range(3)]
+    assert (await client.get(url)).json()[0]["occurrences"] == 3
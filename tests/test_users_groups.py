@@ -1,6 +1,13 @@
+import re
 import pytest
+from decimal import Decimal
 from httpx import AsyncClient
 from uuid import uuid4
+from sqlalchemy import delete
+
+from app.models import FxRate, Group, GroupMember, GroupSummary
+from app.services.fx_rates import fx_rate_cache
+from tests.test_dashboard import count_queries
 
 
 @pytest.mark.asyncio
@@ -55,6 +62,166 @@ async def test_get_group_with_members(client: AsyncClient, test_user):
     assert resp.status_code == 200
     data = resp.json()
     assert data["name"] == "Test Group"
+    assert data["member_count"] == 1
     assert len(data["members"]) == 1
     assert data["members"][0]["user_id"] == str(test_user.id)
+    assert data["members"][0]["user"]["email"] == test_user.email
+    assert data["members_next_cursor"] is None
+
+
+
+@pytest.mark.asyncio
+async def test_list_user_groups_pages_in_join_order(client: AsyncClient, test_users):
+    """Test a user's groups are listed one keyset page at a time, in the order they joined."""
+    user_id = str(test_users[0].id)
+    group_ids = []
+    for name in ("Flat", "Trip", "Office"):
+        group_resp = await client.post("/api/v1/groups", json={"name": name})
+        group_ids.append(group_resp.json()["id"])
+        await client.post(f"/api/v1/groups/{group_ids[-1]}/members", json={"user_id": user_id})
+    # Someone else's group
+    other_resp = await client.post("/api/v1/groups", json={"name": "Other"})
+    await client.post(f"/api/v1/groups/{other_resp.json()['id']}/members", json={"user_id": str(test_users[1].id)})
+    
+    resp = await client.get(f"/api/v1/users/{user_id}/groups", params={"limit": 2})
+    assert resp.status_code == 200
+    first = resp.json()
+    assert [item["id"] for item in first["items"]] == group_ids[:2]
+    assert first["items"][0]["member_count"] == 1
+    assert first["next_cursor"]
+    
+    resp = await client.get(f"/api/v1/users/{user_id}/groups", params={"limit": 2, "cursor": first["next_cursor"]})
+    second = resp.json()
+    assert [item["id"] for item in second["items"]] == group_ids[2:]
+    assert second["next_cursor"] is None
+    
+    resp = await client.get(f"/api/v1/users/{user_id}/groups", params={"cursor": "garbage"})
+    assert resp.status_code == 400
+    resp = await client.get(f"/api/v1/users/{uuid4()}/groups")
+    assert resp.status_code == 404
 
+
+@pytest.mark.asyncio
+async def test_group_summary_follows_expense_writes(client: AsyncClient, test_users, db_session):
+    """Test counts and spend follow expense writes, and listing never reads the ledger tables."""
+    db_session.add_all([FxRate(currency="USD", rate=Decimal("1")), FxRate(currency="EUR", rate=Decimal("1.1"))])
+    await db_session.commit()
+    fx_rate_cache.clear()
+    
+    user_ids = [str(user.id) for user in test_users]
+    group_resp = await client.post("/api/v1/groups", json={"name": "Trip"})
+    group_id = group_resp.json()["id"]
+    for user_id in user_ids:
+        await client.post(f"/api/v1/groups/{group_id}/members", json={"user_id": user_id})
+    expense_ids = []
+    for amount, currency in (("30.00", "USD"), ("10.00", "EUR")):
+        resp = await client.post(f"/api/v1/groups/{group_id}/expenses", json={
+            "paid_by_user_id": user_ids[0],
+            "amount": amount,
+            "currency": currency,
+            "description": "Dinner",
+            "split_type": "EQUAL",
+            "splits": []
+        })
+        expense_ids.append(resp.json()["id"])
+    
+    async def summary() -> dict:
+        resp = await client.get(f"/api/v1/users/{user_ids[1]}/groups")
+        (item,) = resp.json()["items"]
+        return item
+    
+    with count_queries() as statements:
+        item = await summary()
+    assert not any(re.search(r"\b(expenses|expense_splits)\b", statement) for statement in statements)
+    assert (item["member_count"], item["expense_count"], item["total_spend"]) == (3, 2, "41.00")
+    assert item["last_activity_at"] is not None
+    created_version = item["version"]
+    
+    await client.patch(
+        f"/api/v1/groups/{group_id}/expenses/{expense_ids[0]}", json={"version": 1, "amount": "60.00"}
+    )
+    item = await summary()
+    assert (item["expense_count"], item["total_spend"]) == (2, "71.00")
+    assert item["version"] > created_version
+    
+    await client.delete(f"/api/v1/groups/{group_id}/expenses/{expense_ids[1]}", params={"version": 1})
+    item = await summary()
+    assert (item["expense_count"], item["total_spend"]) == (1, "60.00")
+    fx_rate_cache.clear()
+
+
+@pytest.mark.asyncio
+async def test_group_without_summary_row(client: AsyncClient, test_users, db_session):
+    """Test a group with no summary row is computed on reads and gets its row on the next write."""
+    db_session.add_all([FxRate(currency="USD", rate=Decimal("1")), FxRate(currency="EUR", rate=Decimal("1.1"))])
+    group = Group(id=uuid4(), name="Legacy")
+    db_session.add(group)
+    await db_session.flush()
+    db_session.add_all([GroupMember(group_id=group.id, user_id=user.id) for user in test_users[:2]])
+    await db_session.commit()
+    fx_rate_cache.clear()
+    user_id = str(test_users[0].id)
+    
+    resp = await client.get(f"/api/v1/groups/{group.id}")
+    assert resp.status_code == 200
+    assert resp.json()["member_count"] == 2
+    
+    resp = await client.post(f"/api/v1/groups/{group.id}/expenses", json={
+        "paid_by_user_id": user_id,
+        "amount": "10.00",
+        "currency": "EUR",
+        "description": "Museum",
+        "split_type": "EQUAL",
+        "splits": []
+    })
+    assert resp.status_code == 201
+    summary = await db_session.get(GroupSummary, group.id, populate_existing=True)
+    assert (summary.member_count, summary.expense_count, summary.spend) == (2, 1, {"EUR": "10.00"})
+    
+    # A missing rate leaves that group's converted total out, not the page
+    await db_session.execute(delete(FxRate).where(FxRate.currency == "EUR"))
+    await db_session.commit()
+    fx_rate_cache.clear()
+    resp = await client.get(f"/api/v1/users/{user_id}/groups")
+    assert resp.status_code == 200
+    (item,) = resp.json()["items"]
+    assert (item["expense_count"], item["total_spend"]) == (1, None)
+    fx_rate_cache.clear()
+
+
+@pytest.mark.asyncio
+async def test_group_members_are_paged(client: AsyncClient, monkeypatch):
+    """Test group responses carry the count and first page, and the roster is read by keyset pages."""
+    monkeypatch.setattr("app.services.group_service.MEMBER_PAGE_SIZE", 2)
+    group_resp = await client.post("/api/v1/groups", json={"name": "Club"})
+    assert (group_resp.json()["member_count"], group_resp.json()["members"]) == (0, [])
+    group_id = group_resp.json()["id"]
+    user_ids = []
+    for i in range(5):
+        user_resp = await client.post("/api/v1/users", json={"name": f"Member {i}", "email": f"member{i}@example.com"})
+        user_ids.append(user_resp.json()["id"])
+        resp = await client.post(f"/api/v1/groups/{group_id}/members", json={"user_id": user_ids[-1]})
+    
+    # Adding the fifth member returns the count and the first page only
+    data = resp.json()
+    assert data["member_count"] == 5
+    assert [member["user_id"] for member in data["members"]] == user_ids[:2]
+    assert data["members_next_cursor"]
+    
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        resp = await client.get(f"/api/v1/groups/{group_id}/members", params=params)
+        assert resp.status_code == 200
+        page = resp.json()
+        seen += [member["user_id"] for member in page["items"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == user_ids
+    
+    resp = await client.get(f"/api/v1/groups/{group_id}/members", params={"cursor": "garbage"})
+    assert resp.status_code == 400
+    resp = await client.get(f"/api/v1/groups/{uuid4()}/members")
+    assert resp.status_code == 404